@@ -1,10 +1,37 @@
+"""
+Populate the base ontology with the enriched tours and attractions.
+
+Tour durations are normalized to hasMinDurationMinutes / hasMaxDurationMinutes
+on the Duration individual, and prices to hasPriceCurrency / hasPriceAmount on
+the tour. `--bulk` commits the triples of each batch of records in one pass,
+`--workers N` builds them in N processes, and `--format nt|ttl` streams them
+to a file instead of saving RDF/XML.
+
+`--incremental` keeps the ABox in a persistent quadstore next to a manifest
+of record hashes, and only adds, updates or retracts the individuals whose
+records changed; their IRIs are derived from the tour URL or the TripAdvisor
+`city|category|name` id instead of the list position. With `--rules` the SWRL
+rule conclusions in the store are maintained from the same changes (DRed)
+instead of re-reasoning; once enabled, pass it on every incremental run.
+
+    python scripts/abox_population.py --bulk --intern-hours
+    python scripts/abox_population.py --incremental --rules
+"""
+
+import argparse
+import hashlib
 import json
+import os
 import re
 import ssl
+from concurrent.futures import ProcessPoolExecutor
 from datetime import time as TimeType
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from urllib.parse import urlsplit
 from owlready2 import *
+from owlready2.base import owl_named_individual, rdf_type, to_literal
 from datetime import datetime   
 
 import urllib.request
@@ -15,12 +42,465 @@ ONTOLOGY_PATH = BASE_DIR / "ontologies" / "base_structure" / "german_city_touris
 TOURS_JSON_PATH = BASE_DIR / "data" / "post_llm_processing" / "all_cities_tours.json"
 ATTRACTIONS_JSON_PATH = BASE_DIR / "data" / "post_llm_processing" /"trip_advisor_data_enriched_final.json"
 OUTPUT_PATH = BASE_DIR / "ontologies" / "populated" / "german_city_tourism_populated.owl"
+RULES_OUTPUT_PATH = BASE_DIR / "ontologies" / "populated" / "german_city_tourism_with_rules.owl"
+# Incremental mode: persistent quadstore and the record hashes it was built from
+STORE_PATH = BASE_DIR / "ontologies" / "populated" / "abox_store.sqlite3"
+MANIFEST_PATH = BASE_DIR / "ontologies" / "populated" / "abox_manifest.json"
+# Base IRI of the TBox, under which a persisted store keeps it
+ONTOLOGY_IRI = "http://www.semanticweb.org/german_tourism_activities#"
+
+BUDGET_TIERS = ['free', 'low', 'medium', 'high']
+LOCATION_SETTINGS = ['indoor', 'outdoor']
+DAYS_OF_WEEK = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+CITIES = ['Berlin', 'Cologne', 'Munich', 'Hamburg', 'Frankfurt', 'Stuttgart', 'Dusseldorf', 'Dortmund', 'Essen', 'Leipzig']
+
+# Properties declared functional in the TBox: assigning one replaces the previous value
+FUNCTIONAL_PROPERTIES = {
+    'hasBudget', 'hasLocationSetting', 'isInCity', 'hasMeetingPoint', 'hasDuration',
+    'opensAt', 'closesAt', 'hasURL', 'hasImageURL', 'hasMeetingPointDescription', 'hasMapLink',
+    'hasMinDurationMinutes', 'hasMaxDurationMinutes', 'hasPriceAmount', 'hasPriceCurrency',
+}
+
+RDF_TYPE = 'rdf:type'
+NAMED_INDIVIDUAL = 'owl:NamedIndividual'
+
+# Number of records whose triples are committed to the quadstore together in bulk mode
+BULK_BATCH_SIZE = 500
+
+# (subject, predicate, object, is_literal). Subjects, predicates and non-literal
+# objects are local names in the ontology namespace.
+Triple = Tuple[str, str, object, bool]
+
+# IRI suffix of a record: its list position, or a stable id in incremental mode
+RecordId = Union[int, str]
+
+# Individuals shared between records; they are garbage collected, not owned
+SHARED_PREFIXES = ('lang_', 'hours_')
+
+
+_NON_IRI_CHARS = re.compile(r'[^\w\s-]')
+_IRI_SEPARATORS = re.compile(r'[\s-]+')
+# Format: 10:00 AM - 5:00 PM
+_HOURS_PATTERN = re.compile(r'(\d{1,2}:\d{2}\s*[AP]M)\s*-\s*(\d{1,2}:\d{2}\s*[AP]M)')
+
+# Durations: "2 hours", "2 hours 30 minutes", "1 - 1.5 hours", "30 minutes - 1 hour", "Valid 1 - 2 days"
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)\s*([a-z]*)')
+_DURATION_RANGE = re.compile(r'\s*(?:-|–|\bto\b)\s*')
+DURATION_UNITS = {'min': 1, 'hour': 60, 'hr': 60, 'h': 60, 'day': 24 * 60}
+# Prices: "€25", "€1,299.50", "€1.299,50", "25 EUR"
+_PRICE_PATTERN = re.compile(r'([€$£]|[A-Z]{3})?\s*(\d[\d.,]*)\s*([€$£]|[A-Z]{3})?')
+CURRENCY_SYMBOLS = {'€': 'EUR', '$': 'USD', '£': 'GBP'}
+
+# Distinct operating-hours strings are few (a few hundred for ~2k venues), so
+# parse results are memoized rather than recomputed for every day of every venue
+HOURS_CACHE_SIZE = 4096
+
+
+def sanitize_name_for_iri(name: str) -> str:
+    """Convert name to valid IRI component."""
+    # Remove special characters and replace spaces with underscores
+    sanitized = _NON_IRI_CHARS.sub('', name)
+    sanitized = _IRI_SEPARATORS.sub('_', sanitized)
+    return sanitized.lower()
+
+
+@lru_cache(maxsize=HOURS_CACHE_SIZE)
+def parse_time(time_str: str) -> Optional[TimeType]:
+    try: 
+        if 'AM' in time_str or 'PM' in time_str:
+            time_str = time_str.strip()
+            if '-' in time_str:
+                time_str = time_str.split('-')[0].strip()
+
+            parsed = datetime.strptime(time_str, '%I:%M %p')
+            return parsed.time()
+        else:
+            parts = time_str.split(':')
+            hour = int(parts[0])
+            minute = int(parts[1])
+            return TimeType(hour, minute)
+    except Exception as e:
+        print(f"Warning: Could not parse time '{time_str}': {e}")
+        return None
+
+
+@lru_cache(maxsize=HOURS_CACHE_SIZE)
+def parse_operating_hours(hours_str: str) -> Optional[Tuple[TimeType, TimeType]]:
+    """Parse '10:00 AM - 5:00 PM' into (open, close), or None if it does not match.
+
+    Memoized: a string that fails to parse only warns the first time.
+    """
+    match = _HOURS_PATTERN.search(hours_str)
+    if not match:
+        return None
+
+    open_time = parse_time(match.group(1))
+    close_time = parse_time(match.group(2))
+    if not open_time or not close_time:
+        return None
+    return open_time, close_time
+
+
+def _duration_unit(word: str) -> Optional[int]:
+    word = word.rstrip('s')
+    for prefix, minutes in DURATION_UNITS.items():
+        if word.startswith(prefix):
+            return minutes
+    return None
+
+
+def _duration_minutes(text: str, default_unit: Optional[int] = None) -> Optional[float]:
+    """Sum of the amounts in one side of a duration ('2 hours 30 minutes' is 150), or None.
+
+    Only a lone number may leave out its unit, which is then default_unit.
+    """
+    parts = _DURATION_PART.findall(text)
+    if not parts:
+        return None
+    total = 0.0
+    for number, word in parts:
+        unit = _duration_unit(word) if word else (default_unit if len(parts) == 1 else None)
+        if unit is None:
+            return None
+        total += float(number) * unit
+    return total
+
+
+@lru_cache(maxsize=HOURS_CACHE_SIZE)
+def parse_duration(duration_str: str) -> Optional[Tuple[int, int]]:
+    """Parse a duration into (min, max) minutes, or None if it does not read as one.
+
+    Amounts on the same side of a range separator ('-', 'to') add up, so
+    '1 day 2 hours' is (1560, 1560). A bare number before the separator takes
+    the unit of the first amount after it, so '1 - 2 days' is (1440, 2880).
+    """
+    sides = _DURATION_RANGE.split(duration_str.lower())
+    if len(sides) > 2:
+        return None
+    high = _duration_minutes(sides[-1])
+    if high is None:
+        return None
+    low = high
+    if len(sides) == 2:
+        following = _DURATION_PART.search(sides[1])
+        low = _duration_minutes(sides[0], _duration_unit(following.group(2)))
+        if low is None:
+            return None
+    low, high = round(low), round(high)
+    return min(low, high), max(low, high)
+
+
+def parse_amount(amount_str: str) -> Optional[float]:
+    """Parse '1,299.50', '1.299,50', '12,50' or '1.299' into a number, or None if the grouping is off.
+
+    The last separator is the decimal one unless it is the only one and three
+    digits follow, in which case it (like any repeated separator) groups thousands.
+    """
+    amount_str = amount_str.rstrip('.,')
+    last = max(amount_str.rfind('.'), amount_str.rfind(','))
+    if last < 0:
+        return float(amount_str)
+    mark, integer, fraction = amount_str[last], amount_str[:last], amount_str[last + 1:]
+    if amount_str.count(mark) > 1 or (len(fraction) == 3 and not re.search(r'[.,]', integer)):
+        integer, fraction = amount_str, ''
+    groups = re.split(r'[.,]', integer)
+    if len(groups) > 1 and (len(groups[0]) > 3 or any(len(group) != 3 for group in groups[1:])):
+        return None
+    return float(''.join(groups) + (f'.{fraction}' if fraction else ''))
+
+
+@lru_cache(maxsize=HOURS_CACHE_SIZE)
+def parse_price(price_str: str) -> Optional[Tuple[str, float]]:
+    """Parse a price into (ISO currency code, amount), or None without a currency or a readable amount."""
+    match = _PRICE_PATTERN.search(price_str)
+    if not match:
+        return None
+    currency = match.group(1) or match.group(3)
+    amount = parse_amount(match.group(2))
+    if not currency or amount is None:
+        return None
+    return CURRENCY_SYMBOLS.get(currency, currency), amount
+
+
+def _declare(iri_name: str, class_name: str) -> List[Triple]:
+    return [
+        (iri_name, RDF_TYPE, NAMED_INDIVIDUAL, False),
+        (iri_name, RDF_TYPE, class_name, False),
+    ]
+
+
+def operating_hours_iri(day: str, open_time: TimeType, close_time: TimeType) -> str:
+    # Zero-padded, so every distinct (day, opens, closes) gets its own IRI (unpadded, 19:00-02:30 and 19:00-23:00
+    # both became hours_friday_190_230)
+    return (f"hours_{day.lower()}_{open_time.hour:02d}{open_time.minute:02d}"
+            f"_{close_time.hour:02d}{close_time.minute:02d}")
+
+
+@lru_cache(maxsize=HOURS_CACHE_SIZE)
+def _operating_hours_entry(day: str, hours_str: str) -> Tuple[Optional[str], Tuple[Triple, ...]]:
+    parsed = parse_operating_hours(hours_str)
+    if not parsed:
+        print(f"Could not parse operating hours: {hours_str}")
+        return None, ()
+    open_time, close_time = parsed
+
+    iri_name = operating_hours_iri(day, open_time, close_time)
+    triples = _declare(iri_name, 'OperatingHours')
+    triples.append((iri_name, 'appliesToDay', f'day_{day.lower()}', False))
+    triples.append((iri_name, 'opensAt', f"{open_time.hour:02d}:{open_time.minute:02d}", True))
+    triples.append((iri_name, 'closesAt', f"{close_time.hour:02d}:{close_time.minute:02d}", True))
+    return iri_name, tuple(triples)
+
+
+def operating_hours_triples(day: str, hours_str: str) -> Tuple[Optional[str], List[Triple]]:
+    """Triples for one day of operating hours, mirroring OntologyPopulator._create_operating_hours."""
+    if not hours_str:
+        return None, []
+    iri_name, triples = _operating_hours_entry(day, hours_str)
+    return iri_name, list(triples)
+
+
+def tour_triples(idx: RecordId, tour_data: Dict) -> List[Triple]:
+    """All triples for one tour record, in the order populate_tours asserts them."""
+    title = tour_data.get('title', f'tour_{idx}')
+    iri_name = f"tour_{sanitize_name_for_iri(title)}_{idx}"
+    triples = _declare(iri_name, 'Tour')
+
+    if 'city' in tour_data and tour_data['city']:
+        city_key = tour_data['city'].lower()
+        if city_key in (city.lower() for city in CITIES):
+            triples.append((iri_name, 'isInCity', f'city_{city_key}', False))
+
+    if 'budget_tier' in tour_data and tour_data['budget_tier']:
+        budget_key = tour_data['budget_tier'].lower()
+        if budget_key in BUDGET_TIERS:
+            triples.append((iri_name, 'hasBudget', f'budget_{budget_key}', False))
+
+    if 'location_setting' in tour_data and tour_data['location_setting']:
+        setting_key = tour_data['location_setting'].lower()
+        if setting_key in LOCATION_SETTINGS:
+            triples.append((iri_name, 'hasLocationSetting', f'location_{setting_key}', False))
+
+    # The meeting point is only created alongside a duration, as in populate_tours
+    if 'duration' in tour_data and tour_data['duration']:
+        duration_iri = f"duration_{sanitize_name_for_iri(tour_data['duration'])}_{idx}"
+        triples += _declare(duration_iri, 'Duration')
+        triples.append((iri_name, 'hasDuration', duration_iri, False))
+        minutes = parse_duration(tour_data['duration'])
+        if minutes:
+            triples.append((duration_iri, 'hasMinDurationMinutes', minutes[0], True))
+            triples.append((duration_iri, 'hasMaxDurationMinutes', minutes[1], True))
+
+        meeting_point_iri = f"meeting_point_{idx}"
+        triples += _declare(meeting_point_iri, 'MeetingPoint')
+        triples.append((iri_name, 'hasMeetingPoint', meeting_point_iri, False))
+        if 'meeting_point' in tour_data and tour_data['meeting_point']:
+            triples.append((meeting_point_iri, 'hasMeetingPointDescription', tour_data['meeting_point'], True))
+        if 'meeting_point_maps_link' in tour_data and tour_data['meeting_point_maps_link']:
+            triples.append((meeting_point_iri, 'hasMapLink', tour_data['meeting_point_maps_link'], True))
+
+    if 'languages' in tour_data and tour_data['languages']:
+        lang_iris = []
+        for lang_name in (lang.strip() for lang in tour_data['languages'].split(',')):
+            if lang_name:
+                lang_iri = f'lang_{lang_name.lower().replace(" ", "_")}'
+                triples += _declare(lang_iri, 'Language')
+                lang_iris.append(lang_iri)
+        triples += [(iri_name, 'hasLanguage', lang_iri, False) for lang_iri in lang_iris]
+
+    if 'link' in tour_data and tour_data['link']:
+        triples.append((iri_name, 'hasURL', tour_data['link'], True))
+
+    price = parse_price(tour_data['price']) if tour_data.get('price') else None
+    if price:
+        triples.append((iri_name, 'hasPriceCurrency', price[0], True))
+        triples.append((iri_name, 'hasPriceAmount', price[1], True))
+
+    return triples
+
+
+# attraction_type keyword -> (venue class, venue type class, venue type property)
+VENUE_CLASS_RULES = [
+    (('museum',), 'Museum', 'MuseumType', 'hasMuseumType'),
+    (('park', 'garden'), 'Park', 'ParkType', 'hasParkType'),
+    (('nightlife', 'bar', 'club'), 'NightlifeVenue', 'ClubType', 'hasClubType'),
+]
+DEFAULT_VENUE_CLASS = ('Sight', 'SightType', 'hasSightType')
+
+
+def venue_classes_for(attr_type: str) -> Tuple[str, str, str]:
+    attr_type = attr_type.lower()
+    for keywords, venue_class, type_class, type_property in VENUE_CLASS_RULES:
+        if any(keyword in attr_type for keyword in keywords):
+            return venue_class, type_class, type_property
+    return DEFAULT_VENUE_CLASS
+
+
+def attraction_triples(idx: RecordId, attr_data: Dict) -> List[Triple]:
+    """All triples for one attraction record, in the order populate_attractions asserts them."""
+    venue_class, type_class, type_property = venue_classes_for(attr_data.get('attraction_type', ''))
+
+    name = attr_data.get('name', f'attraction_{idx}')
+    iri_name = f"venue_{sanitize_name_for_iri(name)}_{idx}"
+    triples = _declare(iri_name, venue_class)
+
+    if 'city' in attr_data and attr_data['city']:
+        city = attr_data['city'].lower()
+        if city in (known.lower() for known in CITIES):
+            triples.append((iri_name, 'isInCity', f'city_{city}', False))
+
+    if 'budget_tier' in attr_data and attr_data['budget_tier']:
+        budget_key = attr_data['budget_tier'].lower()
+        if budget_key in BUDGET_TIERS:
+            triples.append((iri_name, 'hasBudget', f'budget_{budget_key}', False))
+
+    if 'location_setting' in attr_data and attr_data['location_setting']:
+        setting_key = attr_data['location_setting'].lower()
+        if setting_key in LOCATION_SETTINGS:
+            triples.append((iri_name, 'hasLocationSetting', f'location_{setting_key}', False))
+
+    operating_hours = attr_data.get('operating_hours')
+    if operating_hours and isinstance(operating_hours, dict):
+        hours_iris = []
+        for day, hours_str in operating_hours.items():
+            if hours_str and day in DAYS_OF_WEEK:
+                hours_iri, hours_triples = operating_hours_triples(day, hours_str)
+                if hours_iri:
+                    triples += hours_triples
+                    hours_iris.append(hours_iri)
+        triples += [(iri_name, 'hasOperatingHours', hours_iri, False) for hours_iri in hours_iris]
+
+    if 'spec_type' in attr_data and attr_data['spec_type']:
+        type_iri = f"type_{sanitize_name_for_iri(attr_data['spec_type'])}_{idx}"
+        triples += _declare(type_iri, type_class)
+        triples.append((iri_name, type_property, type_iri, False))
+
+    if 'image_url' in attr_data and attr_data['image_url']:
+        triples.append((iri_name, 'hasImageURL', attr_data['image_url'], True))
+
+    return triples
+
+
+# Record kind -> (record-to-triples function, field used in error messages)
+TRIPLE_BUILDERS: Dict[str, Tuple[Callable[[RecordId, Dict], List[Triple]], str]] = {
+    'tour': (tour_triples, 'title'),
+    'attraction': (attraction_triples, 'name'),
+}
+
+
+def record_triples(kind: str, start_idx: int, records: List[Dict]) -> List[Triple]:
+    """Triples for a shard of records numbered from start_idx.
+
+    Pure function of its arguments, so shards can be transformed in worker
+    processes and still get the same IRIs as a serial run.
+    """
+    triples_for, name_field = TRIPLE_BUILDERS[kind]
+    triples: List[Triple] = []
+    for idx, record in enumerate(records, start_idx):
+        try:
+            triples += triples_for(idx, record)
+        except Exception as e:
+            print(f"  Error creating {kind} {idx} ({record.get(name_field, 'unknown')}): {e}")
+    return triples
+
+
+def _record_triples_shard(shard: Tuple[str, int, List[Dict]]) -> List[Triple]:
+    return record_triples(*shard)
+
+
+def iter_shard_triples(records: List[Dict], kind: str, batch_size: int = BULK_BATCH_SIZE,
+                       workers: int = 1) -> Iterator[List[Triple]]:
+    """Yield the triples of each shard of `batch_size` records, in input order.
+
+    With workers > 1 the shards are transformed in a process pool; executor.map
+    yields results in submission order, so the merge is deterministic.
+    """
+    shards = [(kind, start + 1, records[start:start + batch_size])
+              for start in range(0, len(records), batch_size)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(_record_triples_shard, shards)
+    else:
+        for shard in shards:
+            yield _record_triples_shard(shard)
+
+
+def record_key(kind: str, record: Dict) -> str:
+    """Identity of a source record that survives reordering and edits.
+
+    Tours are keyed by their GetYourGuide URL without query string (the
+    ranking_uuid changes between scrapes), attractions by the same
+    city|category|name id the TripAdvisor scraper uses.
+    """
+    if kind == 'tour':
+        link = record.get('link') or ''
+        if link and link != 'N/A':
+            parts = urlsplit(link)
+            return f"{parts.netloc}{parts.path}".rstrip('/')
+        return f"{record.get('city')}|{record.get('title')}"
+    return f"{record.get('city')}|{record.get('attraction_type')}|{record.get('name')}"
+
+
+def stable_suffix(key: str) -> str:
+    """Numeric IRI suffix derived from a record key.
+
+    Digits only, so consumers that strip a trailing `_<index>` from IRIs
+    (e.g. formatActivityName in the web app) keep working.
+    """
+    return str(int(hashlib.sha1(key.encode('utf-8')).hexdigest()[:12], 16))
+
+
+def content_hash(record: Dict) -> str:
+    return hashlib.sha256(json.dumps(record, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def owned_subjects(triples: List[Triple]) -> List[str]:
+    """Subjects created for a single record, in first-seen order."""
+    return list(dict.fromkeys(s for s, _, _, _ in triples if not s.startswith(SHARED_PREFIXES)))
+
+
+def load_manifest(path: Path) -> Dict[str, Dict[str, Dict]]:
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_manifest(manifest: Dict[str, Dict[str, Dict]], path: Path):
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def collapse_triples(triples: Iterable[Triple]) -> List[Triple]:
+    """Apply Owlready2 assignment semantics to a triple batch.
+
+    Functional properties keep only the last value asserted for a subject,
+    every other triple is kept once, at its first position.
+    """
+    collapsed: Dict[tuple, Triple] = {}
+    for triple in triples:
+        subject, predicate, obj, is_literal = triple
+        if predicate in FUNCTIONAL_PROPERTIES:
+            key = (subject, predicate)
+            collapsed.pop(key, None)
+        else:
+            key = (subject, predicate, obj)
+        collapsed[key] = triple
+    return list(collapsed.values())
 
 class OntologyPopulator:
 
-    def __init__(self, ontology_path: Path):
+    def __init__(self, ontology_path: Path, world: Optional[World] = None, intern_hours: bool = False):
 
-        self.onto = get_ontology(f"file://{ontology_path}").load()
+        self.world = world or default_world
+        if ONTOLOGY_IRI in self.world.ontologies:
+            # A store saved by an earlier run already holds the TBox under its own IRI; the file:// IRI
+            # would only resolve to an empty alias
+            self.onto = self.world.get_ontology(ONTOLOGY_IRI).load()
+        else:
+            self.onto = self.world.get_ontology(f"file://{ontology_path}").load()
 
         # Avoid creating new individuals for existing ones
         self.cities: Dict[str, Thing] = {}
@@ -29,26 +509,35 @@ class OntologyPopulator:
         self.days_of_week: Dict[str, Thing] = {}
         self.languages: Dict[str, Thing] = {}
         self.venue_types: Dict[str, Thing] = {}
+        # Local name -> quadstore storid, for bulk inserts
+        self._storids: Dict[str, int] = {}
+
+        # With intern_hours, an OperatingHours individual is asserted once and
+        # then reused, instead of being re-created for every venue that has it
+        self.intern_hours = intern_hours
+        self.operating_hours: Dict[str, Thing] = {}
+        self._committed_hours: Set[str] = set()
+
+        # (added, removed) object triples as storids, recorded after track_changes()
+        self.changes: Optional[Tuple[Set[Tuple[int, int, int]], Set[Tuple[int, int, int]]]] = None
 
         self._initialize_shared_individuals()
 
     def _initialize_shared_individuals(self):
 
-        for tier in ['free', 'low', 'medium', 'high']:
+        for tier in BUDGET_TIERS:
             individual = self.onto.BudgetTier(f"budget_{tier}")
             self.budget_tiers[tier] = individual
 
-        for setting in ['indoor', 'outdoor']:
+        for setting in LOCATION_SETTINGS:
             individual = self.onto.LocationSetting(f'location_{setting}')
             self.location_settings[setting] = individual
 
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        for day in days:
+        for day in DAYS_OF_WEEK:
             individual = self.onto.DayOfWeek(f'day_{day.lower()}')
             self.days_of_week[day] = individual
 
-        cities = ['Berlin', 'Cologne', 'Munich', 'Hamburg', 'Frankfurt', 'Stuttgart', 'Dusseldorf', 'Dortmund', 'Essen', 'Leipzig']
-        for city in cities:
+        for city in CITIES:
             individual = self.onto.City(f'city_{city.lower()}')
             # Store with lowercase key to match lookup logic
             self.cities[city.lower()] = individual
@@ -62,60 +551,231 @@ class OntologyPopulator:
 
     def _sanitize_name_for_iri(self, name: str) -> str:
         """Convert name to valid IRI component."""
-        # Remove special characters and replace spaces with underscores
-        sanitized = re.sub(r'[^\w\s-]', '', name)
-        sanitized = re.sub(r'[\s-]+', '_', sanitized)
-        return sanitized.lower()
+        return sanitize_name_for_iri(name)
     
     def _parse_time(self, time_str: str) -> Optional[TimeType]:
-        try: 
-            if 'AM' in time_str or 'PM' in time_str:
-                time_str = time_str.strip()
-                if '-' in time_str:
-                    time_str = time_str.split('-')[0].strip()
-
-                parsed = datetime.strptime(time_str, '%I:%M %p')
-                return parsed.time()
-            else:
-                parts = time_str.split(':')
-                hour = int(parts[0])
-                minute = int(parts[1])
-                return TimeType(hour, minute)
-        except Exception as e:
-            print(f"Warning: Could not parse time '{time_str}': {e}")
-            return None
+        return parse_time(time_str)
 
     def _create_operating_hours(self, day: str, hours_str: str) -> Optional[Thing]:
         if not hours_str:
             return None
 
         # Format: 10:00 AM - 5:00 PM
-        match = re.search(r'(\d{1,2}:\d{2}\s*[AP]M)\s*-\s*(\d{1,2}:\d{2}\s*[AP]M)', hours_str)
-        if not match:
+        parsed = parse_operating_hours(hours_str)
+        if not parsed:
             print(f"Could not parse operating hours: {hours_str}")
             return None
+        open_time, close_time = parsed
         
-        open_time_str = match.group(1)
-        close_time_str = match.group(2)
-        
-        open_time = self._parse_time(open_time_str)
-        close_time = self._parse_time(close_time_str)
-        
-        if not open_time or not close_time:
-            print(f"Could not parse operating hours: {hours_str}")
-            return None
-        
-        iri_name = f"hours_{day.lower()}_{open_time.hour}{open_time.minute}_{close_time.hour}{close_time.minute}"
+        iri_name = operating_hours_iri(day, open_time, close_time)
+        if self.intern_hours and iri_name in self.operating_hours:
+            return self.operating_hours[iri_name]
+
         hours_individual = self.onto.OperatingHours(iri_name)
         hours_individual.appliesToDay = [self.days_of_week[day]]
         # Store times as strings (HH:MM format) since xsd:time is not supported by OWL reasoners
         hours_individual.opensAt = f"{open_time.hour:02d}:{open_time.minute:02d}"
         hours_individual.closesAt = f"{close_time.hour:02d}:{close_time.minute:02d}"
+        self.operating_hours[iri_name] = hours_individual
         return hours_individual
 
-    def populate_tours(self, tours_data: List[Dict]):
+    def _resolve(self, name: str) -> int:
+        """Storid of a local name (or of rdf:type / owl:NamedIndividual)."""
+        if name == RDF_TYPE:
+            return rdf_type
+        if name == NAMED_INDIVIDUAL:
+            return owl_named_individual
+        storid = self._storids.get(name)
+        if storid is None:
+            storid = self._storids[name] = self.world._abbreviate(self.onto.base_iri + name)
+        return storid
+
+    def track_changes(self):
+        """Record the object triples add_triples and retract_subjects actually add and delete,
+        so rule conclusions can be maintained from them."""
+        self.changes = (set(), set())
+
+    def _record_changes(self, added: Iterable[Tuple[int, int, int]], removed: Iterable[Tuple[int, int, int]]):
+        if self.changes is None:
+            return
+        added_so_far, removed_so_far = self.changes
+        for triple in removed:
+            if triple in added_so_far:
+                added_so_far.discard(triple)
+            else:
+                removed_so_far.add(triple)
+        for triple in added:
+            if triple in removed_so_far:
+                removed_so_far.discard(triple)
+            else:
+                added_so_far.add(triple)
+
+    def _skip_interned_hours(self, triples: Iterable[Triple]) -> List[Triple]:
+        """Keep the statements about an OperatingHours individual only the first time it is seen."""
+        kept: List[Triple] = []
+        seen: Set[tuple] = set()
+        new_hours: Set[str] = set()
+        for triple in triples:
+            subject, predicate, _, _ = triple
+            if subject.startswith('hours_'):
+                if subject in self._committed_hours:
+                    continue
+                key = (subject, predicate) if predicate in FUNCTIONAL_PROPERTIES else triple
+                if key in seen:
+                    continue
+                seen.add(key)
+                new_hours.add(subject)
+            kept.append(triple)
+        self._committed_hours |= new_hours
+        return kept
+
+    def add_triples(self, triples: Iterable[Triple]):
+        """Commit a batch of triples to the quadstore in one pass.
+
+        Bypasses the per-attribute Owlready2 setters but keeps their semantics:
+        functional properties replace any stored value, other triples are only
+        inserted if not already present.
+        """
+        if self.intern_hours:
+            triples = self._skip_interned_hours(triples)
+
+        graph = self.onto.graph
+        c = graph.c
+        obj_rows, data_rows = [], []
+        functional_obj_keys, functional_data_keys = [], []
+
+        for subject, predicate, obj, is_literal in collapse_triples(triples):
+            s = self._resolve(subject)
+            p = self._resolve(predicate)
+            functional = predicate in FUNCTIONAL_PROPERTIES
+            if is_literal:
+                o, d = to_literal(obj)
+                data_rows.append((c, s, p, o, d))
+                if functional:
+                    functional_data_keys.append((c, s, p))
+            else:
+                obj_rows.append((c, s, p, self._resolve(obj)))
+                if functional:
+                    functional_obj_keys.append((c, s, p))
+
+        db = graph.db
+        replaced = []
+        if self.changes is not None:
+            replaced = [row for key in functional_obj_keys
+                        for row in db.execute("SELECT s, p, o FROM objs WHERE c=? AND s=? AND p=?", key)]
+        db.executemany("DELETE FROM objs WHERE c=? AND s=? AND p=?", functional_obj_keys)
+        db.executemany("DELETE FROM datas WHERE c=? AND s=? AND p=?", functional_data_keys)
+        if self.changes is not None:
+            # A replaced value that is written again cancels out
+            self._record_changes([(s, p, o) for _, s, p, o in obj_rows
+                                  if db.execute("SELECT 1 FROM objs WHERE c=? AND s=? AND p=? AND o=?",
+                                                (c, s, p, o)).fetchone() is None], replaced)
+        db.executemany(
+            "INSERT INTO objs SELECT ?1, ?2, ?3, ?4 "
+            "WHERE NOT EXISTS (SELECT 1 FROM objs WHERE c=?1 AND s=?2 AND p=?3 AND o=?4)",
+            obj_rows,
+        )
+        db.executemany(
+            "INSERT INTO datas SELECT ?1, ?2, ?3, ?4, ?5 "
+            "WHERE NOT EXISTS (SELECT 1 FROM datas WHERE c=?1 AND s=?2 AND p=?3 AND o=?4 AND d=?5)",
+            data_rows,
+        )
+
+    def retract_subjects(self, names: Iterable[str]):
+        """Delete every triple about, or pointing to, the given individuals.
+
+        Shared individuals (languages, operating hours) that are no longer
+        referenced afterwards are deleted too, as a full rebuild would not
+        create them.
+        """
+        graph = self.onto.graph
+        db = graph.db
+        c = graph.c
+        keys = [(c, self._resolve(name)) for name in names]
+        if not keys:
+            return
+
+        base_iri = self.onto.base_iri
+        shared = set()
+        for key in keys:
+            for (o,) in db.execute("SELECT o FROM objs WHERE c=? AND s=?", key):
+                iri = self.world._unabbreviate(o) if o > 0 else ''
+                if iri.startswith(base_iri) and iri[len(base_iri):].startswith(SHARED_PREFIXES):
+                    shared.add(o)
+
+        if self.changes is not None:
+            self._record_changes((), [row for key in keys for query in
+                                      ("SELECT s, p, o FROM objs WHERE c=? AND s=?",
+                                       "SELECT s, p, o FROM objs WHERE c=? AND o=?")
+                                      for row in db.execute(query, key)])
+        db.executemany("DELETE FROM objs WHERE c=? AND s=?", keys)
+        db.executemany("DELETE FROM datas WHERE c=? AND s=?", keys)
+        db.executemany("DELETE FROM objs WHERE c=? AND o=?", keys)
+
+        orphans = [(c, o) for o in shared
+                   if db.execute("SELECT 1 FROM objs WHERE c=? AND o=? LIMIT 1", (c, o)).fetchone() is None]
+        if self.changes is not None:
+            self._record_changes((), [row for key in orphans
+                                      for row in db.execute("SELECT s, p, o FROM objs WHERE c=? AND s=?", key)])
+        db.executemany("DELETE FROM objs WHERE c=? AND s=?", orphans)
+        db.executemany("DELETE FROM datas WHERE c=? AND s=?", orphans)
+
+    def sync_records(self, kind: str, records: List[Dict], manifest: Dict[str, Dict]) -> Tuple[int, int, int]:
+        """Apply only the changes between `records` and the manifest of the previous run.
+
+        Individuals get stable IRIs from record_key(), so a record that did not
+        change is not touched. The manifest is updated in place.
+        Returns the number of added, updated and retracted records.
+        """
+        triples_for, name_field = TRIPLE_BUILDERS[kind]
+
+        current: Dict[str, Tuple[Dict, str]] = {}
+        for record in records:
+            base_key = key = record_key(kind, record)
+            occurrence = 1
+            while key in current:
+                occurrence += 1
+                key = f"{base_key}#{occurrence}"
+            current[key] = (record, content_hash(record))
+
+        stale = [key for key, entry in manifest.items()
+                 if key not in current or current[key][1] != entry['hash']]
+        fresh = [key for key, (_, digest) in current.items()
+                 if key not in manifest or manifest[key]['hash'] != digest]
+        updated = sum(1 for key in fresh if key in manifest)
+
+        self.retract_subjects(subject for key in stale for subject in manifest[key]['subjects'])
+        for key in stale:
+            del manifest[key]
+
+        batch: List[Triple] = []
+        for key in fresh:
+            record, digest = current[key]
+            try:
+                triples = triples_for(stable_suffix(key), record)
+            except Exception as e:
+                print(f"  Error creating {kind} {key} ({record.get(name_field, 'unknown')}): {e}")
+                continue
+            batch += triples
+            manifest[key] = {'hash': digest, 'subjects': owned_subjects(triples)}
+        self.add_triples(batch)
+
+        return len(fresh) - updated, updated, len(stale) - updated
+
+    def _populate_bulk(self, records: List[Dict], kind: str, batch_size: int = BULK_BATCH_SIZE, workers: int = 1):
+        """Transform records shard by shard and commit each shard's triples in input order."""
+        for triples in iter_shard_triples(records, kind, batch_size, workers):
+            self.add_triples(triples)
+
+    def populate_tours(self, tours_data: List[Dict], bulk: bool = False, batch_size: int = BULK_BATCH_SIZE,
+                       workers: int = 1):
         """Populate Tour individuals from JSON data."""
         print(f"\nPopulating {len(tours_data)} tours...")
+
+        if bulk or workers > 1:
+            self._populate_bulk(tours_data, 'tour', batch_size, workers)
+            print(f"Created tours")
+            return
         
         for idx, tour_data in enumerate(tours_data, 1):
             try:
@@ -149,6 +809,9 @@ class OntologyPopulator:
                     duration_iri = f"duration_{self._sanitize_name_for_iri(tour_data['duration'])}_{idx}"
                     duration = self.onto.Duration(duration_iri)
                     tour.hasDuration = duration  
+                    minutes = parse_duration(tour_data['duration'])
+                    if minutes:
+                        duration.hasMinDurationMinutes, duration.hasMaxDurationMinutes = minutes
                 
                 # Set meeting point
                     meeting_point_iri = f"meeting_point_{idx}"
@@ -178,14 +841,25 @@ class OntologyPopulator:
                 if 'link' in tour_data and tour_data['link']:
                     tour.hasURL = tour_data['link']  
                 
+                # Set normalized price
+                price = parse_price(tour_data['price']) if tour_data.get('price') else None
+                if price:
+                    tour.hasPriceCurrency, tour.hasPriceAmount = price
+
             except Exception as e:
                 error_msg = f"Error creating tour {idx} ({tour_data.get('title', 'unknown')}): {e}"
                 print(f"  {error_msg}")
         
         print(f"Created tours")
 
-    def populate_attractions(self, attractions_data: List[Dict]):
+    def populate_attractions(self, attractions_data: List[Dict], bulk: bool = False, batch_size: int = BULK_BATCH_SIZE,
+                             workers: int = 1):
             print(f"\nPopulating {len(attractions_data)} attractions...")
+
+            if bulk or workers > 1:
+                self._populate_bulk(attractions_data, 'attraction', batch_size, workers)
+                print(f"Created attractions")
+                return
             
             for idx, attr_data in enumerate(attractions_data, 1):
                 try:
@@ -277,21 +951,135 @@ class OntologyPopulator:
         print('Ontology saved')
 
     
+def parse_args():
+    parser = argparse.ArgumentParser(description="Populate the ABox from the enriched JSON data.")
+    parser.add_argument('--bulk', action='store_true',
+                        help="Collect triples per batch of records and commit them to the quadstore in one pass")
+    parser.add_argument('--batch-size', type=int, default=BULK_BATCH_SIZE,
+                        help="Records per quadstore commit in bulk mode")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Transform records in this many processes (implies --bulk); 0 uses all cores")
+    parser.add_argument('--intern-hours', action='store_true',
+                        help="Assert each OperatingHours individual once and reuse it, instead of "
+                             "re-creating it for every venue with the same hours")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only add, update or retract the records that changed since the last incremental run")
+    parser.add_argument('--store', type=Path, default=STORE_PATH,
+                        help="Persistent quadstore used by --incremental")
+    parser.add_argument('--manifest', type=Path, default=MANIFEST_PATH,
+                        help="Record hashes of the last --incremental run")
+    parser.add_argument('--rules', action='store_true',
+                        help="With --incremental, keep the SWRL rule conclusions in the store up to date "
+                             "and save the ontology with them to --rules-output")
+    parser.add_argument('--rules-output', type=Path, default=RULES_OUTPUT_PATH,
+                        help=f"Defaults to {RULES_OUTPUT_PATH.relative_to(BASE_DIR)}")
+    parser.add_argument('--format', choices=['rdfxml', 'nt', 'ttl'], default='rdfxml',
+                        help="nt/ttl stream the triples to the output file while populating, "
+                             "instead of building the whole graph and saving it as RDF/XML")
+    parser.add_argument('--gzip', action='store_true', help="Gzip-compress nt/ttl output")
+    parser.add_argument('--output', type=Path, default=None,
+                        help=f"Defaults to {OUTPUT_PATH.relative_to(BASE_DIR)}, with a .nt/.ttl(.gz) suffix when streaming")
+    args = parser.parse_args()
+
+    if args.output is None:
+        args.output = OUTPUT_PATH
+        if args.format != 'rdfxml':
+            args.output = OUTPUT_PATH.with_suffix(f".{args.format}" + ('.gz' if args.gzip else ''))
+    if args.rules and not args.incremental:
+        parser.error("--rules maintains the conclusions of an --incremental store")
+    if args.format != 'rdfxml' and args.incremental:
+        parser.error("--incremental keeps the graph in its quadstore; use the default rdfxml format")
+    return args
+
+
+def run_streaming(output_path: Path, tours_data: List[Dict], attractions_data: List[Dict],
+                  batch_size: int = BULK_BATCH_SIZE, workers: int = 1) -> int:
+    """Write N-Triples/Turtle record batch by record batch, without materializing the ABox.
+
+    Returns the number of triples written.
+    """
+    from rdf_streaming import TripleStreamWriter
+
+    # Only holds the TBox and the shared individuals
+    populator = OntologyPopulator(ONTOLOGY_PATH, world=World())
+    with TripleStreamWriter(output_path, populator.onto.base_iri) as writer:
+        writer.write_ontology(populator.onto)
+        for kind, records in (('tour', tours_data), ('attraction', attractions_data)):
+            print(f"\nStreaming {len(records)} {kind}s...")
+            for triples in iter_shard_triples(records, kind, batch_size, workers):
+                writer.write_triples(collapse_triples(triples))
+    print(f"Wrote {writer.count} triples to {output_path}")
+    return writer.count
+
+
+def run_incremental(args, tours_data: List[Dict], attractions_data: List[Dict]):
+    # The store and the manifest only make sense together
+    if not (args.store.exists() and args.manifest.exists()):
+        for path in (args.store, args.manifest):
+            if path.exists():
+                path.unlink()
+
+    manifest = load_manifest(args.manifest)
+    world = World(filename=str(args.store))
+    populator = OntologyPopulator(ONTOLOGY_PATH, world=world, intern_hours=args.intern_hours)
+
+    engine = None
+    if args.rules:
+        from rule_materialization import INFERENCES_IRI, store_rule_engine, write_facts
+
+        engine = store_rule_engine(world, populator.onto)
+        populator.track_changes()
+
+    changed = False
+    for kind, records in (('tour', tours_data), ('attraction', attractions_data)):
+        added, updated, retracted = populator.sync_records(kind, records, manifest.setdefault(kind, {}))
+        print(f"{kind}s: {added} added, {updated} updated, {retracted} retracted")
+        changed = changed or bool(added or updated or retracted)
+
+    if engine is not None:
+        concluded, withdrawn = engine.maintain(*populator.changes)
+        write_facts(world, world.get_ontology(INFERENCES_IRI), concluded, withdrawn)
+        print(f"Rule conclusions: {len(concluded)} added, {len(withdrawn)} withdrawn, {len(engine.derived)} in total")
+
+    world.save()
+    save_manifest(manifest, args.manifest)
+
+    if changed or not args.output.exists():
+        populator.save(args.output)
+    else:
+        print('No changes, ontology left as is')
+
+    if engine is not None and (changed or not args.rules_output.exists()):
+        from rule_materialization import save_with_rules
+
+        save_with_rules(args.output, args.rules_output, engine.iri_facts(engine.derived))
+        print(f"Ontology with SWRL rules saved to: {args.rules_output}")
+
+    # Release the store, so the next run (in this process too) can open it
+    world.close()
+
+
 def main():
+    args = parse_args()
+    workers = args.workers or os.cpu_count() or 1
+
     with open(TOURS_JSON_PATH, 'r', encoding='utf-8') as f:
         tours_data = json.load(f)
     
     with open(ATTRACTIONS_JSON_PATH, 'r', encoding='utf-8') as f:
         attractions_data = json.load(f)
     
-    populator = OntologyPopulator(ONTOLOGY_PATH)
-    populator.populate_tours(tours_data)
-    populator.populate_attractions(attractions_data)
-    populator.save(OUTPUT_PATH)
+    if args.incremental:
+        run_incremental(args, tours_data, attractions_data)
+        return
+    if args.format != 'rdfxml':
+        run_streaming(args.output, tours_data, attractions_data, args.batch_size, workers)
+        return
+
+    populator = OntologyPopulator(ONTOLOGY_PATH, intern_hours=args.intern_hours)
+    populator.populate_tours(tours_data, bulk=args.bulk, batch_size=args.batch_size, workers=workers)
+    populator.populate_attractions(attractions_data, bulk=args.bulk, batch_size=args.batch_size, workers=workers)
+    populator.save(args.output)
 
 if __name__ == '__main__':
     main()
-
-
-                
-            
\ No newline at end of file
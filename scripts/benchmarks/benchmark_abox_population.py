@@ -0,0 +1,195 @@
+"""
+Benchmark the per-attribute, bulk and parallel ABox population modes (also
+with --intern-hours) on the data/post_llm_processing JSON files, and check
+that all produce the same graph.
+
+--incremental checks the persistent store instead: a store built from part of
+the data and then re-run on all of it must hold the same graph as a fresh
+build, and a re-run without changes must change nothing.
+"""
+
+import argparse
+import copy
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from owlready2 import World
+from abox_population import (ATTRACTIONS_JSON_PATH, ONTOLOGY_PATH, TOURS_JSON_PATH,
+                             OntologyPopulator, run_incremental)
+
+
+def load_data():
+    with open(TOURS_JSON_PATH, 'r', encoding='utf-8') as f:
+        tours_data = json.load(f)
+    with open(ATTRACTIONS_JSON_PATH, 'r', encoding='utf-8') as f:
+        attractions_data = json.load(f)
+    return tours_data, attractions_data
+
+
+def canonical_ntriples(populator: OntologyPopulator) -> List[str]:
+    """Sorted N-Triples lines, independent of quadstore insertion order."""
+    return ontology_ntriples(populator.onto)
+
+
+def ontology_ntriples(onto) -> List[str]:
+    buffer = io.BytesIO()
+    onto.save(file=buffer, format="ntriples")
+    return sorted(line for line in buffer.getvalue().decode('utf-8').splitlines() if line.strip())
+
+
+def run(bulk: bool, workers: int, intern_hours: bool, tours_data: List[Dict], attractions_data: List[Dict],
+        output_path: Path) -> Dict:
+    populator = OntologyPopulator(ONTOLOGY_PATH, world=World(), intern_hours=intern_hours)
+
+    start = time.perf_counter()
+    populator.populate_tours(tours_data, bulk=bulk, workers=workers)
+    tours_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    populator.populate_attractions(attractions_data, bulk=bulk, workers=workers)
+    attractions_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    populator.save(output_path)
+    save_time = time.perf_counter() - start
+
+    return {
+        'tours': tours_time,
+        'attractions': attractions_time,
+        'save': save_time,
+        'triples': canonical_ntriples(populator),
+        'rdfxml': output_path.read_bytes(),
+    }
+
+
+def scale_records(records: List[Dict], scale: int, name_field: str) -> List[Dict]:
+    """Replicate the records `scale` times, as if more cities had been scraped."""
+    scaled = list(records)
+    for n in range(1, scale):
+        scaled += [{**record, name_field: f"{record.get(name_field, '')} {n}"} for record in records]
+    return scaled
+
+
+def incremental_pass(tmp_dir: Path, name: str, tours_data: List[Dict], attractions_data: List[Dict]) -> Dict:
+    """One `abox_population.py --incremental` run against the store `name`; returns its time and saved graph."""
+    output_path = tmp_dir / f'{name}.owl'
+    args = SimpleNamespace(store=tmp_dir / f'{name}.sqlite3', manifest=tmp_dir / f'{name}.json', output=output_path,
+                           intern_hours=False, rules=False, rules_output=tmp_dir / f'{name}_with_rules.owl')
+    start = time.perf_counter()
+    run_incremental(args, tours_data, attractions_data)
+    elapsed = time.perf_counter() - start
+    onto = World().get_ontology(f"file://{output_path}").load()
+    return {'time': elapsed, 'triples': ontology_ntriples(onto)}
+
+
+def check_incremental(tours_data: List[Dict], attractions_data: List[Dict]) -> bool:
+    """Build a store from edited data, re-run it on the real data, and compare with a fresh build."""
+    edited_tours = tours_data[:-10]
+    edited_attractions = copy.deepcopy(attractions_data)
+    for attraction in edited_attractions[:10]:
+        attraction['budget_tier'] = 'high' if attraction.get('budget_tier') != 'high' else 'low'
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        print("\nFresh build:")
+        fresh = incremental_pass(tmp_dir, 'fresh', tours_data, attractions_data)
+        print("\nFirst run on edited data:")
+        incremental_pass(tmp_dir, 'store', edited_tours, edited_attractions)
+        print("\nSecond run, on the real data:")
+        second = incremental_pass(tmp_dir, 'store', tours_data, attractions_data)
+        print("\nThird run, without changes:")
+        third = incremental_pass(tmp_dir, 'store', tours_data, attractions_data)
+
+    print(f"\n{'=' * 70}")
+    print(f"Fresh build: {len(fresh['triples'])} triples in {fresh['time']:.2f}s")
+    failed = False
+    for name, result in (('second run', second), ('no-change run', third)):
+        same_graph = result['triples'] == fresh['triples']
+        print(f"{name}: {len(result['triples'])} triples in {result['time']:.2f}s, "
+              f"same graph as the fresh build: {'yes' if same_graph else 'NO'}")
+        if not same_graph:
+            failed = True
+            for line in sorted(set(fresh['triples']) - set(result['triples']))[:10]:
+                print(f"  - {line}")
+            for line in sorted(set(result['triples']) - set(fresh['triples']))[:10]:
+                print(f"  + {line}")
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Processes for the parallel mode")
+    parser.add_argument('--scale', type=int, default=1,
+                        help="Replicate the input records this many times")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Check re-runs of the persistent store against a fresh build instead")
+    args = parser.parse_args()
+
+    tours_data, attractions_data = load_data()
+    tours_data = scale_records(tours_data, args.scale, 'title')
+    attractions_data = scale_records(attractions_data, args.scale, 'name')
+
+    if args.incremental:
+        if not check_incremental(tours_data, attractions_data):
+            sys.exit(1)
+        return
+
+    modes = {
+        'per-attribute': (False, 1, False),
+        'bulk': (True, 1, False),
+        f'parallel x{args.workers}': (True, args.workers, False),
+        'interned': (False, 1, True),
+        'bulk interned': (True, 1, True),
+    }
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for position, (mode, (bulk, workers, intern_hours)) in enumerate(modes.items()):
+            results[mode] = run(bulk, workers, intern_hours, tours_data, attractions_data,
+                                Path(tmp_dir) / f'{position}.owl')
+
+    baseline = results['per-attribute']
+    print(f"\n{'=' * 70}")
+    print(f"ABox population: {len(tours_data)} tours, {len(attractions_data)} attractions")
+    print('=' * 70)
+    print(f"{'step':<15s}" + ''.join(f"{mode:>18s}" for mode in results))
+    for step in ('tours', 'attractions', 'save'):
+        cells = []
+        for result in results.values():
+            speedup = baseline[step] / result[step] if result[step] else float('inf')
+            cells.append(f"{result[step]:9.3f}s ({speedup:4.1f}x)")
+        print(f"{step:<15s}" + ''.join(f"{cell:>18s}" for cell in cells))
+
+    failed = False
+    for mode, result in results.items():
+        if result is baseline:
+            continue
+        same_graph = baseline['triples'] == result['triples']
+        same_bytes = baseline['rdfxml'] == result['rdfxml']
+        print(f"\n{mode}: {len(result['triples'])} triples (per-attribute: {len(baseline['triples'])})")
+        print(f"  Same graph:        {'yes' if same_graph else 'NO'}")
+        print(f"  Same RDF/XML file: {'yes' if same_bytes else 'no (statement order differs)'}")
+        if not same_graph:
+            failed = True
+            missing = set(baseline['triples']) - set(result['triples'])
+            extra = set(result['triples']) - set(baseline['triples'])
+            for line in sorted(missing)[:10]:
+                print(f"  - {line}")
+            for line in sorted(extra)[:10]:
+                print(f"  + {line}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Detail-page throughput and CPU time of the HTTP tier of the GetYourGuide
+scraper against the Playwright tier, on the fixture pages of
+gyg_scraper/fixture_server.py.
+
+Every detail page is fetched by each tier with the same number of worker
+threads, and the extracted fields are compared with the tours the pages were
+generated from. The browser tier needs a Playwright Chromium (--no-browser
+skips it).
+"""
+
+import argparse
+import queue
+import resource
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scrapers' / 'gyg_scraper'))
+
+from fixture_server import DEFAULT_HOST, Fixtures, make_server, normalize
+from http_details import EMPTY_DETAILS, DetailClient, extract_details_html, missing_fields
+
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+
+
+def cpu_seconds() -> float:
+    """CPU time of this process and its finished children (the browser)."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def run_workers(urls: List[str], workers: int, worker) -> Tuple[List[Dict], float, float]:
+    jobs = queue.Queue()
+    for position, url in enumerate(urls):
+        jobs.put((position, url))
+    results = [dict(EMPTY_DETAILS) for _ in urls]
+
+    cpu_start, start = cpu_seconds(), time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(jobs, results)) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start, cpu_seconds() - cpu_start
+
+
+def http_worker(jobs, results):
+    client = DetailClient(USER_AGENT)
+    try:
+        while True:
+            try:
+                position, url = jobs.get_nowait()
+            except queue.Empty:
+                break
+            status, html = client.fetch(url)
+            if status == 200:
+                results[position] = extract_details_html(html)
+    finally:
+        client.close()
+
+
+def browser_worker(jobs, results):
+    from playwright.sync_api import sync_playwright
+    from scraper import extract_details, launch_browser, new_context
+
+    with sync_playwright() as p:
+        browser = launch_browser(p)
+        try:
+            page = new_context(browser, USER_AGENT).new_page()
+            while True:
+                try:
+                    position, url = jobs.get_nowait()
+                except queue.Empty:
+                    break
+                page.goto(url, wait_until="domcontentloaded", timeout=60000)
+                results[position] = extract_details(page)
+        finally:
+            browser.close()
+
+
+def differences(expected: List[Dict], got: List[Dict]) -> int:
+    fields = list(EMPTY_DETAILS)
+    want = normalize({'': [{field: tour.get(field, 'N/A') for field in fields} for tour in expected]})['']
+    have = normalize({'': got})['']
+    return sum(1 for a, b in zip(want, have) if a != b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0])
+    parser.add_argument('--per-city', type=int, default=40, help="Tours per city in the fixtures")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds the fixture server adds to every response")
+    parser.add_argument('--no-browser', action='store_true', help="Only measure the HTTP tier")
+    args = parser.parse_args()
+
+    fixtures = Fixtures.from_file(per_city=args.per_city)
+    server = make_server(fixtures, port=0, latency=args.latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://{DEFAULT_HOST}:{server.server_port}"
+
+    expected, urls = [], []
+    for city, tours in fixtures.tours.items():
+        for position, tour in enumerate(tours):
+            expected.append(tour)
+            urls.append(base_url + fixtures.detail_path(city, position))
+
+    tiers = [('http', http_worker)] + ([] if args.no_browser else [('browser', browser_worker)])
+    print(f"{len(urls)} detail pages, {args.workers} workers\n")
+    print(f"{'tier':<8} {'wall':>8} {'pages/s':>9} {'cpu':>8} {'cpu/page':>9} {'diffs':>6}")
+    try:
+        for name, worker in tiers:
+            results, wall, cpu = run_workers(urls, args.workers, worker)
+            print(f"{name:<8} {wall:7.2f}s {len(urls) / wall:9.1f} {cpu:7.2f}s {cpu / len(urls) * 1000:7.2f}ms "
+                  f"{differences(expected, results):6d}")
+            if name == 'http':
+                escalated = sum(1 for details in results if missing_fields(details))
+                print(f"{'':<8} {escalated} pages would escalate to the browser (missing a required field)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+"""
+Offline benchmark and regression check of the scraper extractors on recorded
+pages.
+
+The pages of an archive recorded with `--record DIR` (gyg_scraper/scraper.py,
+trip_advisor_scraping/trip_advisor_2.py) are served by html_archive.py's
+replay server, and every extractor is run on them with no network:
+
+- http: the http_details.py extractors over the raw HTML (listing cards, and
+  each detail field on its own)
+- browser (--browser): scraper.CARDS_SCRIPT and DETAILS_SCRIPT in Playwright
+- tripadvisor (--tripadvisor): extract_spec_type_by_index,
+  scrape_operating_hours and scrape_attraction_image in SeleniumBase
+
+Each tier reports pages per second and milliseconds per page for every
+extractor, and its results are compared with a golden file (`golden.json` in
+the archive unless --golden is given, written with --update-golden). The exit
+status is 1 when anything differs. Without --archive, an archive is generated
+from the fixture_server.py pages, with the tours they are made from as golden.
+
+    python benchmark_extractors.py                                   # fixture pages, http tier
+    python benchmark_extractors.py --archive recordings/ --update-golden
+    python benchmark_extractors.py --archive recordings/ --browser --tripadvisor
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SCRAPERS_DIR = Path(__file__).resolve().parent.parent / 'scrapers'
+sys.path.insert(0, str(SCRAPERS_DIR))
+sys.path.insert(0, str(SCRAPERS_DIR / 'gyg_scraper'))
+
+from fixture_server import Fixtures
+from html_archive import DEFAULT_HOST, HtmlArchive, make_replay_server, replay_url
+from http_details import EMPTY_DETAILS, FIELD_EXTRACTORS, DetailClient, extract_cards_html, parse_html
+from pacing import Metrics
+
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+# Stand-in origin of the pages generated from the fixtures
+FIXTURE_ORIGIN = 'https://fixtures.invalid'
+MAX_REPORTED_DIFFS = 10
+
+# Results of a tier: kind -> url -> what was extracted from that page
+Results = Dict[str, Dict[str, object]]
+
+
+def fixture_archive(directory: str, per_city: int) -> Results:
+    """Record the fixture listing and detail pages into directory; the golden results."""
+    fixtures = Fixtures.from_file(per_city=per_city)
+    golden: Results = {'gyg-listing': {}, 'gyg-detail': {}}
+    with HtmlArchive(directory) as archive:
+        for city, tours in fixtures.tours.items():
+            listing_url = FIXTURE_ORIGIN + fixtures.city_path(city)
+            archive.record(listing_url, fixtures.listing(city), 'gyg-listing')
+            golden['gyg-listing'][listing_url] = [
+                {'title': tour['title'], 'price': tour.get('price', 'N/A'), 'href': fixtures.detail_path(city, i)}
+                for i, tour in enumerate(tours[:fixtures.page_size])]
+            for position, tour in enumerate(tours):
+                detail_url = FIXTURE_ORIGIN + fixtures.detail_path(city, position)
+                archive.record(detail_url, fixtures.detail(city, position), 'gyg-detail')
+                golden['gyg-detail'][detail_url] = {field: tour.get(field, 'N/A') for field in EMPTY_DETAILS}
+    return golden
+
+
+def run_http(base_url: str, archive: HtmlArchive, metrics: Metrics) -> Results:
+    results: Results = {'gyg-listing': {}, 'gyg-detail': {}}
+    client = DetailClient(USER_AGENT)
+    try:
+        for url in archive.urls('gyg-listing'):
+            with metrics.stage('fetch', 'wait'):
+                _, html = client.fetch(replay_url(base_url, url))
+            with metrics.stage('cards'):
+                results['gyg-listing'][url] = extract_cards_html(html)
+        for url in archive.urls('gyg-detail'):
+            with metrics.stage('fetch', 'wait'):
+                _, html = client.fetch(replay_url(base_url, url))
+            with metrics.stage('parse'):
+                document = parse_html(html)
+            details = dict(EMPTY_DETAILS)
+            for field, extractor in FIELD_EXTRACTORS:
+                with metrics.stage(field):
+                    extractor(document, details)
+            results['gyg-detail'][url] = details
+    finally:
+        client.close()
+    return results
+
+
+def run_browser(base_url: str, archive: HtmlArchive, metrics: Metrics) -> Results:
+    from playwright.sync_api import sync_playwright
+    from scraper import CARDS_SCRIPT, extract_details, launch_browser, new_context
+
+    results: Results = {'gyg-listing': {}, 'gyg-detail': {}}
+    with sync_playwright() as p:
+        browser = launch_browser(p)
+        try:
+            page = new_context(browser, USER_AGENT).new_page()
+            for kind in results:
+                for url in archive.urls(kind):
+                    with metrics.stage('navigate', 'wait'):
+                        page.goto(replay_url(base_url, url), wait_until='domcontentloaded')
+                    if kind == 'gyg-listing':
+                        with metrics.stage('cards'):
+                            results[kind][url] = page.evaluate(CARDS_SCRIPT, 0)
+                    else:
+                        with metrics.stage('details'):
+                            results[kind][url] = extract_details(page)
+        finally:
+            browser.close()
+    return results
+
+
+def run_tripadvisor(base_url: str, archive: HtmlArchive, metrics: Metrics) -> Results:
+    from seleniumbase import SB
+    sys.path.insert(0, str(SCRAPERS_DIR / 'trip_advisor_scraping'))
+    from trip_advisor_2 import (CARD_SELECTOR, extract_spec_type_by_index, scrape_attraction_image,
+                                scrape_operating_hours)
+
+    results: Results = {'ta-listing': {}, 'ta-attraction': {}}
+    with SB(headless=True, block_images=False) as sb:
+        for url in archive.urls('ta-listing'):
+            with metrics.stage('navigate', 'wait'):
+                sb.open(replay_url(base_url, url))
+            spec_types: List[Optional[str]] = []
+            with metrics.stage('spec types'):
+                # Walks the containers the way scrape_unit does, skipping ticket upsells
+                index = 0
+                for _ in sb.find_elements(CARD_SELECTOR):
+                    result = extract_spec_type_by_index(sb, index)
+                    spec_types.append(result['text'])
+                    index = result['used_index'] + 1
+            results['ta-listing'][url] = spec_types
+        for url in archive.urls('ta-attraction'):
+            with metrics.stage('navigate', 'wait'):
+                sb.open(replay_url(base_url, url))
+            with metrics.stage('operating_hours'):
+                hours = scrape_operating_hours(sb)
+            with metrics.stage('image_url'):
+                image_url = scrape_attraction_image(sb)
+            results['ta-attraction'][url] = {'operating_hours': hours, 'image_url': image_url}
+    return results
+
+
+TIERS = {'http': run_http, 'browser': run_browser, 'tripadvisor': run_tripadvisor}
+
+
+def normalize(value):
+    """Whitespace as the browser renders it, which the HTML text model does not preserve exactly."""
+    if isinstance(value, str):
+        return '\n'.join(' '.join(line.split()) for line in value.split('\n'))
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [normalize(item) for item in value]
+    return value
+
+
+def differences(golden: Results, results: Results) -> List[str]:
+    """One line per page whose extraction differs from the golden file, or that either side lacks.
+
+    Kinds of page the golden file has no results for are not checked.
+    """
+    diffs = []
+    for kind, pages in results.items():
+        if kind not in golden:
+            continue
+        expected = golden[kind]
+        for url in list(expected) + [url for url in pages if url not in expected]:
+            want, have = normalize(expected.get(url)), normalize(pages.get(url))
+            if want == have:
+                continue
+            if isinstance(want, dict) and isinstance(have, dict):
+                detail = {key: (want.get(key), have.get(key)) for key in want if want.get(key) != have.get(key)}
+            else:
+                detail = (want, have)
+            diffs.append(f"{kind} {url}: {detail}")
+    return diffs
+
+
+def report(tier: str, results: Results, metrics: Metrics, wall: float, diffs: List[str]):
+    pages = sum(len(urls) for urls in results.values())
+    print(f"\n[{tier}] {pages} pages in {wall:.2f}s, {pages / wall if wall else 0:.1f} pages/s, "
+          f"{metrics.total('work') / max(pages, 1) * 1000:.2f}ms extracting per page, {len(diffs)} differences")
+    for name, seconds in metrics.seconds.items():
+        print(f"   {name:<16} {metrics.kinds[name]:<5} {seconds / metrics.calls[name] * 1000:8.3f}ms per page")
+    for line in diffs[:MAX_REPORTED_DIFFS]:
+        print(f"   {line}")
+    if len(diffs) > MAX_REPORTED_DIFFS:
+        print(f"   ... and {len(diffs) - MAX_REPORTED_DIFFS} more")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0])
+    parser.add_argument('--archive', help="Directory recorded with --record (default: generated fixture pages)")
+    parser.add_argument('--golden', type=Path, help="Expected results (default: golden.json in the archive)")
+    parser.add_argument('--update-golden', action='store_true', help="Write the results as the golden file")
+    parser.add_argument('--per-city', type=int, default=40, help="Tours per city of the generated fixture pages")
+    parser.add_argument('--browser', action='store_true', help="Also run the Playwright extractors")
+    parser.add_argument('--tripadvisor', action='store_true', help="Also run the TripAdvisor extractors")
+    parser.add_argument('--no-http', action='store_true', help="Skip the HTTP tier")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds the replay server adds to every response")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        if args.archive:
+            archive = HtmlArchive(args.archive)
+            golden_path = args.golden or Path(args.archive) / 'golden.json'
+            golden = {}
+            if golden_path.exists() and not args.update_golden:
+                with open(golden_path, 'r', encoding='utf-8') as f:
+                    golden = json.load(f)
+        else:
+            golden = fixture_archive(scratch, args.per_city)
+            archive = HtmlArchive(scratch)
+            golden_path = args.golden
+
+        tiers = [tier for tier, wanted in (('http', not args.no_http), ('browser', args.browser),
+                                           ('tripadvisor', args.tripadvisor)) if wanted]
+        server = make_replay_server(archive, port=0, latency=args.latency)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://{DEFAULT_HOST}:{server.server_port}"
+        print(f"Replaying {len(archive)} recorded pages from {archive.directory}")
+
+        total_diffs, recorded = 0, {}
+        try:
+            for tier in tiers:
+                metrics = Metrics()
+                start = time.perf_counter()
+                results = TIERS[tier](base_url, archive, metrics)
+                wall = time.perf_counter() - start
+                diffs = [] if args.update_golden else differences(golden, results)
+                report(tier, results, metrics, wall, diffs)
+                total_diffs += len(diffs)
+                for kind, pages in results.items():
+                    recorded.setdefault(kind, pages)
+        finally:
+            server.shutdown()
+            archive.close()
+
+    if args.update_golden and golden_path is not None:
+        with open(golden_path, 'w', encoding='utf-8') as f:
+            json.dump(recorded, f, indent=2, ensure_ascii=False)
+        print(f"\nWrote {sum(len(pages) for pages in recorded.values())} golden results to {golden_path}")
+    if total_diffs:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
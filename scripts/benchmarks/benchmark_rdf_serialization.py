@@ -0,0 +1,96 @@
+"""
+Compare the RDF/XML save path with the streaming N-Triples / Turtle export:
+write time, parse-back time, file size and peak RSS.
+
+Every step runs in its own spawned process so peak RSS is measured per step.
+"""
+
+import json
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from abox_population import ATTRACTIONS_JSON_PATH, ONTOLOGY_PATH, TOURS_JSON_PATH
+
+FORMATS = ['rdfxml', 'nt', 'nt.gz', 'ttl', 'ttl.gz']
+
+
+def load_data():
+    with open(TOURS_JSON_PATH, 'r', encoding='utf-8') as f:
+        tours_data = json.load(f)
+    with open(ATTRACTIONS_JSON_PATH, 'r', encoding='utf-8') as f:
+        attractions_data = json.load(f)
+    return tours_data, attractions_data
+
+
+def write_step(fmt: str, path: Path):
+    from owlready2 import World
+    from abox_population import OntologyPopulator, run_streaming
+
+    tours_data, attractions_data = load_data()
+    if fmt == 'rdfxml':
+        populator = OntologyPopulator(ONTOLOGY_PATH, world=World())
+        populator.populate_tours(tours_data, bulk=True)
+        populator.populate_attractions(attractions_data, bulk=True)
+        populator.save(path)
+    else:
+        run_streaming(path, tours_data, attractions_data)
+
+
+def parse_step(fmt: str, path: Path) -> int:
+    from owlready2 import World
+    from rdf_streaming import load_triples
+
+    world = World()
+    if fmt == 'rdfxml':
+        onto = world.get_ontology(f"file://{path}").load()
+    else:
+        onto = load_triples(path, world)
+    return len(list(onto.individuals()))
+
+
+def measure(step, fmt: str, path: str, queue):
+    start = time.perf_counter()
+    result = step(fmt, Path(path))
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux
+    queue.put((elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, result))
+
+
+def run_isolated(step, fmt: str, path: Path):
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=measure, args=(step, fmt, str(path), queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for fmt in FORMATS:
+            path = Path(tmp_dir) / ('populated.owl' if fmt == 'rdfxml' else f'populated.{fmt}')
+            write_time, write_rss, _ = run_isolated(write_step, fmt, path)
+            parse_time, parse_rss, individuals = run_isolated(parse_step, fmt, path)
+            results[fmt] = (write_time, write_rss, parse_time, parse_rss, path.stat().st_size, individuals)
+
+    print(f"\n{'=' * 90}")
+    print(f"{'format':<10s} {'write':>10s} {'write RSS':>12s} {'parse':>10s} {'parse RSS':>12s} "
+          f"{'size':>12s} {'individuals':>12s}")
+    print('=' * 90)
+    for fmt, (write_time, write_rss, parse_time, parse_rss, size, individuals) in results.items():
+        print(f"{fmt:<10s} {write_time:9.2f}s {write_rss:9.1f} MiB {parse_time:9.2f}s {parse_rss:9.1f} MiB "
+              f"{size / 1024:8.0f} KiB {individuals:12d}")
+    print("\nNote: the RDF/XML parse goes through Owlready2's loader, which also resolves owl:imports;"
+          " load_triples records imports without following them.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Latency and throughput of the local SPARQL endpoint under concurrent load,
+using the queries the web app sends (search form combinations and shortcuts).
+
+By default an endpoint is started in-process and measured with and without its
+result cache. Pass --endpoint URL to run the same workload against another
+SPARQL endpoint (e.g. the TriplyDB one) for comparison.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from search_queries import (SHORTCUT_RULES, build_activity_search_query, build_cities_query,
+                            build_shortcut_query)
+
+BUDGETS = ['budget_free', 'budget_low', 'budget_medium', 'budget_high']
+LOCATION_SETTINGS = ['location_indoor', 'location_outdoor']
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+HOURS = ['09:00', '12:00', '15:00', '18:00', '21:00']
+
+
+def post_query(endpoint: str, query: str) -> Dict:
+    request = urllib.request.Request(endpoint, data=query.encode('utf-8'), method='POST', headers={
+        'Content-Type': 'application/sparql-query',
+        'Accept': 'application/sparql-results+json',
+    })
+    with urllib.request.urlopen(request, timeout=120) as response:
+        return json.loads(response.read())
+
+
+def build_workload(endpoint: str, size: int, seed: int = 0) -> List[str]:
+    """Random search form submissions over the cities the endpoint knows, plus shortcut clicks."""
+    cities = [row['city']['value'].rsplit('city_', 1)[-1]
+              for row in post_query(endpoint, build_cities_query())['results']['bindings']]
+    rng = random.Random(seed)
+    workload = []
+    for _ in range(size):
+        if rng.random() < 0.1:
+            workload.append(build_shortcut_query(rng.choice(SHORTCUT_RULES)))
+            continue
+        day = rng.choice([None] + DAYS)
+        workload.append(build_activity_search_query(
+            rng.choice(cities),
+            day=day,
+            hour=rng.choice([None] + HOURS) if day else None,
+            location_setting=rng.choice([None] + LOCATION_SETTINGS),
+            budget=rng.choice([None] + BUDGETS),
+        ))
+    return workload
+
+
+def run_load(endpoint: str, workload: List[str], concurrency: int) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def timed(query: str):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            post_query(endpoint, query)
+        except Exception:
+            with lock:
+                errors += 1
+            return
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, workload))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else float('nan')
+
+    return {
+        'throughput': len(latencies) / wall if wall else 0.0,
+        'mean': statistics.mean(latencies) * 1000 if latencies else float('nan'),
+        'p50': percentile(0.50),
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+        'errors': errors,
+    }
+
+
+def print_results(label: str, results: Dict[int, Dict]):
+    print(f"\n{label}")
+    print(f"{'clients':>8s} {'req/s':>9s} {'mean ms':>9s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'errors':>7s}")
+    for concurrency, r in results.items():
+        print(f"{concurrency:>8d} {r['throughput']:>9.1f} {r['mean']:>9.1f} {r['p50']:>9.1f} "
+              f"{r['p95']:>9.1f} {r['p99']:>9.1f} {r['errors']:>7d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--endpoint', help="Benchmark this SPARQL endpoint instead of an in-process one")
+    parser.add_argument('--ontology', type=Path, help="Ontology served by the in-process endpoint")
+    parser.add_argument('--requests', type=int, default=300, help="Queries per concurrency level")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    args = parser.parse_args()
+
+    server: Optional[object] = None
+    service = None
+    endpoint = args.endpoint
+    if endpoint is None:
+        from sparql_endpoint import ONTOLOGY_PATH, SparqlService, make_server
+
+        start = time.perf_counter()
+        service = SparqlService(args.ontology or ONTOLOGY_PATH)
+        print(f"Loaded ontology in {time.perf_counter() - start:.2f}s")
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        endpoint = f"http://127.0.0.1:{server.server_port}/sparql"
+
+    workload = build_workload(endpoint, args.requests)
+    print(f"Endpoint: {endpoint}")
+    print(f"Workload: {len(workload)} queries, {len(set(workload))} distinct")
+
+    try:
+        if service is None:
+            print_results("Remote endpoint", {c: run_load(endpoint, workload, c) for c in args.concurrency})
+            return
+
+        cache_size = service.cache_size
+        service.cache_size = 0
+        print_results("Local endpoint, prepared queries only (no result cache)",
+                      {c: run_load(endpoint, workload, c) for c in args.concurrency})
+
+        service.cache_size = cache_size
+        run_load(endpoint, sorted(set(workload)), 1)
+        print_results("Local endpoint, warm result cache",
+                      {c: run_load(endpoint, workload, c) for c in args.concurrency})
+        print(f"\nResult cache: {service.hits} hits, {service.misses} misses")
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
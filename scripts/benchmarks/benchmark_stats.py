@@ -0,0 +1,55 @@
+"""
+Time of the stats_engine reports at scale: the post-LLM GetYourGuide and
+TripAdvisor datasets are replicated `--scale` times (with city names suffixed
+per copy, so the city columns grow too), read into a Table and rendered,
+including the cross-tab and price quartiles.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR / 'scripts' / 'stats_generators'))
+
+import analyze_statistics_gyg
+import analyze_statistics_trip_advisor
+from stats_engine import Table, load_data
+
+DATASETS = {
+    'gyg': (analyze_statistics_gyg, BASE_DIR / 'data' / 'post_llm_processing' / 'all_cities_tours.json',
+            ()),
+    'trip_advisor': (analyze_statistics_trip_advisor,
+                     BASE_DIR / 'data' / 'post_llm_processing' / 'trip_advisor_data_enriched_final.json',
+                     analyze_statistics_trip_advisor.FLAGS),
+}
+
+
+def replicate(records: List[Dict], scale: int) -> List[Dict]:
+    if scale <= 1:
+        return records
+    return [{**record, 'city': f"{record.get('city')} {copy}"} if copy else record
+            for copy in range(scale) for record in records]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0])
+    parser.add_argument('--scale', type=int, default=1000, help="Copies of each dataset")
+    args = parser.parse_args()
+
+    print(f"{'dataset':<14} {'records':>10} {'table':>8} {'report':>8} {'records/s':>12}")
+    for name, (module, data_path, flags) in DATASETS.items():
+        records = replicate(load_data(str(data_path)), args.scale)
+        start = time.perf_counter()
+        table = Table.from_records(records, module.FIELDS, flags, module.DEFAULTS)
+        built = time.perf_counter()
+        module.build_report(table, breakdown=True)
+        done = time.perf_counter()
+        print(f"{name:<14} {len(records):10,d} {built - start:7.2f}s {done - built:7.2f}s "
+              f"{len(records) / (done - start):12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
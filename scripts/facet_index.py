@@ -0,0 +1,315 @@
+"""
+Precomputed faceted index of the activities shown by the web app's search.
+
+Built after abox_population.py / rules creation from the same SPARQL queries
+the web app sends, it stores:
+  - a columnar table with one row per activity, already shaped like the
+    web app's `Activity` (what `parseActivityResults` returns);
+  - one bitset (a Python int, bit i = row i) per city, budget tier and
+    location setting;
+  - per day, the bitset of activities with hours for that day and, for
+    the sorted distinct opensAt/closesAt strings, the bitset of activities
+    open between each boundary and the next;
+  - per activity, every (opensAt, closesAt) pair of each day.
+
+`FacetIndex.search()` then answers the search form's parameters with a few
+bitset intersections and one bisect, with the semantics of `buildFilters`:
+activities without hours for the requested day are kept, the others must
+satisfy `opensAt <= hour < closesAt` as plain string comparisons. With a
+day and an hour, the query's filter binds ?opensAt / ?closesAt, which the
+hours OPTIONAL shares, so an activity with hours that day only lists the
+entries (of any day) with the times of its matching entries; search() does
+the same. `sparql_endpoint.py --facet-index PATH` serves it at `/search`.
+
+    python scripts/facet_index.py                       # build
+    python scripts/facet_index.py --verify              # build, then compare with SPARQL
+    python scripts/facet_index.py --verify --reference  # ... as evaluated by rdflib (slower)
+"""
+
+import argparse
+import json
+import random
+import time
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from search_queries import (build_activity_search_query, build_cities_query, extract_local_name,
+                            parse_activity_results, sanitize_for_uri)
+
+BASE_DIR = Path(__file__).parent.parent
+ONTOLOGY_PATH = BASE_DIR / "ontologies" / "populated" / "german_city_tourism_with_rules.owl"
+INDEX_PATH = BASE_DIR / "ontologies" / "populated" / "activity_facet_index.json"
+
+INDEX_VERSION = 2
+BUDGETS = ['budget_free', 'budget_low', 'budget_medium', 'budget_high']
+LOCATION_SETTINGS = ['location_indoor', 'location_outdoor']
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+# Activity fields stored as columns, in the web app's Activity order ('city' comes from the query)
+COLUMNS = ['uri', 'name', 'type', 'budget', 'locationSetting', 'imageUrl', 'url', 'duration',
+           'languages', 'meetingPoint', 'mapLink', 'operatingHours']
+
+
+def iter_rows(bitset: int) -> Iterator[int]:
+    """Row numbers of the bits set, in increasing order."""
+    while bitset:
+        low = bitset & -bitset
+        yield low.bit_length() - 1
+        bitset ^= low
+
+
+def popcount(bitset: int) -> int:
+    return bin(bitset).count('1')
+
+
+def _bitset(rows: Set[int]) -> int:
+    bitset = 0
+    for row in rows:
+        bitset |= 1 << row
+    return bitset
+
+
+class FacetIndex:
+    """Columnar activity table plus per-facet bitsets."""
+
+    def __init__(self, columns: Dict[str, List], facets: Dict[str, Dict[str, int]],
+                 hours: Dict[str, Dict], entries: List[Dict[str, List[List[str]]]], source: str = ''):
+        self.columns = columns
+        self.facets = facets
+        self.hours = hours
+        # Row -> day -> sorted [opensAt, closesAt] pairs
+        self.entries = entries
+        self.source = source
+
+    def __len__(self) -> int:
+        return len(self.columns['uri'])
+
+    @classmethod
+    def build(cls, service) -> 'FacetIndex':
+        """Build the index from a SparqlService, one unfiltered search query per city."""
+        cities = [extract_local_name(row['city']['value'])[len('city_'):]
+                  for row in json.loads(service.query(build_cities_query()))['results']['bindings']]
+
+        activities: Dict[str, Dict] = {}
+        city_members: Dict[str, Set[str]] = {}
+        budget_members: Dict[str, Set[str]] = {}
+        location_members: Dict[str, Set[str]] = {}
+        # uri -> day -> every (opensAt, closesAt) the temporal OPTIONAL can bind
+        intervals: Dict[str, Dict[str, Set[Tuple[str, str]]]] = {}
+
+        for city in cities:
+            bindings = json.loads(service.query(build_activity_search_query(city)))['results']['bindings']
+            for activity in parse_activity_results(bindings, lambda binding: ''):
+                activities.setdefault(activity['uri'], activity)
+                city_members.setdefault(city, set()).add(activity['uri'])
+
+            for binding in bindings:
+                uri = binding['activity']['value']
+                if 'budget' in binding:
+                    budget_members.setdefault(extract_local_name(binding['budget']['value']), set()).add(uri)
+                if 'locationSetting' in binding:
+                    location = extract_local_name(binding['locationSetting']['value'])
+                    location_members.setdefault(location, set()).add(uri)
+                if 'hoursDay' in binding and 'opensAt' in binding and 'closesAt' in binding:
+                    day = extract_local_name(binding['hoursDay']['value'])[len('day_'):]
+                    intervals.setdefault(uri, {}).setdefault(day, set()).add(
+                        (binding['opensAt']['value'], binding['closesAt']['value']))
+
+        uris = sorted(activities)
+        row_of = {uri: row for row, uri in enumerate(uris)}
+        columns = {name: [activities[uri][name] for uri in uris] for name in COLUMNS}
+
+        def facet(members: Dict[str, Set[str]]) -> Dict[str, int]:
+            return {key: _bitset({row_of[uri] for uri in value}) for key, value in members.items()}
+
+        hours = {}
+        days = sorted({day for by_day in intervals.values() for day in by_day})
+        for day in days:
+            day_intervals = [(opens, closes, row_of[uri])
+                             for uri, by_day in intervals.items() for opens, closes in by_day.get(day, ())]
+            boundaries = sorted({value for opens, closes, _ in day_intervals for value in (opens, closes)})
+            # The open set only changes at a boundary, so one bitset per segment answers any hour string
+            open_sets = [_bitset({row for opens, closes, row in day_intervals if opens <= boundary < closes})
+                         for boundary in boundaries]
+            hours[day] = {
+                'with_hours': _bitset({row for _, _, row in day_intervals}),
+                'boundaries': boundaries,
+                'open': open_sets,
+            }
+
+        entries = [{day: sorted([opens, closes] for opens, closes in pairs)
+                    for day, pairs in sorted(intervals.get(uri, {}).items())} for uri in uris]
+        return cls(columns, {'city': facet(city_members), 'budget': facet(budget_members),
+                             'locationSetting': facet(location_members)}, hours, entries)
+
+    def save(self, path: Path = INDEX_PATH):
+        data = {
+            'version': INDEX_VERSION,
+            'source': self.source,
+            'columns': self.columns,
+            'facets': {name: {key: format(bitset, 'x') for key, bitset in values.items()}
+                       for name, values in self.facets.items()},
+            'hours': {day: {'with_hours': format(entry['with_hours'], 'x'),
+                            'boundaries': entry['boundaries'],
+                            'open': [format(bitset, 'x') for bitset in entry['open']]}
+                      for day, entry in self.hours.items()},
+            'entries': self.entries,
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path: Path = INDEX_PATH) -> 'FacetIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError(f"{path}: index version {data.get('version')}, expected {INDEX_VERSION}; rebuild it")
+        facets = {name: {key: int(bitset, 16) for key, bitset in values.items()}
+                  for name, values in data['facets'].items()}
+        hours = {day: {'with_hours': int(entry['with_hours'], 16),
+                       'boundaries': entry['boundaries'],
+                       'open': [int(bitset, 16) for bitset in entry['open']]}
+                 for day, entry in data['hours'].items()}
+        return cls(data['columns'], facets, hours, data['entries'], data.get('source', ''))
+
+    def match(self, city: str, day: Optional[str] = None, hour: Optional[str] = None,
+              location_setting: Optional[str] = None, budget: Optional[str] = None) -> int:
+        """Bitset of the activities the search form's SPARQL query would return."""
+        result = self.facets['city'].get(sanitize_for_uri(city), 0)
+        if budget:
+            result &= self.facets['budget'].get(budget, 0)
+        if location_setting:
+            result &= self.facets['locationSetting'].get(location_setting, 0)
+        if day and hour:
+            entry = self.hours.get(day)
+            if entry:
+                segment = bisect_right(entry['boundaries'], hour) - 1
+                open_now = entry['open'][segment] if segment >= 0 else 0
+                result &= ~entry['with_hours'] | open_now
+        # A day without an hour keeps every activity, as the day-only FILTER does
+        return result
+
+    def search(self, city: str, day: Optional[str] = None, hour: Optional[str] = None,
+               location_setting: Optional[str] = None, budget: Optional[str] = None) -> List[Dict]:
+        """Activities matching the search parameters, ordered by URI, shaped like the web app's Activity."""
+        city_name = city[:1].upper() + city[1:]
+        results = []
+        for row in iter_rows(self.match(city, day, hour, location_setting, budget)):
+            activity = {name: self.columns[name][row] for name in COLUMNS}
+            activity['city'] = city_name
+            if day and hour and day in self.entries[row]:
+                activity['operatingHours'] = self._hours_open_at(row, day, hour)
+            results.append(activity)
+        return results
+
+    def _hours_open_at(self, row: int, day: str, hour: str) -> Optional[List[Dict]]:
+        """The operatingHours the day + hour query returns: entries with the times of one open that day."""
+        times = {(opens, closes) for opens, closes in self.entries[row][day] if opens <= hour < closes}
+        hours = []
+        for name in DAYS:
+            # One entry per day, like parseActivityResults
+            pair = next(([opens, closes] for opens, closes in self.entries[row].get(name, ())
+                         if (opens, closes) in times), None)
+            if pair:
+                hours.append({'day': name.capitalize(), 'opensAt': pair[0], 'closesAt': pair[1]})
+        return hours or None
+
+
+# --- Verification against the SPARQL path ---------------------------------
+
+def search_grid(cities: List[str], samples: int, hours: List[str], seed: int = 0) -> List[Dict]:
+    """Every city/budget/location/day combination without hour, plus random hour samples."""
+    grid = [{'city': city, 'day': day, 'location_setting': location, 'budget': budget}
+            for city in cities for budget in [None] + BUDGETS
+            for location in [None] + LOCATION_SETTINGS for day in [None] + DAYS]
+    rng = random.Random(seed)
+    for _ in range(samples):
+        grid.append({'city': rng.choice(cities), 'day': rng.choice(DAYS), 'hour': rng.choice(hours),
+                     'location_setting': rng.choice([None] + LOCATION_SETTINGS),
+                     'budget': rng.choice([None] + BUDGETS)})
+    return grid
+
+
+def verify(index: FacetIndex, service, samples: int) -> int:
+    """Compare index.search with the SPARQL results; return the number of mismatching searches."""
+    cities = sorted(index.facets['city'])
+    boundaries = sorted({b for entry in index.hours.values() for b in entry['boundaries']})
+    # Boundaries themselves are the edge cases of the [opensAt, closesAt) check
+    hours = boundaries + [f"{h:02d}:{m:02d}" for h in range(24) for m in (0, 30)]
+    grid = search_grid(cities, samples, hours)
+
+    mismatches = 0
+    sparql_time = index_time = 0.0
+    for params in grid:
+        start = time.perf_counter()
+        bindings = json.loads(service.query(build_activity_search_query(**params)))['results']['bindings']
+        city_name = params['city'][:1].upper() + params['city'][1:]
+        expected = sorted(parse_activity_results(bindings, lambda binding: city_name), key=lambda a: a['uri'])
+        sparql_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = index.search(**params)
+        index_time += time.perf_counter() - start
+
+        # Languages are collected in row order, which the endpoint does not fix
+        for activity in expected + actual:
+            if activity['languages']:
+                activity['languages'] = sorted(activity['languages'])
+        if expected != actual:
+            mismatches += 1
+            missing = {a['uri'] for a in expected} - {a['uri'] for a in actual}
+            extra = {a['uri'] for a in actual} - {a['uri'] for a in expected}
+            by_uri = {a['uri']: a for a in actual}
+            fields = sorted({name for a in expected if a['uri'] in by_uri
+                             for name, value in a.items() if by_uri[a['uri']][name] != value})
+            print(f"  MISMATCH {params}: {len(expected)} via SPARQL, {len(actual)} via index "
+                  f"(missing {sorted(missing)[:3]}, extra {sorted(extra)[:3]}, differing fields {fields})")
+
+    print(f"Verified {len(grid)} searches: {mismatches} mismatches")
+    print(f"  SPARQL: {sparql_time / len(grid) * 1000:.2f} ms/search")
+    print(f"  Index:  {index_time / len(grid) * 1000:.3f} ms/search")
+    return mismatches
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the activity facet index used for search")
+    parser.add_argument('--ontology', type=Path, default=ONTOLOGY_PATH)
+    parser.add_argument('--output', type=Path, default=INDEX_PATH)
+    parser.add_argument('--verify', action='store_true',
+                        help="Compare the index with the SPARQL results over the facet grid")
+    parser.add_argument('--samples', type=int, default=500,
+                        help="Random day+hour searches added to the verification grid")
+    parser.add_argument('--reference', action='store_true',
+                        help="Verify against rdflib's evaluation of the queries instead of the endpoint's "
+                             "(needs rdflib; about a second per search)")
+    return parser.parse_args()
+
+
+def main():
+    from sparql_endpoint import ReferenceService, SparqlService
+
+    args = parse_args()
+
+    print(f"Loading ontology from: {args.ontology}")
+    service = SparqlService(args.ontology, cache_size=0)
+
+    start = time.perf_counter()
+    index = FacetIndex.build(service)
+    index.source = args.ontology.name
+    print(f"Indexed {len(index)} activities in {time.perf_counter() - start:.2f}s")
+    for name, values in index.facets.items():
+        print(f"  {name}: {', '.join(f'{key}={popcount(bitset)}' for key, bitset in sorted(values.items()))}")
+
+    index.save(args.output)
+    print(f"Saved to: {args.output}")
+
+    if args.verify:
+        if args.reference:
+            print("Loading the ontology into rdflib")
+            service = ReferenceService(args.ontology)
+        if verify(index, service, args.samples):
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
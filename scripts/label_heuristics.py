@@ -0,0 +1,247 @@
+"""
+Heuristic pre-classifier for the enrichment labels (budget_tier, location_setting).
+
+Many labels follow from the scraped fields alone: a GetYourGuide price maps to
+a tier, a TripAdvisor "Nature & Parks" attraction is outdoor, and spec types
+repeat across thousands of venues. HeuristicLabeler learns lookup tables from
+already labelled (post-LLM) records and answers with a confidence per label:
+
+- tour budget_tier: the tiers of the K training tours with the nearest price
+- attraction labels: whichever is most decisive of the (attraction_type,
+  spec_type) pair, a word of the name and the attraction_type alone
+- tour location_setting: the most decisive title word, or the overall share
+
+A table entry only counts once it has MIN_SUPPORT records, and its confidence
+is the majority share shrunk by ALPHA pseudo-records (top / (total + ALPHA)),
+so rare evidence never looks certain. llm_enrichment.py --heuristics labels
+records whose labels all reach the kind's minimum confidence itself and only
+sends the rest to the model.
+
+    python scripts/label_heuristics.py --evaluate     # cross-validated coverage and accuracy
+"""
+
+import argparse
+import json
+import re
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from llm_enrichment import DATASETS, LABELS, PRICE_PATTERN
+
+# Neighbours voting on a tour's tier
+PRICE_NEIGHBOURS = 25
+# Records a table entry needs before it is used
+MIN_SUPPORT = 5
+# Pseudo-records added to every entry's total
+ALPHA = 1.0
+# Lowest confidence per kind whose labels agreed with the LLM's on at least 95% of
+# the cross-validated records (--evaluate); no attraction threshold does, so None
+# sends every attraction to the model
+DEFAULT_MIN_CONFIDENCE: Dict[str, Optional[float]] = {'tour': 0.96, 'attraction': None}
+EVALUATION_FOLDS = 5
+EVALUATION_THRESHOLDS = (0.7, 0.8, 0.9, 0.95, 0.96)
+
+WORD_PATTERN = re.compile(r'[^\W\d_]{4,}')
+
+# A prediction: value and confidence in [0, 1)
+Prediction = Tuple[Optional[str], float]
+NO_PREDICTION: Prediction = (None, 0.0)
+
+
+def price_amount(price: Any) -> Optional[float]:
+    match = PRICE_PATTERN.search(price) if isinstance(price, str) else None
+    return float(match.group(1).replace(',', '')) if match else None
+
+
+def words(text: Any) -> List[str]:
+    return sorted(set(WORD_PATTERN.findall(text.lower()))) if isinstance(text, str) else []
+
+
+def _vote(counter: Counter) -> Prediction:
+    total = sum(counter.values())
+    if total < MIN_SUPPORT:
+        return NO_PREDICTION
+    value, top = counter.most_common(1)[0]
+    return value, top / (total + ALPHA)
+
+
+class LookupTable:
+    """Label counts per key."""
+
+    def __init__(self):
+        self.counts: Dict[Any, Counter] = {}
+
+    def add(self, key: Any, label: str):
+        self.counts.setdefault(key, Counter())[label] += 1
+
+    def predict(self, key: Any) -> Prediction:
+        counter = self.counts.get(key)
+        return _vote(counter) if counter else NO_PREDICTION
+
+    def best(self, keys: Iterable[Any]) -> Prediction:
+        """The most confident prediction among several keys (e.g. the words of a title)."""
+        return max((self.predict(key) for key in keys), key=lambda prediction: prediction[1], default=NO_PREDICTION)
+
+
+class PriceTable:
+    """Tier votes of the training records with the nearest prices."""
+
+    def __init__(self):
+        self.prices: List[float] = []
+        self.labels: List[str] = []
+
+    def fit(self, pairs: Iterable[Tuple[float, str]]):
+        ordered = sorted(pairs)
+        self.prices = [price for price, _ in ordered]
+        self.labels = [label for _, label in ordered]
+
+    def predict(self, amount: Optional[float], k: int = PRICE_NEIGHBOURS) -> Prediction:
+        if amount is None or not self.prices:
+            return NO_PREDICTION
+        # Widen a window around the insertion point towards the closer price until it holds k records
+        low = high = bisect_left(self.prices, amount)
+        while high - low < k and (low > 0 or high < len(self.prices)):
+            if high >= len(self.prices) or (low > 0 and amount - self.prices[low - 1] <= self.prices[high] - amount):
+                low -= 1
+            else:
+                high += 1
+        return _vote(Counter(self.labels[low:high]))
+
+
+class HeuristicLabeler:
+    """Lookup tables learned from labelled tours and attractions."""
+
+    def __init__(self):
+        self.tour_prices = PriceTable()
+        self.tour_words = LookupTable()
+        self.tour_settings = Counter()
+        self.attraction_tables = {label: (LookupTable(), LookupTable(), LookupTable()) for label in LABELS}
+
+    @classmethod
+    def train(cls, tours: Sequence[Dict[str, Any]], attractions: Sequence[Dict[str, Any]]) -> 'HeuristicLabeler':
+        labeler = cls()
+        priced = []
+        for tour in tours:
+            tier, setting = tour.get('budget_tier'), tour.get('location_setting')
+            amount = price_amount(tour.get('price'))
+            if tier in LABELS['budget_tier'] and amount is not None:
+                priced.append((amount, tier))
+            if setting in LABELS['location_setting']:
+                labeler.tour_settings[setting] += 1
+                for word in words(tour.get('title')):
+                    labeler.tour_words.add(word, setting)
+        labeler.tour_prices.fit(priced)
+
+        for attraction in attractions:
+            for label, (pairs, names, types) in labeler.attraction_tables.items():
+                value = attraction.get(label)
+                if value not in LABELS[label]:
+                    continue
+                pairs.add((attraction.get('attraction_type'), attraction.get('spec_type')), value)
+                types.add(attraction.get('attraction_type'), value)
+                for word in words(attraction.get('name')):
+                    names.add(word, value)
+        return labeler
+
+    def predict(self, kind: str, record: Dict[str, Any]) -> Dict[str, Prediction]:
+        """(value, confidence) per label; (None, 0.0) when there is no usable evidence."""
+        if kind == 'tour':
+            # A decisive title word, else the overall share of each setting
+            setting = max(self.tour_words.best(words(record.get('title'))), _vote(self.tour_settings),
+                          key=lambda prediction: prediction[1])
+            return {'budget_tier': self.tour_prices.predict(price_amount(record.get('price'))),
+                    'location_setting': setting}
+
+        predictions = {}
+        for label, (pairs, names, types) in self.attraction_tables.items():
+            candidates = [
+                pairs.predict((record.get('attraction_type'), record.get('spec_type'))),
+                names.best(words(record.get('name'))),
+                types.predict(record.get('attraction_type')),
+            ]
+            predictions[label] = max(candidates, key=lambda prediction: prediction[1])
+        return predictions
+
+    def confident_labels(self, kind: str, record: Dict[str, Any],
+                         min_confidence: Optional[float] = None) -> Optional[Dict[str, str]]:
+        """Every label of the record when all reach min_confidence, else None (the model decides).
+
+        min_confidence defaults to the kind's DEFAULT_MIN_CONFIDENCE.
+        """
+        if min_confidence is None:
+            min_confidence = DEFAULT_MIN_CONFIDENCE[kind]
+            if min_confidence is None:
+                return None
+        predictions = self.predict(kind, record)
+        if all(confidence >= min_confidence for _, confidence in predictions.values()):
+            return {label: value for label, (value, _) in predictions.items()}
+        return None
+
+
+def load_labelled(paths: Optional[Dict[str, Path]] = None) -> Tuple[List[Dict], List[Dict]]:
+    """The post-LLM tours and attractions, or the files given per dataset name."""
+    paths = paths or {}
+    loaded = []
+    for name in ('tours', 'attractions'):
+        with open(paths.get(name) or DATASETS[name][2], 'r', encoding='utf-8') as f:
+            loaded.append(json.load(f))
+    return loaded[0], loaded[1]
+
+
+def evaluate(tours: Sequence[Dict], attractions: Sequence[Dict], folds: int = EVALUATION_FOLDS,
+             thresholds: Sequence[float] = EVALUATION_THRESHOLDS) -> Dict[str, Dict[float, Tuple[int, int, int]]]:
+    """Cross-validated (records, confident records, confident records labelled right) per kind and threshold.
+
+    Records are assigned to folds by position, so the result is deterministic.
+    """
+    results = {}
+    for kind, records in (('tour', tours), ('attraction', attractions)):
+        per_threshold = {threshold: [0, 0, 0] for threshold in thresholds}
+        for fold in range(folds):
+            training = [record for index, record in enumerate(records) if index % folds != fold]
+            labeler = HeuristicLabeler.train(training if kind == 'tour' else [],
+                                             training if kind == 'attraction' else [])
+            for index in range(fold, len(records), folds):
+                record = records[index]
+                predictions = labeler.predict(kind, record)
+                lowest = min(confidence for _, confidence in predictions.values())
+                right = all(value == record.get(label) for label, (value, _) in predictions.items())
+                for threshold, counts in per_threshold.items():
+                    counts[0] += 1
+                    if lowest >= threshold:
+                        counts[1] += 1
+                        counts[2] += right
+        results[kind] = {threshold: tuple(counts) for threshold, counts in per_threshold.items()}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validate the heuristic labels on the post-LLM data")
+    parser.add_argument('--evaluate', action='store_true', help="Report coverage and accuracy per confidence")
+    parser.add_argument('--tours', type=Path, help="Labelled tours (default: the post-LLM file)")
+    parser.add_argument('--attractions', type=Path, help="Labelled attractions (default: the post-LLM file)")
+    parser.add_argument('--folds', type=int, default=EVALUATION_FOLDS)
+    args = parser.parse_args()
+
+    tours, attractions = load_labelled({'tours': args.tours, 'attractions': args.attractions})
+    if not args.evaluate:
+        labeler = HeuristicLabeler.train(tours, attractions)
+        for kind, records in (('tour', tours), ('attraction', attractions)):
+            confident = sum(labeler.confident_labels(kind, record) is not None for record in records)
+            threshold = DEFAULT_MIN_CONFIDENCE[kind]
+            print(f"{kind}s: {confident}/{len(records)} labelled"
+                  + (f" with confidence >= {threshold}" if threshold is not None else " (never labelled heuristically)"))
+        return
+
+    print(f"{'kind':<12} {'min conf':>8} {'coverage':>10} {'accuracy':>10}")
+    for kind, per_threshold in evaluate(tours, attractions, args.folds).items():
+        for threshold, (total, confident, right) in per_threshold.items():
+            coverage = confident / total if total else 0.0
+            accuracy = right / confident if confident else 0.0
+            print(f"{kind:<12} {threshold:8.2f} {coverage:9.1%} {accuracy:9.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,467 @@
+"""
+LLM enrichment stage: adds `budget_tier` and `location_setting` to the scraped
+tours and attractions (data/pre_llm_processing -> data/llm_enrichment_output).
+
+The curated data/post_llm_processing files are the population input and the
+heuristics' training data, so they are only replaced when `--output-dir`
+points there and `--overwrite` is given.
+
+Records are sent to a model backend in batches of `--batch-size`, with at most
+`--workers` batches in flight. A batch whose call fails, or whose answer does
+not give every record valid labels, is retried with exponential backoff up to
+`--retries` times; records of a batch that still fails are written without
+labels and counted. Answers are cached per record in SQLite under a hash of
+the fields the prompt shows, the prompt and the model, so a re-run only sends
+new or changed records, and identical records in one run are sent once.
+
+Backends:
+  - rules: deterministic price / keyword rules, no network; the stand-in that
+    lets the whole pipeline run offline
+  - openai: any OpenAI-compatible chat completions endpoint (OpenAI, Ollama,
+    vLLM, llama.cpp server); `--endpoint`, `--model`, OPENAI_API_KEY
+
+With `--heuristics`, label_heuristics.py is first trained on the existing
+post-LLM files; records it labels with at least the minimum confidence are
+not sent to the backend at all. By default that is 0.96 for tours, where the
+heuristics agree with the LLM on 95% of the records they label, and never for
+attractions, where no threshold gets there; `--min-confidence` sets one for
+both.
+
+    python scripts/llm_enrichment.py --backend rules
+    python scripts/llm_enrichment.py --output-dir data/post_llm_processing --overwrite
+    python scripts/llm_enrichment.py --backend openai --endpoint http://127.0.0.1:11434/v1 --model llama3.1
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+BASE_DIR = Path(__file__).parent.parent
+PRE_LLM_DIR = BASE_DIR / "data" / "pre_llm_processing"
+POST_LLM_DIR = BASE_DIR / "data" / "post_llm_processing"
+OUTPUT_DIR = BASE_DIR / "data" / "llm_enrichment_output"
+CACHE_PATH = BASE_DIR / "data" / "llm_enrichment_cache.sqlite3"
+
+# Dataset -> (record kind, input file, output file, JSON indent of the output)
+DATASETS: Dict[str, Tuple[str, Path, Path, int]] = {
+    'tours': ('tour', PRE_LLM_DIR / "all_cities_tours.json", POST_LLM_DIR / "all_cities_tours.json", 4),
+    'attractions': ('attraction', PRE_LLM_DIR / "tripadvisor_data_final.json",
+                    POST_LLM_DIR / "trip_advisor_data_enriched_final.json", 2),
+}
+
+# Label -> allowed values, in the spelling of the post-LLM files
+LABELS = {
+    'location_setting': ('indoor', 'outdoor'),
+    'budget_tier': ('free', 'low', 'medium', 'high'),
+}
+# Fields of a record the prompt shows; they are also what the cache key covers
+PROMPT_FIELDS = {
+    'tour': ('title', 'price', 'duration', 'meeting_point'),
+    'attraction': ('name', 'attraction_type', 'spec_type'),
+}
+PROMPT_FIELD_LENGTH = 300
+
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 3
+BACKOFF_SECONDS = 1.0
+HTTP_TIMEOUT = 60
+# HTTP statuses worth retrying; anything else is a configuration problem
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+SYSTEM_PROMPT = """You label tourist activities in German cities for a travel recommender.
+For every item, answer:
+- budget_tier: "free" (no admission), "low" (up to about 10 EUR), "medium" (about 10-20 EUR) or "high" (more)
+- location_setting: "indoor" or "outdoor", where the activity mostly takes place
+Reply with one JSON object {"labels": [...]} holding, for each item in order,
+{"id": <the item's id>, "budget_tier": ..., "location_setting": ...} and nothing else."""
+
+PRICE_PATTERN = re.compile(r'(\d[\d,]*(?:\.\d+)?)')
+
+
+class BackendError(Exception):
+    """A model call failed in a way worth retrying (network error, throttling, malformed answer)."""
+
+
+def prompt_item(kind: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields of a record shown to the model, long texts cut."""
+    item = {}
+    for field in PROMPT_FIELDS[kind]:
+        value = record.get(field)
+        if isinstance(value, str) and len(value) > PROMPT_FIELD_LENGTH:
+            value = value[:PROMPT_FIELD_LENGTH] + '...'
+        if value not in (None, '', 'N/A'):
+            item[field] = value
+    return item
+
+
+def build_prompt(kind: str, items: Sequence[Dict[str, Any]]) -> str:
+    numbered = [{'id': index, **item} for index, item in enumerate(items)]
+    return f"Items ({kind}s):\n" + json.dumps(numbered, ensure_ascii=False, indent=1)
+
+
+def cache_key(model: str, kind: str, item: Dict[str, Any]) -> str:
+    """Hash of what decides an answer: the model, the prompt and the shown fields."""
+    payload = json.dumps([model, SYSTEM_PROMPT, kind, item], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def label_problems(labels: Any, count: int) -> List[str]:
+    """What is wrong with a backend answer for `count` items; empty when every item has valid labels."""
+    if not isinstance(labels, list) or len(labels) != count:
+        return [f"expected {count} labels, got {len(labels) if isinstance(labels, list) else type(labels).__name__}"]
+    problems = []
+    for index, entry in enumerate(labels):
+        for field, allowed in LABELS.items():
+            value = entry.get(field) if isinstance(entry, dict) else None
+            if value not in allowed:
+                problems.append(f"item {index}: invalid {field} {value!r}")
+    return problems
+
+
+# --- Backends -----------------------------------------------------------------
+
+class RulesBackend:
+    """Deterministic offline stand-in for the model: price bands and keyword lists."""
+
+    model = 'rules-v1'
+
+    # Tour price (EUR) -> tier: the upper bound of each band, as in SYSTEM_PROMPT
+    PRICE_BANDS = ((0.0, 'free'), (10.0, 'low'), (20.0, 'medium'))
+    INDOOR_WORDS = ('museum', 'gallery', 'exhibition', 'theater', 'theatre', 'cinema', 'planetarium', 'aquarium',
+                    'escape', 'cooking', 'tasting', 'workshop', 'spa', 'thermal', 'bar', 'club', 'pub', 'casino',
+                    'concert', 'show', 'church', 'cathedral', 'castle', 'palace', 'library', 'brewery', 'factory')
+    OUTDOOR_WORDS = ('walk', 'walking', 'bike', 'bicycle', 'cruise', 'boat', 'hop-on', 'bus', 'segway', 'park',
+                     'garden', 'zoo', 'hike', 'hiking', 'kayak', 'trail', 'nature', 'lake', 'river', 'beach',
+                     'square', 'bridge', 'monument', 'memorial', 'tower', 'market', 'street', 'neighborhood', 'day trip')
+    # attraction_type -> (default budget tier, default setting)
+    ATTRACTION_DEFAULTS = {
+        'Museums': ('low', 'indoor'),
+        'Nightlife': ('low', 'indoor'),
+        'Nature & Parks': ('free', 'outdoor'),
+        'Sights & Landmarks': ('free', 'outdoor'),
+    }
+    FREE_WORDS = ('free', 'memorial', 'church', 'cathedral', 'square', 'park', 'garden', 'bridge', 'monument')
+    PAID_WORDS = ('tour', 'ticket', 'zoo', 'aquarium', 'theme park', 'amusement', 'casino', 'spa', 'thermal')
+
+    @staticmethod
+    def _words(item: Dict[str, Any]) -> str:
+        return ' '.join(str(value) for value in item.values()).lower()
+
+    def _setting(self, text: str, default: str) -> str:
+        indoor = sum(word in text for word in self.INDOOR_WORDS)
+        outdoor = sum(word in text for word in self.OUTDOOR_WORDS)
+        if indoor == outdoor:
+            return default
+        return 'indoor' if indoor > outdoor else 'outdoor'
+
+    def _tour_labels(self, item: Dict[str, Any]) -> Dict[str, str]:
+        match = PRICE_PATTERN.search(str(item.get('price', '')))
+        tier = 'high'
+        if match:
+            amount = float(match.group(1).replace(',', ''))
+            tier = next((name for bound, name in self.PRICE_BANDS if amount <= bound), 'high')
+        return {'budget_tier': tier, 'location_setting': self._setting(self._words(item), 'outdoor')}
+
+    def _attraction_labels(self, item: Dict[str, Any]) -> Dict[str, str]:
+        tier, setting = self.ATTRACTION_DEFAULTS.get(item.get('attraction_type'), ('free', 'outdoor'))
+        text = self._words(item)
+        if any(word in text for word in self.PAID_WORDS):
+            tier = 'medium' if tier == 'low' else 'low'
+        elif any(word in text for word in self.FREE_WORDS):
+            tier = 'free'
+        return {'budget_tier': tier, 'location_setting': self._setting(text, setting)}
+
+    def classify(self, kind: str, items: Sequence[Dict[str, Any]]) -> List[Dict[str, str]]:
+        labels_for = self._tour_labels if kind == 'tour' else self._attraction_labels
+        return [labels_for(item) for item in items]
+
+
+class OpenAIBackend:
+    """Chat completions over HTTP (stdlib only), for any OpenAI-compatible server."""
+
+    def __init__(self, endpoint: str, model: str, api_key: Optional[str] = None, timeout: float = HTTP_TIMEOUT):
+        self.url = endpoint.rstrip('/') + '/chat/completions'
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(self.url, data=json.dumps(payload).encode('utf-8'), headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            if e.code in RETRY_STATUSES:
+                raise BackendError(f"HTTP {e.code} from {self.url}") from e
+            raise
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            raise BackendError(f"{self.url}: {e}") from e
+
+    def classify(self, kind: str, items: Sequence[Dict[str, Any]]) -> List[Dict[str, str]]:
+        answer = self._post({
+            'model': self.model,
+            'temperature': 0,
+            'messages': [{'role': 'system', 'content': SYSTEM_PROMPT},
+                         {'role': 'user', 'content': build_prompt(kind, items)}],
+        })
+        try:
+            content = answer['choices'][0]['message']['content']
+            # Some models wrap the JSON in prose or a code fence
+            labels = json.loads(content[content.index('{'):content.rindex('}') + 1])['labels']
+        except (KeyError, IndexError, ValueError, TypeError) as e:
+            raise BackendError(f"unreadable answer: {e}") from e
+        if not isinstance(labels, list) or not all(isinstance(entry, dict) for entry in labels):
+            raise BackendError("labels is not a list of objects")
+        # Answers may come in any order; the ids say which item each one is for
+        if sorted(entry.get('id', -1) for entry in labels) != list(range(len(items))):
+            raise BackendError("label ids do not match the items")
+        return sorted(labels, key=lambda entry: entry['id'])
+
+
+BACKENDS = ('rules', 'openai')
+
+
+def make_backend(name: str, endpoint: Optional[str] = None, model: Optional[str] = None):
+    if name == 'rules':
+        return RulesBackend()
+    return OpenAIBackend(endpoint or os.environ.get('OPENAI_BASE_URL', 'https://api.openai.com/v1'),
+                         model or os.environ.get('LLM_MODEL', 'gpt-4o-mini'), os.environ.get('OPENAI_API_KEY'))
+
+
+# --- Cache --------------------------------------------------------------------
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS labels (
+    key TEXT PRIMARY KEY,
+    labels TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class LabelCache:
+    """Backend answers per record, by cache_key(). Not thread-safe: only the collecting thread uses it."""
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(CACHE_SCHEMA)
+
+    def lookup(self, keys: Sequence[str]) -> Dict[str, Dict[str, str]]:
+        found = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            query = f"SELECT key, labels FROM labels WHERE key IN ({','.join('?' * len(chunk))})"
+            found.update((key, json.loads(labels)) for key, labels in self.connection.execute(query, chunk))
+        return found
+
+    def store(self, entries: Dict[str, Dict[str, str]]):
+        """Committed at once, so an interrupted run keeps every finished batch."""
+        now = time.time()
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO labels (key, labels, created_at) VALUES (?, ?, ?)",
+                                        [(key, json.dumps(labels), now) for key, labels in entries.items()])
+
+    def close(self):
+        self.connection.close()
+
+
+# --- Stage --------------------------------------------------------------------
+
+def classify_with_retries(backend, kind: str, items: Sequence[Dict[str, Any]], retries: int = DEFAULT_RETRIES,
+                          backoff: float = BACKOFF_SECONDS) -> List[Dict[str, str]]:
+    """Labels for a batch, retrying failed calls and invalid answers with exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            labels = backend.classify(kind, items)
+            problems = label_problems(labels, len(items))
+            if not problems:
+                return [{field: entry[field] for field in LABELS} for entry in labels]
+            error = BackendError("; ".join(problems[:3]))
+        except BackendError as e:
+            error = e
+        if attempt < retries:
+            time.sleep(backoff * 2 ** attempt)
+    raise error
+
+
+def enrich(records: Sequence[Dict[str, Any]], kind: str, backend, cache: Optional[LabelCache] = None,
+           batch_size: int = DEFAULT_BATCH_SIZE, workers: int = DEFAULT_WORKERS,
+           retries: int = DEFAULT_RETRIES,
+           prelabel: Optional[Callable[[Dict[str, Any]], Optional[Dict[str, str]]]] = None,
+           ) -> Tuple[List[Optional[Dict[str, str]]], Dict[str, int]]:
+    """Labels of every record (None where the backend kept failing), and counts of what happened.
+
+    prelabel may answer a record itself (e.g. HeuristicLabeler.confident_labels);
+    of the rest, only records without a cached answer are sent, each distinct
+    prompt item once.
+    """
+    prelabelled = [prelabel(record) if prelabel is not None else None for record in records]
+    items = [prompt_item(kind, record) for record in records]
+    keys = [cache_key(backend.model, kind, item) for item in items]
+    answers = cache.lookup([key for key, labels in zip(keys, prelabelled) if labels is None]) \
+        if cache is not None else {}
+    stats = {'records': len(records), 'heuristic': sum(1 for labels in prelabelled if labels is not None),
+             'cached': sum(1 for key, labels in zip(keys, prelabelled) if labels is None and key in answers),
+             'sent': 0, 'batches': 0, 'failed': 0}
+
+    pending = {}
+    for key, item, labels in zip(keys, items, prelabelled):
+        if labels is None and key not in answers:
+            pending.setdefault(key, item)
+    pending_keys = list(pending)
+    batches = [pending_keys[start:start + batch_size] for start in range(0, len(pending_keys), batch_size)]
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        futures = {executor.submit(classify_with_retries, backend, kind, [pending[key] for key in batch], retries): batch
+                   for batch in batches}
+        for future in as_completed(futures):
+            batch = futures[future]
+            stats['batches'] += 1
+            stats['sent'] += len(batch)
+            try:
+                labels = future.result()
+            except (BackendError, urllib.error.HTTPError) as e:
+                stats['failed'] += len(batch)
+                print(f"  ✗ Batch of {len(batch)} {kind}s failed: {e}")
+                continue
+            fresh = dict(zip(batch, labels))
+            answers.update(fresh)
+            if cache is not None:
+                cache.store(fresh)
+
+    return [labels if labels is not None else answers.get(key) for key, labels in zip(keys, prelabelled)], stats
+
+
+def apply_labels(record: Dict[str, Any], labels: Optional[Dict[str, str]]) -> Dict[str, Any]:
+    """The record with its labels after the scraped fields, as in the post-LLM files."""
+    if labels is None:
+        return dict(record)
+    return {**record, 'location_setting': labels['location_setting'], 'budget_tier': labels['budget_tier']}
+
+
+def load_records(path: Path) -> List[Dict[str, Any]]:
+    """Records of a pre-LLM file; the combined tours file maps city -> tours, so its city goes last."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return [{**tour, 'city': city} for city, tours in data.items() for tour in tours]
+    return data
+
+
+def write_json(path: Path, records: List[Dict[str, Any]], indent: int):
+    """Replace path atomically, so readers never see a half-written file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=path.parent, suffix='.tmp', delete=False) as f:
+        json.dump(records, f, indent=indent, ensure_ascii=False)
+    os.replace(f.name, path)
+
+
+def train_heuristics(args):
+    """A HeuristicLabeler trained on the labelled files, read before any output replaces them."""
+    from label_heuristics import DEFAULT_MIN_CONFIDENCE, HeuristicLabeler, load_labelled
+
+    tours, attractions = load_labelled({'tours': args.heuristics_tours, 'attractions': args.heuristics_attractions})
+    thresholds = args.min_confidence
+    if thresholds is None:
+        thresholds = ', '.join(f"{kind}s {'never' if threshold is None else threshold}"
+                               for kind, threshold in DEFAULT_MIN_CONFIDENCE.items())
+    print(f"Heuristics trained on {len(tours)} tours and {len(attractions)} attractions "
+          f"(min confidence {thresholds})")
+    return HeuristicLabeler.train(tours, attractions)
+
+
+def run_dataset(name: str, backend, cache: Optional[LabelCache], args, heuristics=None) -> Dict[str, int]:
+    kind, input_path, output_path, indent = DATASETS[name]
+    input_path = getattr(args, f"{name}_input") or input_path
+    output_path = args.output_dir / output_path.name
+
+    records = load_records(input_path)
+    print(f"\nEnriching {len(records)} {name} from {input_path}...")
+    start = time.perf_counter()
+    prelabel = None
+    if heuristics is not None:
+        def prelabel(record):
+            return heuristics.confident_labels(kind, record, args.min_confidence)
+    labels, stats = enrich(records, kind, backend, cache, args.batch_size, args.workers, args.retries, prelabel)
+    enriched = []
+    for record, record_labels in zip(records, labels):
+        city = record.get('city')
+        # Tours read from the per-city mapping keep city as their last field
+        if kind == 'tour' and 'city' in record:
+            record = {field: value for field, value in record.items() if field != 'city'}
+            enriched.append({**apply_labels(record, record_labels), 'city': city})
+        else:
+            enriched.append(apply_labels(record, record_labels))
+    write_json(output_path, enriched, indent)
+
+    print(f"✓ {stats['records']} {name}: {stats['heuristic']} heuristic, {stats['cached']} cached, {stats['sent']} sent in {stats['batches']} "
+          f"batches, {stats['failed']} failed ({time.perf_counter() - start:.2f}s) -> {output_path}")
+    return stats
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Add budget_tier and location_setting to the scraped data")
+    parser.add_argument('--backend', choices=BACKENDS, default='openai',
+                        help="'rules' runs offline without a model")
+    parser.add_argument('--endpoint', help="OpenAI-compatible base URL (default: $OPENAI_BASE_URL or api.openai.com)")
+    parser.add_argument('--model', help="Model name (default: $LLM_MODEL or gpt-4o-mini)")
+    parser.add_argument('--datasets', nargs='+', choices=list(DATASETS), default=list(DATASETS))
+    parser.add_argument('--tours-input', type=Path)
+    parser.add_argument('--attractions-input', type=Path)
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR,
+                        help=f"Default: {OUTPUT_DIR.relative_to(BASE_DIR)}")
+    parser.add_argument('--overwrite', action='store_true',
+                        help=f"Allow replacing the curated files in {POST_LLM_DIR.relative_to(BASE_DIR)}")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Records per model call")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Model calls in flight at once")
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES, help="Retries of a failed batch")
+    parser.add_argument('--cache', type=Path, default=CACHE_PATH, help="SQLite cache of the answers per record")
+    parser.add_argument('--no-cache', action='store_true', help="Send every record, and do not store the answers")
+    parser.add_argument('--heuristics', action='store_true',
+                        help="Label records the heuristics are confident about without the backend")
+    parser.add_argument('--min-confidence', type=float,
+                        help="Confidence every heuristic label of a record needs "
+                             "(default: 0.96 for tours, attractions always go to the backend)")
+    parser.add_argument('--heuristics-tours', type=Path, help="Labelled tours to train on (default: the post-LLM file)")
+    parser.add_argument('--heuristics-attractions', type=Path,
+                        help="Labelled attractions to train on (default: the post-LLM file)")
+    args = parser.parse_args()
+
+    if args.output_dir.resolve() == POST_LLM_DIR.resolve() and not args.overwrite:
+        parser.error(f"{POST_LLM_DIR.relative_to(BASE_DIR)} holds the curated labels; pass --overwrite to replace them")
+    return args
+
+
+def main():
+    args = parse_args()
+    backend = make_backend(args.backend, args.endpoint, args.model)
+    cache = None if args.no_cache else LabelCache(str(args.cache))
+    print(f"Backend: {args.backend} ({backend.model})")
+    heuristics = train_heuristics(args) if args.heuristics else None
+    try:
+        failed = sum(run_dataset(name, backend, cache, args, heuristics)['failed'] for name in args.datasets)
+    finally:
+        if cache is not None:
+            cache.close()
+    if failed:
+        raise SystemExit(f"{failed} records left without labels; re-run to retry them")
+
+
+if __name__ == '__main__':
+    main()
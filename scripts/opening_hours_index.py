@@ -0,0 +1,226 @@
+"""
+Interval index over the OperatingHours individuals, for "open at" queries.
+
+Each OperatingHours entry becomes an interval on a week timeline in minutes
+(Monday 00:00 = 0, Sunday 24:00 = 10080). A closing time at or before the
+opening time is an overnight span that ends the next day (Sunday wraps to
+Monday), and equal times mean open around the clock. These are the cases the
+web app's `opensAt <= hour < closesAt` string FILTER gets wrong.
+
+Each venue's intervals are merged into disjoint spans, so a bar open
+Friday 20:00-02:00 and Saturday 00:00-... counts as one continuous opening.
+The spans are stored in a centered interval tree, which answers "open on
+<day> at <time>" in O(log n + k) and "open for at least N minutes from
+<time>" with the same bound on the candidates.
+
+    python scripts/opening_hours_index.py --day saturday --time 23:30 [--minutes 90]
+"""
+
+import argparse
+import time
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+BASE_DIR = Path(__file__).parent.parent
+ONTOLOGY_PATH = BASE_DIR / "ontologies" / "populated" / "german_city_tourism_with_rules.owl"
+
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# (venue IRI or name, day, opensAt, closesAt) with times as the ontology's HH:MM strings
+HoursEntry = Tuple[str, str, str, str]
+Interval = Tuple[int, int, str]
+
+
+def day_index(day: str) -> int:
+    """Position in the week of 'monday', 'Monday' or 'day_monday'."""
+    name = day.lower()
+    if name.startswith('day_'):
+        name = name[len('day_'):]
+    return DAYS.index(name)
+
+
+def parse_minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.strip().split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def week_minute(day: str, hhmm: str) -> int:
+    return day_index(day) * MINUTES_PER_DAY + parse_minutes(hhmm)
+
+
+def entry_span(day: str, opens_at: str, closes_at: str) -> Tuple[int, int]:
+    """[start, end) on the week timeline; end may pass the end of the week."""
+    start = week_minute(day, opens_at)
+    length = (parse_minutes(closes_at) - parse_minutes(opens_at)) % MINUTES_PER_DAY
+    return start, start + (length or MINUTES_PER_DAY)
+
+
+def merge_spans(spans: Iterable[Tuple[int, int]]) -> List[Tuple[int, float]]:
+    """Disjoint spans covering the same minutes, with time that runs past Sunday
+    midnight continuing into Monday. A venue open all week gets an infinite end."""
+    pieces = []
+    for start, end in spans:
+        if end > MINUTES_PER_WEEK:
+            pieces += [(start, MINUTES_PER_WEEK), (0, end - MINUTES_PER_WEEK)]
+        else:
+            pieces.append((start, end))
+
+    merged: List[List] = []
+    for start, end in sorted(pieces):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    if len(merged) == 1 and merged[0] == [0, MINUTES_PER_WEEK]:
+        return [(0, float('inf'))]
+    if len(merged) > 1 and merged[0][0] == 0 and merged[-1][1] == MINUTES_PER_WEEK:
+        # Sunday night runs on into Monday morning
+        merged[-1][1] = MINUTES_PER_WEEK + merged[0][1]
+    return [(start, end) for start, end in merged]
+
+
+class _Node:
+    """Intervals containing `center`, sorted by start and by end, plus subtrees."""
+
+    __slots__ = ('center', 'starts', 'by_start', 'ends', 'by_end', 'left', 'right')
+
+    def __init__(self, intervals: List[Interval]):
+        # A start as the center guarantees at least one interval stays in this node
+        starts = sorted(iv[0] for iv in intervals)
+        self.center = starts[len(starts) // 2]
+        here = [iv for iv in intervals if iv[0] <= self.center < iv[1]]
+        left = [iv for iv in intervals if iv[1] <= self.center]
+        right = [iv for iv in intervals if iv[0] > self.center]
+
+        self.by_start = sorted(here, key=lambda iv: iv[0])
+        self.starts = [iv[0] for iv in self.by_start]
+        # Ascending by end, so a bisect finds the ones ending after a point
+        self.by_end = sorted(here, key=lambda iv: iv[1])
+        self.ends = [iv[1] for iv in self.by_end]
+        self.left = _Node(left) if left else None
+        self.right = _Node(right) if right else None
+
+
+class OpeningHoursIndex:
+    """Per-venue opening spans on a week timeline, in a centered interval tree."""
+
+    def __init__(self, entries: Iterable[HoursEntry]):
+        self.entries = list(entries)
+        spans: Dict[str, List[Tuple[int, int]]] = {}
+        self.days_with_hours: Dict[int, Set[str]] = {day: set() for day in range(len(DAYS))}
+        for venue, day, opens_at, closes_at in self.entries:
+            spans.setdefault(venue, []).append(entry_span(day, opens_at, closes_at))
+            self.days_with_hours[day_index(day)].add(venue)
+
+        self.venues = sorted(spans)
+        self.intervals: List[Interval] = [(start, end, venue) for venue in self.venues
+                                          for start, end in merge_spans(spans[venue])]
+        self._root = _Node(self.intervals) if self.intervals else None
+
+    def __len__(self) -> int:
+        return len(self.intervals)
+
+    @classmethod
+    def from_ontology(cls, ontology_path: Path = ONTOLOGY_PATH) -> 'OpeningHoursIndex':
+        from owlready2 import World
+
+        world = World()
+        onto = world.get_ontology(f"file://{ontology_path}").load()
+
+        def entries():
+            for venue in onto.search(hasOperatingHours="*"):
+                for hours in venue.hasOperatingHours:
+                    if hours.opensAt is None or hours.closesAt is None:
+                        continue
+                    for day in hours.appliesToDay:
+                        yield venue.iri, day.name, hours.opensAt, hours.closesAt
+
+        return cls(entries())
+
+    def _stab(self, point: int, min_end: int) -> List[str]:
+        """Venues with a span where start <= point and end >= min_end (min_end > point)."""
+        found = []
+        node = self._root
+        while node is not None:
+            if point < node.center:
+                # Every interval here ends after the center, so after the point too
+                for start, end, venue in node.by_start[:bisect_right(node.starts, point)]:
+                    if end >= min_end:
+                        found.append(venue)
+                node = node.left
+            else:
+                # Every interval here starts at or before the center, so before the point too
+                found += [venue for _, _, venue in node.by_end[bisect_left(node.ends, min_end):]]
+                node = node.right
+        return found
+
+    def open_at(self, day: str, hhmm: str) -> List[str]:
+        """Venues open on `day` at `hhmm`, including spans started the day before."""
+        point = week_minute(day, hhmm) % MINUTES_PER_WEEK
+        return sorted(self._stab(point, point + 1))
+
+    def open_for(self, day: str, hhmm: str, minutes: int) -> List[str]:
+        """Venues open on `day` at `hhmm` and still open `minutes` later."""
+        point = week_minute(day, hhmm) % MINUTES_PER_WEEK
+        return sorted(self._stab(point, point + max(minutes, 1)))
+
+    def has_hours(self, day: str) -> Set[str]:
+        """Venues with an OperatingHours entry for `day`."""
+        return self.days_with_hours[day_index(day)]
+
+
+def string_filter_open_at(entries: Iterable[HoursEntry], day: str, hhmm: str) -> Set[str]:
+    """Venues the web app's `opensAt <= hour < closesAt` FILTER accepts, by scanning."""
+    position = day_index(day)
+    return {venue for venue, entry_day, opens_at, closes_at in entries
+            if day_index(entry_day) == position and opens_at <= hhmm < closes_at}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Query the opening-hours interval index")
+    parser.add_argument('--ontology', type=Path, default=ONTOLOGY_PATH)
+    parser.add_argument('--day', required=True, choices=DAYS)
+    parser.add_argument('--time', required=True, help="HH:MM")
+    parser.add_argument('--minutes', type=int, help="Only venues still open this many minutes later")
+    parser.add_argument('--show', type=int, default=20, help="Venues to print")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print(f"Loading ontology from: {args.ontology}")
+    start = time.perf_counter()
+    index = OpeningHoursIndex.from_ontology(args.ontology)
+    print(f"Indexed {len(index)} opening spans of {len(index.venues)} venues in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    if args.minutes:
+        venues = index.open_for(args.day, args.time, args.minutes)
+        label = f"open on {args.day} at {args.time} for at least {args.minutes} minutes"
+    else:
+        venues = index.open_at(args.day, args.time)
+        label = f"open on {args.day} at {args.time}"
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{len(venues)} venues {label} ({elapsed * 1000:.3f} ms)")
+    for venue in venues[:args.show]:
+        print(f"  {venue.rsplit('#', 1)[-1]}")
+    if len(venues) > args.show:
+        print(f"  ... and {len(venues) - args.show} more")
+
+    if not args.minutes:
+        start = time.perf_counter()
+        by_string = string_filter_open_at(index.entries, args.day, args.time)
+        elapsed = time.perf_counter() - start
+        missed = set(venues) - by_string
+        print(f"\nString FILTER scan: {len(by_string)} venues ({elapsed * 1000:.3f} ms), "
+              f"{len(missed)} open venues missed (overnight spans), {len(by_string - set(venues))} extra")
+
+
+if __name__ == '__main__':
+    main()
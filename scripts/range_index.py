@@ -0,0 +1,221 @@
+"""
+Sorted numeric indexes over the tours' normalized duration and price, for
+range queries such as "under 3 hours and under €30".
+
+abox_population.py parses each tour's duration text into
+hasMinDurationMinutes / hasMaxDurationMinutes on its Duration individual, and
+its price into hasPriceCurrency / hasPriceAmount. A NumericIndex keeps one of
+those fields sorted alongside the tours, so the tours within [low, high] are
+one slice found with two bisects: O(log n) to count, O(log n + k) to list.
+TourRangeIndex holds the duration indexes and one price index per currency; a
+query counts every constrained range first, lists only the smallest and
+checks the remaining bounds per candidate.
+
+A duration bound holds for the tour's whole range: at most 180 minutes means
+its longest duration is, at least 60 minutes means its shortest is.
+
+    python scripts/range_index.py --max-minutes 180 --max-price 30
+"""
+
+import argparse
+import json
+import time
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from abox_population import parse_duration, parse_price, sanitize_name_for_iri
+
+BASE_DIR = Path(__file__).parent.parent
+ONTOLOGY_PATH = BASE_DIR / "ontologies" / "populated" / "german_city_tourism_with_rules.owl"
+
+DEFAULT_CURRENCY = 'EUR'
+NORMALIZED_PROPERTIES = ('hasMinDurationMinutes', 'hasMaxDurationMinutes', 'hasPriceCurrency', 'hasPriceAmount')
+
+# (tour local name, (min, max) minutes or None, (currency, amount) or None)
+TourValues = Tuple[str, Optional[Tuple[int, int]], Optional[Tuple[str, float]]]
+
+
+class NumericIndex:
+    """Values of one numeric field in ascending order, with the tour each belongs to."""
+
+    def __init__(self, pairs: Iterable[Tuple[float, str]]):
+        ordered = sorted(pairs)
+        self.values = [value for value, _ in ordered]
+        self.tours = [tour for _, tour in ordered]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _slice(self, low: Optional[float], high: Optional[float]) -> Tuple[int, int]:
+        start = bisect_left(self.values, low) if low is not None else 0
+        end = bisect_right(self.values, high) if high is not None else len(self.values)
+        return start, max(start, end)
+
+    def count(self, low: Optional[float] = None, high: Optional[float] = None) -> int:
+        """Tours with low <= value <= high (an omitted bound is open)."""
+        start, end = self._slice(low, high)
+        return end - start
+
+    def range(self, low: Optional[float] = None, high: Optional[float] = None) -> List[str]:
+        start, end = self._slice(low, high)
+        return self.tours[start:end]
+
+
+class TourRangeIndex:
+    """Duration and per-currency price indexes over the tours."""
+
+    def __init__(self, tours: Iterable[TourValues]):
+        self.values: Dict[str, Tuple[Optional[Tuple[int, int]], Optional[Tuple[str, float]]]] = {
+            tour: (minutes, price) for tour, minutes, price in tours}
+        self.min_minutes = NumericIndex((minutes[0], tour) for tour, (minutes, _) in self.values.items() if minutes)
+        self.max_minutes = NumericIndex((minutes[1], tour) for tour, (minutes, _) in self.values.items() if minutes)
+        prices: Dict[str, List[Tuple[float, str]]] = {}
+        for tour, (_, price) in self.values.items():
+            if price:
+                prices.setdefault(price[0], []).append((price[1], tour))
+        self.prices = {currency: NumericIndex(pairs) for currency, pairs in prices.items()}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @classmethod
+    def from_ontology(cls, ontology_path: Path = ONTOLOGY_PATH) -> 'TourRangeIndex':
+        from owlready2 import World
+
+        world = World()
+        onto = world.get_ontology(f"file://{ontology_path}").load()
+        missing = [name for name in NORMALIZED_PROPERTIES if onto[name] is None]
+        if missing:
+            raise ValueError(f"{ontology_path} has no {', '.join(missing)}; rebuild it with abox_population.py "
+                             f"(and rule creation), or index the tours JSON with --tours")
+
+        def tours():
+            for tour in onto.Tour.instances():
+                duration = tour.hasDuration
+                minutes = None
+                if duration is not None and duration.hasMinDurationMinutes is not None \
+                        and duration.hasMaxDurationMinutes is not None:
+                    minutes = (duration.hasMinDurationMinutes, duration.hasMaxDurationMinutes)
+                price = None
+                if tour.hasPriceCurrency is not None and tour.hasPriceAmount is not None:
+                    price = (tour.hasPriceCurrency, float(tour.hasPriceAmount))
+                yield tour.name, minutes, price
+
+        return cls(tours())
+
+    @classmethod
+    def from_records(cls, tours_data: List[Dict]) -> 'TourRangeIndex':
+        """Index the enriched tours JSON directly, under the IRIs populate_tours gives them."""
+        def tours():
+            for idx, tour_data in enumerate(tours_data, 1):
+                iri_name = f"tour_{sanitize_name_for_iri(tour_data.get('title', f'tour_{idx}'))}_{idx}"
+                duration, price = tour_data.get('duration'), tour_data.get('price')
+                yield (iri_name, parse_duration(duration) if duration else None,
+                       parse_price(price) if price else None)
+
+        return cls(tours())
+
+    def matches(self, tour: str, min_minutes: Optional[int] = None, max_minutes: Optional[int] = None,
+                min_price: Optional[float] = None, max_price: Optional[float] = None,
+                currency: str = DEFAULT_CURRENCY) -> bool:
+        """Whether one tour satisfies every given bound; a bound on a value it lacks fails."""
+        minutes, price = self.values[tour]
+        if min_minutes is not None or max_minutes is not None:
+            if minutes is None:
+                return False
+            if min_minutes is not None and minutes[0] < min_minutes:
+                return False
+            if max_minutes is not None and minutes[1] > max_minutes:
+                return False
+        if min_price is not None or max_price is not None:
+            if price is None or price[0] != currency:
+                return False
+            if min_price is not None and price[1] < min_price:
+                return False
+            if max_price is not None and price[1] > max_price:
+                return False
+        return True
+
+    def query(self, min_minutes: Optional[int] = None, max_minutes: Optional[int] = None,
+              min_price: Optional[float] = None, max_price: Optional[float] = None,
+              currency: str = DEFAULT_CURRENCY) -> List[str]:
+        """Tours within every given bound, sorted."""
+        ranges = []
+        if min_minutes is not None:
+            ranges.append((self.min_minutes, min_minutes, None))
+        if max_minutes is not None:
+            ranges.append((self.max_minutes, None, max_minutes))
+        if min_price is not None or max_price is not None:
+            ranges.append((self.prices.get(currency, NumericIndex(())), min_price, max_price))
+        if not ranges:
+            return sorted(self.values)
+
+        index, low, high = min(ranges, key=lambda entry: entry[0].count(entry[1], entry[2]))
+        bounds = dict(min_minutes=min_minutes, max_minutes=max_minutes, min_price=min_price,
+                      max_price=max_price, currency=currency)
+        return sorted(tour for tour in index.range(low, high) if self.matches(tour, **bounds))
+
+
+def scan_query(index: TourRangeIndex, **bounds) -> List[str]:
+    """The same query by checking every tour, as a FILTER over all of them would."""
+    return sorted(tour for tour in index.values if index.matches(tour, **bounds))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Query tours by duration and price range")
+    parser.add_argument('--ontology', type=Path, default=ONTOLOGY_PATH)
+    parser.add_argument('--tours', type=Path, help="Index this enriched tours JSON instead of the ontology")
+    parser.add_argument('--min-minutes', type=int, help="Shortest duration at least this long")
+    parser.add_argument('--max-minutes', type=int, help="Longest duration at most this long")
+    parser.add_argument('--min-price', type=float)
+    parser.add_argument('--max-price', type=float)
+    parser.add_argument('--currency', default=DEFAULT_CURRENCY, help=f"ISO code of the prices (default: {DEFAULT_CURRENCY})")
+    parser.add_argument('--show', type=int, default=20, help="Tours to print")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    start = time.perf_counter()
+    if args.tours:
+        print(f"Loading tours from: {args.tours}")
+        with open(args.tours, 'r', encoding='utf-8') as f:
+            index = TourRangeIndex.from_records(json.load(f))
+    else:
+        print(f"Loading ontology from: {args.ontology}")
+        try:
+            index = TourRangeIndex.from_ontology(args.ontology)
+        except ValueError as e:
+            raise SystemExit(f"✗ {e}")
+    print(f"Indexed {len(index)} tours in {time.perf_counter() - start:.2f}s: "
+          f"{len(index.max_minutes)} with a duration, "
+          + ", ".join(f"{len(prices)} priced in {currency}" for currency, prices in sorted(index.prices.items())))
+
+    bounds = dict(min_minutes=args.min_minutes, max_minutes=args.max_minutes, min_price=args.min_price,
+                  max_price=args.max_price, currency=args.currency)
+    start = time.perf_counter()
+    tours = index.query(**bounds)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{len(tours)} tours matching ({elapsed * 1000:.3f} ms)")
+    for tour in tours[:args.show]:
+        minutes, price = index.values[tour]
+        duration = f"{minutes[0]}-{minutes[1]} min" if minutes else "no duration"
+        amount = f"{price[1]:g} {price[0]}" if price else "no price"
+        print(f"  {tour}  ({duration}, {amount})")
+    if len(tours) > args.show:
+        print(f"  ... and {len(tours) - args.show} more")
+
+    start = time.perf_counter()
+    scanned = scan_query(index, **bounds)
+    elapsed = time.perf_counter() - start
+    print(f"\nFull scan: {len(scanned)} tours ({elapsed * 1000:.3f} ms)"
+          f"{'' if scanned == tours else ', DIFFERENT from the index'}")
+    if scanned != tours:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
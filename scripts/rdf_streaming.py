@@ -0,0 +1,275 @@
+"""
+Streaming N-Triples / Turtle export of the ABox, and a matching loader.
+
+The writer emits the triples of each batch of records as soon as they are
+produced, so memory stays bounded by the batch size (plus the set of shared
+language / operating-hours statements already written) instead of the whole
+graph. Files ending in `.gz` are gzip-compressed.
+"""
+
+import gzip
+import io
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from owlready2 import World, locstr
+from owlready2.base import to_literal
+
+from abox_population import NAMED_INDIVIDUAL, RDF_TYPE, SHARED_PREFIXES, Triple
+
+RDF = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'
+OWL = 'http://www.w3.org/2002/07/owl#'
+XSD = 'http://www.w3.org/2001/XMLSchema#'
+
+LITERAL_DATATYPES = {bool: 'boolean', int: 'integer', float: 'decimal', str: 'string'}
+# Datatypes the loader converts to Python values, so Owlready2 stores them natively
+_NATIVE_DATATYPES = {None, f"{XSD}string", f"{XSD}boolean", f"{XSD}integer", f"{XSD}int", f"{XSD}long",
+                     f"{XSD}decimal", f"{XSD}double", f"{XSD}float"}
+
+# Rows inserted into the quadstore per executemany call when loading
+LOAD_BATCH_SIZE = 50000
+
+# Local names that can be written as Turtle prefixed names without escaping
+_SAFE_LOCAL_NAME = re.compile(r'^\w[\w-]*$')
+_IRI_ESCAPES = re.compile(r'[\x00-\x20<>"{}|^`\\]')
+_LITERAL_ESCAPES = {'\\': '\\\\', '"': '\\"', '\n': '\\n', '\r': '\\r'}
+
+
+def _escape_iri(iri: str) -> str:
+    return _IRI_ESCAPES.sub(lambda m: f"\\u{ord(m.group()):04X}", iri)
+
+
+def _escape_literal(value: str) -> str:
+    return ''.join(_LITERAL_ESCAPES.get(char, char) for char in value)
+
+
+def output_format(path: Path) -> str:
+    """'nt' or 'ttl', ignoring a trailing .gz."""
+    suffixes = [suffix for suffix in path.suffixes if suffix != '.gz']
+    return 'ttl' if suffixes and suffixes[-1] == '.ttl' else 'nt'
+
+
+def _open_binary(path: Path, mode: str):
+    return gzip.open(path, mode) if path.suffix == '.gz' else open(path, mode)
+
+
+class TripleStreamWriter:
+    """Write ontology triples to an N-Triples or Turtle file as they are produced."""
+
+    def __init__(self, path: Path, base_iri: str):
+        self.path = path
+        self.base_iri = base_iri
+        self.turtle = output_format(path) == 'ttl'
+        self.count = 0
+        # Shared individuals are re-emitted by every record that uses them
+        self._shared_written: Set[tuple] = set()
+        self._file = io.TextIOWrapper(_open_binary(path, 'wb'), encoding='utf-8', newline='\n')
+
+        if self.turtle:
+            self._file.write(f"@prefix : <{base_iri}> .\n")
+            self._file.write(f"@prefix rdf: <{RDF}> .\n")
+            self._file.write(f"@prefix owl: <{OWL}> .\n")
+            self._file.write(f"@prefix xsd: <{XSD}> .\n\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def write_ontology(self, onto):
+        """Write the current content of an Owlready2 ontology (TBox and shared individuals).
+
+        N-Triples lines are valid Turtle, so the same dump works for both formats.
+        """
+        buffer = io.BytesIO()
+        onto.save(file=buffer, format="ntriples")
+        text = buffer.getvalue().decode('utf-8')
+        self._file.write(text)
+        if text and not text.endswith('\n'):
+            self._file.write('\n')
+        self.count += text.count('\n')
+
+    def _term(self, name: str) -> str:
+        if name == RDF_TYPE:
+            return 'a' if self.turtle else f"<{RDF}type>"
+        if name == NAMED_INDIVIDUAL:
+            return 'owl:NamedIndividual' if self.turtle else f"<{OWL}NamedIndividual>"
+        if self.turtle and _SAFE_LOCAL_NAME.match(name):
+            return f":{name}"
+        return f"<{_escape_iri(self.base_iri + name)}>"
+
+    def _literal(self, value) -> str:
+        if isinstance(value, locstr) and value.lang:
+            return f'"{_escape_literal(str(value))}"@{value.lang}'
+        datatype = LITERAL_DATATYPES.get(type(value), 'string')
+        lexical = str(value).lower() if isinstance(value, bool) else str(value)
+        datatype_term = f"xsd:{datatype}" if self.turtle else f"<{XSD}{datatype}>"
+        return f'"{_escape_literal(lexical)}"^^{datatype_term}'
+
+    def write_triples(self, triples: Iterable[Triple]):
+        lines = []
+        for triple in triples:
+            subject, predicate, obj, is_literal = triple
+            if subject.startswith(SHARED_PREFIXES):
+                if triple in self._shared_written:
+                    continue
+                self._shared_written.add(triple)
+            object_term = self._literal(obj) if is_literal else self._term(obj)
+            lines.append(f"{self._term(subject)} {self._term(predicate)} {object_term} .\n")
+        self._file.writelines(lines)
+        self.count += len(lines)
+
+
+# --- Loader ---------------------------------------------------------------
+
+_TERM = (r'<[^>]*>'
+         r'|_:\S+'
+         r'|"(?:[^"\\]|\\.)*"(?:@[A-Za-z][\w-]*|\^\^(?:<[^>]*>|[\w-]*:[\w-]*))?'
+         r'|a(?=\s)'
+         r'|[\w-]*:[\w-]*')
+_STATEMENT = re.compile(rf'^\s*({_TERM})\s+({_TERM})\s+({_TERM})\s*\.\s*$')
+_PREFIX = re.compile(r'^\s*@prefix\s+([\w-]*):\s*<([^>]*)>\s*\.\s*$')
+_LITERAL = re.compile(r'^"((?:[^"\\]|\\.)*)"(?:@([A-Za-z][\w-]*)|\^\^(.+))?$')
+_UNESCAPES = re.compile(r'\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)')
+_SIMPLE_UNESCAPES = {'n': '\n', 'r': '\r', 't': '\t', 'b': '\b', 'f': '\f', '"': '"', "'": "'", '\\': '\\'}
+
+
+def _unescape(text: str) -> str:
+    def replace(match):
+        code = match.group(1)
+        if code[0] in 'uU' and len(code) > 1:
+            return chr(int(code[1:], 16))
+        return _SIMPLE_UNESCAPES.get(code, code)
+    return _UNESCAPES.sub(replace, text) if '\\' in text else text
+
+
+def _literal_value(lexical: str, datatype: Optional[str]):
+    if datatype in (f"{XSD}integer", f"{XSD}int", f"{XSD}long"):
+        return int(lexical)
+    if datatype in (f"{XSD}decimal", f"{XSD}double", f"{XSD}float"):
+        return float(lexical)
+    if datatype == f"{XSD}boolean":
+        return lexical == 'true'
+    return lexical
+
+
+def iter_statements(path: Path) -> Iterator[Tuple[str, str, Tuple]]:
+    """Parse an N-Triples file, or a Turtle file with one statement per line as
+    written by TripleStreamWriter.
+
+    Yields (subject, predicate, object) where subject and predicate are IRIs or
+    `_:` blank node labels, and object is ('iri', iri) or ('literal', lexical,
+    datatype, lang).
+    """
+    prefixes: Dict[str, str] = {}
+
+    def expand(term: str) -> str:
+        if term.startswith('<'):
+            return _unescape(term[1:-1])
+        if term.startswith('_:'):
+            return term
+        if term == 'a':
+            return f"{RDF}type"
+        prefix, _, local = term.partition(':')
+        return prefixes[prefix] + local
+
+    with io.TextIOWrapper(_open_binary(path, 'rb'), encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            prefix_match = _PREFIX.match(line)
+            if prefix_match:
+                prefixes[prefix_match.group(1)] = prefix_match.group(2)
+                continue
+            match = _STATEMENT.match(line)
+            if not match:
+                raise ValueError(f"{path}:{line_number}: unsupported statement: {line.strip()[:80]}")
+            subject, predicate, obj = match.groups()
+            if obj.startswith('"'):
+                literal = _LITERAL.match(obj)
+                datatype = expand(literal.group(3)) if literal.group(3) else None
+                parsed_obj = ('literal', _unescape(literal.group(1)), datatype, literal.group(2))
+            else:
+                parsed_obj = ('iri', expand(obj))
+            yield expand(subject), expand(predicate), parsed_obj
+
+
+def load_triples(path: Path, world: Optional[World] = None):
+    """Load a file written by TripleStreamWriter (or any line-based N-Triples file)
+    straight into an Owlready2 quadstore, in batches.
+
+    The first `owl:Ontology` statement decides the ontology the triples belong
+    to; it must come before the first full batch. owl:imports are recorded but
+    not followed. Returns the ontology.
+    """
+    world = world or World()
+    onto = None
+    storids: Dict[str, int] = {}
+    blank_nodes: Dict[str, int] = {}
+    obj_rows: List[tuple] = []
+    data_rows: List[tuple] = []
+    pending: List[Tuple[str, str, Tuple]] = []
+
+    def resolve(term: str) -> int:
+        if term.startswith('_:'):
+            if term not in blank_nodes:
+                blank_nodes[term] = world.new_blank_node()
+            return blank_nodes[term]
+        storid = storids.get(term)
+        if storid is None:
+            storid = storids[term] = world._abbreviate(term)
+        return storid
+
+    def flush():
+        db = onto.graph.db
+        db.executemany("INSERT INTO objs VALUES (?, ?, ?, ?)", obj_rows)
+        db.executemany("INSERT INTO datas VALUES (?, ?, ?, ?, ?)", data_rows)
+        obj_rows.clear()
+        data_rows.clear()
+
+    def add(subject: str, predicate: str, obj: Tuple):
+        c = onto.graph.c
+        s, p = resolve(subject), resolve(predicate)
+        if obj[0] == 'iri':
+            obj_rows.append((c, s, p, resolve(obj[1])))
+            return
+        _, lexical, datatype, lang = obj
+        if lang:
+            o, d = to_literal(locstr(lexical, lang))
+        elif datatype in _NATIVE_DATATYPES:
+            o, d = to_literal(_literal_value(lexical, datatype))
+        else:
+            o, d = lexical, resolve(datatype)
+        data_rows.append((c, s, p, o, d))
+
+    for subject, predicate, obj in iter_statements(path):
+        if onto is None:
+            if predicate == f"{RDF}type" and obj == ('iri', f"{OWL}Ontology"):
+                onto = world.get_ontology(subject)
+                for statement in pending:
+                    add(*statement)
+                pending.clear()
+                # Owlready2 may already have declared the new ontology itself
+                declared = onto.graph.db.execute(
+                    "SELECT 1 FROM objs WHERE c=? AND s=? AND p=? AND o=?",
+                    (onto.graph.c, resolve(subject), resolve(predicate), resolve(obj[1]))).fetchone()
+                if declared:
+                    continue
+            else:
+                pending.append((subject, predicate, obj))
+                if len(pending) >= LOAD_BATCH_SIZE:
+                    raise ValueError(f"{path}: no owl:Ontology declaration in the first {LOAD_BATCH_SIZE} statements")
+                continue
+        add(subject, predicate, obj)
+        if len(obj_rows) + len(data_rows) >= LOAD_BATCH_SIZE:
+            flush()
+
+    if onto is None:
+        raise ValueError(f"{path}: no owl:Ontology declaration")
+    flush()
+    return onto
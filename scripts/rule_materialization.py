@@ -0,0 +1,587 @@
+"""
+Materialize the SWRL rules of rules_creation.ipynb without HermiT.
+
+Adds the same rule classes and Imp rules to the populated ontology as the
+notebook, then applies the rules with a forward-chaining engine over the
+Owlready2 quadstore instead of `sync_reasoner_hermit()`: the class and
+property facts the rules mention are loaded once into indexes (members per
+class, subject->objects and object->subjects per property), and the rules are
+evaluated semi-naively until no new fact appears. The inferred class
+memberships are written as rdf:type triples into the saved ontology.
+
+Only what the rules need is reasoned about: class membership follows the
+asserted rdfs:subClassOf hierarchy and property atoms follow
+rdfs:subPropertyOf. Equivalent classes, property characteristics and
+consistency are not checked, as the rules do not depend on them.
+
+`RuleEngine.maintain()` updates the conclusions after triples are added or
+retracted, which abox_population.py --incremental --rules uses so a small
+change to the data does not re-run the rules over the whole ABox.
+"""
+
+import argparse
+import re
+import time
+import types
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from owlready2 import *
+from owlready2.base import rdf_type, rdfs_subclassof, rdfs_subpropertyof
+
+BASE_DIR = Path(__file__).parent.parent
+ONTOLOGY_PATH = BASE_DIR / "ontologies" / "populated" / "german_city_tourism_populated.owl"
+OUTPUT_PATH = BASE_DIR / "ontologies" / "populated" / "german_city_tourism_with_rules.owl"
+# Where sync_reasoner() puts inferred facts
+INFERENCES_IRI = "http://inferrences/"
+
+# Rule classes: name -> (parent class, docstring), as defined in rules_creation.ipynb
+RULE_CLASSES = {
+    'BudgetFriendlyActivity': ('Activity', "An activity that is free or low-cost, suitable for budget-conscious travelers."),
+    'BadWeatherOption': ('Activity', "An indoor activity suitable for rainy or bad weather days."),
+    'EnglishFriendlyTour': ('Tour', "A tour that is available in English, accessible for international tourists."),
+    'WeekendHours': ('OperatingHours', "Operating hours that apply to weekend days."),
+    'OpenOnWeekend': ('PhysicalVenue', "A physical venue that is open on weekends."),
+}
+
+RULES = [
+    "Activity(?a), hasBudget(?a, budget_free) -> BudgetFriendlyActivity(?a)",
+    "Activity(?a), hasBudget(?a, budget_low) -> BudgetFriendlyActivity(?a)",
+    "Activity(?a), hasLocationSetting(?a, location_indoor) -> BadWeatherOption(?a)",
+    "Tour(?t), hasLanguage(?t, lang_english) -> EnglishFriendlyTour(?t)",
+    "OperatingHours(?oh), appliesToDay(?oh, day_saturday) -> WeekendHours(?oh)",
+    "OperatingHours(?oh), appliesToDay(?oh, day_sunday) -> WeekendHours(?oh)",
+    "PhysicalVenue(?v), hasOperatingHours(?v, ?oh), WeekendHours(?oh) -> OpenOnWeekend(?v)",
+]
+
+_ATOM = re.compile(r'\s*([\w.-]+)\s*\(([^)]*)\)\s*')
+
+# (predicate name, arguments); one argument for a class atom, two for a property atom.
+# Arguments starting with '?' are variables, the others are individual names.
+Atom = Tuple[str, Tuple[str, ...]]
+# A derived fact: (predicate storid, subject storid, object storid or None for class membership)
+Fact = Tuple[int, int, Optional[int]]
+
+
+def parse_atoms(text: str) -> List[Atom]:
+    atoms = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _ATOM.match(text, position)
+        if not match:
+            raise ValueError(f"Cannot parse SWRL atom at: {text[position:]!r}")
+        args = tuple(arg.strip() for arg in match.group(2).split(','))
+        if len(args) not in (1, 2):
+            raise ValueError(f"Unsupported atom (builtins are not supported): {match.group(0).strip()}")
+        atoms.append((match.group(1), args))
+        position = match.end()
+        if position < len(text):
+            if text[position] not in ',^':
+                raise ValueError(f"Expected ',' between atoms in: {text!r}")
+            position += 1
+    return atoms
+
+
+class Rule:
+    """A Horn rule parsed from Owlready2's SWRL syntax ("B1(?x), B2(?x, c) -> H(?x)")."""
+
+    def __init__(self, text: str):
+        if '->' not in text:
+            raise ValueError(f"Missing '->' in rule: {text!r}")
+        body, head = text.split('->', 1)
+        self.text = text
+        self.body = parse_atoms(body)
+        self.head = parse_atoms(head)
+        bound = {arg for _, args in self.body for arg in args if arg.startswith('?')}
+        unbound = {arg for _, args in self.head for arg in args if arg.startswith('?')} - bound
+        if unbound:
+            raise ValueError(f"Head variables {sorted(unbound)} do not appear in the body of: {text!r}")
+
+    def __repr__(self):
+        return f"Rule({self.text!r})"
+
+
+def join_order(body: List[Atom], first: Optional[int] = None, bound: Optional[Set[str]] = None) -> List[int]:
+    """Order the body atoms so each one is looked up with as many arguments bound as possible.
+
+    Fully bound atoms (membership checks) go first, then the ones with the most
+    bound arguments, constants included; between equals, property atoms go first
+    since they are answered from an index, while an unbound class atom is a scan.
+    """
+    bound = set(bound or ())
+    order: List[int] = []
+    remaining = list(range(len(body)))
+    if first is not None:
+        order.append(first)
+        remaining.remove(first)
+        bound |= set(body[first][1])
+
+    while remaining:
+        def score(position: int) -> Tuple[bool, int, int]:
+            args = body[position][1]
+            known = sum(1 for arg in args if arg in bound or not arg.startswith('?'))
+            return known == len(args), known, len(args)
+        best = max(remaining, key=score)
+        order.append(best)
+        remaining.remove(best)
+        bound |= set(body[best][1])
+    return order
+
+
+class RuleEngine:
+    """Forward chaining of Horn rules over an Owlready2 quadstore, with incremental maintenance.
+
+    Every class/property fact the rules can see is indexed together with its
+    number of supports: asserted triples and rule conclusions, each counted
+    once per class or property of the hierarchy it reaches. `run()` applies the
+    rules semi-naively; `maintain()` updates the conclusions after triples are
+    added or removed, with DRed (over-delete, rederive, propagate).
+    """
+
+    def __init__(self, world: World, onto, rules: Iterable[Rule], inferences=None,
+                 class_parents: Optional[Dict[str, str]] = None):
+        """`inferences` is the ontology holding previously materialized conclusions, which
+        are loaded as such instead of as asserted facts. `class_parents` declares the
+        superclass of rule classes that are not in the quadstore (name -> name)."""
+        self.world = world
+        self.onto = onto
+        self.rules = list(rules)
+        self.db = world.graph.db
+        self._storids: Dict[str, int] = {}
+        self._inferences_c = inferences.graph.c if inferences is not None else None
+
+        extra_parents = {self._resolve(child): self._resolve(parent)
+                         for child, parent in (class_parents or {}).items()}
+        # class storid -> every class it is a (transitive) subclass of, itself included
+        self.superclasses = self._closure(rdfs_subclassof, extra_parents)
+        self.superproperties = self._closure(rdfs_subpropertyof)
+
+        self.classes = {self._resolve(name) for rule in self.rules
+                        for name, args in rule.body + rule.head if len(args) == 1}
+        self.properties = {self._resolve(name) for rule in self.rules
+                           for name, args in rule.body + rule.head if len(args) == 2}
+
+        self.members: Dict[int, Set[int]] = {c: set() for c in self.classes}
+        self.objects: Dict[int, Dict[int, Set[int]]] = {p: {} for p in self.properties}
+        self.subjects: Dict[int, Dict[int, Set[int]]] = {p: {} for p in self.properties}
+        # Indexed fact -> number of asserted triples and conclusions supporting it
+        self.support: Dict[Fact, int] = {}
+        # Rule conclusions that currently hold
+        self.derived: Set[Fact] = set()
+        self._load()
+
+    def _resolve(self, name: str) -> int:
+        storid = self._storids.get(name)
+        if storid is None:
+            entity = self.onto[name]
+            iri = entity.iri if entity is not None else self.onto.base_iri + name
+            storid = self._storids[name] = self.world._abbreviate(iri)
+        return storid
+
+    def _closure(self, predicate: int, extra_parents: Optional[Dict[int, int]] = None) -> Dict[int, Set[int]]:
+        parents: Dict[int, Set[int]] = {}
+        for s, o in self.db.execute("SELECT s, o FROM objs WHERE p=?", (predicate,)):
+            if s > 0 and o > 0:
+                parents.setdefault(s, set()).add(o)
+        for child, parent in (extra_parents or {}).items():
+            parents.setdefault(child, set()).add(parent)
+
+        closure: Dict[int, Set[int]] = {}
+
+        def ancestors(node: int, visiting: Set[int]) -> Set[int]:
+            if node in closure:
+                return closure[node]
+            result = {node}
+            visiting.add(node)
+            for parent in parents.get(node, ()):
+                if parent not in visiting:
+                    result |= ancestors(parent, visiting)
+            visiting.discard(node)
+            closure[node] = result
+            return result
+
+        for node in list(parents):
+            ancestors(node, set())
+        return closure
+
+    @staticmethod
+    def triple_fact(s: int, p: int, o: int) -> Fact:
+        """The fact an object triple states."""
+        return (o, s, None) if p == rdf_type else (p, s, o)
+
+    def _load(self):
+        for c, s, p, o in self.db.execute("SELECT c, s, p, o FROM objs"):
+            fact = self.triple_fact(s, p, o)
+            if c == self._inferences_c:
+                if fact in self.derived:
+                    continue
+                self.derived.add(fact)
+            self._support(fact)
+
+    def _indexed(self, fact: Fact) -> Iterator[Fact]:
+        """The indexed facts that `fact` supports, through the class or property hierarchy."""
+        predicate, s, o = fact
+        if o is None:
+            for cls in self.superclasses.get(predicate, (predicate,)):
+                if cls in self.members:
+                    yield cls, s, None
+        else:
+            for prop in self.superproperties.get(predicate, (predicate,)):
+                if prop in self.objects:
+                    yield prop, s, o
+
+    def _set_indexed(self, key: Fact, present: bool):
+        predicate, s, o = key
+        if o is None:
+            if present:
+                self.members[predicate].add(s)
+            else:
+                self.members[predicate].discard(s)
+            return
+        objects, subjects = self.objects[predicate], self.subjects[predicate]
+        if present:
+            objects.setdefault(s, set()).add(o)
+            subjects.setdefault(o, set()).add(s)
+            return
+        objects[s].discard(o)
+        if not objects[s]:
+            del objects[s]
+        subjects[o].discard(s)
+        if not subjects[o]:
+            del subjects[o]
+
+    def _support(self, fact: Fact, delta: Optional[Dict[int, Set[Tuple[int, Optional[int]]]]] = None):
+        for key in self._indexed(fact):
+            count = self.support.get(key, 0)
+            self.support[key] = count + 1
+            if count == 0:
+                self._set_indexed(key, True)
+                if delta is not None:
+                    delta.setdefault(key[0], set()).add((key[1], key[2]))
+
+    def _unsupport(self, fact: Fact):
+        for key in self._indexed(fact):
+            count = self.support.get(key, 0) - 1
+            if count > 0:
+                self.support[key] = count
+            elif count == 0:
+                del self.support[key]
+                self._set_indexed(key, False)
+
+    def holds(self, fact: Fact) -> bool:
+        return fact in self.support
+
+    def _term(self, arg: str, binding: Dict[str, int]) -> Optional[int]:
+        if arg.startswith('?'):
+            return binding.get(arg)
+        return self._resolve(arg)
+
+    def _match(self, atom: Atom, binding: Dict[str, int],
+               source: Optional[Set[Tuple[int, Optional[int]]]]) -> Iterator[Dict[str, int]]:
+        """Extend `binding` with every way `atom` matches; `source` restricts it to delta facts."""
+        name, args = atom
+        predicate = self._resolve(name)
+
+        def bind(arg: str, value: int, current: Dict[str, int]) -> Optional[Dict[str, int]]:
+            if not arg.startswith('?'):
+                return current
+            if arg in current:
+                return current if current[arg] == value else None
+            extended = dict(current)
+            extended[arg] = value
+            return extended
+
+        if len(args) == 1:
+            subject = self._term(args[0], binding)
+            if source is not None:
+                candidates = [s for s, _ in source]
+                if subject is not None:
+                    candidates = [s for s in candidates if s == subject]
+            elif subject is not None:
+                candidates = [subject] if subject in self.members[predicate] else []
+            else:
+                candidates = self.members[predicate]
+            for s in candidates:
+                extended = bind(args[0], s, binding)
+                if extended is not None:
+                    yield extended
+            return
+
+        subject, obj = self._term(args[0], binding), self._term(args[1], binding)
+        if source is not None:
+            pairs = [(s, o) for s, o in source
+                     if (subject is None or s == subject) and (obj is None or o == obj)]
+        elif subject is not None:
+            objects = self.objects[predicate].get(subject, ())
+            pairs = [(subject, o) for o in objects if obj is None or o == obj]
+        elif obj is not None:
+            pairs = [(s, obj) for s in self.subjects[predicate].get(obj, ())]
+        else:
+            pairs = [(s, o) for s, objects in self.objects[predicate].items() for o in objects]
+        for s, o in pairs:
+            extended = bind(args[0], s, binding)
+            if extended is not None:
+                extended = bind(args[1], o, extended)
+                if extended is not None:
+                    yield extended
+
+    def _solutions(self, rule: Rule, delta_position: Optional[int],
+                   delta: Dict[int, Set[Tuple[int, Optional[int]]]],
+                   binding: Optional[Dict[str, int]] = None) -> Iterator[Dict[str, int]]:
+        """Bindings satisfying the body; with `delta_position`, that atom only matches delta facts."""
+        binding = binding or {}
+        order = join_order(rule.body, delta_position, set(binding))
+
+        def extend(step: int, current: Dict[str, int]) -> Iterator[Dict[str, int]]:
+            if step == len(order):
+                yield current
+                return
+            position = order[step]
+            atom = rule.body[position]
+            source = delta.get(self._resolve(atom[0]), set()) if position == delta_position else None
+            for extended in self._match(atom, current, source):
+                yield from extend(step + 1, extended)
+
+        return extend(0, binding)
+
+    def _conclusions(self, rule: Rule, binding: Dict[str, int]) -> Iterator[Fact]:
+        for name, args in rule.head:
+            obj = self._term(args[1], binding) if len(args) == 2 else None
+            yield self._resolve(name), self._term(args[0], binding), obj
+
+    def _fire(self, rule: Rule, binding: Dict[str, int],
+              delta: Dict[int, Set[Tuple[int, Optional[int]]]]) -> List[Fact]:
+        new = []
+        for fact in self._conclusions(rule, binding):
+            if fact not in self.derived:
+                self.derived.add(fact)
+                self._support(fact, delta)
+                new.append(fact)
+        return new
+
+    def _delta_rounds(self, delta: Dict[int, Set[Tuple[int, Optional[int]]]],
+                      on_solution) -> None:
+        """Semi-naive rounds: each one only joins through the facts new in the previous one."""
+        while delta:
+            previous, delta = delta, {}
+            for rule in self.rules:
+                for position, (name, _) in enumerate(rule.body):
+                    if self._resolve(name) not in previous:
+                        continue
+                    for binding in list(self._solutions(rule, position, previous)):
+                        on_solution(rule, binding, delta)
+
+    def _propagate(self, delta: Dict[int, Set[Tuple[int, Optional[int]]]]) -> List[Fact]:
+        new: List[Fact] = []
+        self._delta_rounds(delta, lambda rule, binding, next_delta: new.extend(self._fire(rule, binding, next_delta)))
+        return new
+
+    def run(self) -> List[Fact]:
+        """Apply the rules to a fixpoint and return the conclusions they added."""
+        new: List[Fact] = []
+        delta: Dict[int, Set[Tuple[int, Optional[int]]]] = {}
+        # First round: every rule over all facts
+        for rule in self.rules:
+            for binding in list(self._solutions(rule, None, delta)):
+                new += self._fire(rule, binding, delta)
+        return new + self._propagate(delta)
+
+    def _derivable(self, fact: Fact) -> bool:
+        """Whether a rule concludes `fact` from the facts that currently hold."""
+        predicate, s, o = fact
+        for rule in self.rules:
+            for name, args in rule.head:
+                if self._resolve(name) != predicate or len(args) != (1 if o is None else 2):
+                    continue
+                binding: Optional[Dict[str, int]] = {}
+                for arg, value in zip(args, (s, o)):
+                    if not arg.startswith('?'):
+                        if self._resolve(arg) != value:
+                            binding = None
+                            break
+                    elif binding.setdefault(arg, value) != value:
+                        binding = None
+                        break
+                if binding is not None and next(self._solutions(rule, None, {}, binding), None) is not None:
+                    return True
+        return False
+
+    def maintain(self, added: Iterable[Tuple[int, int, int]],
+                 removed: Iterable[Tuple[int, int, int]]) -> Tuple[Set[Fact], Set[Fact]]:
+        """Update the conclusions after object triples (s, p, o) were added to and
+        removed from the quadstore, without re-running the rules on everything.
+
+        Returns (conclusions that now hold and did not, conclusions that no longer hold).
+        """
+        added, removed = set(added), set(removed)
+        added, removed = added - removed, removed - added
+        removed_facts = [self.triple_fact(*triple) for triple in removed]
+
+        # 1. Over-delete: every conclusion with a derivation through a removed fact,
+        #    evaluated against the state before the removal. Remaining support counts
+        #    cannot be trusted here, as a conclusion may support its own premises
+        #    through the class hierarchy (EnglishFriendlyTour is a Tour).
+        touched: Set[Fact] = set()
+        over_deleted: Set[Fact] = set()
+
+        def drop(fact: Fact, delta: Dict[int, Set[Tuple[int, Optional[int]]]]):
+            for key in self._indexed(fact):
+                if key in self.support and key not in touched:
+                    touched.add(key)
+                    delta.setdefault(key[0], set()).add((key[1], key[2]))
+
+        def over_delete(rule: Rule, binding: Dict[str, int], delta):
+            for fact in self._conclusions(rule, binding):
+                if fact in self.derived and fact not in over_deleted:
+                    over_deleted.add(fact)
+                    drop(fact, delta)
+
+        delta: Dict[int, Set[Tuple[int, Optional[int]]]] = {}
+        for fact in removed_facts:
+            drop(fact, delta)
+        self._delta_rounds(delta, over_delete)
+
+        # 2. Apply the removals and the over-deletion
+        for fact in removed_facts:
+            self._unsupport(fact)
+        for fact in over_deleted:
+            self.derived.discard(fact)
+            self._unsupport(fact)
+
+        # 3. Add the new triples
+        delta = {}
+        for triple in added:
+            self._support(self.triple_fact(*triple), delta)
+
+        # 4. Rederive the over-deleted conclusions that still follow from what is left
+        for fact in over_deleted:
+            if self._derivable(fact):
+                self.derived.add(fact)
+                self._support(fact, delta)
+
+        # 5. Propagate the additions and rederivations
+        new = self._propagate(delta)
+        return ({fact for fact in new if fact not in over_deleted},
+                {fact for fact in over_deleted if fact not in self.derived})
+
+    def iri_facts(self, facts: Iterable[Fact]) -> List[Tuple[str, str, Optional[str]]]:
+        unabbreviate = self.world._unabbreviate
+        return [(unabbreviate(p), unabbreviate(s), unabbreviate(o) if o is not None else None)
+                for p, s, o in facts]
+
+
+def add_rules(onto, rules: List[str] = RULES):
+    """Declare the rule classes and SWRL rules, as rules_creation.ipynb does."""
+    with onto:
+        for name, (parent, doc) in RULE_CLASSES.items():
+            if onto[name] is None:
+                types.new_class(name, (onto[parent],), {}, lambda namespace, doc=doc: namespace.update(__doc__=doc))
+        for text in rules:
+            Imp().set_as_rule(text)
+
+
+def fact_rows(c: int, facts: Iterable[Fact]) -> List[Tuple[int, int, int, int]]:
+    return [(c, s, rdf_type, p) if o is None else (c, s, p, o) for p, s, o in facts]
+
+
+def write_facts(world: World, target, facts: Iterable[Fact], retracted: Iterable[Fact] = ()) -> int:
+    """Insert conclusions as object triples of the `target` ontology, and delete retracted ones."""
+    c = target.graph.c
+    rows = fact_rows(c, facts)
+    world.graph.db.executemany("DELETE FROM objs WHERE c=? AND s=? AND p=? AND o=?", fact_rows(c, retracted))
+    world.graph.db.executemany(
+        "INSERT INTO objs SELECT ?1, ?2, ?3, ?4 "
+        "WHERE NOT EXISTS (SELECT 1 FROM objs WHERE c=?1 AND s=?2 AND p=?3 AND o=?4)",
+        rows,
+    )
+    return len(rows)
+
+
+def store_rule_engine(world: World, onto) -> RuleEngine:
+    """Rule engine over a persistent ABox store whose conclusions live in <INFERENCES_IRI>.
+
+    The store's ontology does not declare the rule classes, so the populated OWL
+    saved from it stays free of rules. The first time, every conclusion is materialized.
+    """
+    inferences = world.get_ontology(INFERENCES_IRI)
+    engine = RuleEngine(world, onto, [Rule(text) for text in RULES], inferences=inferences,
+                        class_parents={name: parent for name, (parent, _) in RULE_CLASSES.items()})
+    if not engine.derived:
+        write_facts(world, inferences, engine.run())
+    return engine
+
+
+def save_with_rules(populated_path: Path, output_path: Path, conclusions: Iterable[Tuple[str, str, Optional[str]]]):
+    """Write the rules ontology from the populated OWL and already computed conclusions (IRIs)."""
+    world = World()
+    onto = world.get_ontology(f"file://{populated_path}").load()
+    add_rules(onto)
+    abbreviate = world._abbreviate
+    write_facts(world, onto, [(abbreviate(p), abbreviate(s), abbreviate(o) if o is not None else None)
+                              for p, s, o in conclusions])
+    onto.save(file=str(output_path), format="rdfxml")
+
+
+def hermit_memberships(ontology_path: Path) -> Dict[str, Set[str]]:
+    """Rule class members according to HermiT, for comparison (needs Java)."""
+    world = World()
+    onto = world.get_ontology(f"file://{ontology_path}").load()
+    add_rules(onto)
+    sync_reasoner_hermit(world, infer_property_values=True)
+    return {name: {individual.iri for individual in onto[name].instances()} for name in RULE_CLASSES}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Add the SWRL rules to the populated ontology and materialize them")
+    parser.add_argument('--input', type=Path, default=ONTOLOGY_PATH)
+    parser.add_argument('--output', type=Path, default=OUTPUT_PATH)
+    parser.add_argument('--separate-inferences', action='store_true',
+                        help=f"Put inferred facts in <{INFERENCES_IRI}> like sync_reasoner() does, "
+                             "so the saved ontology only gets the rules")
+    parser.add_argument('--compare-hermit', action='store_true',
+                        help="Also run HermiT on the input and compare the rule class members")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print(f"Loading ontology from: {args.input}")
+    world = World()
+    onto = world.get_ontology(f"file://{args.input}").load()
+    add_rules(onto)
+
+    start = time.perf_counter()
+    engine = RuleEngine(world, onto, [Rule(text) for text in RULES])
+    load_time = time.perf_counter() - start
+    start = time.perf_counter()
+    facts = engine.run()
+    run_time = time.perf_counter() - start
+
+    target = world.get_ontology(INFERENCES_IRI) if args.separate_inferences else onto
+    write_facts(world, target, facts)
+    print(f"Inferred {len(facts)} facts (indexing {load_time:.2f}s, rules {run_time:.2f}s)")
+    for name in RULE_CLASSES:
+        storid = engine._resolve(name)
+        print(f"  {name}: {len(engine.members.get(storid, ()))} members")
+
+    onto.save(file=str(args.output), format="rdfxml")
+    print(f"Ontology with SWRL rules saved to: {args.output}")
+
+    if args.compare_hermit:
+        start = time.perf_counter()
+        expected = hermit_memberships(args.input)
+        print(f"\nHermiT took {time.perf_counter() - start:.1f}s")
+        mismatched = False
+        for name, members in expected.items():
+            ours = {world._unabbreviate(s) for s in engine.members.get(engine._resolve(name), ())}
+            same = ours == members
+            mismatched |= not same
+            print(f"  {name}: HermiT {len(members)}, rules engine {len(ours)} -> {'same' if same else 'DIFFERENT'}")
+        if mismatched:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
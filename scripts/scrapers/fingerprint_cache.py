@@ -0,0 +1,90 @@
+"""
+Fingerprint cache for conditional re-scrapes.
+
+For every activity the scrapers have fetched, keyed by its canonical URL
+(query string and fragment dropped, so tracking parameters like
+`ranking_uuid` do not matter), the cache keeps a hash of what the listing card
+showed (e.g. title and price), when the detail page was last fetched and,
+optionally, the details extracted from it. A re-run only needs the detail page
+of cards that are new, whose card data changed, or whose entry is older than
+the TTL; the others reuse the cached details.
+
+Stored in SQLite (WAL), so the sharded TripAdvisor workers can share one file.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_TTL_DAYS = 7.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    url TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    details TEXT
+);
+"""
+
+
+def canonical_url(link: str) -> str:
+    parts = urlsplit(link)
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, '', ''))
+
+
+def fingerprint(*fields) -> str:
+    """Hash of the listing-card fields an activity was seen with."""
+    return hashlib.sha1(json.dumps(fields, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class FingerprintCache:
+    """Last fetch of each activity URL. Not thread-safe: use it from one thread per process."""
+
+    def __init__(self, path: str, ttl_days: float = DEFAULT_TTL_DAYS):
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, url: str, card_fingerprint: str, now: Optional[float] = None) -> Optional[Dict]:
+        """The cached entry of url when its card is unchanged and it was fetched within the TTL, else None.
+
+        The entry is {'fetched_at': ..., 'details': ...}; details is None when none were stored.
+        """
+        now = time.time() if now is None else now
+        row = self.connection.execute("SELECT fingerprint, fetched_at, details FROM fingerprints WHERE url = ?",
+                                      (canonical_url(url),)).fetchone()
+        if row is None or row[0] != card_fingerprint or now - row[1] > self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {'fetched_at': row[1], 'details': None if row[2] is None else json.loads(row[2])}
+
+    def store(self, url: str, card_fingerprint: str, details: Optional[Dict] = None,
+              fetched_at: Optional[float] = None):
+        """Record a successful fetch of url; committed immediately."""
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO fingerprints (url, fingerprint, fetched_at, details) VALUES (?, ?, ?, ?)",
+                (canonical_url(url), card_fingerprint, time.time() if fetched_at is None else fetched_at,
+                 None if details is None else json.dumps(details, ensure_ascii=False)))
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self) -> 'FingerprintCache':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
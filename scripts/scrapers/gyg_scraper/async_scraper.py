@@ -0,0 +1,317 @@
+"""
+Concurrent GetYourGuide scraper on playwright.async_api.
+
+Same output as scraper.py (one `<city>_tours.json` per city plus
+`all_cities_tours.json`), but instead of launching a new Chromium per city and
+scraping cities one after another, one long-lived browser is shared by every
+city. Listing and detail pages are opened in a bounded pool of browser
+contexts, with at most `--concurrency` pages open at once. Navigations to the
+same host take a token from pacing.HostRateController, starting at `--rate`
+per second, and every page waits only for the elements its extractor reads.
+Detail pages of activities whose card is unchanged since a fetch within
+`--ttl-days` are served from the fingerprint cache in the output directory.
+
+    python async_scraper.py --concurrency 6 --contexts 3 --rate 2
+    python async_scraper.py --city Berlin=http://127.0.0.1:8765/berlin-l1/ --rate 0   # fixture_server.py
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fake_useragent import UserAgent
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
+from scraper import (CAPTCHA_SELECTOR, CARDS_SCRIPT, DETAIL_READY, DETAILS_SCRIPT, EMPTY_DETAILS, LISTING_READY,
+                     MAX_PAGES, MY_CITIES, NO_NEW_ITEMS_LIMIT, READY_TIMEOUT, STEALTH_SCRIPT, THROTTLE_RETRIES,
+                     FINGERPRINT_FILE, CardCollector, ThrottledError)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fingerprint_cache import DEFAULT_TTL_DAYS, FingerprintCache, fingerprint
+from pacing import THROTTLE_STATUSES, HostRateController, Metrics
+
+DEFAULT_CONCURRENCY = 6
+DEFAULT_CONTEXTS = 3
+# Starting navigations per second to one host; AIMD adjusts it from the responses
+DEFAULT_HOST_RATE = 2.0
+PAGE_TIMEOUT = 60000
+
+COOKIE_BUTTON = 'button[id*="cookie"], button[class*="cookie"]'
+
+
+class BrowserPool:
+    """One browser, a fixed set of contexts used in turn, and a global limit on open pages."""
+
+    def __init__(self, browser, contexts: List, concurrency: int, controller: HostRateController, metrics: Metrics):
+        self.browser = browser
+        self.contexts = contexts
+        self._next_context = itertools.cycle(contexts)
+        self._slots = asyncio.Semaphore(concurrency)
+        self.controller = controller
+        self.metrics = metrics
+        self.pages_opened = 0
+
+    @classmethod
+    async def launch(cls, playwright, contexts: int = DEFAULT_CONTEXTS, concurrency: int = DEFAULT_CONCURRENCY,
+                     rate: float = DEFAULT_HOST_RATE, headless: bool = True) -> 'BrowserPool':
+        browser = await playwright.chromium.launch(headless=headless, args=[
+            '--disable-blink-features=AutomationControlled',
+            '--start-maximized'
+        ])
+        ua = UserAgent()
+        pool = []
+        for _ in range(max(contexts, 1)):
+            # Each context gets its own user agent and cookie jar
+            context = await browser.new_context(user_agent=ua.random, viewport={'width': 1920, 'height': 1080})
+            await context.add_init_script(STEALTH_SCRIPT)
+            pool.append(context)
+        metrics = Metrics()
+        return cls(browser, pool, max(concurrency, 1), HostRateController(rate, metrics=metrics), metrics)
+
+    def next_context(self):
+        return next(self._next_context)
+
+    async def close(self):
+        for context in self.contexts:
+            await context.close()
+        await self.browser.close()
+
+    async def acquire(self, url: str):
+        """Wait for a token of url's host."""
+        delay = self.controller.reserve(url)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.metrics.add('rate limit', delay, 'wait')
+
+    async def ready(self, page, selector: str) -> bool:
+        """Wait until an element matching selector is in the DOM; False after READY_TIMEOUT."""
+        start = time.perf_counter()
+        try:
+            await page.wait_for_selector(selector, state="attached", timeout=READY_TIMEOUT * 1000)
+            return True
+        except PlaywrightTimeoutError:
+            return False
+        finally:
+            self.metrics.add('readiness', time.perf_counter() - start, 'wait')
+
+    async def open(self, page, url: str, ready_selector: str):
+        """Navigate when the host's rate allows it, retrying throttled attempts at the reduced rate."""
+        for attempt in range(THROTTLE_RETRIES + 1):
+            await self.acquire(url)
+            start = time.perf_counter()
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=PAGE_TIMEOUT)
+            self.metrics.add('navigate', time.perf_counter() - start)
+            if response is not None and response.status in THROTTLE_STATUSES:
+                self.controller.throttled(url, f"HTTP {response.status}")
+            elif not await self.ready(page, ready_selector) and await page.locator(CAPTCHA_SELECTOR).count() > 0:
+                self.controller.throttled(url, "captcha")
+            else:
+                self.controller.success(url)
+                return
+        raise ThrottledError(f"Still throttled after {THROTTLE_RETRIES} retries: {url}")
+
+    @asynccontextmanager
+    async def page(self, url: str, ready_selector: str, context=None):
+        """Open `url` in a new page of the next context (or of `context`), once a slot is free."""
+        async with self._slots:
+            page = await (context or self.next_context()).new_page()
+            self.pages_opened += 1
+            try:
+                await self.open(page, url, ready_selector)
+                yield page
+            finally:
+                await page.close()
+
+
+async def accept_cookies(page, city_name: str):
+    try:
+        await page.wait_for_selector(COOKIE_BUTTON, timeout=5000)
+        await page.click(COOKIE_BUTTON)
+        print(f"🍪 [{city_name}] Cookies accepted.")
+    except Exception:
+        print(f"🍪 [{city_name}] No cookie banner found or already handled.")
+
+
+async def crawl_listing(pool: BrowserPool, page, city_name: str, max_pages: Optional[int],
+                        max_items: Optional[int] = None) -> List[Tuple[str, str, str]]:
+    """(title, price, link) of the listing's activities, clicking 'Show more' up to max_pages times (None: all).
+
+    Each click only reads the cards it appended; repeated activities are dropped by activity id.
+    """
+    collector = CardCollector(max_items)
+    collector.add(await page.evaluate(CARDS_SCRIPT, 0), page.url)
+    pages, without_new = 0, 0
+    while not collector.full and (max_pages is None or pages < max_pages):
+        try:
+            show_more_btn = page.locator(".show-more button")
+            if not await show_more_btn.is_visible():
+                print(f"✅ [{city_name}] No more 'Show more' buttons visible.")
+                break
+            print(f"🖱️ [{city_name}] 'Show more' button found ({len(collector.cards)} activities so far). Clicking...")
+            await pool.acquire(page.url)
+            await show_more_btn.scroll_into_view_if_needed()
+            await show_more_btn.click()
+            start = time.perf_counter()
+            try:
+                await page.wait_for_function("n => document.querySelectorAll('article').length > n",
+                                             arg=collector.read, timeout=READY_TIMEOUT * 1000)
+            finally:
+                pool.metrics.add('readiness', time.perf_counter() - start, 'wait')
+            pool.controller.success(page.url)
+            pages += 1
+
+            added = collector.add(await page.evaluate(CARDS_SCRIPT, collector.read), page.url)
+            without_new = 0 if added else without_new + 1
+            if without_new >= NO_NEW_ITEMS_LIMIT:
+                print(f"✅ [{city_name}] {without_new} pages without new activities, stopping.")
+                break
+        except Exception as e:
+            print(f"⚠️ [{city_name}] Pagination ended or error: {e}")
+            break
+    if collector.duplicates:
+        print(f"♻️ [{city_name}] Skipped {collector.duplicates} repeated activities.")
+    return collector.cards
+
+
+async def extract_details(page) -> Dict[str, str]:
+    """Duration, languages and meeting point of a detail page, in one DOM pass."""
+    return {**EMPTY_DETAILS, **await page.evaluate(DETAILS_SCRIPT)}
+
+
+async def scrape_tour(pool: BrowserPool, title: str, price: str, link: str, context=None,
+                      cache: Optional[FingerprintCache] = None) -> Dict[str, str]:
+    details = EMPTY_DETAILS
+    card_fingerprint = fingerprint(title, price)
+    cached = cache.lookup(link, card_fingerprint) if cache is not None and link != "N/A" else None
+    if cached is not None and cached["details"] is not None:
+        details = {**EMPTY_DETAILS, **cached["details"]}
+        pool.metrics.count("cache hit")
+    elif link != "N/A":
+        try:
+            print(f"🔗 Navigating to detail page for: {title[:50]}...")
+            async with pool.page(link, DETAIL_READY, context) as detail_page:
+                details = await extract_details(detail_page)
+            if cache is not None:
+                cache.store(link, card_fingerprint, details)
+        except Exception as e:
+            print(f"⚠️ Error navigating to detail page: {e}")
+
+    tour = {"title": title, "price": price, "link": link, **details}
+    print(f"✔️ Extracted: {title} | Duration: {tour['duration']} | Languages: {tour['languages']}, "
+          f"Price: {price}, Link: {link}, Meeting Point: {tour['meeting_point'][:30]}...")
+    return tour
+
+
+async def scrape_city(pool: BrowserPool, city_name: str, city_url: str, max_pages: Optional[int] = MAX_PAGES,
+                      max_items: Optional[int] = None, cache: Optional[FingerprintCache] = None) -> List[Dict]:
+    """Listing page first, then every detail page concurrently; tours keep the listing order."""
+    context = pool.next_context()
+    print(f"🌍 [{city_name}] Navigating to {city_url}...")
+    async with pool.page(city_url, LISTING_READY, context) as page:
+        await accept_cookies(page, city_name)
+        print(f"🔍 [{city_name}] Extracting tour data...")
+        cards = await crawl_listing(pool, page, city_name, max_pages, max_items)
+    print(f"📊 [{city_name}] Found {len(cards)} activities.")
+
+    # Detail pages stay in the context that accepted the cookie banner
+    return list(await asyncio.gather(*(scrape_tour(pool, title, price, link, context, cache)
+                                       for title, price, link in cards)))
+
+
+def save_json(data, path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+
+
+async def scrape_cities(cities: Dict[str, str], output_dir: str, concurrency: int = DEFAULT_CONCURRENCY,
+                        contexts: int = DEFAULT_CONTEXTS, rate: float = DEFAULT_HOST_RATE,
+                        max_pages: Optional[int] = MAX_PAGES, headless: bool = True,
+                        max_items: Optional[int] = None,
+                        ttl_days: Optional[float] = DEFAULT_TTL_DAYS) -> Dict[str, List[Dict]]:
+    """Scrape every city with one browser; a ttl_days of None fetches every detail page."""
+    os.makedirs(output_dir, exist_ok=True)
+    # Only used from the event loop's thread, so one connection is enough
+    cache = None if ttl_days is None else FingerprintCache(f"{output_dir}/{FINGERPRINT_FILE}", ttl_days)
+
+    async with async_playwright() as p:
+        start = time.perf_counter()
+        pool = await BrowserPool.launch(p, contexts, concurrency, rate, headless)
+
+        async def run_city(city_name: str, city_url: str) -> Optional[List[Dict]]:
+            try:
+                results = await scrape_city(pool, city_name, city_url, max_pages, max_items, cache)
+            except Exception as e:
+                print(f"❌ [{city_name}] Error scraping: {e}")
+                return None
+            city_filename = f"{output_dir}/{city_name.lower()}_tours.json"
+            save_json(results, city_filename)
+            print(f"🎉 [{city_name}] Done! Scraped {len(results)} items. Saved to {city_filename}")
+            return results
+
+        try:
+            results = await asyncio.gather(*(run_city(name, url) for name, url in cities.items()))
+        finally:
+            await pool.close()
+            if cache is not None:
+                cache.close()
+
+    all_results = {name: tours for name, tours in zip(cities, results) if tours is not None}
+    save_json(all_results, f'{output_dir}/all_cities_tours.json')
+    print(f"📄 Opened {pool.pages_opened} pages in {len(pool.contexts)} contexts")
+    pool.metrics.report("all cities", time.perf_counter() - start)
+    return all_results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape GetYourGuide cities concurrently with one shared browser")
+    parser.add_argument('--cities', nargs='+', choices=list(MY_CITIES), help="Only these cities of MY_CITIES")
+    parser.add_argument('--city', action='append', default=[], metavar='NAME=URL',
+                        help="Scrape this listing URL instead (repeatable), e.g. a fixture_server.py page")
+    parser.add_argument('--output-dir', default='tours_data')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="Pages open at once")
+    parser.add_argument('--contexts', type=int, default=DEFAULT_CONTEXTS, help="Browser contexts in the pool")
+    parser.add_argument('--rate', type=float, default=DEFAULT_HOST_RATE,
+                        help="Starting navigations per second to one host, adapted to the responses (0 for no limit)")
+    parser.add_argument('--max-pages', type=int, default=MAX_PAGES, help="'Show more' clicks per city")
+    parser.add_argument('--full', action='store_true', help="Click 'Show more' until the listing ends")
+    parser.add_argument('--max-items', type=int, help="Stop a city's crawl after this many activities")
+    parser.add_argument('--ttl-days', type=float, default=DEFAULT_TTL_DAYS,
+                        help="Refetch unchanged activities whose details are older than this")
+    parser.add_argument('--no-cache', action='store_true', help="Fetch every detail page")
+    parser.add_argument('--headful', action='store_true', help="Show the browser window")
+    args = parser.parse_args()
+
+    if args.city:
+        args.targets = dict(entry.split('=', 1) for entry in args.city)
+    else:
+        args.targets = {name: MY_CITIES[name] for name in (args.cities or MY_CITIES)}
+    return args
+
+
+def main():
+    args = parse_args()
+
+    start = time.perf_counter()
+    all_results = asyncio.run(scrape_cities(args.targets, args.output_dir, args.concurrency, args.contexts,
+                                            args.rate, None if args.full else args.max_pages,
+                                            not args.headful, args.max_items,
+                                            None if args.no_cache else args.ttl_days))
+
+    total_items = sum(len(v) for v in all_results.values())
+    print(f"\n{'='*60}")
+    print(f"🎊 All done! Scraped {total_items} total items from {len(all_results)} cities "
+          f"in {time.perf_counter() - start:.1f}s.")
+    print(f"📁 Results saved to {args.output_dir}/")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
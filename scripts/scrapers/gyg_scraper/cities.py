@@ -0,0 +1,14 @@
+"""GetYourGuide listing pages of the scraped cities, shared by the scrapers and combine_tours.py."""
+
+# Dictionary of German cities with their GetYourGuide URLs
+MY_CITIES = {
+    'Berlin': 'https://www.getyourguide.com/berlin-l17/',
+    'Cologne': 'https://www.getyourguide.com/cologne-l19/',
+    'Munich': 'https://www.getyourguide.com/munich-l26/',
+    'Hamburg': 'https://www.getyourguide.com/hamburg-l23/',
+    'Frankfurt': 'https://www.getyourguide.com/frankfurt-l21/',
+    'Stuttgart': 'https://www.getyourguide.com/stuttgart-l27/',
+    'Dusseldorf': 'https://www.getyourguide.com/dusseldorf-l125/',
+    'Dortmund': 'https://www.getyourguide.com/dortmund-l136/',
+    'Essen': 'https://www.getyourguide.com/essen-l145/'
+}
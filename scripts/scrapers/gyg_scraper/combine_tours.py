@@ -1,12 +1,71 @@
 #!/usr/bin/env python3
 """
 Script to combine all city tour JSON files into a single all_cities_tours.json file.
+
+City files are loaded concurrently by a few threads but consumed in name
+order, and only a bounded number of them is held at once. Every tour is
+checked against TOUR_SCHEMA and written to the output as soon as its city
+file has been read, either as the usual JSON array (byte-for-byte what
+json.dump(..., indent=4) produced) or as JSON Lines. The per-city summary is
+computed in the same pass.
+
+    python combine_tours.py
+    python combine_tours.py --format jsonl --output tours_data/all_cities_tours.jsonl
 """
 
+import argparse
 import json
 import os
+import re
+import statistics
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from cities import MY_CITIES
+
+LOAD_WORKERS = 4
+COMBINED_FILENAME = 'all_cities_tours.json'
+PRICE_PATTERN = re.compile(r'(\d[\d,]*(?:\.\d+)?)')
+
+
+def parse_price(price: str) -> Optional[float]:
+    """Amount of a listing price like '€1,299' or 'From €21.50', None when there is none."""
+    match = PRICE_PATTERN.search(price)
+    return float(match.group(1).replace(',', '')) if match else None
+
+
+def is_url(value: str) -> bool:
+    parts = urlsplit(value)
+    return parts.scheme in ('http', 'https') and bool(parts.netloc)
+
+
+# Field -> (required, check of its value); "N/A" is what the scrapers write for a field they did not find
+TOUR_SCHEMA: Dict[str, Tuple[bool, Callable[[Any], bool]]] = {
+    'title': (True, lambda value: isinstance(value, str) and bool(value.strip())),
+    'price': (True, lambda value: isinstance(value, str) and (value == 'N/A' or parse_price(value) is not None)),
+    'link': (True, lambda value: isinstance(value, str) and is_url(value)),
+    'duration': (False, lambda value: isinstance(value, str)),
+    'languages': (False, lambda value: isinstance(value, str)),
+    'meeting_point': (False, lambda value: isinstance(value, str)),
+    'meeting_point_maps_link': (False, lambda value: isinstance(value, str) and (value == 'N/A' or is_url(value))),
+}
+
+
+def validate(tour: Any) -> List[str]:
+    """What is wrong with a tour according to TOUR_SCHEMA; empty when it is valid."""
+    if not isinstance(tour, dict):
+        return ['not an object']
+    problems = []
+    for field, (required, check) in TOUR_SCHEMA.items():
+        if field not in tour:
+            if required:
+                problems.append(f'missing {field}')
+        elif not check(tour[field]):
+            problems.append(f'invalid {field}')
+    return problems
 
 
 def load_json(filepath: str) -> List[Dict[str, Any]]:
@@ -15,99 +74,228 @@ def load_json(filepath: str) -> List[Dict[str, Any]]:
         return json.load(f)
 
 
-def save_json(data: List[Dict[str, Any]], filepath: str):
-    """Save JSON data to file."""
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+def extract_city_from_filename(filename: str) -> str:
+    """City of a scraper output file (e.g. 'berlin_tours.json' -> 'Berlin').
+
+    The scrapers name files after the lowercased MY_CITIES key, so the key is
+    looked up first; other files get every word capitalized.
+    """
+    stem = filename[:-len('_tours.json')] if filename.endswith('_tours.json') else Path(filename).stem
+    for city in MY_CITIES:
+        if city.lower() == stem.lower():
+            return city
+    return ' '.join(word.capitalize() for word in re.split(r'[_\s]+', stem) if word)
+
 
+class CityStats:
+    """Per-city summary, built while the tours are written."""
 
-def extract_city_from_filename(filename: str) -> str:
-    """Extract city name from filename (e.g., 'berlin_tours.json' -> 'Berlin')."""
-    city = filename.replace('_tours.json', '')
-    return city.capitalize()
+    def __init__(self, city: str):
+        self.city = city
+        self.tours = 0
+        self.invalid = 0
+        self.prices: List[float] = []
+        # Optional fields the scraper could not find, by field
+        self.not_found: Dict[str, int] = {}
+
+    def add(self, tour: Dict[str, Any]):
+        self.tours += 1
+        price = parse_price(tour.get('price', 'N/A'))
+        if price is not None:
+            self.prices.append(price)
+        for field, (required, _) in TOUR_SCHEMA.items():
+            if not required and tour.get(field, 'N/A') == 'N/A':
+                self.not_found[field] = self.not_found.get(field, 0) + 1
+
+    def summary(self) -> str:
+        line = f"  {self.city:15s}: {self.tours:3d} tours"
+        if self.invalid:
+            line += f", {self.invalid} invalid"
+        if self.prices:
+            line += (f", price €{min(self.prices):.0f}-€{max(self.prices):.0f} "
+                     f"(median €{statistics.median(self.prices):.0f})")
+        if self.not_found:
+            line += ", no " + ", ".join(f"{field} {count}" for field, count in sorted(self.not_found.items()))
+        return line
+
+
+class JsonArrayWriter:
+    """Writes records one by one as the JSON array json.dump(records, f, indent=4) would."""
+
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+
+    def write(self, record: Dict[str, Any]):
+        text = json.dumps(record, indent=4, ensure_ascii=False).replace('\n', '\n    ')
+        self.f.write(('[\n    ' if self.count == 0 else ',\n    ') + text)
+        self.count += 1
+
+    def close(self):
+        self.f.write('\n]' if self.count else '[]')
+
+
+class JsonLinesWriter:
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
 
+    def write(self, record: Dict[str, Any]):
+        self.f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.count += 1
 
-def combine_all_tours(tours_dir: str, output_file: str) -> Dict[str, int]:
+    def close(self):
+        pass
+
+
+WRITERS = {'json': JsonArrayWriter, 'jsonl': JsonLinesWriter}
+
+
+def load_city_files(json_files: List[Path], workers: int) -> Iterator[Tuple[Path, Any]]:
+    """(file, tours or the exception raised loading it) in the order of json_files.
+
+    At most `workers` files are being loaded or waiting to be consumed at once.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def load(json_file: Path):
+            try:
+                return load_json(str(json_file))
+            except Exception as e:
+                return e
+
+        pending = []
+        files = iter(json_files)
+        for json_file in files:
+            pending.append((json_file, executor.submit(load, json_file)))
+            if len(pending) >= workers:
+                break
+        while pending:
+            json_file, future = pending.pop(0)
+            result = future.result()
+            next_file = next(files, None)
+            if next_file is not None:
+                pending.append((next_file, executor.submit(load, next_file)))
+            yield json_file, result
+
+
+def city_files(tours_dir: str, output_file: Optional[str] = None) -> List[Path]:
+    output = Path(output_file).resolve() if output_file else None
+    return [json_file for json_file in sorted(Path(tours_dir).glob('*_tours.json'))
+            # Skip the all_cities_tours.json file if it exists
+            if json_file.name != COMBINED_FILENAME and json_file.resolve() != output]
+
+
+def combine_all_tours(tours_dir: str, output_file: str, output_format: str = 'json', workers: int = LOAD_WORKERS,
+                      keep_invalid: bool = False) -> Dict[str, Any]:
     """
     Combine all city tour JSON files into a single file.
-    
+
     Args:
         tours_dir: Directory containing city tour JSON files
-        output_file: Path to the output combined JSON file
-        
+        output_file: Path to the output combined file, replaced atomically
+        output_format: 'json' (one array) or 'jsonl' (one tour per line)
+        workers: City files loaded at once
+        keep_invalid: Write tours that fail TOUR_SCHEMA too instead of dropping them
+
     Returns:
         Dictionary with statistics about the combination process
     """
-    all_tours = []
     stats = {
         'cities_processed': 0,
         'total_tours': 0,
-        'tours_per_city': {}
+        'invalid_tours': 0,
+        'tours_per_city': {},
+        'problems': {},
+        'city_stats': [],
     }
-    
-    # Get all JSON files in the tours directory
-    tours_path = Path(tours_dir)
-    json_files = sorted(tours_path.glob('*_tours.json'))
-    
-    for json_file in json_files:
-        # Skip the all_cities_tours.json file if it exists
-        if json_file.name == 'all_cities_tours.json':
-            continue
-            
-        city_name = extract_city_from_filename(json_file.name)
-        
-        try:
-            tours = load_json(str(json_file))
-            
-            # Add city field to each tour
+
+    directory = os.path.dirname(os.path.abspath(output_file))
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory, suffix='.tmp', delete=False) as f:
+        writer = WRITERS[output_format](f)
+        for json_file, tours in load_city_files(city_files(tours_dir, output_file), max(workers, 1)):
+            if isinstance(tours, Exception):
+                print(f"✗ Error loading {json_file.name}: {tours}")
+                continue
+            if not isinstance(tours, list):
+                print(f"✗ Error loading {json_file.name}: expected a JSON array of tours")
+                continue
+
+            city_name = extract_city_from_filename(json_file.name)
+            city_stats = CityStats(city_name)
             for tour in tours:
-                tour['city'] = city_name
-            
-            all_tours.extend(tours)
+                problems = validate(tour)
+                if problems:
+                    city_stats.invalid += 1
+                    for problem in problems:
+                        stats['problems'][problem] = stats['problems'].get(problem, 0) + 1
+                    if not keep_invalid or not isinstance(tour, dict):
+                        continue
+                # Add city field to each tour
+                record = {**tour, 'city': city_name}
+                writer.write(record)
+                city_stats.add(record)
+
             stats['cities_processed'] += 1
-            stats['tours_per_city'][city_name] = len(tours)
-            stats['total_tours'] += len(tours)
-            
-            print(f"✓ Loaded {len(tours):3d} tours from {city_name}")
-            
-        except json.JSONDecodeError as e:
-            print(f"✗ Error loading {json_file.name}: {e}")
-        except Exception as e:
-            print(f"✗ Unexpected error loading {json_file.name}: {e}")
-    
-    # Save combined data
-    save_json(all_tours, output_file)
+            stats['tours_per_city'][city_name] = city_stats.tours
+            stats['total_tours'] += city_stats.tours
+            stats['invalid_tours'] += city_stats.invalid
+            stats['city_stats'].append(city_stats)
+            print(f"✓ Loaded {city_stats.tours:3d} tours from {city_name}"
+                  + (f" ({city_stats.invalid} invalid)" if city_stats.invalid else ""))
+        writer.close()
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f.name, output_file)
+
     print(f"\n{'=' * 60}")
     print(f"Combined {stats['total_tours']} tours from {stats['cities_processed']} cities")
+    if stats['invalid_tours']:
+        action = 'kept' if keep_invalid else 'dropped'
+        print(f"{stats['invalid_tours']} invalid tours {action}: "
+              + ", ".join(f"{problem} {count}" for problem, count in sorted(stats['problems'].items())))
     print(f"Saved to: {output_file}")
     print('=' * 60)
-    
+
     return stats
 
 
-def main():
-    # Define paths
+def parse_args():
     script_dir = Path(__file__).parent
-    tours_dir = script_dir / 'tours_data'
-    output_file = tours_dir / 'all_cities_tours.json'
-    
+    parser = argparse.ArgumentParser(description="Combine the city tour files of the scraper into one file")
+    parser.add_argument('--tours-dir', type=Path, default=script_dir / 'tours_data')
+    parser.add_argument('--output', type=Path, help=f"Combined file (default: {COMBINED_FILENAME} in --tours-dir, "
+                                                    ".jsonl with --format jsonl)")
+    parser.add_argument('--format', choices=list(WRITERS), default='json')
+    parser.add_argument('--workers', type=int, default=LOAD_WORKERS, help="City files loaded at once")
+    parser.add_argument('--keep-invalid', action='store_true', help="Keep tours that fail the schema check")
+    args = parser.parse_args()
+    if args.output is None:
+        args.output = args.tours_dir / (COMBINED_FILENAME if args.format == 'json'
+                                        else COMBINED_FILENAME.replace('.json', '.jsonl'))
+    return args
+
+
+def main():
+    args = parse_args()
+    tours_dir, output_file = args.tours_dir, args.output
+
     print("=" * 60)
     print("GetYourGuide Tours Combiner")
     print("=" * 60)
     print(f"\nSource directory: {tours_dir}")
     print(f"Output file: {output_file}\n")
-    
+
     if not tours_dir.exists():
         print(f"Error: Tours directory not found: {tours_dir}")
         return
-    
-    stats = combine_all_tours(str(tours_dir), str(output_file))
-    
+
+    stats = combine_all_tours(str(tours_dir), str(output_file), args.format, args.workers, args.keep_invalid)
+
     # Print summary
     print("\n📊 Summary by City:")
     print("-" * 40)
-    for city, count in sorted(stats['tours_per_city'].items(), key=lambda x: x[1], reverse=True):
-        print(f"  {city:15s}: {count:3d} tours")
+    for city_stats in sorted(stats['city_stats'], key=lambda city_stats: city_stats.tours, reverse=True):
+        print(city_stats.summary())
 
 
 if __name__ == "__main__":
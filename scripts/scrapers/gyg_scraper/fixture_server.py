@@ -0,0 +1,339 @@
+"""
+Local static imitation of GetYourGuide listing and detail pages, to run the
+scrapers against without touching the real site.
+
+Pages are generated from an already scraped tours file, using the selectors
+the scrapers rely on (cookie button, `article` cards, `.show-more button`
+pagination loaded with fetch, `#icon-label-*` key details, meeting point
+blocks) and rotating through the alternative layouts they fall back to.
+
+    python fixture_server.py --port 8765                 # serve
+    python fixture_server.py --check                     # serve, run async_scraper.py against it, compare
+"""
+
+import argparse
+import html
+import json
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+BASE_DIR = Path(__file__).resolve().parents[3]
+TOURS_PATH = BASE_DIR / "data" / "pre_llm_processing" / "all_cities_tours.json"
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+PAGE_SIZE = 8
+
+LISTING_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{city} tours</title></head>
+<body>
+<div id="cookie-banner"><button id="cookie-accept" onclick="this.parentNode.remove()">Accept cookies</button></div>
+<h1>Things to do in {city}</h1>
+<section id="activities">
+{cards}
+</section>
+<div class="show-more"{hidden}><button type="button" onclick="showMore(this)">Show more</button></div>
+<script>
+let nextPage = 1;
+function showMore(button) {{
+    fetch('more?page=' + nextPage).then(r => r.json()).then(data => {{
+        document.getElementById('activities').insertAdjacentHTML('beforeend', data.cards);
+        nextPage += 1;
+        if (!data.more) button.parentNode.hidden = true;
+    }});
+}}
+</script>
+</body></html>
+"""
+
+CARD_TEMPLATE = """<article>
+  <a href="{href}"><h3>{title}</h3></a>
+  {price}
+</article>"""
+
+DETAIL_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body>
+<h1>{title}</h1>
+<dl class="key-details">
+{duration}
+{languages}
+</dl>
+{meeting_point}
+</body></html>
+"""
+
+
+def text_html(value: str) -> str:
+    return html.escape(value).replace('\n', '<br>')
+
+
+def slug(city: str) -> str:
+    return city.lower()
+
+
+class Fixtures:
+    """Listing and detail pages for the tours of each city."""
+
+    def __init__(self, tours: Dict[str, List[Dict]], per_city: int = 12, page_size: int = PAGE_SIZE,
+                 repeat_every: int = 0):
+        self.page_size = page_size
+        # Every repeat_every-th card is followed by a copy of an earlier one with other tracking parameters
+        self.repeat_every = repeat_every
+        self.tours = {city: items[:per_city] for city, items in tours.items()}
+
+    @classmethod
+    def from_file(cls, path: Path = TOURS_PATH, per_city: int = 12, cities: Optional[List[str]] = None,
+                  repeat_every: int = 0) -> 'Fixtures':
+        with open(path, 'r', encoding='utf-8') as f:
+            tours = json.load(f)
+        if cities:
+            tours = {city: tours[city] for city in cities}
+        return cls(tours, per_city, repeat_every=repeat_every)
+
+    def city_path(self, city: str) -> str:
+        return f"/{slug(city)}-l{list(self.tours).index(city) + 1}/"
+
+    def detail_path(self, city: str, position: int) -> str:
+        return f"{self.city_path(city)}tour-t{position}/"
+
+    def city_of(self, path: str) -> Optional[str]:
+        for city in self.tours:
+            if path.startswith(self.city_path(city)):
+                return city
+        return None
+
+    def card(self, city: str, position: int, query: str = '') -> str:
+        tour = self.tours[city][position]
+        price = tour.get('price', 'N/A')
+        price_html = '' if price == 'N/A' else f'<span class="activity-price__text-price">{html.escape(price)}</span>'
+        return CARD_TEMPLATE.format(href=self.detail_path(city, position) + query, title=html.escape(tour['title']),
+                                    price=price_html)
+
+    def cards_at(self, city: str, position: int) -> List[str]:
+        cards = [self.card(city, position)]
+        if self.repeat_every and position % self.repeat_every == self.repeat_every - 1:
+            # Like a sponsored activity shown again further down the listing
+            cards.append(self.card(city, position // 2, f'?ranking_uuid=repeat-{position}'))
+        return cards
+
+    def cards(self, city: str, page: int) -> Tuple[str, bool]:
+        """Cards of one page and whether more pages follow."""
+        start = page * self.page_size
+        positions = range(start, min(start + self.page_size, len(self.tours[city])))
+        cards = [card for i in positions for card in self.cards_at(city, i)]
+        return '\n'.join(cards), start + self.page_size < len(self.tours[city])
+
+    def listing(self, city: str) -> str:
+        cards, more = self.cards(city, 0)
+        return LISTING_TEMPLATE.format(city=html.escape(city), cards=cards, hidden='' if more else ' hidden')
+
+    def detail(self, city: str, position: int) -> str:
+        tour = self.tours[city][position]
+        # Rotate through the layouts the scrapers fall back to
+        variant = position % 3
+
+        duration = ''
+        if tour.get('duration', 'N/A') != 'N/A':
+            if variant == 2:
+                duration = (f'<div data-ref="duration"><dt><span>Free cancellation</span>'
+                            f'<span>Duration {html.escape(tour["duration"])}</span></dt></div>')
+            else:
+                duration = (f'<div id="icon-label-duration"><dt><span class="text-atom--body-strong">'
+                            f'Duration {html.escape(tour["duration"])}</span></dt></div>')
+
+        languages = ''
+        if tour.get('languages', 'N/A') != 'N/A':
+            block_id = 'icon-label-audioGuides' if variant == 1 else 'icon-label-tourGuides'
+            languages = (f'<div id="{block_id}"><dt>Guide</dt><dd><span class="text-atom--caption">'
+                         f'{html.escape(tour["languages"])}</span></dd></div>')
+
+        meeting_point = ''
+        text, maps_link = tour.get('meeting_point', 'N/A'), tour.get('meeting_point_maps_link', 'N/A')
+        if text != 'N/A' or maps_link != 'N/A':
+            body = f'<div class="text-atom--body">{text_html(text)}</div>' if text != 'N/A' else ''
+            link = f'<a href="{html.escape(maps_link)}">Open in Google Maps</a>' if maps_link != 'N/A' else ''
+            if variant == 2:
+                meeting_point = f'<section class="activity-meeting-point">{body}{link}</section>'
+            else:
+                meeting_point = f'<div class="meeting-points-block">{body}{link}</div>'
+
+        return DETAIL_TEMPLATE.format(title=html.escape(tour['title']), duration=duration,
+                                      languages=languages, meeting_point=meeting_point)
+
+    def expected(self, base_url: str, max_pages: Optional[int]) -> Dict[str, List[Dict]]:
+        """What a scraper clicking 'Show more' up to max_pages times (None: all) should return."""
+        visible = None if max_pages is None else (max_pages + 1) * self.page_size
+        return {city: [{**tour, 'link': base_url + self.detail_path(city, i)}
+                       for i, tour in enumerate(tours[:visible])]
+                for city, tours in self.tours.items()}
+
+
+class FixtureRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this keep-alive clients wait on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def _send(self, status: int, body: str, content_type: str = 'text/html; charset=utf-8'):
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.server.requests += 1
+        if self.server.throttle and random.random() < self.server.throttle:
+            self._send(429, 'Too many requests')
+            return
+
+        fixtures: Fixtures = self.server.fixtures
+        url = urlsplit(self.path)
+        city = fixtures.city_of(url.path)
+        if city is None:
+            self._send(404, 'Not found')
+            return
+
+        rest = url.path[len(fixtures.city_path(city)):]
+        if rest == '':
+            self._send(200, fixtures.listing(city))
+        elif rest == 'more':
+            page = int(parse_qs(url.query).get('page', ['1'])[0])
+            cards, more = fixtures.cards(city, page)
+            self._send(200, json.dumps({'cards': cards, 'more': more}), 'application/json')
+        elif rest.startswith('tour-t') and rest[len('tour-t'):].rstrip('/').isdigit():
+            position = int(rest[len('tour-t'):].rstrip('/'))
+            if position >= len(fixtures.tours[city]):
+                self._send(404, 'Not found')
+                return
+            self._send(200, fixtures.detail(city, position))
+        else:
+            self._send(404, 'Not found')
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(fixtures: Fixtures, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                latency: float = 0.0, verbose: bool = False, throttle: float = 0.0) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), FixtureRequestHandler)
+    server.daemon_threads = True
+    server.fixtures = fixtures
+    server.latency = latency
+    server.throttle = throttle
+    server.verbose = verbose
+    server.requests = 0
+    return server
+
+
+def normalize(tours: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+    """Whitespace as the browser renders it, which inner_text does not preserve exactly."""
+    return {city: [{key: '\n'.join(' '.join(line.split()) for line in value.split('\n'))
+                    if isinstance(value, str) else value for key, value in tour.items()}
+                   for tour in items]
+            for city, items in tours.items()}
+
+
+def check(server: ThreadingHTTPServer, args) -> int:
+    """Scrape the fixtures with async_scraper.py and return the number of tours that differ."""
+    import asyncio
+    from async_scraper import scrape_cities
+
+    fixtures: Fixtures = server.fixtures
+    base_url = f"http://{DEFAULT_HOST}:{server.server_port}"
+    targets = {city: base_url + fixtures.city_path(city) for city in fixtures.tours}
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        scraped = asyncio.run(scrape_cities(targets, output_dir, args.concurrency, args.contexts, args.rate,
+                                            max_pages=args.max_pages))
+        elapsed = time.perf_counter() - start
+        with open(Path(output_dir) / 'all_cities_tours.json', 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+
+    expected = normalize(fixtures.expected(base_url, args.max_pages))
+    scraped = normalize(scraped)
+    differences = 0
+    for city, tours in expected.items():
+        got = scraped.get(city, [])
+        if len(got) != len(tours):
+            print(f"  {city}: expected {len(tours)} tours, scraped {len(got)}")
+        for want, have in zip(tours, got):
+            if want != have:
+                differences += 1
+                diff = {key: (want.get(key), have.get(key)) for key in want if want.get(key) != have.get(key)}
+                print(f"  {city}: {want['title'][:40]} differs: {diff}")
+        differences += abs(len(got) - len(tours))
+    if normalize(saved) != scraped:
+        print("  all_cities_tours.json differs from the returned results")
+        differences += 1
+
+    total = sum(len(tours) for tours in expected.values())
+    print(f"Scraped {total} fixture tours of {len(expected)} cities in {elapsed:.1f}s "
+          f"({server.requests} requests): {differences} differences")
+    return differences
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve GetYourGuide-like fixture pages for the scrapers")
+    parser.add_argument('--tours', type=Path, default=TOURS_PATH, help="Scraped tours the pages are made from")
+    parser.add_argument('--cities', nargs='+', help="Only these cities of the tours file")
+    parser.add_argument('--per-city', type=int, default=12, help="Tours per city")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--throttle', type=float, default=0.0,
+                        help="Share of requests answered with 429, to exercise the rate controller")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    parser.add_argument('--check', action='store_true',
+                        help="Run async_scraper.py against the fixtures and compare with the source tours")
+    parser.add_argument('--concurrency', type=int, default=6)
+    parser.add_argument('--contexts', type=int, default=3)
+    parser.add_argument('--rate', type=float, default=0.0)
+    parser.add_argument('--max-pages', type=int, default=2)
+    parser.add_argument('--full', action='store_true', help="Check an unbounded crawl instead of --max-pages")
+    parser.add_argument('--repeat-every', type=int, default=0,
+                        help="Show every Nth card again later with other tracking parameters")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    fixtures = Fixtures.from_file(args.tours, args.per_city, args.cities, args.repeat_every)
+    if args.full:
+        args.max_pages = None
+    server = make_server(fixtures, port=0 if args.check else args.port, latency=args.latency,
+                         verbose=args.verbose, throttle=args.throttle)
+
+    if args.check:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            differences = check(server, args)
+        finally:
+            server.shutdown()
+        if differences:
+            raise SystemExit(1)
+        return
+
+    print(f"Fixture server listening on http://{DEFAULT_HOST}:{server.server_port}")
+    for city in fixtures.tours:
+        print(f"  {city}: http://{DEFAULT_HOST}:{server.server_port}{fixtures.city_path(city)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
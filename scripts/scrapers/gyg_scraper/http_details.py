@@ -0,0 +1,375 @@
+"""
+HTTP tier for GetYourGuide detail pages.
+
+The key details and meeting point blocks are server-rendered, so most detail
+pages can be read from the plain HTML without a browser. DetailClient keeps one
+keep-alive connection per host, sends the listing's cookies and user agent,
+and extracts the same fields as scraper.DETAILS_SCRIPT with a small HTML tree
+and the handful of CSS selectors that script uses. Pages where a required
+field is still missing are left to the Playwright tier.
+"""
+
+import gzip
+import http.client
+import re
+import zlib
+from html.parser import HTMLParser
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+# Fields that must be found in the HTML for the browser to be skipped
+REQUIRED_FIELDS = ('duration',)
+HTTP_TIMEOUT = 30
+MAX_REDIRECTS = 3
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+# Elements whose text is not rendered
+HIDDEN_TAGS = {'script', 'style', 'noscript', 'template', 'head'}
+BLOCK_TAGS = {'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt', 'footer', 'form', 'h1', 'h2',
+              'h3', 'h4', 'h5', 'h6', 'header', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'tr', 'ul'}
+
+# Markers for the text model: a <br> is a hard line break, block edges are collapsible ones
+LINE_BREAK = '\x01'
+BLOCK_BREAK = '\x00'
+WHITESPACE_RUN = re.compile(r'\s+')
+SPACE_AROUND_BREAK = re.compile(r' *([\x00\x01]) *')
+BLOCK_RUN = re.compile(r'\x00+')
+BLOCK_NEXT_TO_BR = re.compile(r'\x00(?=\x01)|(?<=\x01)\x00')
+
+EMPTY_DETAILS = {"duration": "N/A", "languages": "N/A", "meeting_point": "N/A", "meeting_point_maps_link": "N/A"}
+
+
+class Node:
+    __slots__ = ('tag', 'attrs', 'children', 'parent')
+
+    def __init__(self, tag: str, attrs: Dict[str, str], parent: Optional['Node'] = None):
+        self.tag = tag
+        self.attrs = attrs
+        self.children: List = []
+        self.parent = parent
+
+    @property
+    def classes(self) -> List[str]:
+        return self.attrs.get('class', '').split()
+
+    def descendants(self) -> Iterator['Node']:
+        stack = [child for child in reversed(self.children) if isinstance(child, Node)]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(child for child in reversed(node.children) if isinstance(child, Node))
+
+    def inner_text(self) -> str:
+        """Rendered text, close to what element.innerText returns for visible markup."""
+        parts: List[str] = []
+        self._collect_text(parts)
+        text = WHITESPACE_RUN.sub(' ', ''.join(parts))
+        text = SPACE_AROUND_BREAK.sub(r'\1', text)
+        # Block edges collapse into one line break, which a <br> next to them already provides
+        text = BLOCK_NEXT_TO_BR.sub('', BLOCK_RUN.sub(BLOCK_BREAK, text))
+        return text.strip(' ' + BLOCK_BREAK).replace(BLOCK_BREAK, '\n').replace(LINE_BREAK, '\n')
+
+    def _collect_text(self, parts: List[str]):
+        for child in self.children:
+            if isinstance(child, str):
+                parts.append(child)
+            elif child.tag == 'br':
+                parts.append(LINE_BREAK)
+            elif child.tag not in HIDDEN_TAGS:
+                block = child.tag in BLOCK_TAGS
+                if block:
+                    parts.append(BLOCK_BREAK)
+                child._collect_text(parts)
+                if block:
+                    parts.append(BLOCK_BREAK)
+
+
+class TreeBuilder(HTMLParser):
+    """Lenient DOM builder: unmatched end tags are ignored, unclosed elements end with their parent."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node('#document', {})
+        self._stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        node = Node(tag, {name: value or '' for name, value in attrs}, self._stack[-1])
+        self._stack[-1].children.append(node)
+        if tag not in VOID_TAGS:
+            self._stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self._stack.pop()
+
+    def handle_endtag(self, tag):
+        for depth in range(len(self._stack) - 1, 0, -1):
+            if self._stack[depth].tag == tag:
+                del self._stack[depth:]
+                return
+
+    def handle_data(self, data):
+        self._stack[-1].children.append(data)
+
+
+def parse_html(html: str) -> Node:
+    builder = TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+# --- Selectors: tag, #id, .class, [attr], [attr=v], [attr*=v], descendant combinator, comma groups ---
+
+COMPOUND_PATTERN = re.compile(r"""
+    (?P<tag>^[a-zA-Z][\w-]*)
+  | \#(?P<id>[\w-]+)
+  | \.(?P<cls>[\w-]+)
+  | \[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>\*?=)\s*(?P<quote>['"]?)(?P<value>.*?)(?P=quote))?\s*\]
+""", re.VERBOSE)
+
+Compound = List[Tuple[str, str, Optional[str]]]
+
+
+def parse_compound(text: str) -> Compound:
+    tests, position = [], 0
+    while position < len(text):
+        match = COMPOUND_PATTERN.match(text, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Unsupported selector: {text!r}")
+        if match.group('tag'):
+            tests.append(('tag', match.group('tag').lower(), None))
+        elif match.group('id'):
+            tests.append(('id', match.group('id'), None))
+        elif match.group('cls'):
+            tests.append(('class', match.group('cls'), None))
+        else:
+            tests.append((match.group('op') or 'has', match.group('attr'), match.group('value')))
+        position = match.end()
+    return tests
+
+
+def compound_matches(node: Node, tests: Compound) -> bool:
+    for kind, name, value in tests:
+        if kind == 'tag':
+            ok = node.tag == name
+        elif kind == 'id':
+            ok = node.attrs.get('id') == name
+        elif kind == 'class':
+            ok = name in node.classes
+        elif kind == 'has':
+            ok = name in node.attrs
+        elif kind == '=':
+            ok = node.attrs.get(name) == value
+        else:
+            ok = value in node.attrs.get(name, '')
+        if not ok:
+            return False
+    return True
+
+
+def chain_matches(node: Node, chain: List[Compound]) -> bool:
+    """node matches the last compound and has ancestors matching the others, in order."""
+    if not compound_matches(node, chain[-1]):
+        return False
+    ancestor, remaining = node.parent, len(chain) - 2
+    while remaining >= 0 and ancestor is not None:
+        if compound_matches(ancestor, chain[remaining]):
+            remaining -= 1
+        ancestor = ancestor.parent
+    return remaining < 0
+
+
+def select(roots: Iterable[Node], selector: str) -> List[Node]:
+    """Elements under any of roots matching selector, in document order (querySelectorAll)."""
+    chains = [[parse_compound(part) for part in group.split()] for group in selector.split(',')]
+    found, seen = [], set()
+    for root in roots:
+        for node in root.descendants():
+            if id(node) not in seen and any(chain_matches(node, chain) for chain in chains):
+                seen.add(id(node))
+                found.append(node)
+    return found
+
+
+def select_one(roots: Iterable[Node], selector: str) -> Optional[Node]:
+    matches = select(roots, selector)
+    return matches[0] if matches else None
+
+
+def extract_duration(document: Node, details: Dict[str, str]):
+    duration_block = select_one([document], "#icon-label-duration")
+    if duration_block is not None:
+        strong = select_one([duration_block], "dt .text-atom--body-strong")
+        if strong is not None:
+            details["duration"] = strong.inner_text().replace("Duration", "").strip()
+    else:
+        alt_duration_block = select_one([document], 'div[data-ref="duration"]')
+        if alt_duration_block is not None:
+            for span in select([alt_duration_block], "dt span"):
+                span_text = span.inner_text()
+                if "Duration" in span_text:
+                    details["duration"] = span_text.replace("Duration", "").strip()
+                    break
+
+
+def extract_languages(document: Node, details: Dict[str, str]):
+    # Live guide first, then audio guide languages
+    for block_id in ("#icon-label-tourGuides", "#icon-label-audioGuides"):
+        caption = select_one(select([document], block_id), "dd .text-atom--caption")
+        if caption is not None:
+            details["languages"] = caption.inner_text()
+            break
+
+
+def extract_meeting_point(document: Node, details: Dict[str, str]):
+    for block_selector in (".meeting-points-block, #meeting-point-links",
+                           "section.activity-meeting-point, [data-test-id='activity-meeting-point']"):
+        blocks = select([document], block_selector)
+        text = select_one(blocks, ".text-atom--body")
+        maps_link = select_one(blocks, "a[href*='maps.google.com']")
+        if text is not None:
+            details["meeting_point"] = text.inner_text()
+        if maps_link is not None:
+            details["meeting_point_maps_link"] = maps_link.attrs.get("href") or "N/A"
+        if details["meeting_point"] != "N/A" or details["meeting_point_maps_link"] != "N/A":
+            break
+
+
+# One extractor per group of fields, in scraper.DETAILS_SCRIPT's order; each fills in details
+FIELD_EXTRACTORS = (
+    ("duration", extract_duration),
+    ("languages", extract_languages),
+    ("meeting_point", extract_meeting_point),
+)
+
+
+def extract_details_html(html: str) -> Dict[str, str]:
+    """Duration, languages and meeting point of a detail page's HTML, with scraper.DETAILS_SCRIPT's fallbacks."""
+    document = parse_html(html)
+    details = dict(EMPTY_DETAILS)
+    for _, extractor in FIELD_EXTRACTORS:
+        extractor(document, details)
+    return details
+
+
+def extract_cards_html(html: str, start: int = 0) -> List[Dict[str, Optional[str]]]:
+    """Title, price and href of the listing cards from the start-th on, like scraper.CARDS_SCRIPT."""
+    cards = []
+    for card in select([parse_html(html)], "article")[start:]:
+        title = select_one([card], "h3")
+        price = select_one([card], ".activity-price__text-price")
+        link = select_one([card], "a")
+        cards.append({
+            "title": title.inner_text() if title is not None else None,
+            "price": price.inner_text() if price is not None else "N/A",
+            "href": link.attrs.get("href") if link is not None else None,
+        })
+    return cards
+
+
+def missing_fields(details: Dict[str, str], required: Iterable[str] = REQUIRED_FIELDS) -> List[str]:
+    return [field for field in required if details.get(field, "N/A") == "N/A"]
+
+
+def cookie_header(cookies: List[Dict], host: str) -> str:
+    """Cookie header for host from a Playwright storage_state cookie list."""
+    pairs = []
+    for cookie in cookies:
+        domain = cookie.get('domain', '').lstrip('.')
+        if host == domain or host.endswith('.' + domain):
+            pairs.append(f"{cookie['name']}={cookie['value']}")
+    return '; '.join(pairs)
+
+
+def decode_body(body: bytes, encoding: Optional[str], content_type: str) -> str:
+    if encoding == 'gzip':
+        body = gzip.decompress(body)
+    elif encoding == 'deflate':
+        body = zlib.decompress(body)
+    charset = re.search(r'charset=([\w-]+)', content_type or '')
+    return body.decode(charset.group(1) if charset else 'utf-8', errors='replace')
+
+
+class DetailClient:
+    """Keep-alive HTTP client for detail pages. Not thread-safe: use one per worker thread."""
+
+    def __init__(self, user_agent: str, cookies: Optional[List[Dict]] = None, timeout: float = HTTP_TIMEOUT,
+                 required: Iterable[str] = REQUIRED_FIELDS, archive=None):
+        self.user_agent = user_agent
+        # html_archive.HtmlArchive the fetched detail pages are recorded into
+        self.archive = archive
+        self.cookies = cookies or []
+        self.timeout = timeout
+        self.required = tuple(required)
+        self._connections: Dict[Tuple[str, str], http.client.HTTPConnection] = {}
+
+    def _connection(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        key = (scheme, netloc)
+        if key not in self._connections:
+            connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            self._connections[key] = connection_class(netloc, timeout=self.timeout)
+        return self._connections[key]
+
+    def _drop(self, scheme: str, netloc: str):
+        connection = self._connections.pop((scheme, netloc), None)
+        if connection is not None:
+            connection.close()
+
+    def _request(self, url: str) -> Tuple[int, Dict[str, str], bytes]:
+        parts = urlsplit(url)
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        headers = {
+            'User-Agent': self.user_agent,
+            'Accept': 'text/html,application/xhtml+xml',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        }
+        cookies = cookie_header(self.cookies, parts.hostname or '')
+        if cookies:
+            headers['Cookie'] = cookies
+
+        # A kept-alive connection may have been closed by the server since the last request
+        for attempt in range(2):
+            connection = self._connection(parts.scheme, parts.netloc)
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, ConnectionError):
+                self._drop(parts.scheme, parts.netloc)
+                if attempt:
+                    raise
+                continue
+            if response.will_close:
+                self._drop(parts.scheme, parts.netloc)
+            return response.status, {name.lower(): value for name, value in response.getheaders()}, body
+
+    def fetch(self, url: str) -> Tuple[int, str]:
+        """Status and decoded body of url, following redirects."""
+        for _ in range(MAX_REDIRECTS + 1):
+            status, headers, body = self._request(url)
+            if status in (301, 302, 303, 307, 308) and 'location' in headers:
+                url = urljoin(url, headers['location'])
+                continue
+            return status, decode_body(body, headers.get('content-encoding'), headers.get('content-type', ''))
+        return status, ''
+
+    def fetch_details(self, url: str) -> Tuple[int, Optional[Dict[str, str]]]:
+        """Status of url and its details from the HTML, None when the page needs the browser tier."""
+        status, html = self.fetch(url)
+        if self.archive is not None and status == 200:
+            self.archive.record(url, html, 'gyg-detail')
+        if status != 200:
+            return status, None
+        details = extract_details_html(html)
+        if missing_fields(details, self.required):
+            return status, None
+        return status, details
+
+    def close(self):
+        for connection in self._connections.values():
+            connection.close()
+        self._connections.clear()
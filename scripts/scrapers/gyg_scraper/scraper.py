@@ -1,245 +1,510 @@
+"""
+GetYourGuide tour scraper.
+
+Collects every card of a city's listing first, then fetches the detail pages
+from a work queue in `--workers` threads. Each detail page is first fetched
+over plain keep-alive HTTP and parsed by http_details.py; Chromium is only
+started for pages missing a required field, and reads duration, languages and
+meeting point in one `page.evaluate` pass. The tier that served each page is
+logged and counted in the per-city timing report.
+
+`--full` keeps clicking "Show more" until the listing ends (`--max-items N`
+caps it), reading only the cards appended by each click and dropping repeated
+activities by their `-t<number>` id.
+
+    python scraper.py --cities Berlin Munich --full --max-items 300
+"""
+
+import argparse
 import time
-import random
 import json
 import os
-from playwright.sync_api import sync_playwright
+import queue
+import re
+import sys
+import threading
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 from fake_useragent import UserAgent
 
-# Dictionary of German cities with their GetYourGuide URLs
-MY_CITIES = {
-    'Berlin': 'https://www.getyourguide.com/berlin-l17/',
-    'Cologne': 'https://www.getyourguide.com/cologne-l19/',
-    'Munich': 'https://www.getyourguide.com/munich-l26/',
-    'Hamburg': 'https://www.getyourguide.com/hamburg-l23/',
-    'Frankfurt': 'https://www.getyourguide.com/frankfurt-l21/',
-    'Stuttgart': 'https://www.getyourguide.com/stuttgart-l27/',
-    'Dusseldorf': 'https://www.getyourguide.com/dusseldorf-l125/',
-    'Dortmund': 'https://www.getyourguide.com/dortmund-l136/',
-    'Essen': 'https://www.getyourguide.com/essen-l145/'
+from cities import MY_CITIES
+from http_details import EMPTY_DETAILS, DetailClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fingerprint_cache import DEFAULT_TTL_DAYS, FingerprintCache, fingerprint
+from html_archive import HtmlArchive, snapshot
+from pacing import THROTTLE_STATUSES, HostRateController, Metrics
+
+# Detail pages fetched at once per city, each in its own browser thread
+DETAIL_WORKERS = 4
+# 'Show more' clicks per city unless the crawl is unbounded (None)
+MAX_PAGES = 2
+# Fingerprint cache of fetched detail pages, kept in the output directory between runs
+FINGERPRINT_FILE = "fingerprints.sqlite3"
+# Consecutive 'Show more' clicks that may bring only already seen activities before the crawl stops
+NO_NEW_ITEMS_LIMIT = 2
+# Seconds to wait for the elements an extractor reads before giving up on them
+READY_TIMEOUT = 15
+# Navigations retried after a throttling response, at the reduced rate
+THROTTLE_RETRIES = 2
+
+# Elements each extractor needs before it runs
+LISTING_READY = "article"
+DETAIL_READY = ", ".join([
+    "#icon-label-duration", 'div[data-ref="duration"]', "#icon-label-tourGuides", "#icon-label-audioGuides",
+    ".meeting-points-block", "#meeting-point-links", "section.activity-meeting-point",
+    "[data-test-id='activity-meeting-point']",
+])
+# Activity links end in -t<number>/, followed by tracking parameters such as ranking_uuid
+ACTIVITY_ID_PATTERN = re.compile(r"-t(\d+)/?$")
+CAPTCHA_SELECTOR = "iframe[src*='captcha'], [id*='captcha'], [class*='captcha']"
+
+# Stealth: Remove the 'navigator.webdriver' property
+STEALTH_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+"""
+
+# Title, price and raw href of the tour cards from index `start` on, in one round-trip
+CARDS_SCRIPT = """
+(start) => Array.from(document.querySelectorAll("article")).slice(start).map(card => {
+    const title = card.querySelector("h3");
+    const price = card.querySelector(".activity-price__text-price");
+    const link = card.querySelector("a");
+    return {
+        title: title ? title.innerText : null,
+        price: price ? price.innerText : "N/A",
+        href: link ? link.getAttribute("href") : null
+    };
+})
+"""
+
+# Duration, languages and meeting point of a detail page in one DOM pass,
+# with the same fallbacks as the per-locator version:
+# 1. Duration: #icon-label-duration, else the "Duration" span of div[data-ref="duration"]
+# 2. Languages: live tour guide first, then audio guide
+# 3. Meeting point: meeting-points-block (text + maps link), else activity-meeting-point section
+DETAILS_SCRIPT = """
+() => {
+    const details = {duration: "N/A", languages: "N/A", meeting_point: "N/A", meeting_point_maps_link: "N/A"};
+    const firstIn = (blocks, selector) => {
+        for (const block of blocks) {
+            const found = block.querySelector(selector);
+            if (found) return found;
+        }
+        return null;
+    };
+
+    const durationBlock = document.querySelector("#icon-label-duration");
+    if (durationBlock) {
+        const strong = durationBlock.querySelector("dt .text-atom--body-strong");
+        if (strong) details.duration = strong.innerText.replaceAll("Duration", "").trim();
+    } else {
+        const altDurationBlock = document.querySelector('div[data-ref="duration"]');
+        if (altDurationBlock) {
+            for (const span of altDurationBlock.querySelectorAll("dt span")) {
+                if (span.innerText.includes("Duration")) {
+                    details.duration = span.innerText.replaceAll("Duration", "").trim();
+                    break;
+                }
+            }
+        }
+    }
+
+    for (const blockId of ["#icon-label-tourGuides", "#icon-label-audioGuides"]) {
+        const caption = firstIn(document.querySelectorAll(blockId), "dd .text-atom--caption");
+        if (caption) {
+            details.languages = caption.innerText;
+            break;
+        }
+    }
+
+    for (const blockSelector of [".meeting-points-block, #meeting-point-links",
+                                 "section.activity-meeting-point, [data-test-id='activity-meeting-point']"]) {
+        const blocks = document.querySelectorAll(blockSelector);
+        const text = firstIn(blocks, ".text-atom--body");
+        const mapsLink = firstIn(blocks, "a[href*='maps.google.com']");
+        if (text) details.meeting_point = text.innerText;
+        if (mapsLink) details.meeting_point_maps_link = mapsLink.getAttribute("href") || "N/A";
+        if (details.meeting_point !== "N/A" || details.meeting_point_maps_link !== "N/A") break;
+    }
+
+    return details;
 }
+"""
 
-def scrape_getyourguide(city_name, city_url):
-    ua = UserAgent()
-    user_agent = ua.random
-    
-    data = []
 
-    with sync_playwright() as p:
-        # Launch browser (headless=True for Docker, False for debugging locally)
-        browser = p.chromium.launch(headless=True, args=[
-            '--disable-blink-features=AutomationControlled', # Helps avoid simple bot detection
-            '--start-maximized'
-        ])
-        
-        # Create a context with a real user agent and viewport
-        context = browser.new_context(
-            user_agent=user_agent,
-            viewport={'width': 1920, 'height': 1080}
-        )
-        
-        page = context.new_page()
+class ThrottledError(Exception):
+    """The site answered with a throttling status or a captcha."""
+
 
-        # Stealth: Remove the 'navigator.webdriver' property
-        page.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            });
-        """)
+def wait_ready(page, selector, timeout=READY_TIMEOUT):
+    """Wait until an element matching selector is in the DOM; False after timeout seconds."""
+    try:
+        page.wait_for_selector(selector, state="attached", timeout=timeout * 1000)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+def open_paced(page, url, controller, metrics, ready_selector):
+    """Navigate to url when the host's rate allows it and wait for the elements about to be read.
+
+    Throttling statuses and captcha pages slow the host down and raise ThrottledError.
+    """
+    controller.acquire(url)
+    with metrics.stage("navigate"):
+        response = page.goto(url, wait_until="domcontentloaded", timeout=60000)
+    if response is not None and response.status in THROTTLE_STATUSES:
+        controller.throttled(url, f"HTTP {response.status}")
+        raise ThrottledError(f"HTTP {response.status} for {url}")
+    with metrics.stage("readiness", "wait"):
+        ready = wait_ready(page, ready_selector)
+    if not ready and page.locator(CAPTCHA_SELECTOR).count() > 0:
+        controller.throttled(url, "captcha")
+        raise ThrottledError(f"Captcha on {url}")
+    controller.success(url)
+    return ready
+
+
+def launch_browser(p):
+    # Launch browser (headless=True for Docker, False for debugging locally)
+    return p.chromium.launch(headless=True, args=[
+        '--disable-blink-features=AutomationControlled', # Helps avoid simple bot detection
+        '--start-maximized'
+    ])
+
+
+def new_context(browser, user_agent, storage_state=None):
+    # Create a context with a real user agent and viewport
+    context = browser.new_context(
+        user_agent=user_agent,
+        viewport={'width': 1920, 'height': 1080},
+        storage_state=storage_state
+    )
+    context.add_init_script(STEALTH_SCRIPT)
+    return context
+
+
+def extract_details(page):
+    """Duration, languages and meeting point of an open detail page."""
+    return {**EMPTY_DETAILS, **page.evaluate(DETAILS_SCRIPT)}
+
+
+def activity_id(link):
+    """Canonical id of an activity link: the -t<number> suffix, else the path without query parameters."""
+    path = urlsplit(link).path
+    match = ACTIVITY_ID_PATTERN.search(path)
+    return f"t{match.group(1)}" if match else path.rstrip("/")
+
+
+class CardCollector:
+    """Tour cards of a listing, read incrementally and deduplicated by activity id.
+
+    `read` is the number of article elements already seen, so each read after
+    a 'Show more' click only asks the page for the cards appended since.
+    """
+
+    def __init__(self, max_items=None):
+        self.max_items = max_items
+        self.cards = []
+        self.read = 0
+        self.duplicates = 0
+        self._seen = set()
+
+    @property
+    def full(self):
+        return self.max_items is not None and len(self.cards) >= self.max_items
+
+    def add(self, raw_cards, page_url):
+        """Keep the new cards of one CARDS_SCRIPT result; the number kept."""
+        self.read += len(raw_cards)
+        added = 0
+        for card in raw_cards:
+            if self.full:
+                break
+            if card["title"] is None:
+                print("⚠️ Error extracting card: no title")
+                continue
+            link = urljoin(page_url, card["href"]) if card["href"] else "N/A"
+            key = activity_id(link) if link != "N/A" else card["title"]
+            if key in self._seen:
+                self.duplicates += 1
+                continue
+            self._seen.add(key)
+            self.cards.append((card["title"], card["price"], link))
+            added += 1
+        return added
+
+
+def scrape_listing(p, city_name, city_url, user_agent, controller, metrics, max_pages=MAX_PAGES, max_items=None,
+                   archive=None):
+    """Cards of the listing page after pagination, and the cookies the detail workers reuse.
+
+    Clicks 'Show more' up to max_pages times (None: until the listing ends), reading only the
+    cards each click appends, and stops early once max_items activities have been collected
+    or NO_NEW_ITEMS_LIMIT clicks in a row brought nothing new. With an HtmlArchive, the
+    paginated listing is recorded as it was read.
+    """
+    with metrics.stage("launch"):
+        browser = launch_browser(p)
+        context = new_context(browser, user_agent)
+        page = context.new_page()
 
+    try:
         print(f"🌍 [{city_name}] Navigating to {city_url}...")
-        page.goto(city_url, wait_until="domcontentloaded", timeout=60000)
-        
+        for attempt in range(THROTTLE_RETRIES + 1):
+            try:
+                open_paced(page, city_url, controller, metrics, LISTING_READY)
+                break
+            except ThrottledError:
+                if attempt == THROTTLE_RETRIES:
+                    raise
+
         # Handle Cookie Consent (Common blocker)
-        try:
-            # Adjust selector based on current site structure if needed
-            page.wait_for_selector('button[id*="cookie"], button[class*="cookie"]', timeout=5000)
-            page.click('button[id*="cookie"], button[class*="cookie"]')
-            print("🍪 Cookies accepted.")
-        except:
-            print("🍪 No cookie banner found or already handled.")
+        with metrics.stage("cookies", "wait"):
+            try:
+                # Adjust selector based on current site structure if needed
+                page.wait_for_selector('button[id*="cookie"], button[class*="cookie"]', timeout=5000)
+                page.click('button[id*="cookie"], button[class*="cookie"]')
+                print("🍪 Cookies accepted.")
+            except:
+                print("🍪 No cookie banner found or already handled.")
+
+        collector = CardCollector(max_items)
+        with metrics.stage("cards"):
+            collector.add(page.evaluate(CARDS_SCRIPT, 0), page.url)
 
         # --- PAGINATION LOOP ---
-        max_pages = 2  # Limit to avoid infinite loops during testing
-        while max_pages > 0:
+        pages, without_new = 0, 0
+        while not collector.full and (max_pages is None or pages < max_pages):
             try:
                 # Locator for the "Show more" button based on your snippet
                 show_more_btn = page.locator(".show-more button")
-                
-                if show_more_btn.is_visible():
-                    print("🖱️ 'Show more' button found. Clicking...")
-                    
-                    # Scroll to button to simulate human behavior
+
+                if not show_more_btn.is_visible():
+                    print("✅ No more 'Show more' buttons visible.")
+                    break
+                print(f"🖱️ 'Show more' button found ({len(collector.cards)} activities so far). Clicking...")
+
+                # Loading more cards is a request to the site like any other
+                controller.acquire(city_url)
+                with metrics.stage("pagination"):
                     show_more_btn.scroll_into_view_if_needed()
-                    time.sleep(random.uniform(1, 3)) # Human-like pause
-                    
-                    # Click and wait for network activity to settle
                     show_more_btn.click()
-                    page.wait_for_load_state("networkidle") 
-                    
-                    # Small pause to let DOM update
-                    time.sleep(random.uniform(2, 4))
-                else:
-                    print("✅ No more 'Show more' buttons visible.")
+
+                # Wait for the new cards instead of for the network to go idle
+                with metrics.stage("readiness", "wait"):
+                    page.wait_for_function("n => document.querySelectorAll('article').length > n",
+                                           arg=collector.read, timeout=READY_TIMEOUT * 1000)
+                controller.success(city_url)
+                pages += 1
+
+                # Only the cards appended by this click
+                with metrics.stage("cards"):
+                    added = collector.add(page.evaluate(CARDS_SCRIPT, collector.read), page.url)
+                without_new = 0 if added else without_new + 1
+                if without_new >= NO_NEW_ITEMS_LIMIT:
+                    print(f"✅ {without_new} pages without new activities, stopping.")
                     break
-                max_pages -= 1
             except Exception as e:
                 print(f"⚠️ Pagination ended or error: {e}")
                 break
 
-        # --- EXTRACTION ---
         print("🔍 Extracting tour data...")
-        
-        # Select all tour cards (Subject to class changes, inspecting common structure)
-        # Note: Classes like 'vertical-activity-card__content' are common in GYG
-        cards = page.locator("article").all()
-        
-        print(f"📊 Found {len(cards)} activities.")
+        if collector.duplicates:
+            print(f"♻️ Skipped {collector.duplicates} repeated activities.")
+        cards = collector.cards
+        if archive is not None:
+            archive.record(city_url, snapshot(page.content()), "gyg-listing")
+        storage_state = context.storage_state()
+    finally:
+        browser.close()
+
+    return cards, storage_state
+
+
+def fetch_http(client, link, controller, metrics):
+    """Details of link from its HTML, retrying throttled requests at the reduced rate; None to use the browser."""
+    for attempt in range(THROTTLE_RETRIES + 1):
+        controller.acquire(link)
+        try:
+            with metrics.stage("http fetch"):
+                status, tour_details = client.fetch_details(link)
+        except Exception as e:
+            controller.throttled(link, "error")
+            print(f"⚠️ HTTP fetch failed, falling back to the browser: {e}")
+            return None
+        if status in THROTTLE_STATUSES:
+            controller.throttled(link, f"HTTP {status}")
+            continue
+        controller.success(link)
+        return tour_details
+    return None
+
 
-        for card in cards:
+def detail_worker(jobs, details, tiers, user_agent, storage_state, controller, metrics, http_first=True,
+                  archive=None):
+    """Fetch detail pages from the queue until it is empty.
+
+    Each page is tried over plain HTTP first; the browser is only started once
+    a page comes back without the required fields, and then reused.
+    """
+    client = DetailClient(user_agent, storage_state["cookies"], archive=archive) if http_first else None
+    playwright = browser = page = None
+    try:
+        while True:
+            try:
+                position, title, link = jobs.get_nowait()
+            except queue.Empty:
+                break
             try:
-                # Extract basic info (Adapting to generic structure due to dynamic classes)
-                title = card.locator("h3").first.inner_text()
-                
-                # Try to get price from activity-price__text-price class
-                price = "N/A"
-                price_elem = card.locator(".activity-price__text-price")
-                if price_elem.count() > 0:
-                    price = price_elem.first.inner_text()
-                
-                # Link
-                link = "N/A"
-                if card.locator("a").count() > 0:
-                    link = card.locator("a").first.get_attribute("href")
-                    if link and link.startswith("/"):
-                        link = "https://www.getyourguide.com" + link
-
-                # Navigate to detail page to extract additional info
-                duration = "N/A"
-                languages = "N/A"
-                meeting_point = "N/A"
-                meeting_point_maps_link = "N/A"
-                
-                if link != "N/A":
+                if client is not None:
+                    tour_details = fetch_http(client, link, controller, metrics)
+                    if tour_details is not None:
+                        details[position], tiers[position] = tour_details, "http"
+                        continue
+
+                if page is None:
+                    # Playwright's sync API is bound to the thread that started it
+                    with metrics.stage("launch"):
+                        playwright = sync_playwright().start()
+                        browser = launch_browser(playwright)
+                        page = new_context(browser, user_agent, storage_state).new_page()
+                print(f"🔗 Navigating to detail page for: {title[:50]}...")
+                for attempt in range(THROTTLE_RETRIES + 1):
                     try:
-                        # Open detail page in a new tab
-                        detail_page = context.new_page()
-                        detail_page.add_init_script("""
-                            Object.defineProperty(navigator, 'webdriver', {
-                                get: () => undefined
-                            });
-                        """)
-                        
-                        print(f"🔗 Navigating to detail page for: {title[:50]}...")
-                        detail_page.goto(link, wait_until="domcontentloaded", timeout=60000)
-                        time.sleep(random.uniform(2, 4))  # Wait for page to fully load
-                        
-                        # Extract Duration from key-detail-item-block with id icon-label-duration
-                        try:
-                            duration_block = detail_page.locator("#icon-label-duration")
-                            if duration_block.count() > 0:
-                                duration_text = duration_block.locator("dt .text-atom--body-strong").first.inner_text()
-                                duration = duration_text.replace("Duration", "").strip()
-                            else:
-                                # Fallback: try div[data-ref="duration"]
-                                alt_duration_block = detail_page.locator('div[data-ref="duration"]')
-                                if alt_duration_block.count() > 0:
-                                    # Look for span containing "Duration" text
-                                    duration_span = alt_duration_block.locator("dt span").all()
-                                    for span in duration_span:
-                                        span_text = span.inner_text()
-                                        if "Duration" in span_text:
-                                            duration = span_text.replace("Duration", "").strip()
-                                            break
-                        except Exception as e:
-                            print(f"⚠️ Could not extract duration: {e}")
-                        
-                        # Extract Languages from key-detail-item-block with id icon-label-tourGuides
-                        try:
-                            guides_block = detail_page.locator("#icon-label-tourGuides")
-                            if guides_block.count() > 0:
-                                languages = guides_block.locator("dd .text-atom--caption").first.inner_text()
-                        except Exception as e:
-                            print(f"⚠️ Could not extract languages: {e}")
-                        
-                        # Try alternative language sources (audio guide)
-                        if languages == "N/A":
-                            try:
-                                audio_block = detail_page.locator("#icon-label-audioGuides")
-                                if audio_block.count() > 0:
-                                    languages = audio_block.locator("dd .text-atom--caption").first.inner_text()
-                            except:
-                                pass
-                        
-                        # Extract Meeting Point - handles two HTML structures:
-                        # 1. Normal case: meeting-points-block with text description and maps link
-                        # 2. Alternative case: activity-meeting-point section with only maps link
-                        meeting_point_maps_link = "N/A"
-                        try:
-                            # Try normal case first: meeting-points-block
-                            meeting_block = detail_page.locator(".meeting-points-block, #meeting-point-links")
-                            if meeting_block.count() > 0:
-                                meeting_text_elem = meeting_block.locator(".text-atom--body").first
-                                if meeting_text_elem.count() > 0:
-                                    meeting_point = meeting_text_elem.inner_text()
-                                
-                                # Extract Google Maps link if available
-                                maps_link_elem = meeting_block.locator("a[href*='maps.google.com']")
-                                if maps_link_elem.count() > 0:
-                                    meeting_point_maps_link = maps_link_elem.first.get_attribute("href")
-                            
-                            # Fallback: alternative case with activity-meeting-point section
-                            if meeting_point == "N/A" and meeting_point_maps_link == "N/A":
-                                alt_meeting_block = detail_page.locator("section.activity-meeting-point, [data-test-id='activity-meeting-point']")
-                                if alt_meeting_block.count() > 0:
-                                    # Try to get any text content
-                                    text_elem = alt_meeting_block.locator(".text-atom--body")
-                                    if text_elem.count() > 0:
-                                        meeting_point = text_elem.first.inner_text()
-                                    
-                                    # Extract Google Maps link from this alternative structure
-                                    maps_link_elem = alt_meeting_block.locator("a[href*='maps.google.com']")
-                                    if maps_link_elem.count() > 0:
-                                        meeting_point_maps_link = maps_link_elem.first.get_attribute("href")
-                        except Exception as e:
-                            print(f"⚠️ Could not extract meeting point: {e}")
-                        
-                        detail_page.close()
-                        
-                    except Exception as e:
-                        print(f"⚠️ Error navigating to detail page: {e}")
-
-                data.append({
-                    "title": title,
-                    "price": price,
-                    "link": link,
-                    "duration": duration,
-                    "languages": languages,
-                    "meeting_point": meeting_point,
-                    "meeting_point_maps_link": meeting_point_maps_link
-                })
-                print(f"✔️ Extracted: {title} | Duration: {duration} | Languages: {languages}, Price: {price}, Link: {link}, Meeting Point: {meeting_point[:30]}...")
+                        open_paced(page, link, controller, metrics, DETAIL_READY)
+                        break
+                    except ThrottledError:
+                        if attempt == THROTTLE_RETRIES:
+                            raise
+                with metrics.stage("detail extract"):
+                    details[position], tiers[position] = extract_details(page), "browser"
+                if archive is not None:
+                    archive.record(link, snapshot(page.content()), "gyg-detail")
             except Exception as e:
-                print(f"⚠️ Error extracting card: {e}")
-                continue
+                print(f"⚠️ Error navigating to detail page: {e}")
+    finally:
+        if client is not None:
+            client.close()
+        if browser is not None:
+            browser.close()
+        if playwright is not None:
+            playwright.stop()
 
-        browser.close()
 
+def scrape_getyourguide(city_name, city_url, workers=DETAIL_WORKERS, http_first=True, controller=None,
+                        max_pages=MAX_PAGES, max_items=None, cache=None, archive=None):
+    """Scrape one city. Pass the same controller for every city so each host keeps its learned rate.
+
+    With a FingerprintCache, detail pages are only fetched for cards that are
+    new, whose title or price changed, or whose last fetch is older than the TTL.
+    With an HtmlArchive, every page extracted from is recorded for offline replay.
+    """
+    ua = UserAgent()
+    user_agent = ua.random
+    metrics = Metrics()
+    if controller is None:
+        controller = HostRateController()
+    controller.metrics = metrics
+    start = time.perf_counter()
+
+    # Stage 1: every card link of the listing, before any detail page is opened
+    with sync_playwright() as p:
+        cards, storage_state = scrape_listing(p, city_name, city_url, user_agent, controller, metrics,
+                                              max_pages, max_items, archive)
+    print(f"📊 Found {len(cards)} activities.")
+
+    # Stage 2: detail pages fanned out over a work queue, except those the cache still vouches for
+    details = [EMPTY_DETAILS] * len(cards)
+    # Which tier served each record: "cache", "http", "browser", or "none" when both failed or there is no link
+    tiers = ["none"] * len(cards)
+    fingerprints = [fingerprint(title, price) for title, price, _ in cards]
+    jobs = queue.Queue()
+    for position, (title, _, link) in enumerate(cards):
+        if link == "N/A":
+            continue
+        cached = cache.lookup(link, fingerprints[position]) if cache is not None else None
+        if cached is not None and cached["details"] is not None:
+            details[position], tiers[position] = {**EMPTY_DETAILS, **cached["details"]}, "cache"
+        else:
+            jobs.put((position, title, link))
+    if cache is not None:
+        print(f"🗂️ {tiers.count('cache')} unchanged activities from the cache, {jobs.qsize()} to fetch.")
+
+    threads = [threading.Thread(target=detail_worker,
+                                args=(jobs, details, tiers, user_agent, storage_state, controller, metrics,
+                                      http_first, archive))
+               for _ in range(min(max(workers, 1), jobs.qsize()))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if cache is not None:
+        for position, (_, _, link) in enumerate(cards):
+            if tiers[position] in ("http", "browser"):
+                cache.store(link, fingerprints[position], details[position])
+
+    data = []
+    for (title, price, link), tour_details, tier in zip(cards, details, tiers):
+        data.append({"title": title, "price": price, "link": link, **tour_details})
+        metrics.count(f"served by {tier}")
+        print(f"✔️ Extracted: {title} | Duration: {tour_details['duration']} | Languages: {tour_details['languages']}, "
+              f"Price: {price}, Link: {link}, Meeting Point: {tour_details['meeting_point'][:30]}... [{tier}]")
+
+    metrics.report(city_name, time.perf_counter() - start)
+    print(f"   {controller.host(city_url)} rate now {controller.rate(city_url):.2f} requests/s")
     return data
 
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape GetYourGuide tours of MY_CITIES")
+    parser.add_argument('--cities', nargs='+', choices=list(MY_CITIES), help="Only these cities")
+    parser.add_argument('--full', action='store_true',
+                        help="Click 'Show more' until the listing ends instead of MAX_PAGES times")
+    parser.add_argument('--max-pages', type=int, default=MAX_PAGES, help="'Show more' clicks per city")
+    parser.add_argument('--max-items', type=int, help="Stop a city's crawl after this many activities")
+    parser.add_argument('--workers', type=int, default=DETAIL_WORKERS, help="Detail pages fetched at once")
+    parser.add_argument('--ttl-days', type=float, default=DEFAULT_TTL_DAYS,
+                        help="Refetch unchanged activities whose details are older than this")
+    parser.add_argument('--no-cache', action='store_true', help="Fetch every detail page")
+    parser.add_argument('--record', metavar='DIR',
+                        help="Record the listing and detail pages into an html_archive.py archive "
+                             "(fetches every detail page)")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    max_pages = None if args.full else args.max_pages
+
     # Create output directory if it doesn't exist
     output_dir = 'tours_data'
     os.makedirs(output_dir, exist_ok=True)
     
     all_results = {}
+    cache = None
+    if not (args.no_cache or args.record):
+        cache = FingerprintCache(f"{output_dir}/{FINGERPRINT_FILE}", args.ttl_days)
+    archive = HtmlArchive(args.record) if args.record else None
+    # One controller for the whole run: the pace is learned per host, not per city
+    controller = HostRateController()
     
-    for city_name, city_url in MY_CITIES.items():
+    for city_name in args.cities or MY_CITIES:
+        city_url = MY_CITIES[city_name]
         print(f"\n{'='*60}")
         print(f"🏙️  Starting scrape for {city_name}")
         print(f"{'='*60}")
         
         try:
-            results = scrape_getyourguide(city_name, city_url)
+            results = scrape_getyourguide(city_name, city_url, args.workers, controller=controller,
+                                          max_pages=max_pages, max_items=args.max_items, cache=cache,
+                                          archive=archive)
             all_results[city_name] = results
             
             # Save individual city file
@@ -249,9 +514,6 @@ if __name__ == "__main__":
             
             print(f"🎉 [{city_name}] Done! Scraped {len(results)} items. Saved to {city_filename}")
             
-            # Add delay between cities to avoid rate limiting
-            time.sleep(random.uniform(5, 10))
-            
         except Exception as e:
             print(f"❌ [{city_name}] Error scraping: {e}")
             continue
@@ -0,0 +1,202 @@
+"""
+Record/replay archive of the pages the scrapers read.
+
+With `--record DIR`, scraper.py and trip_advisor_2.py store every listing and
+detail page they extract from: the raw HTML for pages read over HTTP, and a
+snapshot of the rendered DOM (scripts removed) for pages read in a browser, so
+a replay shows exactly what the extractors saw. Pages are gzip files named
+after their URL; each writing process appends to its own `index-<pid>.jsonl`,
+so sharded workers can record into one directory.
+
+The replay server answers a request with the recorded page of the same path
+and query, whatever host it was recorded from, which lets the extractors be
+benchmarked and checked against the archive without network
+(benchmarks/benchmark_extractors.py):
+
+    python html_archive.py serve DIR --port 8766
+    python html_archive.py list DIR
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8766
+
+SCRIPT_ELEMENT = re.compile(r'<script\b[^>]*>.*?</script\s*>', re.IGNORECASE | re.DOTALL)
+
+
+def snapshot(page_html: str) -> str:
+    """Rendered DOM without its scripts, so a replay does not rebuild or refetch the page."""
+    return SCRIPT_ELEMENT.sub('', page_html)
+
+
+def replay_path(url: str) -> str:
+    """Path and query a recorded url is served at."""
+    parts = urlsplit(url)
+    return (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+
+
+class HtmlArchive:
+    """Pages by URL, each with a kind ('gyg-listing', 'gyg-detail', 'ta-listing', 'ta-attraction', ...).
+
+    Thread-safe for recording; a URL recorded again replaces the earlier page.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._index = None
+        self.reload()
+
+    def reload(self):
+        """Read the index files of every process that recorded into the directory."""
+        entries = []
+        for index_file in self.directory.glob('index-*.jsonl'):
+            with open(index_file, 'r', encoding='utf-8') as f:
+                entries.extend(json.loads(line) for line in f if line.strip())
+        entries.sort(key=lambda entry: entry['recorded_at'])
+        self.entries = {entry['url']: entry for entry in entries}
+
+    def record(self, url: str, body: str, kind: str, status: int = 200,
+               content_type: str = 'text/html; charset=utf-8'):
+        name = hashlib.sha1(url.encode('utf-8')).hexdigest()[:20] + '.html.gz'
+        entry = {'url': url, 'kind': kind, 'status': status, 'content_type': content_type, 'file': name,
+                 'recorded_at': time.time()}
+        # Page first, then the index line that points to it
+        temporary = self.directory / f'{name}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with gzip.open(temporary, 'wt', encoding='utf-8') as f:
+            f.write(body)
+        os.replace(temporary, self.directory / name)
+        with self._lock:
+            if self._index is None:
+                self._index = open(self.directory / f'index-{os.getpid()}.jsonl', 'a', encoding='utf-8')
+            self._index.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._index.flush()
+            self.entries[url] = entry
+
+    def body(self, url: str) -> str:
+        with gzip.open(self.directory / self.entries[url]['file'], 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    def urls(self, kind: Optional[str] = None) -> Iterator[str]:
+        """Recorded URLs in recording order, optionally of one kind."""
+        return (url for url, entry in self.entries.items() if kind is None or entry['kind'] == kind)
+
+    def by_path(self) -> Dict[str, str]:
+        return {replay_path(url): url for url in self.entries}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def close(self):
+        with self._lock:
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+
+    def __enter__(self) -> 'HtmlArchive':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ReplayRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this keep-alive clients wait on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def _send(self, status: int, body: str, content_type: str = 'text/html; charset=utf-8'):
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.server.requests += 1
+        archive: HtmlArchive = self.server.archive
+        # Tracking parameters may differ from the recorded ones; fall back to the bare path
+        url = self.server.paths.get(self.path) or self.server.paths.get(urlsplit(self.path).path)
+        if url is None:
+            self._send(404, 'Not recorded')
+            return
+        entry = archive.entries[url]
+        self._send(entry['status'], archive.body(url), entry['content_type'])
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_replay_server(archive: HtmlArchive, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                       latency: float = 0.0, verbose: bool = False) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), ReplayRequestHandler)
+    server.daemon_threads = True
+    server.archive = archive
+    server.paths = archive.by_path()
+    server.latency = latency
+    server.verbose = verbose
+    server.requests = 0
+    return server
+
+
+def replay_url(base_url: str, url: str) -> str:
+    """Where the replay server at base_url serves the page recorded for url."""
+    return base_url + replay_path(url)
+
+
+def summary(archive: HtmlArchive) -> Tuple[Counter, int]:
+    """Pages per kind and their total compressed size in bytes."""
+    kinds = Counter(entry['kind'] for entry in archive.entries.values())
+    size = sum((archive.directory / entry['file']).stat().st_size for entry in archive.entries.values())
+    return kinds, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve or inspect an archive recorded with --record")
+    parser.add_argument('command', choices=['serve', 'list'])
+    parser.add_argument('directory')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    args = parser.parse_args()
+
+    archive = HtmlArchive(args.directory)
+    if args.command == 'list':
+        kinds, size = summary(archive)
+        for url, entry in archive.entries.items():
+            print(f"{entry['kind']:<14} {entry['status']}  {url}")
+        print(f"{len(archive)} pages ({', '.join(f'{kind} {count}' for kind, count in sorted(kinds.items()))}), "
+              f"{size / 1024:.0f} KiB")
+        return
+
+    server = make_replay_server(archive, port=args.port, latency=args.latency, verbose=args.verbose)
+    print(f"Replaying {len(archive)} pages on http://{DEFAULT_HOST}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Pacing shared by the GetYourGuide and TripAdvisor scrapers.
+
+Instead of sleeping a random 2-10 s around every action, the scrapers wait for
+the elements they are about to read (readiness) and take a token from a
+per-host bucket before each navigation. The bucket's rate follows AIMD: it
+grows by `increase` requests/s after every clean response and is cut by
+`decrease` on a 429/503, a captcha or an error, so the scrapers only slow down
+when the site pushes back.
+
+Metrics splits the time of a run into waiting (rate limit, readiness) and
+working (navigation, extraction) per named stage.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+# Responses that mean the site wants us to slow down
+THROTTLE_STATUSES = {403, 429, 503}
+
+DEFAULT_RATE = 1.0
+MIN_RATE = 0.05
+MAX_RATE = 4.0
+RATE_INCREASE = 0.05
+RATE_DECREASE = 0.5
+
+
+class Metrics:
+    """Seconds and calls per stage, each stage counted as waiting or working. Thread-safe."""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.kinds: Dict[str, str] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float, kind: str = 'work'):
+        with self._lock:
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self.kinds[name] = kind
+
+    @contextmanager
+    def stage(self, name: str, kind: str = 'work'):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, kind)
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def total(self, kind: str) -> float:
+        return sum(seconds for name, seconds in self.seconds.items() if self.kinds[name] == kind)
+
+    def report(self, label: str, wall_time: Optional[float] = None):
+        header = f"⏱️ [{label}]"
+        if wall_time is not None:
+            header += f" {wall_time:.1f}s wall time,"
+        print(f"{header} {self.total('wait'):.1f}s waiting / {self.total('work'):.1f}s working (summed over workers)")
+        for name, seconds in self.seconds.items():
+            calls = self.calls[name]
+            print(f"   {name:<16} {self.kinds[name]:<5} {seconds:8.2f}s  {calls:4d}x  {seconds / calls:6.2f}s avg")
+        if self.counters:
+            print("   " + ", ".join(f"{name} {count}" for name, count in sorted(self.counters.items())))
+
+
+class HostRateController:
+    """Token bucket per host with an AIMD-controlled refill rate (requests per second). Thread-safe.
+
+    reserve() hands out a token and returns how long the caller must wait for
+    it, so the same controller paces threads (acquire) and coroutines
+    (await asyncio.sleep(reserve(url))).
+    """
+
+    def __init__(self, initial_rate: float = DEFAULT_RATE, min_rate: float = MIN_RATE, max_rate: float = MAX_RATE,
+                 increase: float = RATE_INCREASE, decrease: float = RATE_DECREASE, burst: float = 1.0,
+                 metrics: Optional[Metrics] = None):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, initial_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.burst = burst
+        self.metrics = metrics
+        # host -> [rate, tokens, last refill time]
+        self._buckets: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host(url: str) -> str:
+        return urlsplit(url).netloc or url
+
+    def _bucket(self, host: str, now: float) -> list:
+        if host not in self._buckets:
+            self._buckets[host] = [self.initial_rate, self.burst, now]
+        bucket = self._buckets[host]
+        rate, tokens, last = bucket
+        bucket[1] = min(self.burst, tokens + (now - last) * rate)
+        bucket[2] = now
+        return bucket
+
+    def reserve(self, url: str) -> float:
+        """Take a token for url's host; seconds until it is valid (0 when one was available)."""
+        if self.initial_rate <= 0:
+            return 0.0
+        with self._lock:
+            bucket = self._bucket(self.host(url), time.monotonic())
+            bucket[1] -= 1.0
+            return 0.0 if bucket[1] >= 0 else -bucket[1] / bucket[0]
+
+    def acquire(self, url: str):
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+        if self.metrics is not None:
+            self.metrics.add('rate limit', delay, 'wait')
+
+    def success(self, url: str):
+        if self.initial_rate <= 0:
+            return
+        with self._lock:
+            bucket = self._bucket(self.host(url), time.monotonic())
+            bucket[0] = min(self.max_rate, bucket[0] + self.increase)
+
+    def throttled(self, url: str, reason: str):
+        """Cut the host's rate and drop its saved-up tokens."""
+        if self.metrics is not None:
+            self.metrics.count(reason)
+        if self.initial_rate <= 0:
+            return
+        with self._lock:
+            bucket = self._bucket(self.host(url), time.monotonic())
+            bucket[0] = max(self.min_rate, bucket[0] * self.decrease)
+            bucket[1] = min(bucket[1], 0.0)
+        print(f"🐢 {self.host(url)}: {reason}, slowing down to {self.rate(url):.2f} requests/s")
+
+    def rate(self, url: str) -> float:
+        with self._lock:
+            bucket = self._buckets.get(self.host(url))
+            return bucket[0] if bucket else self.initial_rate
+
+
+def wait_until(predicate: Callable[[], bool], timeout: float, interval: float = 0.1) -> bool:
+    """Poll predicate until it holds or timeout seconds pass; whether it held."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if predicate():
+                return True
+        except Exception:
+            pass
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
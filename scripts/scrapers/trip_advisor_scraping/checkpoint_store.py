@@ -0,0 +1,197 @@
+"""
+Crash-safe checkpoint store for the TripAdvisor scraper.
+
+Scraped attractions are appended to an SQLite table (WAL journal) keyed by
+their `city|category|name` id, one transaction per commit, so a killed run
+never leaves a half-written file behind and resumes from the last commit. The
+ids are also kept in memory for O(1) "already scraped" checks.
+
+The first time a store is opened next to the legacy files
+(`processed_attractions_final.json` and `tripadvisor_data_final.json`) their
+contents are imported. Downstream steps still read the JSON array, which
+`export` writes atomically in scraping order. It refuses to replace a file
+holding more records than the store (a store that missed the legacy import
+would drop them) unless forced:
+
+    python checkpoint_store.py export                 # -> DATA_FILE
+    python checkpoint_store.py export --output out.json
+    python checkpoint_store.py export --force         # even over a larger file
+    python checkpoint_store.py stats
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+from typing import Dict, Iterator, List, Optional
+
+STORE_FILE = "./tripadvisor_checkpoint.sqlite3"
+STATE_FILE = "./processed_attractions_final.json"
+DATA_FILE = "../../../data/pre_llm_processing/tripadvisor_data_final.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attractions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    unique_id TEXT NOT NULL UNIQUE,
+    record TEXT
+);
+"""
+
+
+def record_id(record: Dict) -> str:
+    return f"{record.get('city')}|{record.get('attraction_type')}|{record.get('name')}"
+
+
+class CheckpointStore:
+    """Append-only table of scraped attractions, committed every `commit_every` records.
+
+    With commit_every > 1 a crash loses at most the uncommitted records, which
+    are scraped again on the next run; the file itself stays consistent.
+    """
+
+    def __init__(self, path: str = STORE_FILE, commit_every: int = 1, import_legacy: bool = True,
+                 state_file: str = STATE_FILE, data_file: str = DATA_FILE):
+        self.path = path
+        self.commit_every = max(commit_every, 1)
+        self._pending = 0
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.processed = {row[0] for row in self.connection.execute("SELECT unique_id FROM attractions")}
+
+        if import_legacy and not self.processed:
+            self.import_legacy(state_file, data_file)
+
+    def __contains__(self, unique_id: str) -> bool:
+        return unique_id in self.processed
+
+    def __len__(self) -> int:
+        return len(self.processed)
+
+    def add(self, unique_id: str, record: Optional[Dict]):
+        """Checkpoint one attraction; a record of None only marks the id as processed."""
+        if unique_id in self.processed:
+            return
+        if self._pending == 0:
+            self.connection.execute("BEGIN IMMEDIATE")
+        self.connection.execute(
+            "INSERT OR IGNORE INTO attractions (unique_id, record) VALUES (?, ?)",
+            (unique_id, None if record is None else json.dumps(record, ensure_ascii=False)))
+        self.processed.add(unique_id)
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.commit()
+
+    def replace(self, unique_id: str, record: Dict):
+        """Checkpoint a re-scraped attraction, keeping its place in the scraping order."""
+        if unique_id not in self.processed:
+            self.add(unique_id, record)
+            return
+        if self._pending == 0:
+            self.connection.execute("BEGIN IMMEDIATE")
+        self.connection.execute("UPDATE attractions SET record = ? WHERE unique_id = ?",
+                                (json.dumps(record, ensure_ascii=False), unique_id))
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        if self._pending:
+            self.connection.execute("COMMIT")
+            self._pending = 0
+
+    def refresh(self):
+        """Pick up ids committed by other processes sharing the store."""
+        self.processed.update(row[0] for row in self.connection.execute("SELECT unique_id FROM attractions"))
+
+    def records(self) -> Iterator[Dict]:
+        """Committed records in the order they were scraped."""
+        for (record,) in self.connection.execute(
+                "SELECT record FROM attractions WHERE record IS NOT NULL ORDER BY seq"):
+            yield json.loads(record)
+
+    def import_legacy(self, state_file: str = STATE_FILE, data_file: str = DATA_FILE) -> int:
+        """Import the records of data_file, then the ids of state_file that have no record."""
+        records: List[Dict] = []
+        if os.path.exists(data_file):
+            with open(data_file, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        processed: List[str] = []
+        if os.path.exists(state_file):
+            with open(state_file, "r", encoding="utf-8") as f:
+                processed = json.load(f)
+
+        self.connection.execute("BEGIN IMMEDIATE")
+        for record in records:
+            unique_id = record_id(record)
+            if unique_id not in self.processed:
+                self.connection.execute("INSERT OR IGNORE INTO attractions (unique_id, record) VALUES (?, ?)",
+                                        (unique_id, json.dumps(record, ensure_ascii=False)))
+                self.processed.add(unique_id)
+        for unique_id in processed:
+            if unique_id not in self.processed:
+                self.connection.execute("INSERT OR IGNORE INTO attractions (unique_id) VALUES (?)", (unique_id,))
+                self.processed.add(unique_id)
+        self.connection.execute("COMMIT")
+
+        if records or processed:
+            print(f"Imported {len(records)} records and {len(processed)} processed ids into {self.path}")
+        return len(self.processed)
+
+    def export(self, output_path: str = DATA_FILE, force: bool = False) -> int:
+        """Write the records as the scraper's JSON array, replacing output_path atomically.
+
+        Raises ValueError instead when output_path already holds more records,
+        unless force is set.
+        """
+        self.commit()
+        records = list(self.records())
+        if not force and os.path.exists(output_path):
+            with open(output_path, "r", encoding="utf-8") as f:
+                existing = len(json.load(f))
+            if existing > len(records):
+                raise ValueError(f"{output_path} has {existing} records but the store only {len(records)}; "
+                                 f"not replacing it (force to export anyway)")
+        directory = os.path.dirname(os.path.abspath(output_path))
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory, suffix=".tmp", delete=False) as f:
+            json.dump(records, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f.name, output_path)
+        return len(records)
+
+    def close(self):
+        self.commit()
+        self.connection.close()
+
+    def __enter__(self) -> 'CheckpointStore':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or export the TripAdvisor checkpoint store")
+    parser.add_argument('command', choices=['export', 'stats'])
+    parser.add_argument('--store', default=STORE_FILE)
+    parser.add_argument('--output', default=DATA_FILE, help="JSON array written by export")
+    parser.add_argument('--force', action='store_true', help="Export even over a file with more records")
+    args = parser.parse_args()
+
+    with CheckpointStore(args.store) as store:
+        if args.command == 'export':
+            try:
+                count = store.export(args.output, force=args.force)
+            except ValueError as e:
+                raise SystemExit(f"✗ {e}")
+            print(f"Exported {count} records to {args.output}")
+        else:
+            with_record = sum(1 for _ in store.records())
+            print(f"{len(store)} processed ids, {with_record} records in {args.store}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,54 @@
+"""
+TripAdvisor attraction scraper.
+
+Scrapes (city, category) units into the checkpoint store (checkpoint_store.py)
+and exports tripadvisor_data_final.json at the end of a run. `--workers N`
+runs N independent browser processes that pull units from a shared queue and
+skip every id already in the store, each with its own `--rate` (attraction
+pages per minute) and `--retries` budget.
+
+    python trip_advisor_2.py --workers 3 --headless
+    python trip_advisor_2.py --refresh          # only attractions whose card changed or expired
+"""
+
 from seleniumbase import SB
 from selenium.webdriver.common.by import By
-import random
-import json
-import os
+import argparse
+import multiprocessing
+import queue
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+from checkpoint_store import DATA_FILE, STORE_FILE, CheckpointStore
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fingerprint_cache import DEFAULT_TTL_DAYS, FingerprintCache, fingerprint
+from html_archive import HtmlArchive, snapshot
+from pacing import HostRateController, Metrics, wait_until
 
-STATE_FILE = "./processed_attractions_final.json"
-DATA_FILE = "../../../data/pre_llm_processing/tripadvisor_data_final.json"
 index_spec_type_container = 0
 
+CATEGORIES = ["Sights & Landmarks", "Museums", "Nightlife", "Nature & Parks"]
+MAX_PAGES = 2
+# Failed (city, category) units one worker retries before giving up on them
+DEFAULT_RETRIES = 3
+# Page loads per minute of one worker: the starting rate and the most AIMD raises it to
+DEFAULT_RATE_PER_MINUTE = 20
+MAX_RATE_PER_MINUTE = 60
+# Seconds to wait for the elements about to be read before going on without them
+READY_TIMEOUT = 10
+# Name and spec type each attraction was last scraped with, shared by the workers (see --refresh)
+FINGERPRINT_FILE = "./tripadvisor_fingerprints.sqlite3"
+
+CARD_SELECTOR = 'div.XfVdV.o.AIbhI'
+HOURS_BUTTON_SELECTOR = 'button.keqHA.f._S.G_.w'
+HOURS_SELECTOR = 'div[data-automation="attractionsPoiHoursForDay"]'
+# DataDome, TripAdvisor's bot protection, serves its challenge in an iframe
+CAPTCHA_SELECTOR = 'iframe[src*="captcha-delivery"], iframe[src*="captcha"]'
+
 MY_CITIES = {
     'Berlin': "https://www.tripadvisor.com/Attractions-g187323-Activities-oa0-Berlin.html",
     'Cologne': "https://www.tripadvisor.com/Attractions-g187371-Activities-a_allAttractions.true-Cologne_North_Rhine_Westphalia.html",
@@ -21,30 +62,6 @@ MY_CITIES = {
 }
 
 
-def load_memory():
-    if os.path.exists(STATE_FILE):
-        with open(STATE_FILE, "r", encoding="utf-8") as f:
-            return set(json.load(f))
-    return set()
-
-
-def save_memory(memory):
-    with open(STATE_FILE, "w", encoding="utf-8") as f:
-        json.dump(sorted(list(memory)), f, indent=2)
-
-
-def append_data(record):
-    data = []
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-    data.append(record)
-
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-
-
 def extract_spec_type_by_index(sb, current_index):
     return sb.execute_script(f"""
         (function() {{
@@ -124,10 +141,48 @@ def scrape_attraction_image(sb):
         
     return None
 
-def scrape_attraction_details(sb):
-    selector = 'button.keqHA.f._S.G_.w'
+class ThrottledError(Exception):
+    """TripAdvisor answered with a captcha."""
+
+
+def ready(sb, selector, metrics, timeout=READY_TIMEOUT):
+    """Wait until selector is in the page; False after timeout seconds."""
+    with metrics.stage("readiness", "wait"):
+        try:
+            sb.wait_for_element_present(selector, timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+
+def card_link(sb, element):
+    """URL of the attraction a listing card opens, or None."""
+    return sb.execute_script(
+        "var a = arguments[0].closest('a') || arguments[0].querySelector('a'); return a ? a.href : null;",
+        element)
+
 
-    sb.sleep(1.5)
+def first_card_text(sb):
+    cards = sb.find_elements(CARD_SELECTOR)
+    return cards[0].text if cards else None
+
+
+def wait_for_new_cards(sb, previous_first_card, metrics):
+    """Wait until the card list shows something else than it did before a click."""
+    with metrics.stage("readiness", "wait"):
+        return wait_until(lambda: first_card_text(sb) not in (None, previous_first_card), READY_TIMEOUT)
+
+
+def check_captcha(sb, controller, url):
+    if sb.is_element_present(CAPTCHA_SELECTOR):
+        controller.throttled(url, "captcha")
+        raise ThrottledError(f"Captcha on {url}")
+
+
+def scrape_attraction_details(sb, metrics):
+    selector = HOURS_BUTTON_SELECTOR
+
+    ready(sb, selector, metrics)
     buttons = sb.find_elements(selector)
 
     for i, btn in enumerate(buttons):
@@ -142,168 +197,349 @@ def scrape_attraction_details(sb):
                     }}
                 }})();
             """)
-            sb.sleep(2)
 
-            if sb.is_element_present('div[data-automation="attractionsPoiHoursForDay"]'):
+            if ready(sb, HOURS_SELECTOR, metrics, timeout=5):
                 return scrape_operating_hours(sb)
 
     return {}
 
-def run_scraper():
-    categories = ["Sights & Landmarks", "Museums", "Nightlife", "Nature & Parks"]
-    processed = load_memory()
+def listing_key(city_url, category, page_num):
+    """Archive URL of one listing page: the category filter and pagination are clicks, not URLs."""
+    return f"{city_url}?{urlencode({'category': category, 'page': page_num})}"
+
+
+def scrape_unit(sb, processed, city_name, city_url, category, controller=None, metrics=None, cache=None,
+                archive=None):
+    """Scrape the first MAX_PAGES pages of one category of one city into the checkpoint store.
+
+    Every page load takes a token from controller, and every click waits for
+    the elements it brings up instead of sleeping. Attractions already in the
+    store are skipped; with a FingerprintCache only while their card shows the
+    same name and spec type as when they were scraped within the cache's TTL,
+    otherwise they are scraped again and their record replaced. With an
+    HtmlArchive, every listing and attraction page is recorded for offline replay.
+    """
+    metrics = metrics or Metrics()
+    controller = controller or HostRateController(0, metrics=metrics)
+
+    print(f"\nAnalyzing {city_name}")
+    controller.acquire(city_url)
+    with metrics.stage("navigate"):
+        sb.open(city_url)
+    check_captcha(sb, controller, city_url)
+
+    print(f"\nCategory: {category}")
+    # Click on the category - targets the div containing the category text
+    # Try to click using the div that contains the category text
+    category_selector = f'div.biGQs._P:contains("{category}")'
+    ready(sb, category_selector, metrics)
+    first_card = first_card_text(sb)
+    controller.acquire(city_url)
+    sb.click(category_selector)
+    print(f"Clicked on category: {category}")
+    wait_for_new_cards(sb, first_card, metrics)
+    controller.success(city_url)
+
+    for page_num in range(1, MAX_PAGES + 1):
+
+        print(f"\nPage {page_num}")
+
+        index_spec_type_container = 0
+
+        card_selector = CARD_SELECTOR
+
+        attraction_elements = sb.find_elements(card_selector)
+        if archive is not None:
+            archive.record(listing_key(city_url, category, page_num), snapshot(sb.get_page_source()), "ta-listing")
+
+        for i in range(len(attraction_elements)):
+            current_elements = sb.find_elements(card_selector)
+
+            if i >= len(current_elements):
+                break
+
+            element = current_elements[i]
+            name = element.text.strip()
+
+            if name and name[0].isdigit():
+                name = name.split(" ", 1)[-1]
+
+            unique_id = f"{city_name}|{category}|{name}"
+
+            result_data = extract_spec_type_by_index(sb, index_spec_type_container)
+            spec_type = result_data['text']
+            index_spec_type_container = result_data['used_index'] + 1
+
+            card_fingerprint = fingerprint(name, spec_type)
+            cache_key = None
+            if cache is not None:
+                cache_key = card_link(sb, element) or unique_id
+            if unique_id in processed and (cache is None or cache.lookup(cache_key, card_fingerprint) is not None):
+                print(f"Skipping already scraped: {name}")
+                metrics.count("unchanged")
+                continue
+
+            print(f"\nScraping: {name}")
+            print(f"Spec type: {spec_type}")
+
+            windows_before = len(sb.driver.window_handles)
+            try:
+                controller.acquire(city_url)
+                element.click()
+                with metrics.stage("readiness", "wait"):
+                    wait_until(lambda: len(sb.driver.window_handles) > windows_before, READY_TIMEOUT)
+                    sb.switch_to_newest_window()
+                    sb.wait_for_ready_state_complete()
+                check_captcha(sb, controller, city_url)
+                controller.success(city_url)
+                try:
+                    hours = scrape_attraction_details(sb, metrics)
+                except Exception as inner_e:
+                    print('Could not scrape hours')
+                    hours = None
+
+                try:
+                    image_url = scrape_attraction_image(sb)
+                except Exception as inner_e_:
+                    image_url = None
+
+                if archive is not None:
+                    # With the hours panel open, as the extractors read it
+                    archive.record(sb.get_current_url(), snapshot(sb.get_page_source()), "ta-attraction")
+
+                record = {
+                    "name": name,
+                    "city": city_name,
+                    "attraction_type": category,
+                    "spec_type": spec_type,
+                    "operating_hours": hours,
+                    "image_url": image_url
+                }
+
+                with metrics.stage("checkpoint"):
+                    processed.replace(unique_id, record)
+                    if cache is not None:
+                        cache.store(cache_key, card_fingerprint)
+
+                print("Saved successfully")
+
+            except ThrottledError:
+                raise
+            except Exception as e:
+                controller.throttled(city_url, "error")
+                print(f"Error scraping {name}: {e}")
+
+            finally:
 
-    with SB(
+                try:
+                    # Only the attraction's tab, never the listing if the click opened nothing
+                    if len(sb.driver.window_handles) > windows_before:
+                        sb.execute_script("window.close()")
+                except Exception:
+                    pass
+                sb.switch_to_default_window()
+
+        if page_num < MAX_PAGES:
+            next_page_num = page_num + 1
+            print(f"\nAttempting to go to Page {next_page_num}...")
+
+            next_selector = f'a[aria-label="{next_page_num}"]'
+
+            fallback_selector = 'a[aria-label="Next page"]'
+
+            found_next = False
+            first_card = first_card_text(sb)
+            controller.acquire(city_url)
+
+            if sb.is_element_present(next_selector):
+                sb.execute_script(f"""
+                    (function() {{
+                        var el = document.querySelector('{next_selector}');
+                        if (el) {{
+                            el.scrollIntoView({{block: 'center', behavior: 'smooth'}});
+                            setTimeout(function() {{ el.click(); }}, 500);
+                        }}
+                    }})();
+""")
+                print('element clicked')
+                found_next = True
+            elif sb.is_element_present(fallback_selector):
+                sb.execute_script(f"""
+                    (function() {{
+                        var el = document.querySelector('{fallback_selector}');
+                        if (el) {{
+                            el.scrollIntoView({{block: 'center', behavior: 'smooth'}});
+                            setTimeout(function() {{ el.click(); }}, 500);
+                        }}
+                    }})();
+""")
+                print('element clicked')
+                found_next = True
+
+            if found_next:
+                wait_for_new_cards(sb, first_card, metrics)
+                controller.success(city_url)
+            else:
+                print(f"Could not find button for Page {next_page_num}. Stopping category.")
+                break
+
+
+def work_units(cities=None, categories=None):
+    """(city, category) pairs, city-major like the serial run."""
+    return [(city_name, category)
+            for city_name in (cities or MY_CITIES)
+            for category in (categories or CATEGORIES)]
+
+
+def run_worker(worker_id, units, store_path=STORE_FILE, rate=DEFAULT_RATE_PER_MINUTE, retries=DEFAULT_RETRIES,
+               headless=False, ttl_days=None, record=None):
+    """Scrape (city, category) units from `units` until it is empty, in one SB session.
+
+    Units are disjoint, and the store is re-read before each one so ids
+    committed by other workers (or earlier runs) are skipped. A failed unit
+    slows this worker's rate down and is retried while its retry budget lasts;
+    the units it gives up on are returned. With ttl_days, stored attractions
+    whose card changed or that were scraped longer ago are scraped again.
+    With record, the pages read are recorded into that archive directory.
+    """
+    metrics = Metrics()
+    controller = HostRateController(rate / 60, max_rate=max(MAX_RATE_PER_MINUTE, rate) / 60, metrics=metrics)
+    start = time.perf_counter()
+    failed = []
+    cache = None if ttl_days is None else FingerprintCache(FINGERPRINT_FILE, ttl_days)
+    archive = None if record is None else HtmlArchive(record)
+    with CheckpointStore(store_path, import_legacy=False) as processed, SB(
         uc=True,
-        headless=False,
+        headless=headless,
         ad_block=True,
         maximize=True,
         block_images=False
     ) as sb:
-
-        for city_name, city_url in MY_CITIES.items():
-            print(f"\nAnalyzing {city_name}")
-            sb.open(city_url)
-            sb.sleep(random.uniform(3, 5))
-
-            for category in categories:
-                print(f"\nCategory: {category}")
-                # Click on the category - targets the div containing the category text
+        while True:
+            try:
+                city_name, category = units.get(timeout=1)
+            except queue.Empty:
+                break
+
+            processed.refresh()
+            while True:
                 try:
-                    # Try to click using the div that contains the category text
-                    category_selector = f'div.biGQs._P:contains("{category}")'
-                    sb.click(category_selector)
-                    print(f"Clicked on category: {category}")
+                    scrape_unit(sb, processed, city_name, MY_CITIES[city_name], category, controller, metrics,
+                                cache, archive)
+                    break
                 except Exception as e:
-                    print(f"Failed to click category {category}: {e}")
-                    continue
-                sb.sleep(random.uniform(3, 5))
-
-                
-                for page_num in range(1, 3):
-                    
-                    print(f"\nPage {page_num}")
-                    
-                    
-                    index_spec_type_container = 0
-
-                    card_selector = 'div.XfVdV.o.AIbhI'                    
-
-                    attraction_elements = sb.find_elements(card_selector)
-
-                    for i in range(len(attraction_elements)):
-                        sb.sleep(random.uniform(1.5, 2.5))
-                        current_elements = sb.find_elements(card_selector)
-
-                        if i >= len(current_elements):
-                            break
-
-                        element = current_elements[i]
-                        name = element.text.strip()
-                        
-
-                        if name and name[0].isdigit():
-                            name = name.split(" ", 1)[-1]
-
-                        unique_id = f"{city_name}|{category}|{name}"
-
-                        if unique_id in processed:
-                            print(f"Skipping already scraped: {name}")
-                            index_spec_type_container += 1
-                            continue
-
-                        result_data = extract_spec_type_by_index(sb, index_spec_type_container)
-                        spec_type = result_data['text']
-                        index_spec_type_container = result_data['used_index'] + 1
-                        print(f"\nScraping: {name}")
-                        print(f"Spec type: {spec_type}")
-
-                        try:
-                            element.click()
-                            sb.sleep(2)
-                            sb.switch_to_newest_window()
-                            try:
-                                hours = scrape_attraction_details(sb)
-                            except Exception as inner_e:
-                                print('Could not scrape hours')
-                                hours = None
-                            
-                            try:
-                                image_url = scrape_attraction_image(sb)
-                            except Exception as inner_e_:
-                                image_url = None
-
-                            record = {
-                                "name": name,
-                                "city": city_name,
-                                "attraction_type": category,
-                                "spec_type": spec_type,
-                                "operating_hours": hours,
-                                "image_url": image_url
-                            }
-
-                            append_data(record)
-                            processed.add(unique_id)
-                            save_memory(processed)
-
-                            print("Saved successfully")
-
-                        except Exception as e:
-                            print(f"Error scraping {name}: {e}")
-
-                        finally:
-                            
-                            try:    
-                                sb.execute_script("window.close()")
-                            except Exception:
-                                pass 
-                            sb.switch_to_default_window()
-                            sb.sleep(0.5)
-
-                    
-                    if page_num < 2:
-                        next_page_num = page_num + 1
-                        print(f"\nAttempting to go to Page {next_page_num}...")
-
-                        next_selector = f'a[aria-label="{next_page_num}"]'
-                        
-                        fallback_selector = 'a[aria-label="Next page"]'
-
-                        found_next = False
-                        
-                        if sb.is_element_present(next_selector):
-                            sb.execute_script(f"""
-                                (function() {{
-                                    var el = document.querySelector('{next_selector}');
-                                   if (el) {{
-                                        el.scrollIntoView({{block: 'center', behavior: 'smooth'}});
-                                        setTimeout(function() {{ el.click(); }}, 500);
-                                    }}
-                                }})();
-""")
-                            sb.sleep(1)
-                            print('element clicked')
-                            found_next = True
-                        elif sb.is_element_present(fallback_selector):
-                            sb.execute_script(f"""
-                                (function() {{
-                                    var el = document.querySelector('{fallback_selector}');
-                                    if (el) {{
-                                        el.scrollIntoView({{block: 'center', behavior: 'smooth'}});
-                                        setTimeout(function() {{ el.click(); }}, 500);
-                                    }}
-                                }})();
-""")
-                            sb.sleep(1)
-                            print('element clicked')
-                            found_next = True
-                        
-                        if found_next:
-                            sb.sleep(random.uniform(5, 7))
-                        else:
-                            print(f"Could not find button for Page {next_page_num}. Stopping category.")
-                            break
-                
+                    if retries <= 0:
+                        print(f"[worker {worker_id}] Giving up on {city_name} / {category}: {e}")
+                        failed.append((city_name, category))
+                        break
+                    retries -= 1
+                    metrics.count("unit retries")
+                    if not isinstance(e, ThrottledError):
+                        controller.throttled(MY_CITIES[city_name], "error")
+                    print(f"[worker {worker_id}] {city_name} / {category} failed ({e}), "
+                          f"retrying ({retries} retries left)")
+    if cache is not None:
+        cache.close()
+    if archive is not None:
+        archive.close()
+    metrics.report(f"worker {worker_id}", time.perf_counter() - start)
+    return failed
+
+
+def run_scraper(cities=None, categories=None, store_path=STORE_FILE, rate=DEFAULT_RATE_PER_MINUTE,
+                retries=DEFAULT_RETRIES, headless=False, ttl_days=None, record=None, force_export=False):
+    # Import the legacy files before the worker opens the store without doing so
+    CheckpointStore(store_path).close()
+
+    units = queue.Queue()
+    for unit in work_units(cities, categories):
+        units.put(unit)
+    failed = run_worker(0, units, store_path, rate, retries, headless, ttl_days, record)
+    export(store_path, failed, force_export)
+
+
+def sharded_worker(worker_id, units, results, store_path, rate, retries, headless, ttl_days, record):
+    try:
+        results.put(run_worker(worker_id, units, store_path, rate, retries, headless, ttl_days, record))
+    except Exception as e:
+        print(f"[worker {worker_id}] Crashed: {e}")
+        results.put(None)
+
+
+def run_sharded(workers, cities=None, categories=None, store_path=STORE_FILE, rate=DEFAULT_RATE_PER_MINUTE,
+                retries=DEFAULT_RETRIES, headless=False, ttl_days=None, record=None, force_export=False):
+    """Run `workers` independent browser processes over a shared queue of (city, category) units."""
+    # Import the legacy files once, before the workers open the store
+    CheckpointStore(store_path).close()
+
+    context = multiprocessing.get_context('spawn')
+    units, results = context.Queue(), context.Queue()
+    all_units = work_units(cities, categories)
+    for unit in all_units:
+        units.put(unit)
+
+    processes = [context.Process(target=sharded_worker,
+                                 args=(worker_id, units, results, store_path, rate, retries, headless,
+                                       ttl_days, record))
+                 for worker_id in range(min(workers, len(all_units)))]
+    for process in processes:
+        process.start()
+    failed, crashed = [], 0
+    for _ in processes:
+        worker_failed = results.get()
+        if worker_failed is None:
+            crashed += 1
+        else:
+            failed.extend(worker_failed)
+    for process in processes:
+        process.join()
+    if crashed:
+        print(f"\n{crashed} worker(s) crashed; rerun to scrape the units they did not finish")
+    export(store_path, failed, force_export)
+
+
+def export(store_path, failed, force=False):
+    for city_name, category in failed:
+        print(f"Not scraped: {city_name} / {category}")
+    # Downstream steps read the JSON array
+    with CheckpointStore(store_path, import_legacy=False) as processed:
+        try:
+            count = processed.export(DATA_FILE, force=force)
+        except ValueError as e:
+            print(f"\n✗ {e}")
+            return
+    print(f"\nExported {count} attractions to {DATA_FILE}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape TripAdvisor attractions of MY_CITIES")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Browser processes sharing the (city, category) units (1 = serial)")
+    parser.add_argument('--cities', nargs='+', choices=list(MY_CITIES))
+    parser.add_argument('--categories', nargs='+', choices=CATEGORIES)
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE_PER_MINUTE,
+                        help="Starting page loads per minute per worker, adapted to captchas and errors "
+                             "(0 for no limit)")
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES, help="Failed units a worker retries")
+    parser.add_argument('--store', default=STORE_FILE)
+    parser.add_argument('--headless', action='store_true')
+    parser.add_argument('--refresh', action='store_true',
+                        help="Re-scrape stored attractions whose card changed or that are older than --ttl-days")
+    parser.add_argument('--ttl-days', type=float, default=DEFAULT_TTL_DAYS)
+    parser.add_argument('--record', metavar='DIR',
+                        help="Record the listing and attraction pages into an html_archive.py archive")
+    parser.add_argument('--force-export', action='store_true',
+                        help=f"Replace {DATA_FILE} even when it holds more attractions than the store")
+    args = parser.parse_args()
+    args.ttl_days = args.ttl_days if args.refresh else None
+    return args
+
 
 if __name__ == "__main__":
-    run_scraper()
+    args = parse_args()
+    if args.workers > 1:
+        run_sharded(args.workers, args.cities, args.categories, args.store, args.rate, args.retries, args.headless,
+                    args.ttl_days, args.record, args.force_export)
+    else:
+        run_scraper(args.cities, args.categories, args.store, args.rate, args.retries, args.headless,
+                    args.ttl_days, args.record, args.force_export)
@@ -0,0 +1,359 @@
+"""
+Python port of the SPARQL query builders and result parsing in
+web-app/src/lib/sparql.ts.
+
+The strings produced here are the same as the ones the web app sends, so the
+local endpoint and the benchmarks can be exercised with the real workload.
+Keep this file in sync with `buildFilters`, `buildActivitySearchQuery`,
+`buildShortcutQuery`, `parseActivityResults` and `fetchCities` in
+web-app/src/routes/+page.server.ts. The endpoint caches by query text, so
+the match has to be exact, whitespace included:
+
+    python scripts/search_queries.py     # compare every query with the TypeScript templates
+"""
+
+import itertools
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BASE_DIR = Path(__file__).parent.parent
+WEB_APP_SPARQL_PATH = BASE_DIR / "web-app" / "src" / "lib" / "sparql.ts"
+WEB_APP_PAGE_PATH = BASE_DIR / "web-app" / "src" / "routes" / "+page.server.ts"
+
+ONTOLOGY_PREFIX = "http://www.semanticweb.org/german_tourism_activities#"
+
+SHORTCUT_RULES = ['BudgetFriendlyActivity', 'BadWeatherOption', 'EnglishFriendlyTour', 'OpenOnWeekend']
+
+
+def sparql_prefixes(ontology_prefix: str = ONTOLOGY_PREFIX) -> str:
+    return f"""
+PREFIX : <{ontology_prefix}>
+PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+"""
+
+
+def sanitize_for_uri(value: str) -> str:
+    return re.sub(r'[^a-z0-9_]', '_', value.lower())
+
+
+def build_cities_query(ontology_prefix: str = ONTOLOGY_PREFIX) -> str:
+    """The city list query sent by the page loader (`fetchCities`)."""
+    return f"""{sparql_prefixes(ontology_prefix)}
+SELECT DISTINCT ?city WHERE {{
+  ?city a :City .
+}}
+ORDER BY ?city
+"""
+
+
+def build_filters(city: str, day: Optional[str] = None, hour: Optional[str] = None,
+                  location_setting: Optional[str] = None, budget: Optional[str] = None) -> str:
+    filters = [f"?activity :isInCity :city_{sanitize_for_uri(city)} ."]
+
+    if budget:
+        filters.append(f"?activity :hasBudget :{budget} .")
+
+    if location_setting:
+        filters.append(f"?activity :hasLocationSetting :{location_setting} .")
+
+    if day and hour:
+        filters.append(f"""
+    OPTIONAL {{
+        ?activity :hasOperatingHours ?hours .
+        ?hours :appliesToDay :day_{day} .
+        ?hours :opensAt ?opensAt .
+        ?hours :closesAt ?closesAt .
+    }}
+    FILTER(
+        !BOUND(?hours) ||
+        (?opensAt <= "{hour}" && "{hour}" < ?closesAt)
+    )""")
+    elif day:
+        filters.append(f"""
+    OPTIONAL {{
+        ?activity :hasOperatingHours ?hours .
+        ?hours :appliesToDay :day_{day} .
+    }}
+    FILTER(!BOUND(?hours) || BOUND(?hours))""")
+
+    return '\n    '.join(filters)
+
+
+def build_activity_search_query(city: str, day: Optional[str] = None, hour: Optional[str] = None,
+                                location_setting: Optional[str] = None, budget: Optional[str] = None,
+                                ontology_prefix: str = ONTOLOGY_PREFIX) -> str:
+    filters = build_filters(city, day, hour, location_setting, budget)
+
+    return f"""{sparql_prefixes(ontology_prefix)}
+SELECT DISTINCT ?activity ?activityType ?budget ?locationSetting ?imageUrl ?url ?duration ?langUri ?meetingPointDesc ?mapLink ?hoursDay ?opensAt ?closesAt WHERE {{
+    ?activity rdf:type ?activityType .
+    ?activityType rdfs:subClassOf* :Activity .
+    FILTER(?activityType != :Activity && ?activityType != :PhysicalVenue)
+    
+    {filters}
+    
+    OPTIONAL {{ ?activity :hasBudget ?budget }}
+    OPTIONAL {{ ?activity :hasLocationSetting ?locationSetting }}
+    OPTIONAL {{ ?activity :hasImageURL ?imageUrl }}
+    OPTIONAL {{ ?activity :hasURL ?url }}
+    OPTIONAL {{ ?activity :hasDuration ?durationObj . ?durationObj rdfs:label ?duration }}
+    OPTIONAL {{ ?activity :hasLanguage ?langUri }}
+    OPTIONAL {{
+        ?activity :hasMeetingPoint ?meetingPointObj .
+        ?meetingPointObj :hasMeetingPointDescription ?meetingPointDesc .
+        OPTIONAL {{ ?meetingPointObj :hasMapLink ?mapLink }}
+    }}
+    OPTIONAL {{
+        ?activity :hasOperatingHours ?hoursObj .
+        ?hoursObj :appliesToDay ?hoursDay .
+        ?hoursObj :opensAt ?opensAt .
+        ?hoursObj :closesAt ?closesAt .
+    }}
+}}
+ORDER BY ?activity ?hoursDay
+"""
+
+
+OPTIONAL_METADATA_BLOCK = """
+    OPTIONAL { ?activity :hasBudget ?budget }
+    OPTIONAL { ?activity :hasLocationSetting ?locationSetting }
+    OPTIONAL { ?activity :hasImageURL ?imageUrl }
+    OPTIONAL { ?activity :hasURL ?url }
+    OPTIONAL { ?activity :hasDuration ?durationObj . ?durationObj rdfs:label ?duration }
+    OPTIONAL { ?activity :hasLanguage ?langUri }
+    OPTIONAL {
+        ?activity :hasMeetingPoint ?meetingPointObj .
+        ?meetingPointObj :hasMeetingPointDescription ?meetingPointDesc .
+        OPTIONAL { ?meetingPointObj :hasMapLink ?mapLink }
+    }
+    OPTIONAL {
+        ?activity :hasOperatingHours ?hoursObj .
+        ?hoursObj :appliesToDay ?hoursDay .
+        ?hoursObj :opensAt ?opensAt .
+        ?hoursObj :closesAt ?closesAt .
+    }"""
+
+_ACTIVITY_SCAFFOLD = """
+    ?activity rdf:type ?activityType .
+    ?activityType rdfs:subClassOf* :Activity .
+    FILTER(?activityType NOT IN (:Activity, :PhysicalVenue, :BudgetFriendlyActivity, :BadWeatherOption, :EnglishFriendlyTour, :OpenOnWeekend))"""
+
+SHORTCUT_RULE_PATTERNS: Dict[str, Dict[str, str]] = {
+    'BudgetFriendlyActivity': {
+        'type_scaffold': _ACTIVITY_SCAFFOLD,
+        'rule_pattern': """
+    {
+        { ?activity rdf:type :BudgetFriendlyActivity }
+        UNION
+        { ?activity :hasBudget ?bTier . FILTER(?bTier IN (:budget_free, :budget_low)) }
+    }""",
+    },
+    'BadWeatherOption': {
+        'type_scaffold': _ACTIVITY_SCAFFOLD,
+        'rule_pattern': """
+    {
+        { ?activity rdf:type :BadWeatherOption }
+        UNION
+        { ?activity :hasLocationSetting :location_indoor }
+    }""",
+    },
+    'EnglishFriendlyTour': {
+        'type_scaffold': """
+    ?activity rdf:type ?activityType .
+    ?activityType rdfs:subClassOf* :Tour .
+    FILTER(?activityType NOT IN (:EnglishFriendlyTour))""",
+        'rule_pattern': """
+    {
+        { ?activity rdf:type :EnglishFriendlyTour }
+        UNION
+        { ?activity :hasLanguage :lang_english }
+    }""",
+    },
+    'OpenOnWeekend': {
+        'type_scaffold': """
+    ?activity rdf:type ?activityType .
+    ?activityType rdfs:subClassOf* :PhysicalVenue .
+    FILTER(?activityType NOT IN (:PhysicalVenue, :OpenOnWeekend))""",
+        'rule_pattern': """
+    {
+        { ?activity rdf:type :OpenOnWeekend }
+        UNION
+        { ?activity :hasOperatingHours ?ohRule . ?ohRule :appliesToDay ?wdRule . FILTER(?wdRule IN (:day_saturday, :day_sunday)) }
+    }""",
+    },
+}
+
+
+def build_shortcut_query(rule_key: str, ontology_prefix: str = ONTOLOGY_PREFIX) -> str:
+    pattern = SHORTCUT_RULE_PATTERNS.get(rule_key)
+    if not pattern:
+        raise ValueError(f"Unknown shortcut rule: {rule_key}")
+
+    return f"""{sparql_prefixes(ontology_prefix)}
+SELECT DISTINCT ?activity ?activityType ?cityUri ?budget ?locationSetting ?imageUrl ?url ?duration ?langUri ?meetingPointDesc ?mapLink ?hoursDay ?opensAt ?closesAt WHERE {{
+    {pattern['type_scaffold']}
+    {pattern['rule_pattern']}
+
+    ?activity :isInCity ?cityUri .
+{OPTIONAL_METADATA_BLOCK}
+}}
+ORDER BY ?activity ?hoursDay
+"""
+
+
+# --- Result parsing (mirror of parseActivityResults) ------------------------
+
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+ACTIVITY_TYPES = {'tour': 'Tour', 'museum': 'Museum', 'park': 'Park', 'sight': 'Sight',
+                  'nightlifevenue': 'NightlifeVenue'}
+
+
+def extract_local_name(uri: str) -> str:
+    index = max(uri.rfind('#'), uri.rfind('/'))
+    return uri[index + 1:] if index >= 0 else uri
+
+
+def format_activity_name(uri: str) -> str:
+    # re.ASCII: JavaScript's \w, \b and \d are ASCII-only
+    name = re.sub(r'^(tour|venue)_', '', extract_local_name(uri), flags=re.IGNORECASE | re.ASCII)
+    name = re.sub(r'_\d+$', '', name, flags=re.ASCII)
+    return re.sub(r'\b\w', lambda m: m.group().upper(), name.replace('_', ' '), flags=re.ASCII)
+
+
+def determine_activity_type(type_uri: str) -> str:
+    return ACTIVITY_TYPES.get(extract_local_name(type_uri).lower(), 'Sight')
+
+
+def _strip_prefix(uri: Optional[str], prefix: str) -> Optional[str]:
+    if not uri:
+        return None
+    return extract_local_name(uri).replace(prefix, '', 1)
+
+
+def _capitalized(uri: Optional[str], prefix: str) -> Optional[str]:
+    name = _strip_prefix(uri, prefix)
+    return name[:1].upper() + name[1:] if name is not None else None
+
+
+def parse_activity_results(bindings: List[Dict[str, Dict[str, str]]],
+                           city_resolver: Callable[[Dict], str]) -> List[Dict]:
+    """Group SPARQL result rows into Activity dicts, as the web app does.
+
+    Properties the web app leaves `undefined` are None here.
+    """
+    activities: Dict[str, Dict] = {}
+    for binding in bindings:
+        uri = binding['activity']['value']
+        entry = activities.setdefault(uri, {'binding': binding, 'hours': [], 'languages': []})
+
+        language = _capitalized(binding.get('langUri', {}).get('value'), 'lang_')
+        if language and language not in entry['languages']:
+            entry['languages'].append(language)
+
+        day = _capitalized(binding.get('hoursDay', {}).get('value'), 'day_')
+        opens_at = binding.get('opensAt', {}).get('value')
+        closes_at = binding.get('closesAt', {}).get('value')
+        if day and opens_at and closes_at and all(hours['day'] != day for hours in entry['hours']):
+            entry['hours'].append({'day': day, 'opensAt': opens_at, 'closesAt': closes_at})
+
+    results = []
+    for uri, entry in activities.items():
+        binding = entry['binding']
+        value = lambda name: binding.get(name, {}).get('value')
+        hours = sorted(entry['hours'], key=lambda h: DAY_ORDER.index(h['day']) if h['day'] in DAY_ORDER else -1)
+        results.append({
+            'uri': uri,
+            'name': format_activity_name(uri),
+            'type': determine_activity_type(binding['activityType']['value']),
+            'city': city_resolver(binding),
+            'budget': _strip_prefix(value('budget'), 'budget_'),
+            'locationSetting': _strip_prefix(value('locationSetting'), 'location_'),
+            'imageUrl': value('imageUrl'),
+            'url': value('url'),
+            'duration': value('duration'),
+            'languages': entry['languages'] or None,
+            'meetingPoint': value('meetingPointDesc'),
+            'mapLink': value('mapLink'),
+            'operatingHours': hours or None,
+        })
+    return results
+
+
+# --- Sync check against the TypeScript templates -----------------------------
+
+_TEMPLATE_LITERAL = re.compile(r'`((?:[^`\\]|\\.)*)`', re.S)
+_PLACEHOLDER = re.compile(r'\$\{([^}]*)\}')
+
+
+def _template_literals(source: str, after: str, count: int = 1) -> List[str]:
+    """The first `count` template literals following the text `after`."""
+    start = source.index(after)
+    return [match.group(1) for match in itertools.islice(_TEMPLATE_LITERAL.finditer(source, start), count)]
+
+
+def _render(template: str, values: Dict[str, str]) -> str:
+    """Fill a template literal's ${...} placeholders from their expression text."""
+    return _PLACEHOLDER.sub(lambda match: values[match.group(1)], template)
+
+
+def web_app_mismatches(sparql_path: Path = WEB_APP_SPARQL_PATH, page_path: Path = WEB_APP_PAGE_PATH) -> List[str]:
+    """Names of the queries whose text differs from the web app's, for every search form combination."""
+    sparql_ts = sparql_path.read_text(encoding='utf-8')
+    page_ts = page_path.read_text(encoding='utf-8')
+    mismatches = []
+
+    prefixes = _render(_template_literals(sparql_ts, 'export const SPARQL_PREFIXES')[0],
+                       {'ONTOLOGY_PREFIX': ONTOLOGY_PREFIX})
+    if prefixes != sparql_prefixes():
+        mismatches.append('SPARQL_PREFIXES')
+    if _render(_template_literals(page_ts, 'const query =')[0],
+               {'SPARQL_PREFIXES': prefixes}) != build_cities_query():
+        mismatches.append('fetchCities')
+
+    # Pushed in this order: city, budget, location setting, day + hour, day only
+    city, budget, location, day_and_hour, day_only = _template_literals(sparql_ts, 'function buildFilters', 5)
+    search = _template_literals(sparql_ts, 'export function buildActivitySearchQuery')[0]
+    for budget_value, location_value, day_value, hour_value in itertools.product(
+            [None, 'budget_low'], [None, 'location_indoor'], [None, 'saturday'], [None, '14:00']):
+        values = {'sanitizeForUri(params.city)': sanitize_for_uri('Berlin'), 'params.budget': budget_value,
+                  'params.locationSetting': location_value, 'params.day': day_value, 'params.hour': hour_value}
+        pushed = [city]
+        if budget_value:
+            pushed.append(budget)
+        if location_value:
+            pushed.append(location)
+        if day_value and hour_value:
+            pushed.append(day_and_hour)
+        elif day_value:
+            pushed.append(day_only)
+        filters = '\n    '.join(_render(template, values) for template in pushed)
+        params = dict(city='Berlin', day=day_value, hour=hour_value, location_setting=location_value,
+                      budget=budget_value)
+        if _render(search, {'SPARQL_PREFIXES': prefixes, 'filters': filters}) != build_activity_search_query(**params):
+            mismatches.append(f"buildActivitySearchQuery({params})")
+
+    metadata = _template_literals(sparql_ts, 'const OPTIONAL_METADATA_BLOCK')[0]
+    shortcut = _template_literals(sparql_ts, 'export function buildShortcutQuery', 2)[1]
+    for rule in SHORTCUT_RULES:
+        type_scaffold, rule_pattern = _template_literals(sparql_ts, f"    {rule}: {{", 2)
+        expected = _render(shortcut, {'SPARQL_PREFIXES': prefixes, 'pattern.typeScaffold': type_scaffold,
+                                      'pattern.rulePattern': rule_pattern, 'OPTIONAL_METADATA_BLOCK': metadata})
+        if expected != build_shortcut_query(rule):
+            mismatches.append(f"buildShortcutQuery({rule})")
+    return mismatches
+
+
+def main():
+    mismatches = web_app_mismatches()
+    if mismatches:
+        for name in mismatches:
+            print(f"✗ {name} differs from {WEB_APP_SPARQL_PATH.relative_to(BASE_DIR)}")
+        raise SystemExit(1)
+    print("✓ Every query matches the web app's text")
+
+
+if __name__ == '__main__':
+    main()
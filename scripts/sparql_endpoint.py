@@ -0,0 +1,395 @@
+"""
+Local SPARQL 1.1 HTTP endpoint over the populated ontology.
+
+Loads the ontology once into an in-memory Owlready2 quadstore and answers the
+queries built by web-app/src/lib/sparql.ts, so the web app can point
+`TRIPLYDB_ENDPOINT` at it instead of the remote TriplyDB service:
+
+    python scripts/sparql_endpoint.py --port 7878
+    # web-app/.env
+    TRIPLYDB_ENDPOINT=http://127.0.0.1:7878/sparql
+
+Accepts the SPARQL protocol forms of a query (POST with
+`application/sparql-query`, POST form-encoded `query=`, GET `?query=`) and
+answers with `application/sparql-results+json`. The store is read-only, so
+prepared queries and serialized results are cached by query text.
+
+Owlready2 joins a variable left unbound by an OPTIONAL as NULL. The search
+form's day + hour filter binds ?opensAt / ?closesAt in such an OPTIONAL, so
+activities without hours that day would lose every hours row; that filter's
+times are renamed and joined in Python instead, which gives the standard
+SPARQL result. `--check` compares the answers to the web app's queries with
+rdflib's evaluation of them:
+
+    python scripts/sparql_endpoint.py --check
+"""
+
+import argparse
+import json
+import re
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from owlready2 import World, locstr
+
+from search_queries import (SHORTCUT_RULES, build_activity_search_query, build_cities_query,
+                            build_shortcut_query)
+
+BASE_DIR = Path(__file__).parent.parent
+ONTOLOGY_PATH = BASE_DIR / "ontologies" / "populated" / "german_city_tourism_with_rules.owl"
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 7878
+DEFAULT_PATH = '/sparql'
+SEARCH_PATH = '/search'
+# Serialized result sets kept in memory; the web app's search space is small
+RESULT_CACHE_SIZE = 512
+
+RESULTS_CONTENT_TYPE = 'application/sparql-results+json'
+XSD = 'http://www.w3.org/2001/XMLSchema#'
+LITERAL_DATATYPES = {bool: 'boolean', int: 'integer', float: 'decimal'}
+
+_PROJECTION = re.compile(r'\bSELECT\s+(?:DISTINCT\s+|REDUCED\s+)?((?:\?\w+\s*)+)', re.IGNORECASE)
+# The OPTIONAL/FILTER buildFilters emits for a day and an hour
+_DAY_HOUR_FILTER = re.compile(
+    r'(\?hours :opensAt )\?opensAt( \.\s*\?hours :closesAt )\?closesAt( \.\s*\}\s*'
+    r'FILTER\(\s*!BOUND\(\?hours\) \|\|\s*\()\?opensAt( <= "[^"]*" && "[^"]*" < )\?closesAt\)')
+DAY_TIME_VARIABLES = ('dayOpensAt', 'dayClosesAt')
+
+
+class QueryError(Exception):
+    """The query could not be parsed or executed."""
+
+
+def term_binding(value) -> Dict[str, str]:
+    """Convert an Owlready2 query result into a SPARQL JSON results term."""
+    iri = getattr(value, 'iri', None)
+    if iri is not None:
+        return {'type': 'uri', 'value': iri}
+    if isinstance(value, locstr) and value.lang:
+        return {'type': 'literal', 'value': str(value), 'xml:lang': value.lang}
+    datatype = LITERAL_DATATYPES.get(type(value))
+    if datatype == 'boolean':
+        return {'type': 'literal', 'value': str(value).lower(), 'datatype': f"{XSD}boolean"}
+    if datatype:
+        return {'type': 'literal', 'value': str(value), 'datatype': f"{XSD}{datatype}"}
+    return {'type': 'literal', 'value': str(value)}
+
+
+def projected_variables(query: str, prepared) -> List[str]:
+    columns = getattr(prepared, 'column_names', None)
+    if columns:
+        return [name.lstrip('?') for name in columns]
+    match = _PROJECTION.search(query)
+    if not match:
+        raise QueryError("Only SELECT queries with explicit variables are supported")
+    return [name.lstrip('?') for name in match.group(1).split()]
+
+
+def rewrite_day_hour_filter(query: str) -> Optional[str]:
+    """The query with the day + hour filter's times bound to DAY_TIME_VARIABLES and projected last.
+
+    None when the query has no such filter, or does not project ?opensAt and
+    ?closesAt (then nothing joins on them).
+    """
+    projection = _PROJECTION.search(query)
+    if not projection or not {'?opensAt', '?closesAt'} <= set(projection.group(1).split()):
+        return None
+    opens, closes = (f"?{name}" for name in DAY_TIME_VARIABLES)
+    rewritten, count = _DAY_HOUR_FILTER.subn(rf'\g<1>{opens}\g<2>{closes}\g<3>{opens}\g<4>{closes})', query)
+    if not count:
+        return None
+    end = projection.end(1)
+    return f"{rewritten[:end].rstrip()} {opens} {closes} {rewritten[end:]}"
+
+
+def join_day_times(variables: List[str], rows: List[list]) -> List[tuple]:
+    """Keep the rows whose hours have the filter's times (if bound), without the DAY_TIME_VARIABLES columns."""
+    opens, closes, day_opens, day_closes = (variables.index(name)
+                                            for name in ('opensAt', 'closesAt') + DAY_TIME_VARIABLES)
+    seen, joined = set(), []
+    for row in rows:
+        if row[day_opens] is not None and (row[opens], row[closes]) != (row[day_opens], row[day_closes]):
+            continue
+        row = tuple(row[:-len(DAY_TIME_VARIABLES)])
+        if row not in seen:
+            seen.add(row)
+            joined.append(row)
+    return joined
+
+
+class SparqlService:
+    """Owlready2-backed query service with prepared-query and result caches."""
+
+    def __init__(self, ontology_path: Path = ONTOLOGY_PATH, cache_size: int = RESULT_CACHE_SIZE):
+        self.world = World()
+        self.onto = self.world.get_ontology(f"file://{ontology_path}").load()
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._prepared: Dict[str, object] = {}
+        self._results: "OrderedDict[str, bytes]" = OrderedDict()
+        # Owlready2 shares one SQLite connection; queries on it run one at a time
+        self._store_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+
+    def _cached(self, query: str) -> Optional[bytes]:
+        with self._cache_lock:
+            body = self._results.get(query)
+            if body is not None:
+                self._results.move_to_end(query)
+                self.hits += 1
+            return body
+
+    def _remember(self, query: str, body: bytes):
+        if not self.cache_size:
+            return
+        with self._cache_lock:
+            self._results[query] = body
+            if len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+
+    def execute(self, query: str) -> Tuple[List[str], List[list]]:
+        """Run a SELECT query and return (variables, rows of Owlready2 values)."""
+        rewritten = rewrite_day_hour_filter(query)
+        with self._store_lock:
+            prepared = self._prepared.get(query)
+            try:
+                if prepared is None:
+                    prepared = self.world.prepare_sparql(rewritten or query, error_on_undefined_entities=False)
+                    self._prepared[query] = prepared
+                variables = projected_variables(rewritten or query, prepared)
+                rows = list(prepared.execute())
+            except QueryError:
+                raise
+            except Exception as e:
+                raise QueryError(f"{type(e).__name__}: {e}") from e
+        if rewritten:
+            rows = join_day_times(variables, rows)
+            variables = variables[:-len(DAY_TIME_VARIABLES)]
+        return variables, rows
+
+    def query(self, query: str) -> bytes:
+        """Run a query and return the `application/sparql-results+json` body."""
+        body = self._cached(query)
+        if body is not None:
+            return body
+
+        variables, rows = self.execute(query)
+        bindings = []
+        for row in rows:
+            bindings.append({name: term_binding(value)
+                             for name, value in zip(variables, row) if value is not None})
+        body = json.dumps({'head': {'vars': variables}, 'results': {'bindings': bindings}},
+                          ensure_ascii=False).encode('utf-8')
+        with self._cache_lock:
+            self.misses += 1
+        self._remember(query, body)
+        return body
+
+    def warm(self) -> int:
+        """Prepare and cache the city list, the shortcut queries and each city's unfiltered search."""
+        cities = json.loads(self.query(build_cities_query()))['results']['bindings']
+        queries = [build_shortcut_query(rule) for rule in SHORTCUT_RULES]
+        queries += [build_activity_search_query(row['city']['value'].rsplit('city_', 1)[-1]) for row in cities]
+        for query in queries:
+            self.query(query)
+        return len(queries) + 1
+
+
+class ReferenceService:
+    """rdflib's evaluation of the same queries, to check SparqlService against."""
+
+    def __init__(self, ontology_path: Path = ONTOLOGY_PATH):
+        import rdflib
+
+        self.graph = rdflib.Graph()
+        self.graph.parse(str(ontology_path), format='xml')
+
+    def query(self, query: str) -> bytes:
+        return self.graph.query(query).serialize(format='json')
+
+
+def check_queries(cities: List[str]) -> List[Tuple[str, str]]:
+    """(name, query) of the city list, the shortcuts and each city's searches over every filter shape."""
+    queries = [('cities', build_cities_query())]
+    queries += [(rule, build_shortcut_query(rule)) for rule in SHORTCUT_RULES]
+    # Late hours fall into overnight spans, early ones before most openings
+    for city in cities:
+        for day, hour, location_setting, budget in [
+                (None, None, None, None), ('saturday', None, None, None), ('saturday', '14:00', None, None),
+                ('monday', '09:00', None, None), ('friday', '23:30', None, None), ('sunday', '02:00', None, None),
+                ('wednesday', '12:00', 'location_indoor', 'budget_low'), (None, None, 'location_outdoor', 'budget_free')]:
+            params = dict(day=day, hour=hour, location_setting=location_setting, budget=budget)
+            queries.append((f"{city} {params}", build_activity_search_query(city, **params)))
+    return queries
+
+
+def result_rows(body: bytes) -> List[tuple]:
+    """A JSON result set as sorted rows of (variable, value), ignoring order and literal datatypes."""
+    results = json.loads(body)
+    variables = results['head']['vars']
+    return sorted(tuple((name, binding[name]['value']) for name in variables if name in binding)
+                  for binding in results['results']['bindings'])
+
+
+def check(service: SparqlService, reference: ReferenceService) -> int:
+    """Compare the service's answers to check_queries() with the reference's; return the number that differ."""
+    cities = [row[0][1].rsplit('city_', 1)[-1] for row in result_rows(service.query(build_cities_query()))]
+    mismatches = 0
+    for name, query in check_queries(cities):
+        actual, expected = result_rows(service.query(query)), result_rows(reference.query(query))
+        if actual != expected:
+            mismatches += 1
+            print(f"  ✗ {name}: {len(actual)} rows, {len(expected)} from rdflib "
+                  f"({len(set(actual) - set(expected))} extra, {len(set(expected) - set(actual))} missing)")
+    print(f"{'✓' if not mismatches else '✗'} {mismatches} of {len(check_queries(cities))} queries differ from rdflib")
+    return mismatches
+
+
+class SparqlRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'GermanTravelCompanionSPARQL/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str):
+        self._send(status, message.encode('utf-8'), 'text/plain; charset=utf-8')
+
+    def _answer(self, query: Optional[str]):
+        if not query:
+            self._error(400, "Missing SPARQL query")
+            return
+        try:
+            body = self.server.service.query(query)
+        except QueryError as e:
+            self._error(400, str(e))
+            return
+        self._send(200, body, f"{RESULTS_CONTENT_TYPE}; charset=utf-8")
+
+    def _search(self, query_string: str):
+        params = {key: values[0] for key, values in parse_qs(query_string).items()}
+        if not params.get('city'):
+            self._error(400, "Missing city")
+            return
+        activities = self.server.facet_index.search(
+            params['city'], day=params.get('day') or None, hour=params.get('hour') or None,
+            location_setting=params.get('locationSetting') or None, budget=params.get('budget') or None)
+        self._send(200, json.dumps(activities, ensure_ascii=False).encode('utf-8'),
+                   'application/json; charset=utf-8')
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == SEARCH_PATH and self.server.facet_index is not None:
+            self._search(url.query)
+            return
+        if url.path != self.server.endpoint_path:
+            self._error(404, f"Not found: {url.path}")
+            return
+        self._answer(parse_qs(url.query).get('query', [None])[0])
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != self.server.endpoint_path:
+            self._error(404, f"Not found: {url.path}")
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        payload = self.rfile.read(length).decode('utf-8')
+        content_type = (self.headers.get('Content-Type') or '').split(';')[0].strip().lower()
+        if content_type == 'application/sparql-query':
+            self._answer(payload)
+        elif content_type == 'application/x-www-form-urlencoded':
+            self._answer(parse_qs(payload).get('query', [None])[0])
+        else:
+            self._error(415, f"Unsupported Content-Type: {content_type or '(none)'}")
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Accept')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(service: SparqlService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                path: str = DEFAULT_PATH, verbose: bool = False, facet_index=None) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), SparqlRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.endpoint_path = path
+    server.verbose = verbose
+    server.facet_index = facet_index
+    return server
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve the populated ontology over the SPARQL 1.1 protocol")
+    parser.add_argument('--ontology', type=Path, default=ONTOLOGY_PATH)
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--path', default=DEFAULT_PATH, help="URL path of the endpoint")
+    parser.add_argument('--cache-size', type=int, default=RESULT_CACHE_SIZE,
+                        help="Result sets kept in memory (0 disables the result cache)")
+    parser.add_argument('--warm', action='store_true',
+                        help="Run the city list, shortcut and per-city search queries before serving")
+    parser.add_argument('--facet-index', type=Path,
+                        help=f"Also answer the search form at {SEARCH_PATH}?city=&day=&hour=&locationSetting=&budget= "
+                             "from this facet index (see facet_index.py)")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    parser.add_argument('--check', action='store_true',
+                        help="Compare the answers to the web app's queries with rdflib's, then exit (needs rdflib)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print(f"Loading ontology from: {args.ontology}")
+    service = SparqlService(args.ontology, cache_size=args.cache_size)
+    print(f"  Loaded {sum(1 for _ in service.onto.individuals())} individuals")
+
+    if args.check:
+        print("Loading the ontology into rdflib")
+        if check(service, ReferenceService(args.ontology)):
+            raise SystemExit(1)
+        return
+
+    if args.warm:
+        print(f"  Warmed {service.warm()} queries")
+
+    facet_index = None
+    if args.facet_index:
+        from facet_index import FacetIndex
+        facet_index = FacetIndex.load(args.facet_index)
+        print(f"  Loaded facet index of {len(facet_index)} activities")
+
+    server = make_server(service, args.host, args.port, args.path, args.verbose, facet_index)
+    print(f"SPARQL endpoint listening on http://{args.host}:{server.server_port}{args.path}")
+    if facet_index is not None:
+        print(f"Search listening on http://{args.host}:{server.server_port}{SEARCH_PATH}")
+    print(f"  Set TRIPLYDB_ENDPOINT=http://{args.host}:{server.server_port}{args.path} in web-app/.env")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,176 +1,118 @@
-import json
+import argparse
 import os
-import re
-from collections import Counter
-from typing import List, Dict, Any
-
-def load_data(filepath: str) -> List[Dict[str, Any]]:
-    """Load JSON data from file."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def parse_price(price_str: str) -> float:
-    """Extract numeric value from price string."""
-    if not price_str:
-        return 0.0
-    # Remove currency symbols and convert to float
-    clean_price = re.sub(r'[^\d.]', '', price_str)
-    try:
-        return float(clean_price)
-    except ValueError:
-        return 0.0
-
-def analyze_prices(data: List[Dict]) -> Dict[str, float]:
-    """Calculate price statistics."""
-    prices = []
-    for item in data:
-        p = parse_price(item.get('price', ''))
-        if p > 0:
-            prices.append(p)
-    
-    if not prices:
-        return {'min': 0, 'max': 0, 'avg': 0}
-        
-    return {
-        'min': min(prices),
-        'max': max(prices),
-        'avg': sum(prices) / len(prices)
-    }
-
-def count_languages(data: List[Dict]) -> Counter:
-    """Count occurrences of each language."""
-    lang_counter = Counter()
-    for item in data:
-        langs = item.get('languages', '')
-        if langs:
-            # specific fix for "Spanish, English..."
-            for lang in langs.split(','):
-                lang_counter[lang.strip()] += 1
-    return lang_counter
 
-def main():
-    # Resolve paths relative to this script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    # Path to data file: ../../data/post_llm_processing/all_cities_tours.json
-    data_path = os.path.join(script_dir, '../../data/post_llm_processing/all_cities_tours.json')
-    # Path to output file: ../../stats/gyg_stats.md
-    output_path = os.path.join(script_dir, '../../stats/gyg_stats.txt')
-    
-    # Create stats directory if it doesn't exist
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+from stats_engine import Report, Table
 
-    print(f"Loading data from {data_path}...")
-    try:
-        data = load_data(data_path)
-    except FileNotFoundError:
-        print(f"Error: Data file not found at {data_path}")
-        return
+# Fields read into the table; budget tier and setting count a missing value as 'Unknown'
+FIELDS = ('city', 'duration', 'languages', 'budget_tier', 'location_setting', 'price')
+DEFAULTS = {'budget_tier': 'Unknown', 'location_setting': 'Unknown'}
 
-    output = []
-    
-    def add_line(text=""):
-        output.append(str(text))
-        
-    def add_section(title):
-        add_line("=" * 80)
-        add_line(f"{title:^80}")
-        add_line("=" * 80)
-        add_line()
+
+def build_report(table: Table, breakdown: bool = False) -> str:
+    """The gyg_stats.txt report of a table of tours; breakdown adds the cross-tab and price quartiles."""
+    report = Report()
+    total = len(table)
 
     # 1. Basic Statistics
-    cities = set(item.get('city') for item in data if item.get('city'))
-    lang_counts = count_languages(data)
-    price_stats = analyze_prices(data)
-    
-    add_section("📊 BASIC STATISTICS")
-    add_line(f"Total Tours:      {len(data):,}")
-    add_line(f"Total Cities:     {len(cities)}")
-    add_line(f"Total Languages:  {len(lang_counts)}")
-    add_line(f"Price Range:      €{price_stats['min']:.2f} - €{price_stats['max']:.2f} (Avg: €{price_stats['avg']:.2f})")
-    add_line()
+    city_counter = table.counts('city', present_only=True)
+    lang_counts = table.split_counts('languages')
+    price_stats = table.price_summary('price')
+
+    report.section("📊 BASIC STATISTICS")
+    report.line(f"Total Tours:      {total:,}")
+    report.line(f"Total Cities:     {len(city_counter)}")
+    report.line(f"Total Languages:  {len(lang_counts)}")
+    report.line(f"Price Range:      €{price_stats['min']:.2f} - €{price_stats['max']:.2f} (Avg: €{price_stats['avg']:.2f})")
+    report.line()
 
     # 2. Tours by City
-    add_section("🏙️  TOURS BY CITY")
-    city_counter = Counter(item.get('city') for item in data if item.get('city'))
-    for i, (city, count) in enumerate(city_counter.most_common(), 1):
-        percentage = (count / len(data)) * 100
-        add_line(f"{i:2d}. {city:<30s} {count:4d} tours ({percentage:5.2f}%)")
-    add_line()
+    report.section("🏙️  TOURS BY CITY")
+    report.ranking(city_counter.most_common(), total, "tours")
+    report.line()
 
     # 3. Top 10 Duration Types
-    add_section("⏱️  TOP 10 DURATION TYPES")
-    duration_counter = Counter(item.get('duration') for item in data if item.get('duration'))
-    for i, (dur, count) in enumerate(duration_counter.most_common(10), 1):
-        percentage = (count / len(data)) * 100
-        add_line(f"{i:2d}. {dur:<30s} {count:4d} tours ({percentage:5.2f}%)")
-    add_line()
+    report.section("⏱️  TOP 10 DURATION TYPES")
+    report.ranking(table.counts('duration', present_only=True).most_common(10), total, "tours")
+    report.line()
 
     # 4. Top 10 Languages
-    add_section("🗣️  TOP 10 LANGUAGES")
-    for i, (lang, count) in enumerate(lang_counts.most_common(10), 1):
-        percentage = (count / len(data)) * 100 # Note: sum of % > 100% since multiple langs per tour
-        add_line(f"{i:2d}. {lang:<30s} {count:4d} tours ({percentage:5.2f}%)")
-    add_line()
+    # Note: sum of % > 100% since multiple langs per tour
+    report.section("🗣️  TOP 10 LANGUAGES")
+    report.ranking(lang_counts.most_common(10), total, "tours")
+    report.line()
 
     # 5. Budget Tier Distribution
-    add_section("💰 BUDGET TIER DISTRIBUTION")
-    budget_counter = Counter(item.get('budget_tier', 'Unknown') for item in data)
-    budget_order = ['Free', 'Low', 'Medium', 'High']
-    
-    for tier_name in budget_order:
-        count = 0
-        if tier_name in budget_counter:
-            count = budget_counter[tier_name]
-        elif tier_name.lower() in budget_counter:
-            count = budget_counter[tier_name.lower()]
-            
-        if count > 0:
-            percentage = (count / len(data)) * 100
-            add_line(f"{tier_name:<15s} {count:4d} tours ({percentage:5.2f}%)")
-    add_line()
+    report.section("💰 BUDGET TIER DISTRIBUTION")
+    report.distribution(table.counts('budget_tier'), ['Free', 'Low', 'Medium', 'High'], total, "tours")
+    report.line()
 
     # 6. Location Setting Distribution
-    add_section("📍 LOCATION SETTING DISTRIBUTION")
-    loc_counter = Counter(item.get('location_setting', 'Unknown') for item in data)
-    loc_order = ['Indoor', 'Outdoor']
-    
-    for loc_name in loc_order:
-        count = 0
-        if loc_name in loc_counter:
-            count = loc_counter[loc_name]
-        elif loc_name.lower() in loc_counter:
-            count = loc_counter[loc_name.lower()]
-            
-        if count > 0:
-            percentage = (count / len(data)) * 100
-            add_line(f"{loc_name:<15s} {count:4d} tours ({percentage:5.2f}%)")
-    add_line()
+    report.section("📍 LOCATION SETTING DISTRIBUTION")
+    report.distribution(table.counts('location_setting'), ['Indoor', 'Outdoor'], total, "tours")
+    report.line()
+
+    if breakdown:
+        report.section("🧮 CITY × BUDGET × SETTING")
+        report.crosstab(table, "tours")
+        report.line()
+
+        report.section("💶 PRICE DISTRIBUTION")
+        report.line(f"Priced Tours:     {price_stats['count']:,}")
+        report.line(f"Quartiles:        €{price_stats['p25']:.2f} / €{price_stats['median']:.2f} / "
+                    f"€{price_stats['p75']:.2f}")
+        report.line()
 
     # 7. Summary
-    add_section("📈 SUMMARY")
-    
+    report.section("📈 SUMMARY")
+
     most_common_city = city_counter.most_common(1)[0] if city_counter else ("N/A", 0)
     most_common_lang = lang_counts.most_common(1)[0] if lang_counts else ("N/A", 0)
-    
+
     summary_text = f"""    Dataset Overview:
-    • Total Tours:              {len(data):,}
-    • Cities Covered:           {len(cities)}
+    • Total Tours:              {total:,}
+    • Cities Covered:           {len(city_counter)}
     • Most Expensive:           €{price_stats['max']:.2f}
     • Average Price:            €{price_stats['avg']:.2f}
     
     Most Common City:           {most_common_city[0]} ({most_common_city[1]} tours)
     Most Common Language:       {most_common_lang[0]} ({most_common_lang[1]} tours)"""
-    
-    add_line(summary_text)
+
+    report.line(summary_text)
+    return report.text()
+
+
+def main():
+    # Resolve paths relative to this script
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Write the GetYourGuide tours statistics report")
+    # Path to data file: ../../data/post_llm_processing/all_cities_tours.json
+    parser.add_argument('--data', default=os.path.join(script_dir, '../../data/post_llm_processing/all_cities_tours.json'))
+    # Path to output file: ../../stats/gyg_stats.txt
+    parser.add_argument('--output', default=os.path.join(script_dir, '../../stats/gyg_stats.txt'))
+    parser.add_argument('--breakdown', action='store_true',
+                        help="Add the city x budget x setting cross-tab and the price quartiles")
+    args = parser.parse_args()
+    data_path, output_path = args.data, args.output
+
+    # Create stats directory if it doesn't exist
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    print(f"Loading data from {data_path}...")
+    try:
+        table = Table.from_file(data_path, FIELDS, defaults=DEFAULTS)
+    except FileNotFoundError:
+        print(f"Error: Data file not found at {data_path}")
+        return
 
     # Output
-    final_output = "\n".join(output)
+    final_output = build_report(table, args.breakdown)
     print(final_output)
-    
+
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write(final_output)
-    
+
     print(f"\nStats saved to {output_path}")
 
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,584 @@
+"""
+Statistics of the populated knowledge graph, and a diff against the JSON it was built from.
+
+gyg_stats.txt and trip_advisor_stats.txt describe the input JSON; this report
+describes what abox_population.py and the rule materialization actually put
+in the graph. The triples are streamed once - straight out of the quadstore
+tables for an OWL file or a persistent --incremental store, or line by line
+for an N-Triples/Turtle export - into a few counters keyed by term id, and
+names are only resolved for the keys that end up in the report:
+
+- individuals per asserted class, with and without subclasses, and the size
+  of every inferred rule class
+- triples and distinct subjects per property
+- per class and property, a histogram of how many values its individuals
+  have (0 is how a missing city, budget or duration shows up)
+- orphaned individuals (non-activities nothing refers to) and references to
+  individuals that were never declared
+- the counts the JSON records imply against the counts found in the graph,
+  the records whose individual is missing (dropped by the error handler of
+  populate_tours/populate_attractions) and the operating hours that did not
+  parse
+
+    python scripts/stats_generators/analyze_statistics_kg.py
+    python scripts/stats_generators/analyze_statistics_kg.py --graph ontologies/populated/abox_store.sqlite3 --check
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR / 'scripts'))
+
+from owlready2 import World
+from owlready2.base import owl_class, owl_named_individual, rdf_type, rdfs_subclassof
+
+from abox_population import (ATTRACTIONS_JSON_PATH, BUDGET_TIERS, CITIES, DAYS_OF_WEEK, DEFAULT_VENUE_CLASS,
+                             LOCATION_SETTINGS, RULES_OUTPUT_PATH, TOURS_JSON_PATH, VENUE_CLASS_RULES,
+                             operating_hours_iri, parse_operating_hours, record_key, sanitize_name_for_iri,
+                             stable_suffix, venue_classes_for)
+from rdf_streaming import OWL, RDF, iter_statements
+from rule_materialization import RULE_CLASSES
+from search_queries import extract_local_name
+from stats_engine import Report, Table, load_data
+
+RDFS_SUBCLASS_OF = 'http://www.w3.org/2000/01/rdf-schema#subClassOf'
+STORE_SUFFIXES = ('.sqlite3', '.sqlite', '.db')
+
+# Individuals of these classes (and their subclasses) are what the records become; nothing has to refer to them
+ROOT_CLASSES = ('Activity',)
+# Venue class -> the property linking it to its venue type individual
+VENUE_TYPE_PROPERTIES = {venue_class: type_property for venue_class, _, type_property
+                         in [rule[1:] for rule in VENUE_CLASS_RULES] + [DEFAULT_VENUE_CLASS]}
+VENUE_CLASSES = list(VENUE_TYPE_PROPERTIES)
+WEEKEND_DAYS = ('Saturday', 'Sunday')
+# Values per individual above this share the last histogram bucket
+CARDINALITY_BUCKETS = 5
+# Examples listed per orphaned class, dangling property and missing record kind
+EXAMPLES = 5
+
+Term = Hashable
+
+
+# --- One pass over the triples ----------------------------------------------
+
+class GraphCounts:
+    """What a single pass over the triples of a graph collects.
+
+    Terms are opaque ids (quadstore storids, or IRIs for a file), so nothing is
+    resolved while streaming; `name` gives the local name of one.
+    """
+
+    def __init__(self, vocabulary: Dict[str, Term], name: Callable[[Term], str]):
+        self.type_id = vocabulary['type']
+        self.class_id = vocabulary['class']
+        self.subclass_id = vocabulary['subClassOf']
+        self.individual_id = vocabulary['NamedIndividual']
+        self.name = name
+        self.types: Dict[Term, List[Term]] = defaultdict(list)
+        self.parents: Dict[Term, List[Term]] = defaultdict(list)
+        # Every other object triple
+        self.links: List[Tuple[Term, Term, Term]] = []
+        # (subject, data property) -> literals
+        self.values: Counter = Counter()
+
+    def add_objects(self, triples: Iterable[Tuple[Term, Term, Term]]):
+        type_id, subclass_id = self.type_id, self.subclass_id
+        types, parents, append_link = self.types, self.parents, self.links.append
+        for s, p, o in triples:
+            if p == type_id:
+                types[s].append(o)
+            elif p == subclass_id:
+                parents[s].append(o)
+            else:
+                append_link((s, p, o))
+
+    def add_values(self, pairs: Iterable[Tuple[Term, Term]]):
+        self.values.update(pairs)
+
+    @property
+    def triples(self) -> Tuple[int, int]:
+        """Object and data triples seen."""
+        objects = len(self.links) + sum(map(len, self.types.values())) + sum(map(len, self.parents.values()))
+        return objects, sum(self.values.values())
+
+
+def graph_contexts(world: World) -> List[int]:
+    """Quadstore contexts of the loaded ontologies and their inferences, not of the ontologies they import."""
+    ontologies = list(world.ontologies.values())
+    imported = {imported.graph.c for ontology in ontologies for imported in ontology.imported_ontologies}
+    return sorted({ontology.graph.c for ontology in ontologies} - imported)
+
+
+def quadstore_counts(world: World) -> GraphCounts:
+    """One scan of the objs and datas tables, restricted to graph_contexts()."""
+    counts = GraphCounts({'type': rdf_type, 'class': owl_class, 'subClassOf': rdfs_subclassof,
+                          'NamedIndividual': owl_named_individual},
+                         lambda storid: extract_local_name(world._unabbreviate(storid)))
+    contexts = graph_contexts(world)
+    marks = ','.join('?' * len(contexts))
+    db = world.graph.db
+    counts.add_objects(db.execute(f"SELECT s, p, o FROM objs WHERE c IN ({marks})", contexts))
+    counts.add_values(db.execute(f"SELECT s, p FROM datas WHERE c IN ({marks})", contexts))
+    return counts
+
+
+def file_counts(path: Path) -> GraphCounts:
+    """One read of an N-Triples/Turtle file as written by rdf_streaming.TripleStreamWriter."""
+    counts = GraphCounts({'type': f"{RDF}type", 'class': f"{OWL}Class", 'subClassOf': RDFS_SUBCLASS_OF,
+                          'NamedIndividual': f"{OWL}NamedIndividual"}, extract_local_name)
+    values = counts.values
+
+    def objects():
+        for subject, predicate, obj in iter_statements(path):
+            if obj[0] == 'iri':
+                yield subject, predicate, obj[1]
+            else:
+                values[(subject, predicate)] += 1
+
+    counts.add_objects(objects())
+    return counts
+
+
+def is_triple_file(path: Path) -> bool:
+    suffixes = [suffix for suffix in path.suffixes if suffix != '.gz']
+    return bool(suffixes) and suffixes[-1] in ('.nt', '.ttl')
+
+
+def read_graph(path: Path) -> GraphCounts:
+    """Counts of an RDF/XML ontology, a persistent quadstore or an N-Triples/Turtle file."""
+    if is_triple_file(path):
+        return file_counts(path)
+    if path.suffix in STORE_SUFFIXES:
+        world = World(filename=str(path))
+    else:
+        world = World()
+        world.get_ontology(f"file://{path.resolve()}").load()
+    return quadstore_counts(world)
+
+
+# --- Aggregation ------------------------------------------------------------
+
+def _ancestors(name: str, parents: Dict[str, List[str]], seen: Optional[Set[str]] = None) -> Set[str]:
+    seen = seen if seen is not None else set()
+    if name not in seen:
+        seen.add(name)
+        for parent in parents.get(name, ()):
+            _ancestors(parent, parents, seen)
+    return seen
+
+
+class GraphStats:
+    """Class, property and cardinality statistics of a graph, by local name."""
+
+    def __init__(self, counts: GraphCounts):
+        object_triples, data_triples = counts.triples
+        self.object_triples = object_triples
+        self.data_triples = data_triples
+
+        classes = {s for s, types in counts.types.items() if counts.class_id in types}
+        class_names = {storid: counts.name(storid) for storid in classes}
+        parents = {class_names[c]: [class_names[p] for p in counts.parents.get(c, ()) if p in classes]
+                   for c in classes}
+        self.ancestors = {name: _ancestors(name, parents) for name in parents}
+        self.rules_declared = any(name in parents for name in RULE_CLASSES)
+
+        # Individual -> asserted class names; memberships of rule classes are counted apart
+        asserted: Dict[Term, Tuple[str, ...]] = {}
+        self.inferred_sizes: Counter = Counter()
+        for s, types in counts.types.items():
+            if s in classes:
+                continue
+            names = {class_names[t] for t in types if t in classes}
+            if not names and counts.individual_id not in types:
+                continue
+            asserted[s] = tuple(sorted(names.difference(RULE_CLASSES)))
+            self.inferred_sizes.update(names.intersection(RULE_CLASSES))
+        self.individuals = len(asserted)
+        # sync_reasoner() puts its conclusions in another ontology, so declared rule classes may be empty here
+        self.rules_materialized = bool(self.inferred_sizes)
+        self.names = {counts.name(s) for s in asserted}
+
+        by_classes = Counter(asserted.values())
+        self.class_sizes: Counter = Counter()
+        self.class_totals: Counter = Counter()
+        for names, count in by_classes.items():
+            for name in names or ('(no class)',):
+                self.class_sizes[name] += count
+            for name in set().union(*(self.ancestors.get(name, {name}) for name in names)):
+                self.class_totals[name] += count
+
+        # Values per (individual, property), object and data properties alike
+        links = [(s, p, o) for s, p, o in counts.links if s in asserted]
+        per_subject = Counter((s, p) for s, p, _ in links)
+        data_properties = set()
+        for (s, p), count in counts.values.items():
+            if s in asserted:
+                per_subject[(s, p)] += count
+                data_properties.add(p)
+
+        property_names = {p: counts.name(p) for _, p in per_subject}
+        self.property_kinds = {property_names[p]: 'data' if p in data_properties else 'object'
+                               for p in property_names}
+        self.property_triples: Counter = Counter()
+        self.property_subjects: Counter = Counter()
+        # (class, property) -> Counter(values per individual), 0 left out; triples per (class, property)
+        self.cardinality: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+        self.class_property_triples: Counter = Counter()
+        for (s, p), count in per_subject.items():
+            name = property_names[p]
+            self.property_triples[name] += count
+            self.property_subjects[name] += 1
+            for class_name in asserted[s]:
+                self.cardinality[(class_name, name)][min(count, CARDINALITY_BUCKETS)] += 1
+                self.class_property_triples[(class_name, name)] += count
+
+        # (subject class, property, object) -> triples, e.g. ('Tour', 'isInCity', 'city_berlin')
+        self.link_counts: Counter = Counter()
+        for (classes_of, p, o), count in Counter((asserted[s], p, o) for s, p, o in links).items():
+            object_name = counts.name(o)
+            for class_name in classes_of:
+                self.link_counts[(class_name, property_names[p], object_name)] += count
+
+        # Individuals nothing refers to that are not records themselves, and references to undeclared terms
+        referenced = {o for _, _, o in links}
+        self.orphans: Dict[str, List[str]] = defaultdict(list)
+        for s, names in asserted.items():
+            if s not in referenced and not any(root in self.ancestors.get(name, ()) for name in names
+                                               for root in ROOT_CLASSES):
+                for name in names or ('(no class)',):
+                    self.orphans[name].append(counts.name(s))
+        self.dangling: Dict[str, List[str]] = defaultdict(list)
+        for s, p, o in links:
+            if o not in asserted and o not in classes:
+                self.dangling[property_names[p]].append(counts.name(o))
+
+    def size(self, *class_names: str) -> int:
+        return sum(self.class_sizes[name] for name in class_names)
+
+    def linked(self, class_names: Sequence[str], property_name: str, object_name: str) -> int:
+        """Triples from individuals of the classes to one object through one property."""
+        return sum(self.link_counts[(name, property_name, object_name)] for name in class_names)
+
+    def with_property(self, pairs: Iterable[Tuple[str, str]]) -> int:
+        """Individuals that have at least one value, over (class, property) pairs."""
+        return sum(sum(self.cardinality[pair].values()) for pair in pairs if pair in self.cardinality)
+
+    def triples_of(self, pairs: Iterable[Tuple[str, str]]) -> int:
+        return sum(self.class_property_triples[pair] for pair in pairs)
+
+    def histogram(self, class_name: str, property_name: str) -> Counter:
+        """Individuals of the class per number of values of the property, 0 included."""
+        hist = Counter(self.cardinality.get((class_name, property_name), {}))
+        missing = self.class_sizes[class_name] - sum(hist.values())
+        if missing:
+            hist[0] = missing
+        return hist
+
+
+# --- What the JSON records imply --------------------------------------------
+
+TOUR_FIELDS = ('city', 'budget_tier', 'location_setting', 'duration', 'languages', 'link')
+ATTRACTION_FIELDS = ('city', 'budget_tier', 'location_setting', 'attraction_type', 'spec_type', 'image_url')
+CITY_KEYS = {city.lower() for city in CITIES}
+
+
+def keyed(table: Table, field: str, key: Callable[[Any], Any]) -> Counter:
+    """Records per key(value), key applied once per distinct value."""
+    counter = Counter()
+    for value, count in table.mapped(field, key):
+        counter[value] += count
+    return counter
+
+
+def _choice(allowed) -> Callable[[Any], Optional[str]]:
+    # The lowercased value when abox_population links it, as in tour_triples/attraction_triples
+    return lambda value: value.lower() if isinstance(value, str) and value and value.lower() in allowed else None
+
+
+def _languages(value: Any) -> Set[str]:
+    if not isinstance(value, str):
+        return set()
+    return {language.strip().lower().replace(' ', '_') for language in value.split(',') if language.strip()}
+
+
+class HoursCounts:
+    """What the operating_hours of the attractions should become."""
+
+    def __init__(self, attractions: Iterable[Dict[str, Any]]):
+        self.venues = 0
+        self.entries = 0
+        self.weekend_venues = 0
+        self.iris: Set[str] = set()
+        self.weekend_iris: Set[str] = set()
+        self.unparsed: Counter = Counter()
+        self.unknown_days: Counter = Counter()
+        for record in attractions:
+            operating_hours = record.get('operating_hours')
+            if not operating_hours or not isinstance(operating_hours, dict):
+                continue
+            days = []
+            for day, hours_str in operating_hours.items():
+                if not hours_str:
+                    continue
+                if day not in DAYS_OF_WEEK:
+                    self.unknown_days[day] += 1
+                    continue
+                parsed = parse_operating_hours(hours_str) if isinstance(hours_str, str) else None
+                if parsed is None:
+                    self.unparsed[str(hours_str)] += 1
+                    continue
+                iri = operating_hours_iri(day, *parsed)
+                self.iris.add(iri)
+                if day in WEEKEND_DAYS:
+                    self.weekend_iris.add(iri)
+                days.append(day)
+            if days:
+                self.venues += 1
+                self.entries += len(days)
+                self.weekend_venues += any(day in WEEKEND_DAYS for day in days)
+
+
+def missing_records(kind: str, records: Sequence[Dict[str, Any]], names: Set[str]) -> List[Tuple[int, str]]:
+    """(position, name) of the records without an individual in the graph.
+
+    A record counts as present under either IRI scheme: its list position
+    (the default population) or its stable suffix (--incremental).
+    """
+    prefix, name_field = ('tour', 'title') if kind == 'tour' else ('venue', 'name')
+    occurrences = Counter()
+    missing = []
+    for idx, record in enumerate(records, 1):
+        base_key = record_key(kind, record)
+        occurrences[base_key] += 1
+        key = base_key if occurrences[base_key] == 1 else f"{base_key}#{occurrences[base_key]}"
+        found = False
+        for suffix in (idx, stable_suffix(key)):
+            name = record.get(name_field, f"{'tour' if kind == 'tour' else 'attraction'}_{suffix}")
+            if isinstance(name, str) and f"{prefix}_{sanitize_name_for_iri(name)}_{suffix}" in names:
+                found = True
+                break
+        if not found:
+            missing.append((idx, str(record.get(name_field))))
+    return missing
+
+
+def diff_rows(graph: GraphStats, tours: Sequence[Dict[str, Any]],
+              attractions: Sequence[Dict[str, Any]]) -> List[Tuple[str, int, int]]:
+    """(metric, count implied by the JSON, count in the graph)."""
+    tour_table = Table.from_records(tours, TOUR_FIELDS)
+    attraction_table = Table.from_records(attractions, ATTRACTION_FIELDS)
+    hours = HoursCounts(attractions)
+    rows = []
+
+    rows.append(("Tour individuals", len(tours), graph.size('Tour')))
+    rows.append(("Venue individuals", len(attractions), graph.size(*VENUE_CLASSES)))
+    venue_classes = keyed(attraction_table, 'attraction_type',
+                          lambda value: venue_classes_for(value if isinstance(value, str) else '')[0])
+    for venue_class in VENUE_CLASSES:
+        rows.append((f"{venue_class} individuals", venue_classes[venue_class], graph.size(venue_class)))
+
+    for label, table, classes in (("Tours", tour_table, ['Tour']), ("Venues", attraction_table, VENUE_CLASSES)):
+        cities = keyed(table, 'city', _choice(CITY_KEYS))
+        for city in CITIES:
+            key = city.lower()
+            rows.append((f"{label} in {city}", cities[key], graph.linked(classes, 'isInCity', f'city_{key}')))
+        budgets = keyed(table, 'budget_tier', _choice(BUDGET_TIERS))
+        for tier in BUDGET_TIERS:
+            rows.append((f"{label} with budget {tier}", budgets[tier],
+                         graph.linked(classes, 'hasBudget', f'budget_{tier}')))
+        settings = keyed(table, 'location_setting', _choice(LOCATION_SETTINGS))
+        for setting in LOCATION_SETTINGS:
+            rows.append((f"{label} {setting}", settings[setting],
+                         graph.linked(classes, 'hasLocationSetting', f'location_{setting}')))
+
+    rows.append(("Tours with a duration", keyed(tour_table, 'duration', bool)[True],
+                 graph.with_property([('Tour', 'hasDuration')])))
+    languages = tour_table.mapped('languages', _languages)
+    rows.append(("Tours with languages", sum(count for names, count in languages if names),
+                 graph.with_property([('Tour', 'hasLanguage')])))
+    rows.append(("Tour language links", sum(len(names) * count for names, count in languages),
+                 graph.triples_of([('Tour', 'hasLanguage')])))
+    rows.append(("Tours with a URL", keyed(tour_table, 'link', bool)[True], graph.with_property([('Tour', 'hasURL')])))
+
+    rows.append(("Venues with a spec type", keyed(attraction_table, 'spec_type', bool)[True],
+                 graph.with_property(VENUE_TYPE_PROPERTIES.items())))
+    rows.append(("Venues with an image URL", keyed(attraction_table, 'image_url', bool)[True],
+                 graph.with_property((venue_class, 'hasImageURL') for venue_class in VENUE_CLASSES)))
+    rows.append(("Venues with operating hours", hours.venues,
+                 graph.with_property((venue_class, 'hasOperatingHours') for venue_class in VENUE_CLASSES)))
+    rows.append(("Venue opening days", hours.entries,
+                 graph.triples_of((venue_class, 'hasOperatingHours') for venue_class in VENUE_CLASSES)))
+    rows.append(("OperatingHours individuals", len(hours.iris), graph.size('OperatingHours')))
+
+    if graph.rules_materialized:
+        tour_budgets = keyed(tour_table, 'budget_tier', _choice(BUDGET_TIERS))
+        venue_budgets = keyed(attraction_table, 'budget_tier', _choice(BUDGET_TIERS))
+        indoor = (keyed(tour_table, 'location_setting', _choice(LOCATION_SETTINGS))['indoor']
+                  + keyed(attraction_table, 'location_setting', _choice(LOCATION_SETTINGS))['indoor'])
+        expected = {
+            'BudgetFriendlyActivity': sum(tour_budgets[tier] + venue_budgets[tier] for tier in ('free', 'low')),
+            'BadWeatherOption': indoor,
+            'EnglishFriendlyTour': sum(count for names, count in languages if 'english' in names),
+            'WeekendHours': len(hours.weekend_iris),
+            'OpenOnWeekend': hours.weekend_venues,
+        }
+        for name in RULE_CLASSES:
+            rows.append((f"{name} (inferred)", expected[name], graph.inferred_sizes[name]))
+    return rows
+
+
+# --- Report -----------------------------------------------------------------
+
+def _examples(names: List[str]) -> str:
+    shown = ", ".join(sorted(names)[:EXAMPLES])
+    return shown + (f", ... (+{len(names) - EXAMPLES})" if len(names) > EXAMPLES else "")
+
+
+def build_report(graph: GraphStats, tours: Optional[Sequence[Dict[str, Any]]] = None,
+                 attractions: Optional[Sequence[Dict[str, Any]]] = None) -> Tuple[str, int]:
+    """The kg_stats.txt report, and how many JSON-vs-graph checks failed (0 without JSON)."""
+    report = Report()
+    total = graph.individuals
+
+    report.section("📊 GRAPH SIZE")
+    report.line(f"Object Triples:   {graph.object_triples:,}")
+    report.line(f"Data Triples:     {graph.data_triples:,}")
+    report.line(f"Individuals:      {total:,}")
+    report.line(f"Classes Used:     {len([name for name in graph.class_sizes if name != '(no class)'])}")
+    report.line(f"Properties Used:  {len(graph.property_triples)}")
+    report.line()
+
+    report.section("🧩 INDIVIDUALS PER CLASS")
+    for i, (name, count) in enumerate(graph.class_sizes.most_common(), 1):
+        percentage = (count / total) * 100
+        with_subclasses = graph.class_totals[name]
+        extra = f", {with_subclasses} with subclasses" if with_subclasses != count else ""
+        report.line(f"{i:2d}. {name:<30s} {count:5d} individuals ({percentage:5.2f}%){extra}")
+    for name in sorted(set(graph.class_totals) - set(graph.class_sizes)):
+        report.line(f"    {name:<30s} {graph.class_totals[name]:5d} individuals in subclasses")
+    report.line()
+
+    report.section("🧠 INFERRED CLASSES")
+    if graph.rules_materialized:
+        for name in RULE_CLASSES:
+            report.line(f"{name:<30s} {graph.inferred_sizes[name]:5d} individuals")
+    elif graph.rules_declared:
+        report.line("Rule classes declared, but none has members in this graph (run rule_materialization.py)")
+    else:
+        report.line("No rule classes in this graph (run rule_materialization.py)")
+    report.line()
+
+    report.section("🔗 PROPERTIES")
+    for name in sorted(graph.property_triples):
+        report.line(f"{name:<30s} {graph.property_kinds[name]:<6s} {graph.property_triples[name]:6d} triples "
+                    f"{graph.property_subjects[name]:6d} subjects")
+    report.line()
+
+    report.section("📶 VALUES PER INDIVIDUAL")
+    properties_of = defaultdict(list)
+    for class_name, property_name in graph.cardinality:
+        properties_of[class_name].append(property_name)
+    for class_name, count in graph.class_sizes.most_common():
+        if class_name not in properties_of:
+            continue
+        report.line(f"{class_name} ({count})")
+        for property_name in sorted(properties_of[class_name]):
+            hist = graph.histogram(class_name, property_name)
+            buckets = "  ".join(f"{value}{'+' if value == CARDINALITY_BUCKETS else ''}: {hist[value]}"
+                                for value in sorted(hist))
+            report.line(f"  {property_name:<28s} {buckets}")
+    report.line("(individuals per number of values; 0 = property missing)")
+    report.line()
+
+    report.section("🏝️  ORPHANED INDIVIDUALS")
+    if not graph.orphans and not graph.dangling:
+        report.line("None")
+    for name, names in sorted(graph.orphans.items()):
+        report.line(f"{name:<30s} {len(names):5d} not referenced: {_examples(names)}")
+    for name, names in sorted(graph.dangling.items()):
+        report.line(f"{name:<30s} {len(names):5d} references to undeclared individuals: {_examples(names)}")
+    report.line()
+
+    failed = 0
+    if tours is not None and attractions is not None:
+        rows = diff_rows(graph, tours, attractions)
+        report.section("⚖️  JSON vs GRAPH")
+        report.line(f"{'':<40s} {'json':>7s} {'graph':>7s} {'diff':>7s}")
+        for metric, expected, actual in rows:
+            mark = '' if expected == actual else '  ✗'
+            failed += expected != actual
+            report.line(f"{metric:<40s} {expected:7d} {actual:7d} {actual - expected:+7d}{mark}")
+        report.line()
+
+        missing_tours = missing_records('tour', tours, graph.names)
+        missing_attractions = missing_records('attraction', attractions, graph.names)
+        failed += bool(missing_tours) + bool(missing_attractions)
+        report.line(f"Tours without an individual:      {len(missing_tours):4d}")
+        for idx, name in missing_tours[:EXAMPLES]:
+            report.line(f"  #{idx} {name}")
+        report.line(f"Attractions without an individual: {len(missing_attractions):4d}")
+        for idx, name in missing_attractions[:EXAMPLES]:
+            report.line(f"  #{idx} {name}")
+
+        hours = HoursCounts(attractions)
+        report.line(f"Unparsed operating hours:          {sum(hours.unparsed.values()):4d} "
+                    f"({len(hours.unparsed)} distinct)")
+        for hours_str, count in hours.unparsed.most_common(EXAMPLES):
+            report.line(f"  {count:4d} x {hours_str!r}")
+        if hours.unknown_days:
+            report.line(f"Unknown operating-hours days:      {sum(hours.unknown_days.values()):4d} "
+                        f"({', '.join(sorted(hours.unknown_days))})")
+        report.line()
+
+    report.section("📈 SUMMARY")
+    report.line(f"    Individuals:              {total:,}")
+    report.line(f"    Triples:                  {graph.object_triples + graph.data_triples:,}")
+    report.line(f"    Orphaned individuals:     {sum(map(len, graph.orphans.values()))}")
+    if tours is not None and attractions is not None:
+        report.line(f"    JSON checks failed:       {failed}")
+    return report.text(), failed
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Write the knowledge graph statistics report")
+    parser.add_argument('--graph', type=Path, default=RULES_OUTPUT_PATH,
+                        help="RDF/XML ontology, --incremental quadstore (.sqlite3) or N-Triples/Turtle export")
+    parser.add_argument('--tours', type=Path, default=TOURS_JSON_PATH)
+    parser.add_argument('--attractions', type=Path, default=ATTRACTIONS_JSON_PATH)
+    parser.add_argument('--no-json', action='store_true', help="Only describe the graph, without the JSON diff")
+    parser.add_argument('--output', default=os.path.join(script_dir, '../../stats/kg_stats.txt'))
+    parser.add_argument('--check', action='store_true',
+                        help="Exit with 1 when the graph does not match what the JSON implies")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+
+    print(f"Streaming triples from {args.graph}...")
+    start = time.perf_counter()
+    graph = GraphStats(read_graph(args.graph))
+    streamed = time.perf_counter() - start
+    tours = attractions = None
+    if not args.no_json:
+        tours, attractions = load_data(str(args.tours)), load_data(str(args.attractions))
+    final_output, failed = build_report(graph, tours, attractions)
+    print(final_output)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(final_output)
+
+    print(f"\nRead {graph.object_triples + graph.data_triples:,} triples in {streamed:.2f}s, "
+          f"report in {time.perf_counter() - start:.2f}s")
+    print(f"Stats saved to {args.output}")
+    if args.check and failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Columnar statistics engine shared by analyze_statistics_gyg.py and
+analyze_statistics_trip_advisor.py.
+
+A dataset is read once into a Table: every field the reports use becomes a
+column (a list with one value per record, counted per distinct value as it is
+built), or a byte array for yes/no fields. The aggregations run over those
+columns with C-level builtins (Counter, zip) instead of Python loops over the
+records, and anything derived from a value (a parsed price, a split language
+list) is computed once per distinct value, not once per record:
+
+- counts(field): a Counter in the order values were first seen, so
+  most_common() breaks ties exactly like a Counter fed record by record
+- split_counts(field, sep): the same for comma-separated lists
+- crosstab(*fields): counts of value combinations (city x budget x setting)
+- price_summary(field): min / max / average and quartiles of the prices
+
+Report renders the fixed-width text layout of the stats/*.txt files.
+"""
+
+import json
+import re
+from array import array
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+def load_data(filepath: str) -> List[Dict[str, Any]]:
+    """Load JSON data from file."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def parse_price(price_str: str) -> float:
+    """Extract numeric value from price string."""
+    if not price_str:
+        return 0.0
+    # Remove currency symbols and convert to float
+    clean_price = re.sub(r'[^\d.]', '', price_str)
+    try:
+        return float(clean_price)
+    except ValueError:
+        return 0.0
+
+
+class Column:
+    """One field of every record, and the number of records per distinct value in first-seen order."""
+
+    def __init__(self, name: str, data: List[Any]):
+        self.name = name
+        self.data = data
+        self.value_counts = Counter(data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+class Table:
+    """The columns of one dataset, built in a single read of its records."""
+
+    def __init__(self, size: int, columns: Dict[str, Column], flags: Dict[str, array]):
+        self.size = size
+        self.columns = columns
+        self.flags = flags
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]], fields: Iterable[str], flags: Iterable[str] = (),
+                     defaults: Optional[Dict[str, Any]] = None) -> 'Table':
+        """Encode fields as columns and flags as truthiness bytes.
+
+        Values must be hashable; defaults gives the value of a field a record
+        does not have (None otherwise), like record.get(field, default).
+        """
+        defaults = defaults or {}
+        columns = {}
+        for field in fields:
+            default = defaults.get(field)
+            columns[field] = Column(field, [record.get(field, default) for record in records])
+        flag_columns = {field: array('b', [1 if record.get(field) else 0 for record in records]) for field in flags}
+        return cls(len(records), columns, flag_columns)
+
+    @classmethod
+    def from_file(cls, filepath: str, fields: Iterable[str], flags: Iterable[str] = (),
+                  defaults: Optional[Dict[str, Any]] = None) -> 'Table':
+        return cls.from_records(load_data(filepath), fields, flags, defaults)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def counts(self, field: str, present_only: bool = False) -> Counter:
+        """Records per value; with present_only, falsy values (None, '') are left out."""
+        value_counts = self.columns[field].value_counts
+        if not present_only:
+            return Counter(value_counts)
+        return Counter({value: count for value, count in value_counts.items() if value})
+
+    def distinct(self, field: str, present_only: bool = True) -> int:
+        return len(self.counts(field, present_only))
+
+    def split_counts(self, field: str, sep: str = ',') -> Counter:
+        """Records per item of a separated list field (e.g. languages); each distinct list is split once."""
+        counter = Counter()
+        for value, count in self.columns[field].value_counts.items():
+            if value:
+                for item in value.split(sep):
+                    counter[item.strip()] += count
+        return counter
+
+    def crosstab(self, *fields: str) -> Counter:
+        """Records per combination of the fields' values."""
+        return Counter(zip(*(self.columns[field].data for field in fields)))
+
+    def flag_count(self, field: str) -> int:
+        return sum(self.flags[field])
+
+    def mapped(self, field: str, function: Callable[[Any], Any]) -> List[Tuple[Any, int]]:
+        """(function(value), records) per distinct value of field, function applied once per value."""
+        return [(function(value), count) for value, count in self.columns[field].value_counts.items()]
+
+    def price_summary(self, field: str = 'price', parse: Callable[[Any], float] = parse_price) -> Dict[str, float]:
+        """min, max, avg, p25, median and p75 of the positive prices, and how many there are."""
+        prices = sorted((price, count) for price, count in self.mapped(field, parse) if price > 0)
+        total = sum(count for _, count in prices)
+        if not total:
+            return {'count': 0, 'min': 0, 'max': 0, 'avg': 0, 'p25': 0, 'median': 0, 'p75': 0}
+
+        def quantile(q: float) -> float:
+            # Nearest rank over the run-length encoded, sorted prices
+            rank, seen = max(1, round(q * total)), 0
+            for price, count in prices:
+                seen += count
+                if seen >= rank:
+                    return price
+            return prices[-1][0]
+
+        return {
+            'count': total,
+            'min': prices[0][0],
+            'max': prices[-1][0],
+            'avg': sum(price * count for price, count in prices) / total,
+            'p25': quantile(0.25),
+            'median': quantile(0.5),
+            'p75': quantile(0.75),
+        }
+
+
+def tier_count(counter: Counter, name: str) -> int:
+    """Count of a capitalized category, or of its lowercase spelling when the data uses that."""
+    if name in counter:
+        return counter[name]
+    return counter.get(name.lower(), 0)
+
+
+class Report:
+    """Lines of a text report in the stats/*.txt layout."""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def line(self, text=""):
+        self.lines.append(str(text))
+
+    def section(self, title: str):
+        self.line("=" * 80)
+        self.line(f"{title:^80}")
+        self.line("=" * 80)
+        self.line()
+
+    def ranking(self, items: Iterable[Tuple[Any, int]], total: int, unit: str, width: int = 30):
+        for i, (value, count) in enumerate(items, 1):
+            percentage = (count / total) * 100
+            self.line(f"{i:2d}. {value:<{width}s} {count:4d}{' ' + unit if unit else ''} ({percentage:5.2f}%)")
+
+    def distribution(self, counter: Counter, order: Sequence[str], total: int, unit: str):
+        for name in order:
+            count = tier_count(counter, name)
+            if count > 0:
+                percentage = (count / total) * 100
+                self.line(f"{name:<15s} {count:4d} {unit} ({percentage:5.2f}%)")
+
+    def crosstab(self, table: Table, unit: str, row_field: str = 'city',
+                 column_fields: Tuple[str, str] = ('budget_tier', 'location_setting')):
+        """Records per row value and combination of the two column fields' values."""
+        cells = table.crosstab(row_field, *column_fields)
+        keys = sorted({key[1:] for key in cells}, key=lambda key: tuple(str(part).lower() for part in key))
+        labels = ['/'.join(str(part) for part in key) for key in keys]
+        self.line(f"{'':<15s}" + "".join(f"{label:>16s}" for label in labels) + f"{'total':>8s}")
+        for row, count in table.counts(row_field, present_only=True).most_common():
+            row_cells = [cells.get((row, *key), 0) for key in keys]
+            self.line(f"{str(row):<15s}" + "".join(f"{cell:16d}" for cell in row_cells) + f"{count:8d}")
+        self.line(f"({', '.join(column_fields)} per {row_field}, in {unit})")
+
+    def text(self) -> str:
+        return "\n".join(self.lines)
@@ -0,0 +1,11 @@
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+
+# The scripts import their siblings by module name, as when run from their own directory
+for directory in (SCRIPTS_DIR, SCRIPTS_DIR / "benchmarks", SCRIPTS_DIR / "stats_generators",
+                  SCRIPTS_DIR / "scrapers", SCRIPTS_DIR / "scrapers" / "gyg_scraper",
+                  SCRIPTS_DIR / "scrapers" / "trip_advisor_scraping"):
+    if str(directory) not in sys.path:
+        sys.path.insert(0, str(directory))
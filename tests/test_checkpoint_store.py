@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from checkpoint_store import CheckpointStore, record_id
+
+
+def attraction(name, rating=None):
+    record = {'name': name, 'city': 'Berlin', 'attraction_type': 'Museums'}
+    if rating is not None:
+        record['rating'] = rating
+    return record
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return {'path': str(tmp_path / "store.sqlite3"), 'state_file': str(tmp_path / "processed.json"),
+            'data_file': str(tmp_path / "data.json")}
+
+
+def write(path, value):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(value, f)
+
+
+def test_legacy_files_are_imported_once(paths):
+    write(paths['data_file'], [attraction("A"), attraction("B")])
+    write(paths['state_file'], [record_id(attraction("A")), "Berlin|Museums|Closed"])
+
+    with CheckpointStore(**paths) as store:
+        assert len(store) == 3
+        assert "Berlin|Museums|Closed" in store
+        assert list(store.records()) == [attraction("A"), attraction("B")]
+
+    # A store that already has ids does not import again
+    write(paths['data_file'], [attraction("C")])
+    with CheckpointStore(**paths) as store:
+        assert len(store) == 3
+
+
+def test_replace_keeps_the_scraping_order(paths):
+    with CheckpointStore(**paths) as store:
+        for name in "ABC":
+            store.add(record_id(attraction(name)), attraction(name))
+        store.replace(record_id(attraction("A")), attraction("A", rating=4.5))
+        store.replace(record_id(attraction("D")), attraction("D"))
+        store.add(record_id(attraction("B")), attraction("B", rating=1.0))
+
+    with CheckpointStore(**paths) as store:
+        assert list(store.records()) == [attraction("A", rating=4.5), attraction("B"), attraction("C"), attraction("D")]
+
+
+def test_replace_fills_in_an_id_without_record(paths):
+    with CheckpointStore(**paths) as store:
+        store.add(record_id(attraction("A")), None)
+        assert list(store.records()) == []
+        store.replace(record_id(attraction("A")), attraction("A"))
+        assert list(store.records()) == [attraction("A")]
+
+
+def test_uncommitted_records_are_lost_but_the_store_stays_readable(paths):
+    store = CheckpointStore(commit_every=3, **paths)
+    for name in "ABCD":
+        store.add(record_id(attraction(name)), attraction(name))
+    store.connection.close()
+
+    with CheckpointStore(**paths) as store:
+        assert [record['name'] for record in store.records()] == ["A", "B", "C"]
+
+
+def test_export_refuses_to_shrink_a_larger_file(paths, tmp_path):
+    output = str(tmp_path / "out.json")
+    write(output, [attraction("X"), attraction("Y")])
+    with CheckpointStore(**paths) as store:
+        store.add(record_id(attraction("A")), attraction("A"))
+        with pytest.raises(ValueError):
+            store.export(output)
+        assert store.export(output, force=True) == 1
+        store.add(record_id(attraction("B")), attraction("B"))
+        assert store.export(output) == 2
+
+    with open(output, encoding='utf-8') as f:
+        assert json.load(f) == [attraction("A"), attraction("B")]
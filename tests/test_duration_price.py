@@ -0,0 +1,63 @@
+import pytest
+
+pytest.importorskip("owlready2")
+
+from abox_population import parse_amount, parse_duration, parse_price
+
+
+@pytest.mark.parametrize('text, minutes', [
+    ("2 hours", (120, 120)),
+    ("1.5 hours", (90, 90)),
+    ("90 minutes", (90, 90)),
+    ("2 hours 30 minutes", (150, 150)),
+    ("1 day 2 hours", (1560, 1560)),
+    ("30 - 45 minutes", (30, 45)),
+    ("2-3 hours", (120, 180)),
+    ("2 to 3 hours", (120, 180)),
+    ("30 minutes – 1 hour", (30, 60)),
+    ("Valid 1 - 2 days", (1440, 2880)),
+    ("1-2 days 3 hours", (1440, 3060)),
+])
+def test_parse_duration(text, minutes):
+    assert parse_duration(text) == minutes
+
+
+@pytest.mark.parametrize('text', ["Flexible", "1 - 2 - 3 hours", "2 3 hours"])
+def test_parse_duration_rejects_what_does_not_read_as_one(text):
+    assert parse_duration(text) is None
+
+
+@pytest.mark.parametrize('text, amount', [
+    ("21", 21.0),
+    ("12,50", 12.5),
+    ("12.5", 12.5),
+    ("1,299.50", 1299.5),
+    ("1.299,50", 1299.5),
+    ("1.299", 1299.0),
+    ("1,299", 1299.0),
+    ("1.299.000", 1299000.0),
+    ("12345,6", 12345.6),
+])
+def test_parse_amount(text, amount):
+    assert parse_amount(text) == amount
+
+
+@pytest.mark.parametrize('text', ["1,29,9", "1.2.3", "1,000,00", "1234.567,8"])
+def test_parse_amount_rejects_bad_grouping(text):
+    assert parse_amount(text) is None
+
+
+@pytest.mark.parametrize('text, price', [
+    ("€21", ('EUR', 21.0)),
+    ("From €12,50", ('EUR', 12.5)),
+    ("$1,299.50", ('USD', 1299.5)),
+    ("30 €", ('EUR', 30.0)),
+    ("CHF 30", ('CHF', 30.0)),
+])
+def test_parse_price(text, price):
+    assert parse_price(text) == price
+
+
+@pytest.mark.parametrize('text', ["30", "N/A", "€1,29,9"])
+def test_parse_price_needs_a_currency_and_an_amount(text):
+    assert parse_price(text) is None
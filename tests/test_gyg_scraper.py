@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip("playwright")
+pytest.importorskip("fake_useragent")
+
+from scraper import CardCollector, activity_id
+
+PAGE = "https://www.getyourguide.com/berlin-l17/"
+
+
+def card(title, href, price="€20"):
+    return {"title": title, "href": href, "price": price}
+
+
+def test_activity_id_ignores_query_and_slug():
+    assert activity_id("https://www.getyourguide.com/berlin-l17/old-town-walk-t12345/?ranking_uuid=1") == "t12345"
+    assert activity_id("https://www.getyourguide.com/berlin-l17/old-town-tour-t12345/") == "t12345"
+    assert activity_id("https://www.getyourguide.com/berlin-l17/some-page/?x=1") == "/berlin-l17/some-page"
+
+
+def test_collector_dedupes_by_activity_id():
+    collector = CardCollector()
+    added = collector.add([card("Walk", "/berlin-l17/walk-t1/?ranking=1"),
+                           card("Walk (again)", "/berlin-l17/walk-t1/?ranking=2"),
+                           card("Boat", "/berlin-l17/boat-t2/")], PAGE)
+    assert added == 2
+    assert collector.duplicates == 1
+    assert collector.cards == [("Walk", "€20", "https://www.getyourguide.com/berlin-l17/walk-t1/?ranking=1"),
+                               ("Boat", "€20", "https://www.getyourguide.com/berlin-l17/boat-t2/")]
+
+
+def test_collector_dedupes_across_reads_and_counts_what_it_read():
+    collector = CardCollector()
+    collector.add([card("Walk", "/berlin-l17/walk-t1/")], PAGE)
+    assert collector.add([card("Walk", "/berlin-l17/walk-t1/"), card("Bike", "/berlin-l17/bike-t3/")], PAGE) == 1
+    assert collector.read == 3
+    assert [title for title, _, _ in collector.cards] == ["Walk", "Bike"]
+
+
+def test_cards_without_link_dedupe_by_title_and_without_title_are_skipped():
+    collector = CardCollector()
+    assert collector.add([card("Pass", None), card("Pass", None), card(None, "/berlin-l17/x-t4/")], PAGE) == 1
+    assert collector.cards == [("Pass", "€20", "N/A")]
+    assert collector.duplicates == 1
+
+
+def test_collector_stops_at_max_items():
+    collector = CardCollector(max_items=2)
+    assert collector.add([card(f"Tour {n}", f"/berlin-l17/tour-t{n}/") for n in range(5)], PAGE) == 2
+    assert collector.full
+    assert collector.add([card("Late", "/berlin-l17/late-t9/")], PAGE) == 0
@@ -0,0 +1,97 @@
+import copy
+import io
+
+import pytest
+
+owlready2 = pytest.importorskip("owlready2")
+
+from abox_population import ONTOLOGY_PATH, OntologyPopulator, content_hash, record_key, stable_suffix
+
+TOURS = [
+    {'title': "Berlin: Hop-On Hop-Off Bus Tour", 'price': "€21", 'city': 'Berlin',
+     'link': "https://www.getyourguide.com/berlin-l17/hop-on-hop-off-t4279/?ranking_uuid=a4cd",
+     'duration': "1 - 2 days", 'languages': "English, German", 'budget_tier': 'high',
+     'location_setting': 'outdoor', 'meeting_point': "Any stop", 'meeting_point_maps_link': "N/A"},
+    {'title': "Munich: Old Town Walking Tour", 'price': "€15", 'city': 'Munich',
+     'link': "https://www.getyourguide.com/munich-l26/old-town-walk-t1234/?ranking_uuid=77aa",
+     'duration': "2 hours", 'languages': "English", 'budget_tier': 'low',
+     'location_setting': 'outdoor', 'meeting_point': "Marienplatz", 'meeting_point_maps_link': "N/A"},
+]
+ATTRACTIONS = [
+    {'name': "Reichstag Building", 'city': 'Berlin', 'attraction_type': "Sights & Landmarks",
+     'spec_type': "Architectural Buildings", 'budget_tier': 'free', 'location_setting': 'indoor',
+     'operating_hours': {'Monday': "8:00 AM - 10:00 PM", 'Saturday': "8:00 AM - 10:00 PM"}},
+    {'name': "Deutsches Museum", 'city': 'Munich', 'attraction_type': "Museums",
+     'spec_type': "Science Museums", 'budget_tier': 'medium', 'location_setting': 'indoor',
+     'operating_hours': {'Sunday': "9:00 AM - 5:00 PM"}},
+    {'name': "Berghain", 'city': 'Berlin', 'attraction_type': "Nightlife",
+     'spec_type': "Dance Clubs & Discos", 'budget_tier': 'medium', 'location_setting': 'indoor',
+     'operating_hours': {'Friday': "11:59 PM - 6:00 AM"}},
+]
+
+
+def new_populator():
+    try:
+        return OntologyPopulator(ONTOLOGY_PATH, world=owlready2.World())
+    except owlready2.OwlReadyOntologyParsingError as e:
+        pytest.skip(f"The TBox imports could not be loaded: {e}")
+
+
+def ntriples(populator):
+    buffer = io.BytesIO()
+    populator.onto.save(file=buffer, format="ntriples")
+    return sorted(line for line in buffer.getvalue().decode('utf-8').splitlines() if line.strip())
+
+
+def fresh_build(tours, attractions):
+    populator = new_populator()
+    populator.sync_records('tour', tours, {})
+    populator.sync_records('attraction', attractions, {})
+    return ntriples(populator)
+
+
+def test_record_key_ignores_tracking_parameters():
+    tour = TOURS[0]
+    rescraped = {**tour, 'link': tour['link'].replace('ranking_uuid=a4cd', 'ranking_uuid=ffff')}
+    assert record_key('tour', tour) == record_key('tour', rescraped) == "www.getyourguide.com/berlin-l17/hop-on-hop-off-t4279"
+    assert record_key('attraction', ATTRACTIONS[0]) == "Berlin|Sights & Landmarks|Reichstag Building"
+
+
+def test_stable_suffix_is_numeric_and_deterministic():
+    suffix = stable_suffix("Berlin|Museums|Pergamon")
+    assert suffix.isdigit()
+    assert suffix == stable_suffix("Berlin|Museums|Pergamon") != stable_suffix("Berlin|Museums|Bode")
+
+
+def test_content_hash_ignores_key_order_but_not_values():
+    record = ATTRACTIONS[0]
+    assert content_hash(record) == content_hash(dict(reversed(list(record.items()))))
+    assert content_hash(record) != content_hash({**record, 'budget_tier': 'low'})
+
+
+def test_sync_counts_and_matches_a_fresh_build():
+    populator = new_populator()
+    tours_manifest, attractions_manifest = {}, {}
+    assert populator.sync_records('tour', TOURS, tours_manifest) == (2, 0, 0)
+    assert populator.sync_records('attraction', ATTRACTIONS, attractions_manifest) == (3, 0, 0)
+
+    edited = copy.deepcopy(ATTRACTIONS[1:])
+    edited[0]['budget_tier'] = 'low'
+    edited[0]['operating_hours'] = {'Saturday': "10:00 AM - 6:00 PM"}
+    assert populator.sync_records('tour', TOURS[:1], tours_manifest) == (0, 0, 1)
+    assert populator.sync_records('attraction', edited, attractions_manifest) == (0, 1, 1)
+    assert ntriples(populator) == fresh_build(TOURS[:1], edited)
+
+    # Back to the original data, then a run without changes
+    assert populator.sync_records('tour', TOURS, tours_manifest) == (1, 0, 0)
+    assert populator.sync_records('attraction', ATTRACTIONS, attractions_manifest) == (1, 1, 0)
+    assert populator.sync_records('attraction', ATTRACTIONS, attractions_manifest) == (0, 0, 0)
+    assert ntriples(populator) == fresh_build(TOURS, ATTRACTIONS)
+
+
+def test_duplicate_records_get_their_own_individuals():
+    populator = new_populator()
+    manifest = {}
+    assert populator.sync_records('attraction', ATTRACTIONS[:1] * 2, manifest) == (2, 0, 0)
+    assert len({entry['subjects'][0] for entry in manifest.values()}) == 2
+    assert populator.sync_records('attraction', ATTRACTIONS[:1], manifest) == (0, 0, 1)
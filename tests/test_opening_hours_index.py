@@ -0,0 +1,82 @@
+import random
+
+from opening_hours_index import DAYS, MINUTES_PER_WEEK, OpeningHoursIndex, entry_span, merge_spans, week_minute
+
+ENTRIES = [
+    ('museum', 'monday', '10:00', '18:00'),
+    ('bar', 'friday', '20:00', '02:00'),
+    ('bar', 'saturday', '00:00', '04:00'),
+    ('club', 'sunday', '22:00', '06:00'),
+    ('kiosk', 'day_wednesday', '08:00', '08:00'),
+]
+
+
+def test_entry_span_overnight_and_all_day():
+    assert entry_span('monday', '10:00', '18:00') == (600, 1080)
+    assert entry_span('friday', '20:00', '02:00') == (week_minute('friday', '20:00'), week_minute('saturday', '02:00'))
+    assert entry_span('tuesday', '08:00', '08:00') == (week_minute('tuesday', '08:00'), week_minute('wednesday', '08:00'))
+    # Sunday night runs past the end of the week
+    assert entry_span('sunday', '22:00', '06:00')[1] == MINUTES_PER_WEEK + 360
+
+
+def test_merge_spans():
+    assert merge_spans([(0, 100), (50, 200), (300, 400)]) == [(0, 200), (300, 400)]
+    # Sunday night runs on through the Monday morning span, which stays for Monday queries
+    assert merge_spans([(0, 60), (MINUTES_PER_WEEK - 60, MINUTES_PER_WEEK + 30)]) == \
+        [(0, 60), (MINUTES_PER_WEEK - 60, MINUTES_PER_WEEK + 60)]
+    assert merge_spans([(day * 1440, day * 1440 + 1440) for day in range(7)]) == [(0, float('inf'))]
+
+
+def test_overnight_span_is_open_the_next_morning():
+    index = OpeningHoursIndex(ENTRIES)
+    assert index.open_at('friday', '23:30') == ['bar']
+    assert index.open_at('saturday', '01:00') == ['bar']
+    assert index.open_at('saturday', '04:00') == []
+    # Friday 20:00 to Saturday 04:00 is one continuous opening
+    assert index.open_for('friday', '21:00', 6 * 60) == ['bar']
+    assert index.open_for('friday', '21:00', 7 * 60 + 1) == []
+
+
+def test_week_wraps_from_sunday_to_monday():
+    index = OpeningHoursIndex(ENTRIES)
+    assert index.open_at('sunday', '23:00') == ['club']
+    assert index.open_at('monday', '05:59') == ['club']
+    assert index.open_at('monday', '06:00') == []
+    assert index.open_for('sunday', '23:00', 7 * 60) == ['club']
+
+
+def test_equal_times_are_open_around_the_clock():
+    index = OpeningHoursIndex(ENTRIES)
+    assert index.open_at('wednesday', '23:00') == ['kiosk']
+    assert index.open_at('thursday', '07:59') == ['kiosk']
+    assert index.open_at('thursday', '08:00') == []
+
+
+def test_open_all_week_is_open_for_any_duration():
+    index = OpeningHoursIndex([('hotel', day, '00:00', '00:00') for day in DAYS])
+    assert index.open_for('sunday', '23:59', 3 * 1440) == ['hotel']
+
+
+def test_stabbing_matches_a_scan():
+    rng = random.Random(0)
+    entries = []
+    for venue in range(60):
+        for day in rng.sample(DAYS, rng.randint(1, 7)):
+            opens, closes = rng.randrange(0, 1440, 30), rng.randrange(0, 1440, 30)
+            entries.append((f"venue_{venue}", day, f"{opens // 60:02d}:{opens % 60:02d}",
+                            f"{closes // 60:02d}:{closes % 60:02d}"))
+    index = OpeningHoursIndex(entries)
+
+    def scan(point, minutes):
+        open_minutes = {}
+        for venue, day, opens_at, closes_at in entries:
+            start, end = entry_span(day, opens_at, closes_at)
+            open_minutes.setdefault(venue, set()).update(m % MINUTES_PER_WEEK for m in range(start, end))
+        return sorted(venue for venue, covered in open_minutes.items()
+                      if all((point + m) % MINUTES_PER_WEEK in covered for m in range(max(minutes, 1))))
+
+    for _ in range(40):
+        day, minute = rng.choice(DAYS), rng.randrange(0, 1440, 15)
+        hhmm = f"{minute // 60:02d}:{minute % 60:02d}"
+        minutes = rng.choice([0, 60, 300])
+        assert index.open_for(day, hhmm, minutes) == scan(week_minute(day, hhmm), minutes)
@@ -0,0 +1,69 @@
+import pytest
+
+import pacing
+from pacing import HostRateController, Metrics
+
+URL = "https://www.getyourguide.com/berlin-l17/"
+OTHER = "https://www.tripadvisor.com/Attractions"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A frozen time.monotonic for pacing, moved forward by hand."""
+    now = [1000.0]
+    monkeypatch.setattr(pacing.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_rate_grows_additively_up_to_the_maximum(clock):
+    controller = HostRateController(initial_rate=1.0, max_rate=1.2, increase=0.05)
+    for _ in range(3):
+        controller.success(URL)
+    assert controller.rate(URL) == pytest.approx(1.15)
+    for _ in range(10):
+        controller.success(URL)
+    assert controller.rate(URL) == 1.2
+
+
+def test_throttling_cuts_the_rate_multiplicatively_down_to_the_minimum(clock, capsys):
+    metrics = Metrics()
+    controller = HostRateController(initial_rate=1.0, min_rate=0.2, decrease=0.5, metrics=metrics)
+    controller.throttled(URL, "status 429")
+    assert controller.rate(URL) == 0.5
+    controller.throttled(URL, "status 429")
+    controller.throttled(URL, "captcha")
+    assert controller.rate(URL) == 0.2
+    assert metrics.counters == {"status 429": 2, "captcha": 1}
+    assert "slowing down" in capsys.readouterr().out
+
+
+def test_hosts_are_paced_independently(clock, capsys):
+    controller = HostRateController(initial_rate=1.0)
+    controller.throttled(URL, "status 503")
+    assert controller.rate(OTHER) == 1.0
+    assert controller.reserve(OTHER) == 0.0
+
+
+def test_reserve_waits_for_the_next_token(clock):
+    controller = HostRateController(initial_rate=2.0, burst=1.0)
+    assert controller.reserve(URL) == 0.0
+    assert controller.reserve(URL) == pytest.approx(0.5)
+    assert controller.reserve(URL) == pytest.approx(1.0)
+    clock[0] += 10
+    # Idle time refills no more than the burst
+    assert controller.reserve(URL) == 0.0
+    assert controller.reserve(URL) == pytest.approx(0.5)
+
+
+def test_throttling_drops_saved_up_tokens(clock, capsys):
+    controller = HostRateController(initial_rate=1.0, decrease=0.5)
+    clock[0] += 10
+    controller.throttled(URL, "status 429")
+    assert controller.reserve(URL) == pytest.approx(2.0)
+
+
+def test_zero_rate_disables_pacing(clock):
+    controller = HostRateController(initial_rate=0)
+    controller.throttled(URL, "status 429")
+    controller.success(URL)
+    assert [controller.reserve(URL) for _ in range(3)] == [0.0, 0.0, 0.0]
@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+pytest.importorskip("owlready2")
+
+from range_index import NumericIndex, TourRangeIndex, scan_query
+
+TOURS = [
+    ('walk', (120, 120), ('EUR', 15.0)),
+    ('bus', (1440, 2880), ('EUR', 21.0)),
+    ('boat', (60, 90), ('EUR', 30.0)),
+    ('museum_pass', None, ('EUR', 30.0)),
+    ('dinner', (180, 180), ('USD', 80.0)),
+    ('free_walk', (150, 150), None),
+]
+
+
+def test_numeric_index_bounds_are_inclusive():
+    index = NumericIndex([(30.0, 'c'), (15.0, 'a'), (21.0, 'b'), (30.0, 'd')])
+    assert index.range(15, 30) == ['a', 'b', 'c', 'd']
+    assert index.count(16, 29) == 1
+    assert index.range(None, 21) == ['a', 'b']
+    assert index.range(31) == []
+    assert index.count(30, 15) == 0
+
+
+def test_duration_bounds_hold_for_the_whole_range():
+    index = TourRangeIndex(TOURS)
+    assert index.query(max_minutes=180) == ['boat', 'dinner', 'free_walk', 'walk']
+    assert index.query(min_minutes=120) == ['bus', 'dinner', 'free_walk', 'walk']
+    assert index.query(min_minutes=100, max_minutes=1500) == ['dinner', 'free_walk', 'walk']
+
+
+def test_price_bounds_only_match_their_currency():
+    index = TourRangeIndex(TOURS)
+    assert index.query(max_price=30) == ['boat', 'bus', 'museum_pass', 'walk']
+    assert index.query(max_price=100, currency='USD') == ['dinner']
+    assert index.query(max_price=30, currency='GBP') == []
+
+
+def test_bounds_on_missing_values_fail_and_no_bounds_match_all():
+    index = TourRangeIndex(TOURS)
+    assert index.query(max_minutes=100, max_price=30) == ['boat']
+    assert index.query() == sorted(tour for tour, _, _ in TOURS)
+
+
+def test_query_matches_a_full_scan():
+    rng = random.Random(0)
+    tours = []
+    for n in range(300):
+        low = rng.choice([30, 60, 90, 120, 180, 240, 1440])
+        minutes = None if n % 7 == 0 else (low, low + rng.choice([0, 30, 60]))
+        price = None if n % 11 == 0 else (rng.choice(['EUR', 'EUR', 'USD']), float(rng.randint(0, 100)))
+        tours.append((f"tour_{n}", minutes, price))
+    index = TourRangeIndex(tours)
+    for _ in range(200):
+        bounds = dict(min_minutes=rng.choice([None, 60, 120]), max_minutes=rng.choice([None, 90, 180, 300]),
+                      min_price=rng.choice([None, 10.0, 25.0]), max_price=rng.choice([None, 30.0, 75.0]),
+                      currency=rng.choice(['EUR', 'USD']))
+        assert index.query(**bounds) == scan_query(index, **bounds)
+
+
+def test_from_records_uses_the_population_iris():
+    index = TourRangeIndex.from_records([{'title': "Old Town Walk", 'duration': "2 hours", 'price': "€15"},
+                                         {'title': "Boat Trip", 'duration': "Flexible", 'price': "N/A"}])
+    assert index.values == {'tour_old_town_walk_1': ((120, 120), ('EUR', 15.0)), 'tour_boat_trip_2': (None, None)}
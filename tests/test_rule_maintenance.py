@@ -0,0 +1,139 @@
+import pytest
+
+owlready2 = pytest.importorskip("owlready2")
+from owlready2 import ObjectProperty, Thing
+from owlready2.base import rdf_type
+
+from rule_materialization import RULE_CLASSES, RULES, Rule, RuleEngine
+
+
+class Tourism:
+    """A small ABox with the classes and properties the rules mention."""
+
+    def __init__(self):
+        self.world = owlready2.World()
+        self.onto = onto = self.world.get_ontology("http://example.org/tourism#")
+        with onto:
+            class Activity(Thing): pass
+            class Tour(Activity): pass
+            class PhysicalVenue(Activity): pass
+            class Museum(PhysicalVenue): pass
+            class OperatingHours(Thing): pass
+            class hasBudget(ObjectProperty): pass
+            class hasLocationSetting(ObjectProperty): pass
+            class hasLanguage(ObjectProperty): pass
+            class appliesToDay(ObjectProperty): pass
+            class hasOperatingHours(ObjectProperty): pass
+        for name in ('budget_free', 'budget_low', 'budget_high', 'location_indoor', 'lang_english', 'lang_german',
+                     'day_friday', 'day_saturday', 'day_sunday'):
+            Thing(name, namespace=onto)
+
+    def hours(self, name, day):
+        hours = self.onto.OperatingHours(name)
+        hours.appliesToDay = [self.onto[day]]
+        return hours
+
+    def engine(self):
+        return RuleEngine(self.world, self.onto, [Rule(text) for text in RULES],
+                          class_parents={name: parent for name, (parent, _) in RULE_CLASSES.items()})
+
+    def triple(self, s, p, o):
+        return s.storid, self.onto[p].storid, o.storid
+
+    def conclusions(self, facts):
+        return {(self.world._unabbreviate(p).rsplit('#', 1)[-1], self.world._unabbreviate(s).rsplit('#', 1)[-1])
+                for p, s, _ in facts}
+
+
+@pytest.fixture
+def tourism():
+    tourism = Tourism()
+    onto = tourism.onto
+    museum = onto.Museum('museum', hasLocationSetting=[onto.location_indoor], hasBudget=[onto.budget_free])
+    museum.hasOperatingHours = [tourism.hours('museum_sat', 'day_saturday'),
+                                tourism.hours('museum_sun', 'day_sunday')]
+    onto.Tour('tour', hasLanguage=[onto.lang_english], hasBudget=[onto.budget_high])
+    return tourism
+
+
+def test_run_concludes_every_rule(tourism):
+    engine = tourism.engine()
+    assert tourism.conclusions(engine.run()) == {
+        ('BudgetFriendlyActivity', 'museum'), ('BadWeatherOption', 'museum'), ('OpenOnWeekend', 'museum'),
+        ('WeekendHours', 'museum_sat'), ('WeekendHours', 'museum_sun'), ('EnglishFriendlyTour', 'tour')}
+
+
+def test_maintain_keeps_conclusions_with_another_derivation(tourism):
+    onto = tourism.onto
+    engine = tourism.engine()
+    engine.run()
+
+    removed = tourism.triple(onto.museum, 'hasOperatingHours', onto.museum_sat)
+    onto.museum.hasOperatingHours.remove(onto.museum_sat)
+    concluded, withdrawn = engine.maintain([], [removed])
+
+    # Still open on Sunday; the Saturday hours stay WeekendHours on their own
+    assert concluded == withdrawn == set()
+    fresh = tourism.engine()
+    fresh.run()
+    assert engine.derived == fresh.derived
+
+
+def test_maintain_withdraws_and_restores_conclusions(tourism):
+    onto = tourism.onto
+    engine = tourism.engine()
+    engine.run()
+
+    removed = [tourism.triple(onto.museum, 'hasOperatingHours', hours) for hours in onto.museum.hasOperatingHours]
+    onto.museum.hasOperatingHours = []
+    concluded, withdrawn = engine.maintain([], removed)
+    assert tourism.conclusions(withdrawn) == {('OpenOnWeekend', 'museum')}
+    assert not concluded
+
+    friday = tourism.hours('museum_fri', 'day_friday')
+    added = [(friday.storid, rdf_type, onto.OperatingHours.storid),
+             tourism.triple(friday, 'appliesToDay', onto.day_friday),
+             tourism.triple(onto.museum, 'hasOperatingHours', friday)]
+    onto.museum.hasOperatingHours = [friday]
+    assert engine.maintain(added, []) == (set(), set())
+
+    added = [tourism.triple(friday, 'appliesToDay', onto.day_sunday)]
+    friday.appliesToDay.append(onto.day_sunday)
+    concluded, withdrawn = engine.maintain(added, [])
+    assert tourism.conclusions(concluded) == {('WeekendHours', 'museum_fri'), ('OpenOnWeekend', 'museum')}
+    assert not withdrawn
+    fresh = tourism.engine()
+    fresh.run()
+    assert engine.derived == fresh.derived
+
+
+def test_maintain_matches_a_fresh_run_after_a_budget_change(tourism):
+    onto = tourism.onto
+    engine = tourism.engine()
+    engine.run()
+
+    removed = [tourism.triple(onto.museum, 'hasBudget', onto.budget_free),
+               tourism.triple(onto.tour, 'hasBudget', onto.budget_high)]
+    added = [tourism.triple(onto.museum, 'hasBudget', onto.budget_high),
+             tourism.triple(onto.tour, 'hasBudget', onto.budget_low)]
+    onto.museum.hasBudget = [onto.budget_high]
+    onto.tour.hasBudget = [onto.budget_low]
+    concluded, withdrawn = engine.maintain(added, removed)
+
+    assert tourism.conclusions(concluded) == {('BudgetFriendlyActivity', 'tour')}
+    assert tourism.conclusions(withdrawn) == {('BudgetFriendlyActivity', 'museum')}
+    fresh = tourism.engine()
+    fresh.run()
+    assert engine.derived == fresh.derived
+
+
+def test_a_conclusion_supporting_its_own_premise_is_withdrawn(tourism):
+    # EnglishFriendlyTour is a Tour, so the conclusion is one of its own rule's premises
+    onto = tourism.onto
+    engine = tourism.engine()
+    engine.run()
+
+    removed = tourism.triple(onto.tour, 'hasLanguage', onto.lang_english)
+    onto.tour.hasLanguage = []
+    _, withdrawn = engine.maintain([], [removed])
+    assert tourism.conclusions(withdrawn) == {('EnglishFriendlyTour', 'tour')}
@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("owlready2")
+
+from search_queries import build_activity_search_query
+from sparql_endpoint import DAY_TIME_VARIABLES, join_day_times, rewrite_day_hour_filter
+
+
+def test_rewrite_renames_only_the_day_hour_filter_times():
+    query = build_activity_search_query('berlin', 'saturday', '14:00')
+    rewritten = rewrite_day_hour_filter(query)
+
+    assert '?hours :opensAt ?dayOpensAt .' in rewritten
+    assert '(?dayOpensAt <= "14:00" && "14:00" < ?dayClosesAt)' in rewritten
+    # The hours OPTIONAL still binds the projected variables
+    assert '?hoursObj :opensAt ?opensAt .' in rewritten
+    assert '?opensAt ?closesAt ?dayOpensAt ?dayClosesAt WHERE' in rewritten
+
+
+@pytest.mark.parametrize('params', [dict(), dict(day='saturday'), dict(location_setting='location_indoor')])
+def test_rewrite_leaves_other_searches_alone(params):
+    assert rewrite_day_hour_filter(build_activity_search_query('berlin', **params)) is None
+
+
+def test_join_keeps_all_hours_of_activities_without_hours_that_day():
+    variables = ['activity', 'hoursDay', 'opensAt', 'closesAt', *DAY_TIME_VARIABLES]
+    rows = [
+        # Open at the hour on the day: only the entries with the same times
+        ['museum', 'monday', '10:00', '18:00', '10:00', '18:00'],
+        ['museum', 'saturday', '10:00', '18:00', '10:00', '18:00'],
+        ['museum', 'sunday', '12:00', '16:00', '10:00', '18:00'],
+        # No hours that day: every entry
+        ['bar', 'friday', '19:00', '02:00', None, None],
+        ['bar', 'sunday', '17:00', '23:00', None, None],
+        # Two matching entries on the day bind the filter twice, collapsed by DISTINCT
+        ['park', 'saturday', '06:00', '22:00', '06:00', '22:00'],
+        ['park', 'saturday', '06:00', '22:00', '08:00', '20:00'],
+        ['park', 'saturday', '08:00', '20:00', '08:00', '20:00'],
+    ]
+
+    assert join_day_times(variables, rows) == [
+        ('museum', 'monday', '10:00', '18:00'),
+        ('museum', 'saturday', '10:00', '18:00'),
+        ('bar', 'friday', '19:00', '02:00'),
+        ('bar', 'sunday', '17:00', '23:00'),
+        ('park', 'saturday', '06:00', '22:00'),
+        ('park', 'saturday', '08:00', '20:00'),
+    ]
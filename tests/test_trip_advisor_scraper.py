@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+pytest.importorskip("seleniumbase")
+
+import trip_advisor_2
+from checkpoint_store import DATA_FILE, STATE_FILE, CheckpointStore, record_id
+
+
+def attraction(name, city='Berlin', category='Museums'):
+    return {'name': name, 'city': city, 'attraction_type': category}
+
+
+@pytest.fixture
+def scraper_dir(tmp_path, monkeypatch):
+    """A working directory as deep as the scraper's, so DATA_FILE lands in tmp_path/data."""
+    workdir = tmp_path / "scripts" / "scrapers" / "trip_advisor_scraping"
+    workdir.mkdir(parents=True)
+    (tmp_path / "data" / "pre_llm_processing").mkdir(parents=True)
+    monkeypatch.chdir(workdir)
+    return workdir
+
+
+def fake_worker(new_records):
+    def run_worker(worker_id, units, store_path, *args):
+        with CheckpointStore(store_path, import_legacy=False) as store:
+            for record in new_records:
+                store.add(record_id(record), record)
+        return []
+    return run_worker
+
+
+def test_serial_run_keeps_the_legacy_attractions(scraper_dir, monkeypatch):
+    legacy = [attraction(f"Museum {i}") for i in range(5)]
+    with open(DATA_FILE, 'w', encoding='utf-8') as f:
+        json.dump(legacy, f)
+    new = attraction("New Museum")
+    monkeypatch.setattr(trip_advisor_2, 'run_worker', fake_worker([new]))
+
+    trip_advisor_2.run_scraper(store_path=str(scraper_dir / "store.sqlite3"))
+
+    with open(DATA_FILE, encoding='utf-8') as f:
+        assert json.load(f) == legacy + [new]
+
+
+def test_serial_run_imports_the_legacy_processed_ids(scraper_dir, monkeypatch):
+    with open(STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(["Berlin|Museums|Closed Museum"], f)
+    monkeypatch.setattr(trip_advisor_2, 'run_worker', fake_worker([]))
+
+    store_path = str(scraper_dir / "store.sqlite3")
+    trip_advisor_2.run_scraper(store_path=store_path)
+
+    with CheckpointStore(store_path, import_legacy=False) as store:
+        assert "Berlin|Museums|Closed Museum" in store
+
+
+def test_export_does_not_shrink_the_data_file(scraper_dir):
+    legacy = [attraction(f"Museum {i}") for i in range(3)]
+    with open(DATA_FILE, 'w', encoding='utf-8') as f:
+        json.dump(legacy, f)
+    store_path = str(scraper_dir / "store.sqlite3")
+    with CheckpointStore(store_path, import_legacy=False) as store:
+        store.add(record_id(attraction("Only")), attraction("Only"))
+
+    trip_advisor_2.export(store_path, [])
+    with open(DATA_FILE, encoding='utf-8') as f:
+        assert json.load(f) == legacy
+
+    trip_advisor_2.export(store_path, [], force=True)
+    with open(DATA_FILE, encoding='utf-8') as f:
+        assert json.load(f) == [attraction("Only")]